@@ -0,0 +1,22 @@
+"""Add index on receipts.current_deadline
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_receipts_current_deadline', 'receipts', ['current_deadline'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_receipts_current_deadline', table_name='receipts')
@@ -3,7 +3,7 @@ API endpoints.
 """
 from fastapi import APIRouter
 
-from app.api import employees, receipts, operations, polishing, returns, history, notifications, analytics
+from app.api import employees, receipts, operations, polishing, returns, history, notifications, analytics, admin
 
 # Главный роутер API
 api_router = APIRouter(prefix="/api/v1")
@@ -17,5 +17,6 @@ api_router.include_router(returns.router)
 api_router.include_router(history.router)
 api_router.include_router(notifications.router)
 api_router.include_router(analytics.router)
+api_router.include_router(admin.router)
 
 __all__ = ["api_router"]
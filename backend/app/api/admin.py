@@ -0,0 +1,93 @@
+"""
+Служебные API endpoints: диагностика производительности.
+"""
+import logging
+
+from fastapi import APIRouter, Depends, Query, status
+from fastapi.responses import PlainTextResponse
+
+from app.core.config import settings
+from app.core.exceptions import NotFoundException, ValidationException
+from app.core.profiler import profile_process, request_profiles
+from app.core.security import verify_api_key
+from app.core.slow_queries import slow_query_log
+from app.schemas.admin import RequestProfileListResponse, SlowQueryListResponse
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[Depends(verify_api_key)],
+)
+
+
+@router.get("/slow-queries", response_model=SlowQueryListResponse)
+def list_slow_queries(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=200),
+):
+    """
+    Медленные SQL-запросы этого процесса (дольше SLOW_QUERY_MS) по формам,
+    по убыванию суммарного времени, с планами EXPLAIN.
+    """
+    items, total = slow_query_log.top(skip=skip, limit=limit)
+    return SlowQueryListResponse(
+        items=items,
+        total=total,
+        skip=skip,
+        limit=limit,
+        threshold_ms=settings.SLOW_QUERY_MS,
+    )
+
+
+@router.delete("/slow-queries", status_code=status.HTTP_204_NO_CONTENT)
+def reset_slow_queries() -> None:
+    """Очищает журнал медленных запросов (например, после выката исправления)."""
+    slow_query_log.reset()
+    logger.info("Slow query log reset")
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def profile(
+    seconds: float = Query(10, gt=0),
+    interval_ms: float = Query(None, ge=1, le=1000),
+    include_idle: bool = Query(False),
+):
+    """
+    Профиль всего процесса за seconds секунд (event loop и потоки threadpool)
+    в формате collapsed stacks для flamegraph.pl / speedscope. include_idle —
+    учитывать простаивающие потоки (ожидание в select, wait, get).
+    """
+    if seconds > settings.PROFILER_MAX_SECONDS:
+        raise ValidationException(
+            f"seconds не больше PROFILER_MAX_SECONDS ({settings.PROFILER_MAX_SECONDS:g})"
+        )
+    sampler = await profile_process(
+        seconds,
+        (interval_ms or settings.PROFILER_INTERVAL_MS) / 1000,
+        include_idle=include_idle,
+    )
+    return PlainTextResponse(
+        sampler.collapsed(),
+        headers={"X-Profile-Samples": str(sampler.samples), "X-Profile-Ticks": str(sampler.ticks)},
+    )
+
+
+@router.get("/profiles", response_model=RequestProfileListResponse)
+def list_request_profiles(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+):
+    """Сохранённые профили запросов (заголовок X-Profile: 1), новые — первыми."""
+    items, total = request_profiles.list(skip=skip, limit=limit)
+    return RequestProfileListResponse(items=items, total=total, skip=skip, limit=limit)
+
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+def get_request_profile(profile_id: str):
+    """Профиль запроса в формате collapsed stacks."""
+    profile = request_profiles.get(profile_id)
+    if profile is None:
+        raise NotFoundException("Профиль", profile_id)
+    return PlainTextResponse(profile.collapsed, headers={"X-Profile-Samples": str(profile.samples)})
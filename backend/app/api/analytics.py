@@ -1,12 +1,17 @@
 """
 API эндпоинты аналитики — Sprint 6.
 """
-from typing import Optional
+import time
+from typing import Callable, Optional
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
+from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.etag import conditional_response, make_etag
+from app.core.responses import ORJSONResponse
 from app.core.security import verify_api_key
 from app.services.analytics_service import AnalyticsService
 from app.schemas.analytics import (
@@ -26,64 +31,127 @@ router = APIRouter(
 )
 
 
+def _conditional_report(
+    request: Request,
+    svc: AnalyticsService,
+    schema: type[BaseModel],
+    report: Callable[..., dict],
+    **params,
+) -> Response:
+    """
+    Отчёт с ETag: версия данных (последние id строк) + параметры запроса
+    + временное окно ANALYTICS_ETAG_WINDOW. При совпадении — 304 без расчёта.
+    """
+    window = settings.ANALYTICS_ETAG_WINDOW
+    etag = make_etag(
+        request.url.path,
+        request.url.query,
+        *svc.data_version(),
+        int(time.time() // window) if window > 0 else 0,
+    )
+    return conditional_response(
+        request, etag, lambda: ORJSONResponse(schema.model_validate(report(**params)))
+    )
+
+
 @router.get("/quality/assembly", response_model=AssemblyQualityResponse)
 def get_assembly_quality(
+    request: Request,
     period: PeriodFilter = Query(PeriodFilter.all),
     employee_id: Optional[int] = Query(None),
     db: Session = Depends(get_db),
 ):
     """Качество сборки по сотрудникам."""
     svc = AnalyticsService(db)
-    return svc.assembly_quality(period=period.value, employee_id=employee_id)
+    return _conditional_report(
+        request,
+        svc,
+        AssemblyQualityResponse,
+        svc.assembly_quality,
+        period=period.value,
+        employee_id=employee_id,
+    )
 
 
 @router.get("/quality/mechanism", response_model=MechanismQualityResponse)
 def get_mechanism_quality(
+    request: Request,
     period: PeriodFilter = Query(PeriodFilter.all),
     employee_id: Optional[int] = Query(None),
     db: Session = Depends(get_db),
 ):
     """Качество ремонта механизма по сотрудникам."""
     svc = AnalyticsService(db)
-    return svc.mechanism_quality(period=period.value, employee_id=employee_id)
+    return _conditional_report(
+        request,
+        svc,
+        MechanismQualityResponse,
+        svc.mechanism_quality,
+        period=period.value,
+        employee_id=employee_id,
+    )
 
 
 @router.get("/quality/polishing", response_model=PolishingQualityResponse)
 def get_polishing_quality(
+    request: Request,
     period: PeriodFilter = Query(PeriodFilter.all),
     polisher_id: Optional[int] = Query(None),
     db: Session = Depends(get_db),
 ):
     """Качество полировки по полировщикам."""
     svc = AnalyticsService(db)
-    return svc.polishing_quality(period=period.value, polisher_id=polisher_id)
+    return _conditional_report(
+        request,
+        svc,
+        PolishingQualityResponse,
+        svc.polishing_quality,
+        period=period.value,
+        polisher_id=polisher_id,
+    )
 
 
 @router.get("/polishing/workload", response_model=PolishingWorkloadResponse)
 def get_polishing_workload(
+    request: Request,
     db: Session = Depends(get_db),
 ):
     """Текущая загрузка полировщиков."""
     svc = AnalyticsService(db)
-    return svc.polishing_workload()
+    return _conditional_report(request, svc, PolishingWorkloadResponse, svc.polishing_workload)
 
 
 @router.get("/performance", response_model=PerformanceResponse)
 def get_performance(
+    request: Request,
     period: PeriodFilter = Query(PeriodFilter.all),
     employee_id: Optional[int] = Query(None),
     db: Session = Depends(get_db),
 ):
     """Производительность за период по сотрудникам."""
     svc = AnalyticsService(db)
-    return svc.performance(period=period.value, employee_id=employee_id)
+    return _conditional_report(
+        request,
+        svc,
+        PerformanceResponse,
+        svc.performance,
+        period=period.value,
+        employee_id=employee_id,
+    )
 
 
 @router.get("/returns/summary", response_model=ReturnsSummaryResponse)
 def get_returns_summary(
+    request: Request,
     period: PeriodFilter = Query(PeriodFilter.all),
     db: Session = Depends(get_db),
 ):
     """Сводка возвратов за период."""
     svc = AnalyticsService(db)
-    return svc.returns_summary(period=period.value)
+    return _conditional_report(
+        request,
+        svc,
+        ReturnsSummaryResponse,
+        svc.returns_summary,
+        period=period.value,
+    )
@@ -7,6 +7,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
+from app.core.responses import list_response
 from app.core.security import verify_api_key
 from app.schemas.employee import (
     EmployeeCreate,
@@ -42,8 +43,8 @@ def list_employees(
     else:
         employees = service.get_all(skip=skip, limit=limit, role=role)
 
-    return EmployeeListResponse(
-        items=[EmployeeResponse.model_validate(e) for e in employees],
+    return list_response(
+        EmployeeListResponse, EmployeeResponse, employees,
         total=len(employees),
     )
 
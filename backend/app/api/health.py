@@ -0,0 +1,54 @@
+"""
+Health check endpoints (без API-ключа — для проб платформы и балансировщика).
+
+- /health/live — процесс жив и обслуживает event loop; зависимости не трогает;
+- /health/ready — задержки БД и Redis, загрузка пула, недавнее время обработки
+  webhook и отставание scheduler; результат кэшируется (app.core.health);
+- /health — прежний формат ответа, БД по кэшу readiness.
+"""
+import time
+
+from fastapi import APIRouter
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.api.metrics import notifications_summary
+from app.core.health import readiness
+
+router = APIRouter(tags=["health"])
+
+_started = time.monotonic()
+
+
+@router.get("/health/live")
+async def live():
+    """Liveness: без обращений к БД, Redis и боту."""
+    return {"status": "alive", "uptime_seconds": round(time.monotonic() - _started, 1)}
+
+
+@router.get("/health/ready")
+async def ready():
+    """Readiness: 503, если недоступны БД или Redis FSM; degraded — 200 с причинами в checks."""
+    result = await readiness.check()
+    status_code = 503 if result["status"] == "not_ready" else 200
+    return JSONResponse(status_code=status_code, content=jsonable_encoder(result))
+
+
+@router.get("/health")
+async def health():
+    """Health check endpoint with database verification."""
+    database = (await readiness.check())["checks"]["database"]
+    if database["status"] == "ok":
+        return {
+            "status": "healthy",
+            "database": "connected",
+            "notifications": notifications_summary(),
+        }
+    return JSONResponse(
+        status_code=503,
+        content={
+            "status": "unhealthy",
+            "database": database["error"],
+            "notifications": notifications_summary(),
+        },
+    )
@@ -3,10 +3,13 @@ API endpoints для работы с историей событий.
 """
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
+from app.core.etag import conditional_response, make_etag
+from app.core.fieldsets import FieldSet, fields_query
+from app.core.responses import list_response
 from app.core.security import verify_api_key
 from app.schemas.history import (
     HistoryEventCreate,
@@ -27,15 +30,16 @@ def list_history(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     event_type: Optional[str] = Query(None),
+    fields: FieldSet = Depends(fields_query(HistoryEventResponse)),
     db: Session = Depends(get_db),
 ):
-    """Получить список событий истории."""
+    """Получить список событий истории (fields — только перечисленные поля)."""
     service = HistoryService(db)
-    events = service.get_all(skip=skip, limit=limit, event_type=event_type)
+    events = service.get_all(skip=skip, limit=limit, event_type=event_type, fields=fields)
     total = service.count_all(event_type=event_type)
 
-    return HistoryEventListResponse(
-        items=[HistoryEventResponse.model_validate(e) for e in events],
+    return list_response(
+        HistoryEventListResponse, HistoryEventResponse, events, fields,
         total=total,
     )
 
@@ -58,19 +62,26 @@ def get_history_event(event_id: int, db: Session = Depends(get_db)):
 @router.get("/receipt/{receipt_id}", response_model=HistoryEventListResponse)
 def get_history_by_receipt(
     receipt_id: int,
+    request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    fields: FieldSet = Depends(fields_query(HistoryEventResponse)),
     db: Session = Depends(get_db),
 ):
-    """Получить историю событий по квитанции."""
+    """
+    Получить историю событий по квитанции.
+    ETag — max id события и их количество; при If-None-Match страница не читается.
+    """
     service = HistoryService(db)
-    events = service.get_by_receipt(receipt_id, skip=skip, limit=limit)
-    total = service.count_by_receipt(receipt_id)
+    max_id, total = service.receipt_version(receipt_id)
+    etag = make_etag("history", receipt_id, max_id, total, skip, limit, fields)
 
-    return HistoryEventListResponse(
-        items=[HistoryEventResponse.model_validate(e) for e in events],
+    return conditional_response(request, etag, lambda: list_response(
+        HistoryEventListResponse, HistoryEventResponse,
+        service.get_by_receipt(receipt_id, skip=skip, limit=limit, fields=fields),
+        fields,
         total=total,
-    )
+    ))
 
 
 @router.post("", response_model=HistoryEventResponse, status_code=status.HTTP_201_CREATED)
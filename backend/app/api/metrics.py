@@ -0,0 +1,152 @@
+"""
+API endpoint метрик процесса (формат Prometheus).
+"""
+import math
+import sys
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from app.core.config import settings
+from app.core.database import engine, pool_stats
+from app.core.metrics import registry, Sample
+from app.core.metrics_multiprocess import render_multiprocess
+from app.core.security import verify_api_key
+from app.services.notification_service import BACKLOG_SIZE, DELIVERY_LAG
+from telegram_bot.services.api_client import get_api_client
+from telegram_bot.services.notification_scheduler import scheduler_stats
+
+router = APIRouter(tags=["metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def collect_scheduler_samples() -> list[Sample]:
+    """Сэмплы scheduler уведомлений бота (живёт в том же процессе)."""
+    samples: list[Sample] = [
+        ("notification_scheduler_iterations_total", {}, scheduler_stats.iterations),
+        ("notification_scheduler_iteration_errors_total", {}, scheduler_stats.iteration_errors),
+        ("notification_scheduler_iteration_duration_seconds_total", {}, scheduler_stats.total_duration),
+        ("notification_scheduler_iteration_duration_seconds_max", {}, scheduler_stats.max_duration),
+        ("notification_scheduler_backlog", {}, scheduler_stats.last_backlog),
+        ("notification_scheduler_sent_total", {}, scheduler_stats.notifications_sent),
+    ]
+    if scheduler_stats.last_duration is not None:
+        samples.append(
+            ("notification_scheduler_last_iteration_duration_seconds", {}, scheduler_stats.last_duration)
+        )
+    for recipient, failures in sorted(scheduler_stats.send_failures.items()):
+        samples.append(
+            ("notification_send_failures_total", {"recipient": str(recipient)}, failures)
+        )
+    return samples
+
+
+def collect_api_client_samples() -> list[Sample]:
+    """Статистика кэша справочников, объединения и условных GET-запросов APIClient бота."""
+    samples: list[Sample] = []
+    for resource, stats in get_api_client().cache_stats().items():
+        labels = {"resource": resource}
+        samples.append(("bot_api_cache_hits_total", labels, stats["hits"]))
+        samples.append(("bot_api_cache_misses_total", labels, stats["misses"]))
+        samples.append(("bot_api_cache_invalidations_total", labels, stats["invalidations"]))
+    coalescing = get_api_client().coalescing_stats()
+    samples.append(("bot_api_get_requests_total", {}, coalescing["get_requests"]))
+    samples.append(("bot_api_get_backend_calls_total", {}, coalescing["backend_calls"]))
+    samples.append(("bot_api_get_coalesced_total", {}, coalescing["coalesced"]))
+    validators = get_api_client().validator_stats()
+    samples.append(("bot_api_conditional_requests_total", {}, validators["conditional_requests"]))
+    samples.append(("bot_api_not_modified_total", {}, validators["not_modified"]))
+    samples.append(("bot_api_validator_cache_entries", {}, validators["entries"]))
+    return samples
+
+
+def collect_update_queue_samples() -> list[Sample]:
+    """Очередь webhook-обновлений: глубина, отказы (backpressure), время обработки."""
+    # Модуль бота грузится лениво при старте — до этого очереди ещё нет
+    bot_module = sys.modules.get("telegram_bot.bot")
+    if bot_module is None:
+        return []
+    queue = bot_module.get_update_queue()
+    stats = queue.stats
+    return [
+        ("telegram_update_queue_depth", {}, queue.depth()),
+        ("telegram_update_queue_capacity", {}, queue.capacity),
+        ("telegram_update_queue_max_depth", {}, stats.max_depth),
+        ("telegram_updates_enqueued_total", {}, stats.enqueued),
+        ("telegram_updates_processed_total", {}, stats.processed),
+        ("telegram_updates_failed_total", {}, stats.failed),
+        ("telegram_updates_rejected_total", {}, stats.rejected),
+        ("telegram_update_wait_seconds_total", {}, stats.wait_seconds_total),
+        ("telegram_update_processing_seconds_total", {}, stats.processing_seconds_total),
+        ("telegram_update_processing_seconds_max", {}, stats.processing_seconds_max),
+        *collect_processing_buckets(stats.processing_histogram()),
+    ]
+
+
+def collect_processing_buckets(buckets: list[tuple[float, int]]) -> list[Sample]:
+    """Бакеты гистограммы времени обработки webhook-обновлений."""
+    samples: list[Sample] = [
+        (
+            "telegram_update_processing_seconds_bucket",
+            {"le": "+Inf" if math.isinf(upper) else str(upper)},
+            cumulative,
+        )
+        for upper, cumulative in buckets
+    ]
+    samples.append(("telegram_update_processing_seconds_count", {}, buckets[-1][1]))
+    return samples
+
+
+def collect_fsm_storage_samples() -> list[Sample]:
+    """Обращения CachedRedisStorage к Redis: количество, латентность, L1-кэш."""
+    bot_module = sys.modules.get("telegram_bot.bot")
+    stats = bot_module.get_fsm_storage_stats() if bot_module is not None else None
+    if not stats:
+        return []
+    return [
+        ("fsm_redis_roundtrips_total", {}, stats["redis_roundtrips"]),
+        ("fsm_redis_seconds_total", {}, stats["redis_seconds_total"]),
+        ("fsm_redis_seconds_max", {}, stats["redis_seconds_max"]),
+        ("fsm_l1_hits_total", {}, stats["l1_hits"]),
+        ("fsm_l1_misses_total", {}, stats["l1_misses"]),
+        ("fsm_flushes_total", {}, stats["flushes"]),
+        ("fsm_version_conflicts_total", {}, stats["conflicts"]),
+    ]
+
+
+def collect_db_pool_samples() -> list[Sample]:
+    """Состояние пула соединений SQLAlchemy."""
+    return [
+        (f"db_pool_{name}", {}, value) for name, value in pool_stats(engine.pool).items()
+    ]
+
+
+registry.register_collector(collect_scheduler_samples)
+registry.register_collector(collect_update_queue_samples)
+registry.register_collector(collect_api_client_samples)
+registry.register_collector(collect_fsm_storage_samples)
+registry.register_collector(collect_db_pool_samples)
+
+
+def notifications_summary() -> dict:
+    """Сводка по уведомлениям для /health."""
+    return {
+        "backlog": int(BACKLOG_SIZE.value()),
+        "delivery_lag_seconds": DELIVERY_LAG.snapshot(),
+        "scheduler": scheduler_stats.summary(),
+    }
+
+
+@router.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    dependencies=[Depends(verify_api_key)],
+)
+def metrics() -> PlainTextResponse:
+    """Метрики процесса (всех воркеров в multiprocess-режиме) в формате Prometheus."""
+    if settings.METRICS_MULTIPROC_DIR:
+        text = render_multiprocess(registry, settings.METRICS_MULTIPROC_DIR)
+    else:
+        text = registry.render()
+    return PlainTextResponse(text, media_type=PROMETHEUS_CONTENT_TYPE)
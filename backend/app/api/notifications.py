@@ -5,6 +5,7 @@ from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
+from app.core.responses import list_response
 from app.core.security import verify_api_key
 from app.schemas.notification import NotificationResponse, NotificationListResponse
 from app.services.notification_service import NotificationService
@@ -22,8 +23,8 @@ def get_pending_notifications(db: Session = Depends(get_db)):
     service = NotificationService(db)
     notifications = service.get_pending()
 
-    return NotificationListResponse(
-        items=[NotificationResponse.model_validate(n) for n in notifications],
+    return list_response(
+        NotificationListResponse, NotificationResponse, notifications,
         total=len(notifications),
     )
 
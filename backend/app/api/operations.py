@@ -5,6 +5,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
+from app.core.responses import list_response
 from app.core.security import verify_api_key
 from app.schemas.operation import (
     OperationCreate,
@@ -28,8 +29,8 @@ def list_operation_types(db: Session = Depends(get_db)):
     service = OperationService(db)
     types = service.get_all_types()
 
-    return OperationTypeListResponse(
-        items=[OperationTypeResponse.model_validate(t) for t in types],
+    return list_response(
+        OperationTypeListResponse, OperationTypeResponse, types,
         total=len(types),
     )
 
@@ -59,8 +60,8 @@ def list_operations(
     service = OperationService(db)
     items, total = service.get_all(skip=skip, limit=limit)
 
-    return OperationListResponse(
-        items=[OperationResponse.model_validate(op) for op in items],
+    return list_response(
+        OperationListResponse, OperationResponse, items,
         total=total,
         skip=skip,
         limit=limit,
@@ -73,8 +74,8 @@ def get_operations_by_receipt(receipt_id: int, db: Session = Depends(get_db)):
     service = OperationService(db)
     operations = service.get_by_receipt(receipt_id)
 
-    return OperationListResponse(
-        items=[OperationResponse.model_validate(op) for op in operations],
+    return list_response(
+        OperationListResponse, OperationResponse, operations,
         total=len(operations),
     )
 
@@ -5,6 +5,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
+from app.core.responses import list_response
 from app.core.security import verify_api_key
 from app.schemas.polishing import (
     PolishingDetailsCreate,
@@ -13,6 +14,8 @@ from app.schemas.polishing import (
     PolishingDetailsListResponse,
     PolishingStatsResponse,
 )
+from app.schemas.batch import BatchPolishingRequest, BatchResultResponse
+from app.services.batch_service import BatchService
 from app.services.polishing_service import PolishingService
 
 router = APIRouter(
@@ -32,8 +35,8 @@ def list_in_progress(
     service = PolishingService(db)
     items, total = service.get_in_progress(skip=skip, limit=limit)
 
-    return PolishingDetailsListResponse(
-        items=[PolishingDetailsResponse.model_validate(item) for item in items],
+    return list_response(
+        PolishingDetailsListResponse, PolishingDetailsResponse, items,
         total=total,
         skip=skip,
         limit=limit,
@@ -66,8 +69,8 @@ def get_polishing_by_polisher(
     service = PolishingService(db)
     items, total = service.get_by_polisher(polisher_id, skip=skip, limit=limit)
 
-    return PolishingDetailsListResponse(
-        items=[PolishingDetailsResponse.model_validate(item) for item in items],
+    return list_response(
+        PolishingDetailsListResponse, PolishingDetailsResponse, items,
         total=total,
         skip=skip,
         limit=limit,
@@ -106,6 +109,18 @@ def create_polishing(
     return PolishingDetailsResponse.model_validate(polishing)
 
 
+@router.post("/batch", response_model=BatchResultResponse)
+def batch_create_polishing(
+    data: BatchPolishingRequest,
+    db: Session = Depends(get_db),
+):
+    """
+    Передать в полировку сразу несколько часов по номерам квитанций.
+    Уже бывшие в полировке квитанции возвращаются в результатах с ошибкой.
+    """
+    return BatchService(db).send_to_polishing(data)
+
+
 @router.post("/receipt/{receipt_id}/return", response_model=PolishingDetailsResponse)
 def mark_polishing_returned(
     receipt_id: int,
@@ -1,25 +1,39 @@
 """
 API endpoints для управления квитанциями.
 """
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.etag import conditional_response, make_etag
+from app.core.fieldsets import FieldSet, fields_query
+from app.core.responses import ORJSONResponse, dump_rows, list_response
 from app.core.security import verify_api_key
 from app.schemas.receipt import (
     ReceiptCreate,
     ReceiptUpdate,
     ReceiptResponse,
     ReceiptListResponse,
+    UrgentReceiptListResponse,
     ReceiptWithHistoryResponse,
     ReceiptGetOrCreate,
+    ReceiptImportResponse,
     AssignMasterRequest,
     OtkPassRequest,
     InitiateReturnRequest,
 )
 from app.schemas.history import HistoryEventResponse, HistoryEventCreate
+from app.schemas.batch import BatchAssignMasterRequest, BatchOtkPassRequest, BatchResultResponse
+from app.schemas.command import ReceiptCommandsRequest, ReceiptCommandsResponse
+from app.services.batch_service import BatchService
+from app.services.command_service import ReceiptCommandService
 from app.services.receipt_service import ReceiptService
 from app.services.history_service import HistoryService
+from app.services.import_service import ReceiptImportService, iter_line_batches
 from app.services.employee_service import EmployeeService
 
 router = APIRouter(
@@ -33,37 +47,57 @@ router = APIRouter(
 def list_receipts(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    fields: FieldSet = Depends(fields_query(ReceiptResponse)),
     db: Session = Depends(get_db),
 ):
-    """Получить список квитанций."""
+    """Получить список квитанций (fields — только перечисленные поля)."""
     service = ReceiptService(db)
-    items, total = service.get_all(skip=skip, limit=limit)
+    items, total = service.get_all(skip=skip, limit=limit, fields=fields)
 
-    return ReceiptListResponse(
-        items=[ReceiptResponse.model_validate(r) for r in items],
+    return list_response(
+        ReceiptListResponse, ReceiptResponse, items, fields,
         total=total,
         skip=skip,
         limit=limit,
     )
 
 
-@router.get("/urgent", response_model=ReceiptListResponse)
+@router.get("/urgent", response_model=UrgentReceiptListResponse)
 def get_urgent_receipts(
+    window: Optional[Literal["overdue", "today", "week"]] = Query(None),
+    cursor: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=100),
+    fields: FieldSet = Depends(fields_query(ReceiptResponse)),
     db: Session = Depends(get_db),
 ):
-    """Получить список срочных часов (с дедлайном, не прошедших ОТК)."""
+    """
+    Получить список срочных часов (с дедлайном, не прошедших ОТК).
+    window — окно по дедлайну; при передаче limit или cursor ответ
+    постраничный, курсор следующей страницы — в next_cursor.
+    """
     service = ReceiptService(db)
-    receipts = service.get_urgent()
-    
-    return ReceiptListResponse(
-        items=[ReceiptResponse.model_validate(r) for r in receipts],
-        total=len(receipts),
+    if limit is None and cursor is None:
+        receipts = service.get_urgent(window=window, fields=fields)
+        return list_response(
+            UrgentReceiptListResponse, ReceiptResponse, receipts, fields,
+            total=len(receipts),
+        )
+
+    limit = limit or 10
+    receipts, total, next_cursor = service.get_urgent_page(
+        window=window, cursor=cursor, limit=limit, fields=fields
+    )
+    return list_response(
+        UrgentReceiptListResponse, ReceiptResponse, receipts, fields,
+        total=total,
+        limit=limit,
+        next_cursor=next_cursor,
     )
 
 
 @router.get("/{receipt_id}", response_model=ReceiptResponse)
-def get_receipt(receipt_id: int, db: Session = Depends(get_db)):
-    """Получить квитанцию по ID."""
+def get_receipt(receipt_id: int, request: Request, db: Session = Depends(get_db)):
+    """Получить квитанцию по ID (поддерживает If-None-Match)."""
     service = ReceiptService(db)
     receipt = service.get_by_id(receipt_id)
     
@@ -72,8 +106,11 @@ def get_receipt(receipt_id: int, db: Session = Depends(get_db)):
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Квитанция с ID {receipt_id} не найдена",
         )
-    
-    return ReceiptResponse.model_validate(receipt)
+
+    etag = make_etag("receipt", receipt.id, receipt.receipt_number, receipt.current_deadline)
+    return conditional_response(
+        request, etag, lambda: ORJSONResponse(dump_rows(ReceiptResponse, [receipt])[0])
+    )
 
 
 @router.get("/number/{receipt_number}", response_model=ReceiptResponse)
@@ -124,8 +161,11 @@ def get_or_create_receipt(
 
 
 @router.get("/{receipt_id}/history", response_model=ReceiptWithHistoryResponse)
-def get_receipt_with_history(receipt_id: int, db: Session = Depends(get_db)):
-    """Получить квитанцию с полной историей."""
+def get_receipt_with_history(receipt_id: int, request: Request, db: Session = Depends(get_db)):
+    """
+    Получить квитанцию с полной историей.
+    ETag — версия квитанции (дедлайн) и истории (max id, количество событий).
+    """
     receipt_service = ReceiptService(db)
     history_service = HistoryService(db)
     
@@ -136,12 +176,19 @@ def get_receipt_with_history(receipt_id: int, db: Session = Depends(get_db)):
             detail=f"Квитанция с ID {receipt_id} не найдена",
         )
     
-    history = history_service.get_by_receipt(receipt_id)
-    
-    response_data = ReceiptResponse.model_validate(receipt).model_dump()
-    response_data["history"] = [HistoryEventResponse.model_validate(h) for h in history]
-    
-    return ReceiptWithHistoryResponse(**response_data)
+    etag = make_etag(
+        "receipt-history", receipt.id, receipt.current_deadline,
+        *history_service.receipt_version(receipt_id),
+    )
+
+    def build() -> ORJSONResponse:
+        history = history_service.get_by_receipt(receipt_id)
+        # Строки ORM сериализуются напрямую, без model_dump и пересборки модели
+        [response_data] = dump_rows(ReceiptResponse, [receipt])
+        response_data["history"] = dump_rows(HistoryEventResponse, history)
+        return ORJSONResponse(response_data)
+
+    return conditional_response(request, etag, build)
 
 
 @router.post("", response_model=ReceiptResponse, status_code=status.HTTP_201_CREATED)
@@ -167,6 +214,25 @@ def create_receipt(
     return ReceiptResponse.model_validate(receipt)
 
 
+@router.post(
+    "/import",
+    response_model=ReceiptImportResponse,
+    openapi_extra={
+        "requestBody": {"content": {"text/csv": {"schema": {"type": "string"}}}, "required": True},
+    },
+)
+async def import_receipts(request: Request, db: Session = Depends(get_db)):
+    """
+    Импорт квитанций из CSV (тело запроса, text/csv): receipt_number[,deadline].
+    Тело читается потоком и обрабатывается пачками по IMPORT_CHUNK_SIZE строк;
+    существующие номера пропускаются, весь импорт — одна транзакция.
+    """
+    service = ReceiptImportService(db)
+    async for lines in iter_line_batches(request.stream(), settings.IMPORT_CHUNK_SIZE):
+        await run_in_threadpool(service.import_lines, lines)
+    return service.result
+
+
 @router.patch("/{receipt_id}/deadline", response_model=ReceiptResponse)
 def update_deadline(
     receipt_id: int,
@@ -203,7 +269,6 @@ def assign_to_master(
     Согласно ТЗ Sprint 3: создаёт history_event: sent_to_master
     """
     receipt_service = ReceiptService(db)
-    history_service = HistoryService(db)
     employee_service = EmployeeService(db)
 
     receipt = receipt_service.get_by_id(data.receipt_id)
@@ -229,24 +294,54 @@ def assign_to_master(
             telegram_username=data.telegram_username,
         )
 
-    # Создаём событие истории
-    history_data = HistoryEventCreate(
-        receipt_id=data.receipt_id,
-        event_type="sent_to_master",
-        payload={
-            "master_id": data.master_id,
-            "master_name": master.name,
-            "urgent": data.is_urgent,
-            "deadline": data.deadline.isoformat() if data.deadline else None,
-        },
-        telegram_id=data.telegram_id,
-        telegram_username=data.telegram_username,
+    receipt_service.record_sent_to_master(
+        receipt.id,
+        master,
+        data.is_urgent,
+        data.deadline,
+        data.telegram_id,
+        data.telegram_username,
     )
-    history_service.create(history_data)
+    db.flush()
 
     return ReceiptResponse.model_validate(receipt)
 
 
+@router.post("/batch/assign-master", response_model=BatchResultResponse)
+def batch_assign_to_master(
+    data: BatchAssignMasterRequest,
+    db: Session = Depends(get_db),
+):
+    """
+    Выдать мастеру сразу несколько часов по номерам квитанций.
+    Отсутствующие квитанции создаются, всё пишется одной транзакцией.
+    """
+    return BatchService(db).assign_to_master(data)
+
+
+@router.post("/batch/otk-pass", response_model=BatchResultResponse)
+def batch_otk_pass(
+    data: BatchOtkPassRequest,
+    db: Session = Depends(get_db),
+):
+    """Отметить прохождение ОТК сразу для нескольких квитанций."""
+    return BatchService(db).otk_pass(data)
+
+
+@router.post("/commands", response_model=ReceiptCommandsResponse)
+def run_receipt_commands(
+    data: ReceiptCommandsRequest,
+    db: Session = Depends(get_db),
+):
+    """
+    Выполнить упорядоченный список команд над квитанциями одной транзакцией:
+    assign_master, set_deadline, otk_pass, add_comment, send_to_polishing.
+    Если хотя бы одна команда невыполнима, не применяется ни одна: 400/404/409
+    с причинами по командам в detail.
+    """
+    return ReceiptCommandService(db).execute(data)
+
+
 @router.post("/{receipt_id}/otk-pass", response_model=ReceiptResponse)
 def otk_pass(
     receipt_id: int,
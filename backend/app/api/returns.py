@@ -5,6 +5,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
+from app.core.responses import list_response
 from app.core.security import verify_api_key
 from app.schemas.return_ import (
     ReturnCreate,
@@ -28,8 +29,8 @@ def list_return_reasons(db: Session = Depends(get_db)):
     service = ReturnService(db)
     reasons = service.get_all_reasons()
 
-    return ReturnReasonListResponse(
-        items=[ReturnReasonResponse.model_validate(r) for r in reasons],
+    return list_response(
+        ReturnReasonListResponse, ReturnReasonResponse, reasons,
         total=len(reasons),
     )
 
@@ -59,8 +60,8 @@ def list_returns(
     service = ReturnService(db)
     items, total = service.get_all(skip=skip, limit=limit)
 
-    return ReturnListResponse(
-        items=[ReturnResponse.model_validate(r) for r in items],
+    return list_response(
+        ReturnListResponse, ReturnResponse, items,
         total=total,
         skip=skip,
         limit=limit,
@@ -73,8 +74,8 @@ def get_returns_by_receipt(receipt_id: int, db: Session = Depends(get_db)):
     service = ReturnService(db)
     returns = service.get_by_receipt(receipt_id)
 
-    return ReturnListResponse(
-        items=[ReturnResponse.model_validate(r) for r in returns],
+    return list_response(
+        ReturnListResponse, ReturnResponse, returns,
         total=len(returns),
     )
 
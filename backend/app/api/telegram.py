@@ -1,76 +1,134 @@
 """
 API endpoints для Telegram бота webhook.
 Обновлен для работы с aiogram 3.x
+
+telegram_bot.bot (и вместе с ним aiogram) импортируется лениво — в фоновой
+задаче после старта приложения, чтобы не задерживать его готовность.
 """
-import logging
 import asyncio
+import importlib
+import logging
+import random
+from types import ModuleType
+from typing import Optional
+
 from fastapi import APIRouter, Request, HTTPException, status
 from fastapi.responses import JSONResponse
 
-from telegram_bot.bot import setup_webhook, process_update, get_bot, get_dispatcher
 from telegram_bot.config import bot_config
+from telegram_bot.services.api_client import get_api_client
 from app.core.config import settings
+from app.core.startup import startup_timer
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/telegram", tags=["telegram"])
 
 # Флаг для отслеживания инициализации бота
 _bot_initialized = False
+_bot_module: Optional[ModuleType] = None
+_startup_task: Optional[asyncio.Task] = None
 
 
-@router.on_event("startup")
-async def startup_event():
-    """Инициализация бота при старте приложения."""
+async def load_bot_module() -> ModuleType:
+    """Импортирует telegram_bot.bot в отдельном потоке, не блокируя event loop."""
+    global _bot_module
+    if _bot_module is None:
+        _bot_module = await asyncio.to_thread(importlib.import_module, "telegram_bot.bot")
+    return _bot_module
+
+
+async def setup_webhook_with_retries(bot_module: ModuleType) -> bool:
+    """
+    Устанавливает webhook, повторяя попытки с экспоненциальной паузой
+    и полным jitter (случайная пауза от 0 до min(потолок, 2^попытка) секунд).
+    """
+    attempts = max(1, bot_config.WEBHOOK_SETUP_ATTEMPTS)
+    for attempt in range(1, attempts + 1):
+        try:
+            await bot_module.setup_webhook()
+            logger.info(f"Webhook configured for URL: {bot_config.WEBHOOK_URL}")
+            return True
+        except Exception as e:
+            if attempt == attempts:
+                logger.error(f"Failed to set webhook after {attempts} attempts: {e}")
+                return False
+            delay = random.uniform(0, min(bot_config.WEBHOOK_SETUP_BACKOFF_MAX, 2 ** attempt))
+            logger.warning(
+                f"Could not set webhook (attempt {attempt}/{attempts}): {e}, "
+                f"retrying in {delay:.1f}s"
+            )
+            await asyncio.sleep(delay)
+    return False
+
+
+async def initialize_bot() -> None:
+    """Фоновая инициализация бота: импорт, диспетчер, очередь, webhook."""
     global _bot_initialized
-    
+
     try:
-        logger.info("Initializing Telegram bot...")
-        
-        # Проверяем конфигурацию
-        if not bot_config.TOKEN:
-            logger.error("TELEGRAM_BOT_TOKEN not set, bot will not be initialized")
-            return
-        
-        # Получаем бота и диспетчер
-        bot = get_bot()
-        dp = get_dispatcher()
-        
-        # Настраиваем webhook если есть URL
+        with startup_timer.stage("bot_import"):
+            bot_module = await load_bot_module()
+        with startup_timer.stage("bot_dispatcher"):
+            bot_module.get_bot()
+            bot_module.get_dispatcher()
+        bot_module.get_update_queue().start()
+        _bot_initialized = True
+
         if bot_config.WEBHOOK_URL:
-            # Добавляем задержку перед установкой webhook
-            await asyncio.sleep(2)
-            try:
-                await setup_webhook()
-                logger.info(f"Webhook configured for URL: {bot_config.WEBHOOK_URL}")
-            except Exception as e:
-                logger.warning(f"Could not set webhook immediately: {e}")
-                # Попробуем еще раз через 5 секунд
-                await asyncio.sleep(5)
-                try:
-                    await setup_webhook()
-                    logger.info(f"Webhook configured on retry for URL: {bot_config.WEBHOOK_URL}")
-                except Exception as e2:
-                    logger.error(f"Failed to set webhook on retry: {e2}")
+            with startup_timer.stage("bot_webhook"):
+                await setup_webhook_with_retries(bot_module)
         else:
             logger.warning("WEBHOOK_URL not set, webhook not configured")
-        
-        _bot_initialized = True
+
         logger.info("Telegram bot startup completed successfully")
-        
+
     except Exception as e:
         logger.error(f"Error during bot startup: {e}")
-        # Не прерываем запуск приложения из-за ошибки бота
+        # Не прерываем работу приложения из-за ошибки бота
+
+
+async def attach_in_process_transport(app) -> None:
+    """
+    Переключает APIClient бота на in-process ASGI транспорт,
+    если это включено в конфигурации (API_TRANSPORT=asgi).
+    """
+    if bot_config.API_TRANSPORT != "asgi":
+        return
+    await get_api_client().use_asgi_app(app)
+    logger.info("Bot API client uses in-process ASGI transport")
+
+
+@router.on_event("startup")
+async def startup_event():
+    """Запускает инициализацию бота в фоне — готовность приложения её не ждёт."""
+    global _startup_task
+
+    logger.info("Initializing Telegram bot...")
+    if not bot_config.TOKEN:
+        logger.error("TELEGRAM_BOT_TOKEN not set, bot will not be initialized")
+        return
+    _startup_task = asyncio.create_task(initialize_bot(), name="telegram-bot-startup")
 
 
 @router.on_event("shutdown")
 async def shutdown_event():
     """Завершение работы бота при остановке приложения."""
     global _bot_initialized
-    
+
+    if _startup_task is not None and not _startup_task.done():
+        _startup_task.cancel()
+        await asyncio.gather(_startup_task, return_exceptions=True)
+
+    if _bot_module is None:
+        return
+
+    # Дожидаемся обработки уже принятых обновлений
+    await _bot_module.get_update_queue().drain(timeout=bot_config.WEBHOOK_DRAIN_TIMEOUT)
+
     if _bot_initialized:
         try:
             logger.info("Shutting down Telegram bot...")
-            bot = get_bot()
+            bot = _bot_module.get_bot()
             await bot.session.close()
             logger.info("Bot shutdown completed")
         except Exception as e:
@@ -92,21 +150,32 @@ async def telegram_webhook(request: Request) -> JSONResponse:
         if secret != settings.TELEGRAM_WEBHOOK_SECRET:
             raise HTTPException(status_code=403, detail="Invalid webhook secret")
 
+    # Если бот ещё не загружен фоновой инициализацией — дожидаемся импорта
+    bot_module = await load_bot_module()
+    from aiogram.types import Update
+
     try:
-        # Получаем данные от Telegram
+        # Получаем и валидируем данные от Telegram
         update_data = await request.json()
         logger.debug(f"Received webhook data: {update_data}")
-        
-        # Обрабатываем обновление
-        await process_update(update_data)
-        
-        return JSONResponse(content={"status": "ok"})
-        
+        update = Update.model_validate(update_data)
     except Exception as e:
-        logger.error(f"Error processing webhook: {e}")
-        # Возвращаем 200 OK даже при ошибке, чтобы Telegram не повторял запрос
-        # Логируем ошибку для отладки
+        logger.error(f"Invalid webhook update: {e}")
+        # Возвращаем 200 OK, чтобы Telegram не повторял заведомо невалидный запрос
         return JSONResponse(
             content={"status": "error", "message": str(e)},
             status_code=status.HTTP_200_OK
         )
+
+    # Обработка идёт в фоне: ставим в очередь и сразу отвечаем Telegram
+    queue = bot_module.get_update_queue()
+    if not queue.running:
+        queue.start()
+    if not await queue.submit(update):
+        # Очередь переполнена — Telegram повторит доставку позже
+        return JSONResponse(
+            content={"status": "busy"},
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+
+    return JSONResponse(content={"status": "ok"})
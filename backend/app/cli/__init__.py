@@ -0,0 +1,3 @@
+"""
+Консольные команды обслуживания (запуск: python -m app.cli.<команда>).
+"""
@@ -0,0 +1,65 @@
+"""
+Импорт квитанций из CSV напрямую в БД — то же, что POST /api/v1/receipts/import.
+
+Запуск (из каталога backend):
+    python -m app.cli.import_receipts receipts.csv [--chunk-size 1000] [--dry-run]
+
+Файл читается пачками, весь импорт — одна транзакция: при ошибке
+не создаётся ничего. --dry-run выполняет импорт и откатывает транзакцию
+(сверка: сколько номеров новых, сколько уже есть, какие строки с ошибками).
+"""
+import argparse
+import logging
+import sys
+from itertools import islice
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.schemas.receipt import ReceiptImportResponse
+from app.services.import_service import ReceiptImportService
+
+logger = logging.getLogger(__name__)
+
+
+def import_file(path: str, chunk_size: int, dry_run: bool = False) -> ReceiptImportResponse:
+    """Импортирует CSV-файл пачками по chunk_size строк."""
+    db = SessionLocal()
+    try:
+        service = ReceiptImportService(db)
+        with open(path, encoding="utf-8-sig", newline="") as csv_file:
+            while lines := list(islice(csv_file, chunk_size)):
+                service.import_lines(lines)
+        if dry_run:
+            db.rollback()
+        else:
+            db.commit()
+        return service.result
+    except Exception:
+        db.rollback()
+        logger.exception("Receipt import failed: %s", path)
+        raise
+    finally:
+        db.close()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Импорт квитанций из CSV")
+    parser.add_argument("path", help="CSV: receipt_number[,deadline]")
+    parser.add_argument("--chunk-size", type=int, default=settings.IMPORT_CHUNK_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="Откатить транзакцию в конце")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    result = import_file(args.path, args.chunk_size, dry_run=args.dry_run)
+    logger.info(
+        "%s: rows=%s, created=%s, skipped=%s, failed=%s, notifications=%s",
+        "Dry run" if args.dry_run else "Import finished",
+        result.rows, result.created, result.skipped, result.failed, result.notifications,
+    )
+    for error in result.errors:
+        logger.warning("Line %s (%s): %s", error.line, error.receipt_number, error.detail)
+    return 1 if result.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
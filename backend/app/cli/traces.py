@@ -0,0 +1,157 @@
+"""
+Сводка трасс из файла TRACE_FILE (TRACE_EXPORTER=file): самые медленные хендлеры бота.
+
+Запуск (из каталога backend):
+    python -m app.cli.traces traces.jsonl [--top 10] [--slowest 3]
+
+Для каждого хендлера (корневой span component=handler): число вызовов,
+p50/p95/max, среднее число запросов к API и SQL и разбивка времени по слоям —
+собственное время span'ов (без дочерних) handler, api_client, http и sql.
+Затем — деревья span'ов самых медленных трасс.
+"""
+import argparse
+import json
+import sys
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Iterable, TextIO
+
+# Слои в порядке вложенности: бот → клиент API → роут FastAPI → SQL
+COMPONENTS = ("handler", "api_client", "http", "sql")
+
+
+def load_spans(path: str) -> list[dict]:
+    """Span'ы из файла JSON lines; битые строки (оборванная запись) пропускаются."""
+    spans = []
+    with open(path, encoding="utf-8") as trace_file:
+        for line in trace_file:
+            try:
+                spans.append(json.loads(line))
+            except ValueError:
+                continue
+    return spans
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+@dataclass
+class Trace:
+    """Одна трасса: корневой span хендлера и его потомки."""
+
+    root: dict
+    children: dict[str, list[dict]]
+
+    def walk(self, span: dict | None = None, depth: int = 0) -> Iterable[tuple[int, dict]]:
+        span = span or self.root
+        yield depth, span
+        for child in sorted(self.children.get(span["span_id"], []), key=lambda s: s["start_unix_nano"]):
+            yield from self.walk(child, depth + 1)
+
+    def self_times(self) -> dict[str, float]:
+        """Собственное время по слоям, мс (параллельные дочерние span'ы — не ниже нуля)."""
+        totals: dict[str, float] = defaultdict(float)
+        for _, span in self.walk():
+            nested = sum(child["duration_ms"] for child in self.children.get(span["span_id"], []))
+            totals[span["component"]] += max(0.0, span["duration_ms"] - nested)
+        return totals
+
+    def count(self, component: str) -> int:
+        return sum(1 for _, span in self.walk() if span["component"] == component)
+
+
+@dataclass
+class HandlerSummary:
+    name: str
+    durations: list[float] = field(default_factory=list)
+    errors: int = 0
+    api_calls: int = 0
+    queries: int = 0
+    layers: dict[str, float] = field(default_factory=lambda: defaultdict(float))
+
+    @property
+    def calls(self) -> int:
+        return len(self.durations)
+
+
+def build_traces(spans: list[dict]) -> list[Trace]:
+    """Трассы с корнем-хендлером; span'ы без хендлера (scheduler, внешние запросы) не учитываются."""
+    children: dict[str, list[dict]] = defaultdict(list)
+    roots = []
+    for span in spans:
+        if span.get("parent_id"):
+            children[span["parent_id"]].append(span)
+        elif span.get("component") == "handler":
+            roots.append(span)
+    return [Trace(root, children) for root in roots]
+
+
+def summarize(traces: list[Trace]) -> list[HandlerSummary]:
+    """Сводка по хендлерам, самые медленные (по p95) — первыми."""
+    summaries: dict[str, HandlerSummary] = {}
+    for trace in traces:
+        name = trace.root["name"]
+        summary = summaries.setdefault(name, HandlerSummary(name))
+        summary.durations.append(trace.root["duration_ms"])
+        summary.errors += trace.root.get("status") == "error"
+        summary.api_calls += trace.count("api_client")
+        summary.queries += trace.count("sql")
+        for component, ms in trace.self_times().items():
+            summary.layers[component] += ms
+    return sorted(
+        summaries.values(),
+        key=lambda s: (percentile(s.durations, 0.95), max(s.durations)),
+        reverse=True,
+    )
+
+
+def render(traces: list[Trace], top: int, slowest: int, out: TextIO) -> None:
+    summaries = summarize(traces)
+    if not summaries:
+        out.write("Нет трасс хендлеров\n")
+        return
+    header = (
+        f"{'handler':<36} {'calls':>6} {'err':>4} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} "
+        f"{'api/call':>8} {'sql/call':>8}  " + " ".join(f"{c + ' %':>12}" for c in COMPONENTS)
+    )
+    out.write(header + "\n" + "-" * len(header) + "\n")
+    for summary in summaries[:top]:
+        total = sum(summary.layers.values()) or 1.0
+        layers = " ".join(
+            f"{summary.layers.get(component, 0.0) * 100 / total:>12.1f}" for component in COMPONENTS
+        )
+        out.write(
+            f"{summary.name[:36]:<36} {summary.calls:>6} {summary.errors:>4} "
+            f"{percentile(summary.durations, 0.5):>9.1f} {percentile(summary.durations, 0.95):>9.1f} "
+            f"{max(summary.durations):>9.1f} {summary.api_calls / summary.calls:>8.1f} "
+            f"{summary.queries / summary.calls:>8.1f}  {layers}\n"
+        )
+
+    for trace in sorted(traces, key=lambda t: t.root["duration_ms"], reverse=True)[:slowest]:
+        out.write(f"\nTrace {trace.root['trace_id']}\n")
+        for depth, span in trace.walk():
+            error = f"  ! {span['error']}" if span.get("error") else ""
+            label = span.get("attributes", {}).get("db.statement") or span["name"]
+            out.write(
+                f"{'  ' * depth}{span['duration_ms']:>9.1f} ms  [{span['component']}] "
+                f"{label[:100]}{error}\n"
+            )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Самые медленные хендлеры бота по трассам")
+    parser.add_argument("path", help="Файл TRACE_FILE (JSON lines)")
+    parser.add_argument("--top", type=int, default=15, help="Сколько хендлеров показать")
+    parser.add_argument("--slowest", type=int, default=3, help="Сколько самых медленных трасс развернуть")
+    args = parser.parse_args(argv)
+
+    render(build_traces(load_spans(args.path)), args.top, args.slowest, sys.stdout)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,237 @@
+"""
+Сжатие HTTP-ответов (gzip / brotli) по Accept-Encoding.
+
+ASGI middleware: ответы меньше COMPRESSION_MIN_SIZE и не текстовые типы
+отдаются как есть. Ответ целиком (без more_body) сжимается одним вызовом,
+потоковый (StreamingResponse, экспорт) — по мере поступления чанков
+с flush после каждого, чтобы клиент получал данные без задержки.
+
+Brotli — опциональная зависимость: без пакета `brotli` доступен только gzip.
+По каждому роуту копятся счётчики байт до/после и CPU-время сжатия,
+а также причины пропуска — по ним подбирается порог.
+"""
+import logging
+import time
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import registry, route_label
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - зависит от окружения
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/x-ndjson",
+    "image/svg+xml",
+}
+
+COMPRESSION_BYTES_IN = registry.counter(
+    "http_compression_input_bytes_total",
+    "Размер ответов до сжатия (байт)",
+    labelnames=("route", "encoding"),
+)
+COMPRESSION_BYTES_OUT = registry.counter(
+    "http_compression_output_bytes_total",
+    "Размер ответов после сжатия (байт)",
+    labelnames=("route", "encoding"),
+)
+COMPRESSION_SECONDS = registry.histogram(
+    "http_compression_cpu_seconds",
+    "CPU-время сжатия одного ответа",
+    labelnames=("route", "encoding"),
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+COMPRESSION_SKIPPED = registry.counter(
+    "http_compression_skipped_total",
+    "Ответы, отданные без сжатия, по причинам",
+    labelnames=("route", "reason"),
+)
+
+
+def available_encodings() -> tuple[str, ...]:
+    """Поддерживаемые кодировки в порядке предпочтения сервера."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Выбирает кодировку по Accept-Encoding (с учётом q-значений и «*»).
+    None — клиент не принимает ни одну из поддерживаемых.
+    """
+    if not accept_encoding:
+        return None
+    weights: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+
+    best, best_q = None, 0.0
+    for encoding in available_encodings():
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    if not content_type:
+        return False
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return (
+        media_type.startswith("text/")
+        or media_type in COMPRESSIBLE_TYPES
+        or media_type.endswith("+json")
+    )
+
+
+class _Compressor:
+    """Потоковый компрессор выбранной кодировки с учётом CPU-времени."""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        self.cpu_seconds = 0.0
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+        else:
+            # wbits=31 — формат gzip (заголовок и CRC)
+            self._gz = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        started = time.thread_time()
+        if self.encoding == "br":
+            out = self._br.process(data) + (self._br.finish() if final else self._br.flush())
+        else:
+            out = self._gz.compress(data) + self._gz.flush(
+                zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+            )
+        self.cpu_seconds += time.thread_time() - started
+        return out
+
+
+class CompressionMiddleware:
+    """ASGI middleware сжатия ответов."""
+
+    def __init__(self, app: ASGIApp, minimum_size: Optional[int] = None):
+        self.app = app
+        self.minimum_size = (
+            settings.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.minimum_size < 0:
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        responder = _CompressionResponder(scope, send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """Состояние одного ответа: решение о сжатии принимается на первом чанке тела."""
+
+    def __init__(self, scope: Scope, send: Send, encoding: Optional[str], minimum_size: int):
+        self.scope = scope
+        self._send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start: Optional[Message] = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    @property
+    def route(self) -> str:
+        return route_label(self.scope)
+
+    def _skip_reason(self, headers: Headers, body: bytes, more_body: bool) -> Optional[str]:
+        if "content-encoding" in headers:
+            return "already_encoded"
+        if not is_compressible(headers.get("content-type")):
+            return "content_type"
+        if self.encoding is None:
+            return "not_accepted"
+        if not more_body and len(body) < self.minimum_size:
+            return "below_threshold"
+        content_length = headers.get("content-length")
+        if more_body and content_length is not None and int(content_length) < self.minimum_size:
+            return "below_threshold"
+        return None
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            headers = Headers(raw=self.start["headers"])
+            reason = self._skip_reason(headers, body, more_body)
+            if reason is not None:
+                self.passthrough = True
+                if body or more_body:
+                    COMPRESSION_SKIPPED.inc(route=self.route, reason=reason)
+                if is_compressible(headers.get("content-type")):
+                    MutableHeaders(scope=self.start).add_vary_header("Accept-Encoding")
+                await self._send(self.start)
+                await self._send(message)
+                return
+
+            self.compressor = _Compressor(self.encoding)
+            mutable = MutableHeaders(scope=self.start)
+            mutable["Content-Encoding"] = self.encoding
+            mutable.add_vary_header("Accept-Encoding")
+            # Сильный ETag описывает байты без сжатия — ослабляем его
+            etag = mutable.get("etag")
+            if etag and not etag.startswith("W/"):
+                mutable["ETag"] = f"W/{etag}"
+            if more_body:
+                del mutable["Content-Length"]
+            else:
+                compressed = self._compress(body, final=True)
+                mutable["Content-Length"] = str(len(compressed))
+                await self._send(self.start)
+                await self._send({"type": "http.response.body", "body": compressed})
+                self._record()
+                return
+            await self._send(self.start)
+
+        chunk = self._compress(body, final=not more_body)
+        await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+        if not more_body:
+            self._record()
+
+    def _compress(self, body: bytes, final: bool) -> bytes:
+        out = self.compressor.compress(body, final)
+        self.bytes_in += len(body)
+        self.bytes_out += len(out)
+        return out
+
+    def _record(self) -> None:
+        labels = {"route": self.route, "encoding": self.encoding}
+        COMPRESSION_BYTES_IN.inc(self.bytes_in, **labels)
+        COMPRESSION_BYTES_OUT.inc(self.bytes_out, **labels)
+        COMPRESSION_SECONDS.observe(self.compressor.cpu_seconds, **labels)
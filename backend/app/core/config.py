@@ -44,5 +44,59 @@ class Settings:
     # Redis
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 
+    # ETag отчётов аналитики меняется не реже, чем раз в это окно (сек):
+    # границы периодов и правки сотрудников не отражаются в id строк
+    ANALYTICS_ETAG_WINDOW: int = int(os.getenv("ANALYTICS_ETAG_WINDOW", 300))
+
+    # Импорт квитанций из CSV: строк в одной пачке и сколько ошибок вернуть в ответе
+    IMPORT_CHUNK_SIZE: int = int(os.getenv("IMPORT_CHUNK_SIZE", 1000))
+    IMPORT_MAX_ERRORS: int = int(os.getenv("IMPORT_MAX_ERRORS", 100))
+
+    # Idempotency-Key: срок хранения ответов (сек), макс. размер тела запроса/ответа
+    # для сохранения (байт) и период очистки просроченных ключей (сек)
+    IDEMPOTENCY_TTL: int = int(os.getenv("IDEMPOTENCY_TTL", 86400))
+    IDEMPOTENCY_MAX_BODY: int = int(os.getenv("IDEMPOTENCY_MAX_BODY", 1048576))
+    IDEMPOTENCY_PURGE_INTERVAL: int = int(os.getenv("IDEMPOTENCY_PURGE_INTERVAL", 3600))
+
+    # Бюджет SQL-запросов на HTTP-запрос (-1 — без ограничения) и сколько
+    # повторов одной формы запроса считать признаком N+1 (0 — не проверять)
+    SQL_QUERY_BUDGET: int = int(os.getenv("SQL_QUERY_BUDGET", 30))
+    SQL_REPEATED_THRESHOLD: int = int(os.getenv("SQL_REPEATED_THRESHOLD", 5))
+
+    # Журнал медленных SQL-запросов: порог (мс; -1 — выключен), сколько форм
+    # запросов хранить, снимать ли EXPLAIN (ANALYZE, BUFFERS) на PostgreSQL
+    # и его statement_timeout (мс)
+    SLOW_QUERY_MS: float = float(os.getenv("SLOW_QUERY_MS", 200))
+    SLOW_QUERY_MAX_SHAPES: int = int(os.getenv("SLOW_QUERY_MAX_SHAPES", 200))
+    SLOW_QUERY_EXPLAIN: bool = os.getenv("SLOW_QUERY_EXPLAIN", "1") == "1"
+    SLOW_QUERY_EXPLAIN_TIMEOUT_MS: int = int(os.getenv("SLOW_QUERY_EXPLAIN_TIMEOUT_MS", 5000))
+
+    # Сэмплирующий профилировщик: предел длительности профиля процесса (сек),
+    # интервал сэмплирования по умолчанию и для профиля запроса по X-Profile (мс),
+    # сколько последних профилей запросов хранить
+    PROFILER_MAX_SECONDS: float = float(os.getenv("PROFILER_MAX_SECONDS", 60))
+    PROFILER_INTERVAL_MS: float = float(os.getenv("PROFILER_INTERVAL_MS", 10))
+    PROFILER_REQUEST_INTERVAL_MS: float = float(os.getenv("PROFILER_REQUEST_INTERVAL_MS", 1))
+    PROFILER_KEEP_REQUESTS: int = int(os.getenv("PROFILER_KEEP_REQUESTS", 20))
+
+    # /health/ready: сколько секунд отдавать закэшированный результат, таймаут
+    # одной проверки (сек) и пороги «degraded»: доля занятых соединений пула,
+    # p95 обработки webhook (сек), отставание scheduler уведомлений (сек)
+    HEALTH_CACHE_SECONDS: float = float(os.getenv("HEALTH_CACHE_SECONDS", 5))
+    HEALTH_CHECK_TIMEOUT: float = float(os.getenv("HEALTH_CHECK_TIMEOUT", 2))
+    HEALTH_POOL_SATURATION: float = float(os.getenv("HEALTH_POOL_SATURATION", 0.9))
+    HEALTH_WEBHOOK_SLOW_SECONDS: float = float(os.getenv("HEALTH_WEBHOOK_SLOW_SECONDS", 5))
+    HEALTH_SCHEDULER_MAX_LAG: float = float(os.getenv("HEALTH_SCHEDULER_MAX_LAG", 120))
+
+    # Метрики нескольких воркеров uvicorn: каталог снимков (пусто — режим
+    # одного процесса) и период записи снимка воркером (сек)
+    METRICS_MULTIPROC_DIR: str = os.getenv("METRICS_MULTIPROC_DIR", "")
+    METRICS_MULTIPROC_INTERVAL: float = float(os.getenv("METRICS_MULTIPROC_INTERVAL", 5))
+
+    # Сжатие ответов: минимальный размер тела (байт; -1 — выключено) и уровни
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+    COMPRESSION_GZIP_LEVEL: int = int(os.getenv("COMPRESSION_GZIP_LEVEL", 6))
+    COMPRESSION_BROTLI_QUALITY: int = int(os.getenv("COMPRESSION_BROTLI_QUALITY", 4))
+
 
 settings = Settings()
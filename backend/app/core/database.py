@@ -1,16 +1,58 @@
 """
 Конфигурация базы данных SQLAlchemy 2.0.
 """
+import time
+
 from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.pool import QueuePool
 
 from app.core.config import settings
+from app.core.metrics import registry
+
+DB_POOL_CHECKOUT_SECONDS = registry.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Ожидание соединения из пула SQLAlchemy",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0),
+)
+DB_POOL_TIMEOUTS = registry.counter(
+    "db_pool_checkout_timeouts_total",
+    "Таймауты ожидания соединения из пула",
+)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool, замеряющий ожидание свободного соединения."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            DB_POOL_TIMEOUTS.inc()
+            raise
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - started)
+
+
+def pool_stats(pool) -> dict[str, int]:
+    """Размер пула, выданные соединения и overflow (только для QueuePool)."""
+    if not isinstance(pool, QueuePool):
+        return {}
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+    }
 
 
 _engine_kwargs: dict = {"echo": False}
 
 if settings.DATABASE_URL.startswith("postgresql"):
     _engine_kwargs.update(
+        poolclass=InstrumentedQueuePool,
         pool_size=10,
         max_overflow=20,
         pool_pre_ping=True,
@@ -0,0 +1,47 @@
+"""
+ETag и условные GET-запросы (If-None-Match → 304 Not Modified).
+
+ETag считается из дешёвой «версии данных» (id, max id, счётчики) до загрузки
+и сериализации ответа: при совпадении с If-None-Match эндпоинт отвечает 304
+без тела, не выполняя основной запрос. ETag слабый (W/): ответ одинаков
+по смыслу, а не побайтово (например, после смены сжатия).
+"""
+import hashlib
+from typing import Any, Callable, Optional
+
+from fastapi import Request, Response
+
+# Клиент обязан ревалидировать ответ при каждом использовании (no-cache ≠ no-store)
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    """Слабый ETag из частей версии данных."""
+    raw = "|".join("" if part is None else str(part) for part in parts)
+    return f'W/"{hashlib.blake2b(raw.encode(), digest_size=10).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Сравнение If-None-Match с ETag по RFC 9110 (слабое, поддержка списка и «*»)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+def conditional_response(request: Request, etag: str, build: Callable[[], Response]) -> Response:
+    """
+    304 без тела, если клиент прислал актуальный ETag; иначе ответ build()
+    с заголовками ETag и Cache-Control.
+    """
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response = build()
+    response.headers.update(headers)
+    return response
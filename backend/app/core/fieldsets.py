@@ -0,0 +1,64 @@
+"""
+Разреженные наборы полей (sparse fieldsets) для списочных эндпоинтов.
+
+`?fields=id,receipt_number` ограничивает и SQL-запрос (load_only — в SELECT
+только нужные колонки), и сериализацию ответа. Поддерживаются схемы, поля
+которых один к одному соответствуют колонкам модели. Неизвестное поле —
+ValidationException (400) со списком допустимых.
+"""
+from typing import Callable, Iterable, Optional
+
+from fastapi import Query
+from pydantic import BaseModel
+from sqlalchemy.orm import Query as ORMQuery, load_only
+
+from app.core.exceptions import ValidationException
+
+# Выбранные поля в порядке схемы; None — все поля
+FieldSet = Optional[tuple[str, ...]]
+
+
+def parse_fields(schema: type[BaseModel], raw: Optional[str]) -> FieldSet:
+    """Разбирает `fields=a,b` по полям схемы. Пустое значение — все поля."""
+    if raw is None:
+        return None
+    requested = {name.strip() for name in raw.split(",") if name.strip()}
+    if not requested:
+        return None
+    unknown = requested - set(schema.model_fields)
+    if unknown:
+        raise ValidationException(
+            f"Неизвестные поля: {', '.join(sorted(unknown))}. "
+            f"Допустимые: {', '.join(schema.model_fields)}"
+        )
+    return tuple(name for name in schema.model_fields if name in requested)
+
+
+def fields_query(schema: type[BaseModel]) -> Callable[..., FieldSet]:
+    """Зависимость FastAPI: query-параметр `fields` для схемы элементов списка."""
+
+    def dependency(
+        fields: Optional[str] = Query(
+            None,
+            description=f"Поля через запятую: {', '.join(schema.model_fields)}",
+        ),
+    ) -> FieldSet:
+        return parse_fields(schema, fields)
+
+    return dependency
+
+
+def load_columns(
+    query: ORMQuery,
+    model: type,
+    fields: FieldSet,
+    required: Iterable[str] = (),
+) -> ORMQuery:
+    """
+    Ограничивает SELECT колонками fields (плюс required — нужные самому
+    сервису, например для курсора). Первичный ключ load_only грузит всегда.
+    """
+    if fields is None:
+        return query
+    names = dict.fromkeys((*fields, *required))
+    return query.options(load_only(*(getattr(model, name) for name in names)))
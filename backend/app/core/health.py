@@ -0,0 +1,164 @@
+"""
+Проверки готовности (/health/ready) с кэшированием результата.
+
+Каждая проверка возвращает словарь со status: ok, degraded, error или
+skipped (зависимость в этом процессе не используется — например, бот
+не запущен). Итог: not_ready (503), если недоступны БД или Redis FSM;
+degraded, если пул БД почти исчерпан, webhook обрабатывается медленно
+или scheduler уведомлений отстаёт; иначе ready.
+
+Результат кэшируется на HEALTH_CACHE_SECONDS: частые пробы балансировщика
+не создают нагрузки, одновременные пробы ждут одну проверку.
+"""
+import asyncio
+import logging
+import sys
+import time
+from typing import Any, Optional
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import engine, pool_stats
+from app.core.utils import now_moscow
+from telegram_bot.services.notification_scheduler import CHECK_INTERVAL, scheduler_stats
+
+logger = logging.getLogger(__name__)
+
+# Проверки, отказ которых означает «не готов принимать трафик»
+CRITICAL_CHECKS = ("database", "redis")
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+def _db_roundtrip() -> None:
+    # Соединение из пула без сессии и commit — только SELECT 1
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+
+async def check_database() -> dict:
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(asyncio.to_thread(_db_roundtrip), settings.HEALTH_CHECK_TIMEOUT)
+    except Exception as e:
+        logger.warning(f"Readiness: database check failed: {e!r}")
+        return {"status": "error", "latency_ms": _elapsed_ms(started), "error": repr(e)}
+    return {"status": "ok", "latency_ms": _elapsed_ms(started)}
+
+
+def check_db_pool() -> dict:
+    pool = engine.pool
+    stats = pool_stats(pool)
+    if not stats:
+        return {"status": "skipped"}
+    capacity = stats["size"] + max(getattr(pool, "_max_overflow", 0), 0)
+    saturation = round(stats["checked_out"] / capacity, 3) if capacity else 0.0
+    status = "degraded" if saturation >= settings.HEALTH_POOL_SATURATION else "ok"
+    return {"status": status, "saturation": saturation, **stats}
+
+
+def _bot_module():
+    # Модуль бота грузится лениво при старте; без него Redis и webhook не используются
+    return sys.modules.get("telegram_bot.bot")
+
+
+async def check_redis() -> dict:
+    bot_module = _bot_module()
+    redis = bot_module.get_fsm_redis() if bot_module is not None else None
+    if redis is None:
+        return {"status": "skipped"}
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(redis.ping(), settings.HEALTH_CHECK_TIMEOUT)
+    except Exception as e:
+        logger.warning(f"Readiness: Redis check failed: {e!r}")
+        return {"status": "error", "latency_ms": _elapsed_ms(started), "error": repr(e)}
+    return {"status": "ok", "latency_ms": _elapsed_ms(started)}
+
+
+def check_webhook() -> dict:
+    bot_module = _bot_module()
+    if bot_module is None:
+        return {"status": "skipped"}
+    queue = bot_module.get_update_queue()
+    recent = queue.stats.recent_processing()
+    last = queue.stats.last_processed_at
+    slow = recent["p95_seconds"] is not None and recent["p95_seconds"] > settings.HEALTH_WEBHOOK_SLOW_SECONDS
+    full = queue.running and queue.depth() >= queue.capacity
+    return {
+        "status": "degraded" if slow or full else "ok",
+        "depth": queue.depth(),
+        "capacity": queue.capacity,
+        "seconds_since_last_update": round(time.time() - last, 1) if last is not None else None,
+        **{f"recent_{key}": value for key, value in recent.items()},
+    }
+
+
+def check_scheduler() -> dict:
+    if scheduler_stats.last_iteration_at is None:
+        return {"status": "skipped"}
+    since_last = time.time() - scheduler_stats.last_iteration_at
+    # Итерации идут раз в CHECK_INTERVAL: всё сверх — отставание
+    lag = max(0.0, since_last - CHECK_INTERVAL)
+    return {
+        "status": "degraded" if lag > settings.HEALTH_SCHEDULER_MAX_LAG else "ok",
+        "lag_seconds": round(lag, 1),
+        "seconds_since_last_iteration": round(since_last, 1),
+        "last_duration_seconds": scheduler_stats.summary()["last_duration_seconds"],
+    }
+
+
+def overall_status(checks: dict[str, dict]) -> str:
+    if any(checks[name]["status"] == "error" for name in CRITICAL_CHECKS if name in checks):
+        return "not_ready"
+    if any(check["status"] in ("degraded", "error") for check in checks.values()):
+        return "degraded"
+    return "ready"
+
+
+class ReadinessProbe:
+    """Проверки готовности с кэшем результата на HEALTH_CACHE_SECONDS."""
+
+    def __init__(self):
+        self._result: Optional[dict[str, Any]] = None
+        self._checked_at = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def check(self) -> dict[str, Any]:
+        """Результат проверок; повторные вызовы в пределах кэша — без обращений к зависимостям."""
+        if self._fresh():
+            return self._result
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if not self._fresh():
+                self._result = await self._run()
+                self._checked_at = time.monotonic()
+        return self._result
+
+    def _fresh(self) -> bool:
+        return (
+            self._result is not None
+            and time.monotonic() - self._checked_at < settings.HEALTH_CACHE_SECONDS
+        )
+
+    async def _run(self) -> dict[str, Any]:
+        database, redis = await asyncio.gather(check_database(), check_redis())
+        checks = {
+            "database": database,
+            "db_pool": check_db_pool(),
+            "redis": redis,
+            "webhook": check_webhook(),
+            "scheduler": check_scheduler(),
+        }
+        return {"status": overall_status(checks), "checked_at": now_moscow(), "checks": checks}
+
+    def reset(self) -> None:
+        self._result = None
+        self._lock = None
+
+
+readiness = ReadinessProbe()
@@ -0,0 +1,105 @@
+"""
+Метрики HTTP-запросов: количество и латентность по шаблону роута,
+запросы в обработке, число SQL-запросов и время в БД на один HTTP-запрос.
+
+Запросы, превысившие SQL_QUERY_BUDGET или повторяющие одну форму SQL
+не меньше SQL_REPEATED_THRESHOLD раз (вероятный N+1), логируются
+с самыми частыми формами запросов. Роут запроса — источник (origin)
+в журнале медленных запросов app.core.slow_queries.
+"""
+import logging
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import registry, route_label
+from app.core.query_stats import QueryStats, track_queries
+from app.core.slow_queries import origin_scope
+
+logger = logging.getLogger(__name__)
+
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total",
+    "HTTP-запросы по методу, шаблону роута и статусу",
+    labelnames=("method", "route", "status"),
+)
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds",
+    "Время обработки HTTP-запроса",
+    labelnames=("method", "route"),
+)
+HTTP_IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight",
+    "HTTP-запросы в обработке",
+    multiprocess_mode="sum",
+)
+HTTP_DB_QUERIES = registry.histogram(
+    "http_request_db_queries",
+    "Количество SQL-запросов на один HTTP-запрос",
+    labelnames=("method", "route"),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+HTTP_DB_SECONDS = registry.histogram(
+    "http_request_db_seconds",
+    "Суммарное время SQL-запросов за один HTTP-запрос",
+    labelnames=("method", "route"),
+)
+QUERY_BUDGET_EXCEEDED = registry.counter(
+    "http_request_query_budget_exceeded_total",
+    "HTTP-запросы сверх бюджета SQL-запросов или с повторяющимися запросами (N+1)",
+    labelnames=("method", "route", "reason"),
+)
+
+
+def check_query_budget(method: str, route: str, stats: QueryStats) -> None:
+    """Логирует запрос, превысивший бюджет SQL или с признаками N+1."""
+    reasons = []
+    if 0 <= settings.SQL_QUERY_BUDGET < stats.count:
+        reasons.append("budget")
+    if settings.SQL_REPEATED_THRESHOLD > 0 and stats.repeated(settings.SQL_REPEATED_THRESHOLD):
+        reasons.append("repeated")
+    if not reasons:
+        return
+    for reason in reasons:
+        QUERY_BUDGET_EXCEEDED.inc(method=method, route=route, reason=reason)
+    logger.warning(f"SQL budget exceeded ({', '.join(reasons)}): {method} {route}: {stats.report()}")
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware метрик запросов. Снаружи от сжатия, CORS и идемпотентности —
+    их время учитывается; трассировка и профилировщик — внешние слои (app.main).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        with track_queries() as queries, origin_scope(scope):
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                duration = time.perf_counter() - started
+                HTTP_IN_FLIGHT.dec()
+                method = scope["method"]
+                route = route_label(scope)
+                HTTP_REQUESTS.inc(method=method, route=route, status=str(status_code))
+                HTTP_REQUEST_SECONDS.observe(duration, method=method, route=route)
+                HTTP_DB_QUERIES.observe(queries.count, method=method, route=route)
+                HTTP_DB_SECONDS.observe(queries.seconds, method=method, route=route)
+                check_query_budget(method, route, queries)
@@ -0,0 +1,243 @@
+"""
+Идемпотентность POST-запросов по заголовку Idempotency-Key.
+
+Клиент (APIClient бота) повторяет запрос при таймауте — без ключа запись
+могла бы примениться дважды. Middleware резервирует ключ до выполнения
+запроса, после выполнения сохраняет ответ (статус, тип, тело) в таблицу
+idempotency_keys. Повтор с тем же ключом получает сохранённый ответ
+с заголовком Idempotent-Replayed: true, эндпоинт не вызывается.
+
+- ключ с другим телом/путём — 400 IDEMPOTENCY_KEY_REUSED;
+- исходный запрос ещё выполняется — 409 IDEMPOTENCY_IN_PROGRESS;
+- ответы 5xx и исключения не сохраняются — повтор выполнит запрос заново;
+- сбой сохранения ответа логируется, резерв снимается в новой сессии;
+- тела больше IDEMPOTENCY_MAX_BODY (потоковый импорт CSV) идут без ключа.
+
+Сессия БД берётся из get_db с учётом dependency_overrides (тесты).
+"""
+import hashlib
+import logging
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from fastapi.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.metrics import registry
+from app.services.idempotency_service import IdempotencyKeyBusy, IdempotencyService
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "idempotency-key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+IDEMPOTENCY_REQUESTS = registry.counter(
+    "idempotency_requests_total",
+    "POST-запросы с Idempotency-Key по исходу",
+    labelnames=("outcome",),
+)
+
+# (fingerprint, status_code, content_type, body) сохранённой записи
+StoredResponse = tuple[str, Optional[int], Optional[str], Optional[bytes]]
+
+
+def _error(status_code: int, detail: str, error_code: str, **headers: str) -> JSONResponse:
+    return JSONResponse(
+        status_code=status_code,
+        content={"detail": detail, "error_code": error_code},
+        headers=headers or None,
+    )
+
+
+def request_fingerprint(scope: Scope, body: bytes) -> str:
+    """Отпечаток запроса: метод, путь, query и тело."""
+    digest = hashlib.sha256()
+    for part in (scope["method"].encode(), scope["path"].encode(), scope.get("query_string", b"")):
+        digest.update(part)
+        digest.update(b"\0")
+    digest.update(body)
+    return digest.hexdigest()
+
+
+class IdempotencyMiddleware:
+    """ASGI middleware идемпотентности POST-запросов."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._last_purge = 0.0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        key = headers.get(IDEMPOTENCY_HEADER)
+        # Без валидного API-ключа сохранённый ответ не выдаётся — 401 вернёт сам роут
+        if key is None or not settings.API_KEY or headers.get("x-api-key") != settings.API_KEY:
+            await self.app(scope, receive, send)
+            return
+        if not key.strip() or len(key) > MAX_KEY_LENGTH:
+            response = _error(
+                400, f"Idempotency-Key: от 1 до {MAX_KEY_LENGTH} символов", "VALIDATION_ERROR"
+            )
+            await response(scope, receive, send)
+            return
+
+        messages, complete = await self._read_body(receive)
+        replay_receive = self._replay(messages, receive)
+        if not complete:
+            IDEMPOTENCY_REQUESTS.inc(outcome="bypass")
+            await self.app(scope, replay_receive, send)
+            return
+
+        body = b"".join(message.get("body", b"") for message in messages)
+        fingerprint = request_fingerprint(scope, body)
+        session = contextmanager(scope["app"].dependency_overrides.get(get_db, get_db))
+        try:
+            stored = await run_in_threadpool(self._reserve, session, key, fingerprint)
+        except IdempotencyKeyBusy:
+            stored = (fingerprint, None, None, None)
+
+        if stored is not None:
+            response = self._stored_response(stored, fingerprint)
+            await response(scope, receive, send)
+            return
+
+        IDEMPOTENCY_REQUESTS.inc(outcome="executed")
+        capture = _ResponseCapture(send)
+        try:
+            await self.app(scope, replay_receive, capture.send)
+        finally:
+            await run_in_threadpool(self._finish, session, key, capture)
+
+    async def _read_body(self, receive: Receive) -> tuple[list[Message], bool]:
+        """Читает тело до IDEMPOTENCY_MAX_BODY; False — тело больше лимита (дочитает app)."""
+        messages: list[Message] = []
+        size = 0
+        while True:
+            message = await receive()
+            messages.append(message)
+            if message["type"] != "http.request":
+                return messages, True
+            size += len(message.get("body", b""))
+            if size > settings.IDEMPOTENCY_MAX_BODY:
+                return messages, not message.get("more_body", False)
+            if not message.get("more_body", False):
+                return messages, True
+
+    @staticmethod
+    def _replay(messages: list[Message], receive: Receive) -> Receive:
+        """receive для приложения: сначала прочитанные сообщения, затем исходный поток."""
+        pending = list(messages)
+
+        async def replay() -> Message:
+            if pending:
+                return pending.pop(0)
+            return await receive()
+
+        return replay
+
+    def _reserve(self, session, key: str, fingerprint: str) -> Optional[StoredResponse]:
+        with session() as db:
+            service = IdempotencyService(db)
+            now = time.monotonic()
+            if now - self._last_purge > settings.IDEMPOTENCY_PURGE_INTERVAL:
+                self._last_purge = now
+                service.purge_expired()
+            record = service.reserve(key, fingerprint)
+            if record is None:
+                return None
+            return record.fingerprint, record.status_code, record.content_type, record.response_body
+
+    def _finish(self, session, key: str, capture: "_ResponseCapture") -> None:
+        try:
+            with session() as db:
+                service = IdempotencyService(db)
+                if capture.storable:
+                    service.complete(key, capture.status_code, capture.content_type, capture.body)
+                else:
+                    service.release(key)
+        except Exception:
+            # Иначе резерв отвечал бы 409 на каждый повтор до истечения IDEMPOTENCY_TTL
+            logger.exception(f"Failed to store idempotent response for key {key!r}")
+            IDEMPOTENCY_REQUESTS.inc(outcome="store_failed")
+            self._release_after_failure(session, key)
+
+    @staticmethod
+    def _release_after_failure(session, key: str) -> None:
+        """Снимает резерв в новой сессии: повтор выполнит запрос заново."""
+        try:
+            with session() as db:
+                IdempotencyService(db).release(key)
+        except Exception:
+            logger.exception(f"Failed to release idempotency key {key!r}")
+
+    @staticmethod
+    def _stored_response(stored: StoredResponse, fingerprint: str) -> Response:
+        stored_fingerprint, status_code, content_type, body = stored
+        if stored_fingerprint != fingerprint:
+            IDEMPOTENCY_REQUESTS.inc(outcome="mismatch")
+            return _error(
+                400,
+                "Idempotency-Key уже использован для другого запроса",
+                "IDEMPOTENCY_KEY_REUSED",
+            )
+        if status_code is None:
+            IDEMPOTENCY_REQUESTS.inc(outcome="in_progress")
+            return _error(
+                409,
+                "Запрос с этим Idempotency-Key ещё выполняется",
+                "IDEMPOTENCY_IN_PROGRESS",
+                **{"Retry-After": "1"},
+            )
+        IDEMPOTENCY_REQUESTS.inc(outcome="replayed")
+        return Response(
+            content=body or b"",
+            status_code=status_code,
+            media_type=content_type,
+            headers={REPLAYED_HEADER: "true"},
+        )
+
+
+class _ResponseCapture:
+    """Пропускает ответ клиенту и запоминает его для сохранения."""
+
+    def __init__(self, send: Send):
+        self._send = send
+        self.status_code: Optional[int] = None
+        self.content_type: Optional[str] = None
+        self.chunks: list[bytes] = []
+        self.size = 0
+        self.complete = False
+
+    @property
+    def body(self) -> bytes:
+        return b"".join(self.chunks)
+
+    @property
+    def storable(self) -> bool:
+        return (
+            self.complete
+            and self.status_code is not None
+            and self.status_code < 500
+            and self.size <= settings.IDEMPOTENCY_MAX_BODY
+        )
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.status_code = message["status"]
+            self.content_type = Headers(raw=message.get("headers", [])).get("content-type")
+        elif message["type"] == "http.response.body":
+            chunk = message.get("body", b"")
+            self.size += len(chunk)
+            if self.size <= settings.IDEMPOTENCY_MAX_BODY:
+                self.chunks.append(chunk)
+            if not message.get("more_body", False):
+                self.complete = True
+        await self._send(message)
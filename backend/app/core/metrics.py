@@ -0,0 +1,411 @@
+"""
+Лёгкий in-process реестр метрик (counter / gauge / histogram).
+
+Метрики собираются в памяти процесса и отдаются через `/metrics`
+в текстовом формате Prometheus, краткая сводка — в `/health`.
+При нескольких воркерах uvicorn см. app/core/metrics_multiprocess.py.
+"""
+import bisect
+import math
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, Iterable, Optional
+
+# Сэмпл для внешних коллекторов: (имя, labels, значение)
+Sample = tuple[str, dict[str, str], float]
+
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _label_key(labelnames: tuple[str, ...], labels: dict) -> tuple[str, ...]:
+    """Приводит labels к кортежу значений в порядке labelnames."""
+    if set(labels) != set(labelnames):
+        raise ValueError(f"Ожидались labels {labelnames}, получены {tuple(labels)}")
+    return tuple(str(labels[name]) for name in labelnames)
+
+
+def route_label(scope: dict) -> str:
+    """
+    Шаблон пути сработавшего роута для label метрик (без значений параметров).
+
+    FastAPI подключает вложенные роутеры лениво: scope["route"] — исходный
+    APIRoute без префикса роутера, полный шаблон лежит в контексте роута.
+    """
+    context = scope.get("fastapi", {}).get("effective_route_context")
+    path = getattr(context, "path_format", None)
+    if path:
+        return path
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def _escape_label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    """Форматирует labels в синтаксисе Prometheus: {a="1",b="2"}."""
+    parts = [
+        f'{name}="{_escape_label_value(value)}"'
+        for name, value in zip(labelnames, values)
+    ]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    """Форматирует число для Prometheus (целые — без дробной части)."""
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric(ABC):
+    """Базовый класс метрики с поддержкой labels."""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _header(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+
+    @abstractmethod
+    def render(self) -> list[str]:
+        """Строки метрики в текстовом формате Prometheus."""
+
+    @abstractmethod
+    def reset(self) -> None:
+        """Обнуляет значения."""
+
+    @abstractmethod
+    def state(self) -> list:
+        """Значения в сериализуемом виде (снимок для multiprocess-режима)."""
+
+
+class Counter(_Metric):
+    """Монотонно растущий счётчик."""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        if amount < 0:
+            raise ValueError("Counter можно только увеличивать")
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            return self._values.get(key, 0.0)
+
+    def values(self) -> dict[tuple[str, ...], float]:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> list[str]:
+        lines = self._header()
+        for key, value in sorted(self.values().items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def state(self) -> list:
+        return [[list(key), value] for key, value in self.values().items()]
+
+
+class Gauge(_Metric):
+    """
+    Значение, которое может расти и уменьшаться.
+
+    multiprocess_mode — как объединять значения воркеров в multiprocess-режиме:
+    "all" — отдельная серия на процесс (label pid), "sum" — сумма, "max" — максимум.
+    """
+
+    type_name = "gauge"
+    MULTIPROCESS_MODES = ("all", "sum", "max")
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        multiprocess_mode: str = "all",
+    ):
+        if multiprocess_mode not in self.MULTIPROCESS_MODES:
+            raise ValueError(f"Неизвестный multiprocess_mode: {multiprocess_mode}")
+        super().__init__(name, documentation, labelnames)
+        self.multiprocess_mode = multiprocess_mode
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels) -> None:
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            return self._values.get(key, 0.0)
+
+    def values(self) -> dict[tuple[str, ...], float]:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> list[str]:
+        lines = self._header()
+        for key, value in sorted(self.values().items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def state(self) -> list:
+        return [[list(key), value] for key, value in self.values().items()]
+
+
+class _HistogramState:
+    """Накопленные данные гистограммы для одного набора labels."""
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, n_buckets: int):
+        self.counts = [0] * n_buckets
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram(_Metric):
+    """Гистограмма с фиксированными (кумулятивными при выводе) бакетами."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        upper = sorted(float(b) for b in buckets)
+        if not upper or not math.isinf(upper[-1]):
+            upper.append(math.inf)
+        self.buckets = tuple(upper)
+        self._states: dict[tuple[str, ...], _HistogramState] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(self.labelnames, labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                state = self._states[key] = _HistogramState(len(self.buckets))
+            state.counts[idx] += 1
+            state.sum += value
+            state.count += 1
+
+    def count(self, **labels) -> int:
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            state = self._states.get(key)
+            return state.count if state else 0
+
+    def sum(self, **labels) -> float:
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            state = self._states.get(key)
+            return state.sum if state else 0.0
+
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        """
+        Оценка квантиля по бакетам (верхняя граница бакета).
+        Возвращает None, если наблюдений не было.
+        """
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            state = self._states.get(key)
+            if state is None or state.count == 0:
+                return None
+            rank = q * state.count
+            cumulative = 0
+            for upper, bucket_count in zip(self.buckets, state.counts):
+                cumulative += bucket_count
+                if cumulative >= rank:
+                    return upper
+            return self.buckets[-1]
+
+    def snapshot(self, **labels) -> dict:
+        """Краткая сводка для JSON-ответов (/health)."""
+        count = self.count(**labels)
+        if count == 0:
+            return {"count": 0}
+        return {
+            "count": count,
+            "avg": round(self.sum(**labels) / count, 3),
+            "p50": self.quantile(0.5, **labels),
+            "p95": self.quantile(0.95, **labels),
+        }
+
+    def render(self) -> list[str]:
+        lines = self._header()
+        with self._lock:
+            states = {k: (list(s.counts), s.sum, s.count) for k, s in self._states.items()}
+        for key, (counts, total, count) in sorted(states.items()):
+            cumulative = 0
+            for upper, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(upper)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+                )
+            labels_str = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels_str} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels_str} {count}")
+        return lines
+
+    def reset(self) -> None:
+        with self._lock:
+            self._states.clear()
+
+    def state(self) -> list:
+        with self._lock:
+            return [
+                [list(key), list(s.counts), s.sum, s.count] for key, s in self._states.items()
+            ]
+
+    def merge(self, labels: tuple[str, ...], counts: list[int], total: float, count: int) -> None:
+        """Добавляет накопленные данные (из снимка другого процесса)."""
+        with self._lock:
+            state = self._states.get(labels)
+            if state is None:
+                state = self._states[labels] = _HistogramState(len(self.buckets))
+            for idx, bucket_count in enumerate(counts):
+                state.counts[idx] += bucket_count
+            state.sum += total
+            state.count += count
+
+
+class MetricsRegistry:
+    """Реестр метрик процесса."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors: list[Callable[[], Iterable[Sample]]] = []
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, documentation: str, **kwargs) -> _Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Метрика {name} уже зарегистрирована с другим типом")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames=labelnames)
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        multiprocess_mode: str = "all",
+    ) -> Gauge:
+        return self._get_or_create(
+            Gauge, name, documentation, labelnames=labelnames, multiprocess_mode=multiprocess_mode
+        )
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._get_or_create(
+            Histogram, name, documentation, labelnames=labelnames, buckets=buckets
+        )
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def register_collector(self, collector: Callable[[], Iterable[Sample]]) -> None:
+        """
+        Регистрирует внешний коллектор — функцию, возвращающую сэмплы
+        (имя, labels, значение). Используется для статистики, которая
+        живёт вне backend (например, scheduler уведомлений бота).
+        """
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+
+    def metrics(self) -> list[_Metric]:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def collect_samples(self) -> list[Sample]:
+        """Сэмплы всех внешних коллекторов."""
+        with self._lock:
+            collectors = list(self._collectors)
+        samples: list[Sample] = []
+        for collector in collectors:
+            samples.extend(collector())
+        return samples
+
+    def render(self) -> str:
+        """Все метрики в текстовом формате Prometheus."""
+        return render_text(self.metrics(), self.collect_samples())
+
+    def reset(self) -> None:
+        """Обнуляет значения всех метрик (для тестов)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.reset()
+
+
+def render_text(metrics: Iterable[_Metric], samples: Iterable[Sample]) -> str:
+    """Текстовый формат Prometheus для метрик и сэмплов коллекторов."""
+    lines: list[str] = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    for name, labels, value in samples:
+        lines.append(
+            f"{name}{_format_labels(labels.keys(), labels.values())} {_format_value(value)}"
+        )
+    return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
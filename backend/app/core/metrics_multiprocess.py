@@ -0,0 +1,218 @@
+"""
+Multiprocess-режим метрик для нескольких воркеров uvicorn.
+
+Каждый воркер держит свой реестр в памяти и периодически (и при остановке)
+сохраняет снимок в METRICS_MULTIPROC_DIR/metrics_<pid>.json. Воркер,
+обслуживающий /metrics, сначала записывает свежий снимок, затем объединяет
+снимки всех процессов:
+
+- counter и histogram суммируются (включая завершившиеся процессы —
+  счётчики не должны уменьшаться);
+- gauge — по multiprocess_mode ("all" — серия на процесс с label pid,
+  "sum", "max"), только живые процессы;
+- сэмплы коллекторов — по имени: счётчики (*_total, *_count, *_bucket)
+  суммируются с учётом завершившихся процессов, максимумы (*_max,
+  *_max_*) — max() по всем процессам, остальные (текущие значения)
+  суммируются по живым процессам.
+
+Каталог нужно очищать перед запуском сервиса (как у prometheus_client).
+"""
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+from app.core.metrics import (
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsRegistry,
+    Sample,
+    render_text,
+)
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_PREFIX = "metrics_"
+
+
+def snapshot_path(directory: str, pid: int) -> Path:
+    return Path(directory) / f"{SNAPSHOT_PREFIX}{pid}.json"
+
+
+def registry_snapshot(registry: MetricsRegistry) -> dict:
+    """Снимок реестра: описания и значения метрик, сэмплы коллекторов."""
+    metrics = []
+    for metric in registry.metrics():
+        entry = {
+            "name": metric.name,
+            "type": metric.type_name,
+            "documentation": metric.documentation,
+            "labelnames": list(metric.labelnames),
+            "values": metric.state(),
+        }
+        if isinstance(metric, Histogram):
+            entry["buckets"] = [b for b in metric.buckets if b != float("inf")]
+        if isinstance(metric, Gauge):
+            entry["mode"] = metric.multiprocess_mode
+        metrics.append(entry)
+    samples = [[name, labels, value] for name, labels, value in registry.collect_samples()]
+    return {"pid": os.getpid(), "metrics": metrics, "samples": samples}
+
+
+def write_snapshot(registry: MetricsRegistry, directory: str) -> None:
+    """Атомарно записывает снимок текущего процесса."""
+    path = snapshot_path(directory, os.getpid())
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(registry_snapshot(registry)), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def read_snapshots(directory: str) -> list[dict]:
+    snapshots = []
+    for path in sorted(Path(directory).glob(f"{SNAPSHOT_PREFIX}*.json")):
+        try:
+            snapshots.append(json.loads(path.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            # Файл удалён или перезаписывается — возьмём при следующем сборе
+            logger.warning(f"Skipping unreadable metrics snapshot {path}")
+    return snapshots
+
+
+def pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# Суффиксы сэмплов коллекторов со счётчиками — значения не должны уменьшаться
+COUNTER_SAMPLE_SUFFIXES = ("_total", "_count", "_bucket")
+
+
+def sample_merge_mode(name: str) -> str:
+    """Как объединять сэмпл коллектора: "counter", "max" или "live_sum"."""
+    if name.endswith(COUNTER_SAMPLE_SUFFIXES):
+        return "counter"
+    if name.endswith("_max") or "_max_" in name:
+        return "max"
+    return "live_sum"
+
+
+def merge_snapshots(snapshots: list[dict], live_pids: Optional[set[int]] = None) -> str:
+    """Объединяет снимки процессов в текст Prometheus."""
+    if live_pids is None:
+        live_pids = {s["pid"] for s in snapshots if pid_alive(s["pid"])}
+
+    merged: dict[str, object] = {}
+    samples: dict[tuple, float] = {}
+    for snapshot in snapshots:
+        pid = snapshot["pid"]
+        alive = pid in live_pids
+        for entry in snapshot["metrics"]:
+            metric = merged.get(entry["name"])
+            if metric is None:
+                metric = merged[entry["name"]] = _empty_metric(entry)
+            elif metric.type_name != entry["type"]:
+                continue
+            _merge_values(metric, entry, pid, alive)
+        for name, labels, value in snapshot["samples"]:
+            mode = sample_merge_mode(name)
+            if mode == "live_sum" and not alive:
+                continue
+            key = (name, tuple(labels.items()))
+            current = samples.get(key)
+            if current is None:
+                samples[key] = value
+            elif mode == "max":
+                samples[key] = max(current, value)
+            else:
+                samples[key] = current + value
+
+    sample_list: list[Sample] = [
+        (name, dict(labels), value) for (name, labels), value in samples.items()
+    ]
+    return render_text(merged.values(), sample_list)
+
+
+def _empty_metric(entry: dict):
+    labelnames = tuple(entry["labelnames"])
+    if entry["type"] == "histogram":
+        return Histogram(entry["name"], entry["documentation"], labelnames, tuple(entry["buckets"]))
+    if entry["type"] == "gauge":
+        mode = entry.get("mode", "all")
+        if mode == "all":
+            labelnames += ("pid",)
+        return Gauge(entry["name"], entry["documentation"], labelnames, multiprocess_mode=mode)
+    return Counter(entry["name"], entry["documentation"], labelnames)
+
+
+def _merge_values(metric, entry: dict, pid: int, alive: bool) -> None:
+    labelnames = metric.labelnames
+    if isinstance(metric, Histogram):
+        for key, counts, total, count in entry["values"]:
+            if len(counts) == len(metric.buckets):
+                metric.merge(tuple(key), counts, total, count)
+        return
+    if isinstance(metric, Counter):
+        for key, value in entry["values"]:
+            metric.inc(value, **dict(zip(labelnames, key)))
+        return
+    if not alive:
+        return
+    for key, value in entry["values"]:
+        if metric.multiprocess_mode == "all":
+            metric.set(value, **dict(zip(labelnames, [*key, str(pid)])))
+        elif metric.multiprocess_mode == "sum":
+            metric.inc(value, **dict(zip(labelnames, key)))
+        else:
+            labels = dict(zip(labelnames, key))
+            current = metric.values().get(tuple(key))
+            metric.set(value if current is None else max(current, value), **labels)
+
+
+def render_multiprocess(registry: MetricsRegistry, directory: str) -> str:
+    """Метрики всех воркеров: свежий снимок своего процесса + снимки остальных."""
+    write_snapshot(registry, directory)
+    return merge_snapshots(read_snapshots(directory))
+
+
+class SnapshotWriter:
+    """Фоновый поток, периодически сохраняющий снимок реестра воркера."""
+
+    def __init__(self, registry: MetricsRegistry, directory: str, interval: float):
+        self.registry = registry
+        self.directory = directory
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _write(self) -> None:
+        try:
+            write_snapshot(self.registry, self.directory)
+        except Exception:
+            logger.exception("Failed to write metrics snapshot")
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._write()
+
+    def start(self) -> None:
+        Path(self.directory).mkdir(parents=True, exist_ok=True)
+        self._write()
+        self._thread = threading.Thread(target=self._run, name="metrics-snapshot", daemon=True)
+        self._thread.start()
+        logger.info(f"Metrics multiprocess mode: snapshots in {self.directory}")
+
+    def stop(self) -> None:
+        """Останавливает поток и записывает итоговый снимок."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval)
+            self._thread = None
+        self._write()
@@ -0,0 +1,290 @@
+"""
+Сэмплирующий профилировщик работающего процесса.
+
+StackSampler в отдельном потоке каждые interval секунд снимает стеки всех
+потоков через sys._current_frames(): и event loop (async-эндпоинты, бот),
+и потоки threadpool (sync-эндпоинты, SQL). Результат — collapsed stacks
+(«поток;кадр;кадр N» по строке на стек), формат flamegraph.pl, speedscope
+и inferno. Ожидание (select event loop, wait/get в потоках) по умолчанию
+не учитывается — профиль показывает, где тратится CPU.
+
+Два режима:
+- весь процесс на N секунд — GET /api/v1/admin/profile;
+- один запрос — заголовок X-Profile: 1 (вместе с X-API-Key): учитываются
+  кадры event loop, пока выполняется задача запроса, и потоки threadpool,
+  в стеке которых есть эндпоинт или зависимости роута (параллельные
+  запросы к тому же роуту попадут в профиль). Профиль сохраняется в памяти,
+  его id — в заголовке ответа X-Profile-Id.
+"""
+import asyncio
+import inspect
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from datetime import datetime
+from functools import lru_cache
+from types import CodeType, FrameType
+from typing import Callable, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.exceptions import AppException
+from app.core.metrics import route_label
+from app.core.utils import now_moscow
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+# Файлы, в которых «висит» простаивающий поток
+IDLE_FILES = frozenset({"selectors.py", "threading.py", "queue.py"})
+
+ThreadFilter = Callable[[int, FrameType], bool]
+
+
+@lru_cache(maxsize=8192)
+def frame_label(code: CodeType) -> str:
+    """Кадр в collapsed stack: функция (модуль:первая строка) — без ';' и переводов строк."""
+    path = code.co_filename.replace(os.sep, "/")
+    if "site-packages/" in path:
+        path = path.rsplit("site-packages/", 1)[1]
+    else:
+        path = "/".join(path.rsplit("/", 3)[-3:])
+    return f"{code.co_name} ({path}:{code.co_firstlineno})".replace(";", ":")
+
+
+def thread_group(name: str) -> str:
+    """Имя потока без номеров: воркеры одного пула сливаются в один корень."""
+    return re.sub(r"\d+", "N", name)
+
+
+class StackSampler:
+    """Периодически снимает стеки потоков процесса в отдельном потоке."""
+
+    def __init__(
+        self,
+        interval: float,
+        thread_filter: Optional[ThreadFilter] = None,
+        include_idle: bool = False,
+    ):
+        self.interval = interval
+        self.thread_filter = thread_filter
+        self.include_idle = include_idle
+        self.stacks: Counter[str] = Counter()
+        self.ticks = 0
+        self.started = 0.0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def start(self) -> None:
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self.started
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self) -> None:
+        """Один снимок стеков всех потоков, кроме самого сэмплера."""
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        self.ticks += 1
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            if not self.include_idle and os.path.basename(frame.f_code.co_filename) in IDLE_FILES:
+                continue
+            if self.thread_filter is not None and not self.thread_filter(ident, frame):
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(frame_label(frame.f_code))
+                frame = frame.f_back
+            labels.append(thread_group(names.get(ident, f"thread-{ident}")))
+            self.stacks[";".join(reversed(labels))] += 1
+
+    def collapsed(self) -> str:
+        """Collapsed stacks: «кадр;кадр;... N», самые частые — первыми."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+_process_lock = threading.Lock()
+
+
+async def profile_process(seconds: float, interval: float, include_idle: bool = False) -> StackSampler:
+    """Профилирует весь процесс seconds секунд; одновременно — только один профиль."""
+    if not _process_lock.acquire(blocking=False):
+        raise AppException(409, "Профилирование процесса уже выполняется", "PROFILER_BUSY")
+    sampler = StackSampler(interval, include_idle=include_idle)
+    try:
+        sampler.start()
+        await asyncio.sleep(seconds)
+    finally:
+        sampler.stop()
+        _process_lock.release()
+    logger.info(
+        f"Process profile: {seconds:.1f} s, {sampler.ticks} ticks, {sampler.samples} samples"
+    )
+    return sampler
+
+
+class RequestProfile:
+    """Сохранённый профиль одного HTTP-запроса."""
+
+    __slots__ = ("id", "method", "route", "status", "duration_ms", "samples", "created_at", "collapsed")
+
+    def __init__(self, profile_id: str, method: str, created_at: datetime):
+        self.id = profile_id
+        self.method = method
+        self.route = "unmatched"
+        self.status = 500
+        self.duration_ms = 0.0
+        self.samples = 0
+        self.created_at = created_at
+        self.collapsed = ""
+
+    def as_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "route": self.route,
+            "status": self.status,
+            "duration_ms": self.duration_ms,
+            "samples": self.samples,
+            "created_at": self.created_at,
+        }
+
+
+class RequestProfileStore:
+    """Последние PROFILER_KEEP_REQUESTS профилей запросов (новые — первыми)."""
+
+    def __init__(self):
+        self._profiles: deque[RequestProfile] = deque()
+        self._lock = threading.Lock()
+
+    def add(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._profiles.appendleft(profile)
+            while len(self._profiles) > max(1, settings.PROFILER_KEEP_REQUESTS):
+                self._profiles.pop()
+
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        with self._lock:
+            return next((p for p in self._profiles if p.id == profile_id), None)
+
+    def list(self, skip: int = 0, limit: int = 20) -> tuple[list[dict], int]:
+        with self._lock:
+            profiles = list(self._profiles)
+        return [p.as_dict() for p in profiles[skip:skip + limit]], len(profiles)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._profiles.clear()
+
+
+request_profiles = RequestProfileStore()
+
+
+def _route_codes(scope: Scope) -> frozenset[CodeType]:
+    """Код эндпоинта сработавшего роута и его зависимостей."""
+    dependant = getattr(scope.get("route"), "dependant", None)
+    codes = set()
+    pending = [dependant] if dependant is not None else []
+    while pending:
+        current = pending.pop()
+        call = inspect.unwrap(current.call) if current.call is not None else None
+        code = getattr(call, "__code__", None)
+        if code is not None:
+            codes.add(code)
+        pending.extend(current.dependencies)
+    return frozenset(codes)
+
+
+def request_thread_filter(scope: Scope, task: asyncio.Task) -> ThreadFilter:
+    """Фильтр кадров одного запроса: event loop во время задачи запроса и его sync-код в threadpool."""
+    loop = task.get_loop()
+    loop_thread = threading.get_ident()
+    codes: Optional[frozenset[CodeType]] = None
+
+    def belongs(ident: int, frame: FrameType) -> bool:
+        nonlocal codes
+        if ident == loop_thread:
+            return asyncio.current_task(loop) is task
+        if codes is None:
+            if "route" not in scope:
+                return False
+            codes = _route_codes(scope)
+        while frame is not None:
+            if frame.f_code in codes:
+                return True
+            frame = frame.f_back
+        return False
+
+    return belongs
+
+
+class RequestProfilerMiddleware:
+    """
+    Профиль запроса по заголовку X-Profile: 1. Заголовок учитывается только
+    с верным X-API-Key — иначе запрос выполняется как обычно.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        if headers.get(PROFILE_HEADER) != "1" or not settings.API_KEY or (
+            headers.get("x-api-key") != settings.API_KEY
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(uuid.uuid4().hex, scope["method"], now_moscow())
+        sampler = StackSampler(
+            settings.PROFILER_REQUEST_INTERVAL_MS / 1000,
+            thread_filter=request_thread_filter(scope, asyncio.current_task()),
+        )
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                MutableHeaders(scope=message)[PROFILE_ID_HEADER] = profile.id
+            await send(message)
+
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop()
+            profile.route = route_label(scope)
+            profile.duration_ms = round(sampler.duration * 1000, 3)
+            profile.samples = sampler.samples
+            profile.collapsed = sampler.collapsed()
+            request_profiles.add(profile)
+            logger.info(
+                f"Request profile {profile.id}: {profile.method} {profile.route} "
+                f"{profile.duration_ms:.1f} ms, {profile.samples} samples"
+            )
@@ -0,0 +1,98 @@
+"""
+Учёт SQL-запросов: количество, суммарное время в БД и повторяющиеся
+«формы» запросов (текст без значений параметров).
+
+Запросы считаются через события before/after_cursor_execute всех Engine
+в QueryStats текущего контекста (track_queries). Контекст копируется
+в потоки threadpool, поэтому sync-эндпоинты тоже учитываются.
+Одна и та же форма, повторённая много раз за запрос, — признак N+1.
+"""
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Текст запроса без литералов и с IN-списками, свёрнутыми до (?)."""
+    shape = _STRING_LITERAL.sub("?", statement)
+    shape = _NUMBER.sub("?", shape)
+    shape = _PLACEHOLDER_LIST.sub("(?)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+class QueryStats:
+    """SQL-запросы одной области учёта (обычно одного HTTP-запроса)."""
+
+    __slots__ = ("count", "seconds", "shapes")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes: Counter[str] = Counter()
+
+    def record(self, statement: str, seconds: float = 0.0) -> None:
+        self.count += 1
+        self.seconds += seconds
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Формы запросов, выполненные не меньше threshold раз (по убыванию)."""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+    def report(self, limit: int = 5) -> str:
+        """Краткий отчёт для логов и сообщений тестов."""
+        lines = [f"{self.count} queries, {self.seconds * 1000:.1f} ms in DB"]
+        for shape, n in self.shapes.most_common(limit):
+            lines.append(f"  {n}x {shape[:200]}")
+        return "\n".join(lines)
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Учитывает SQL-запросы текущего контекста в новом QueryStats."""
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _current_stats.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    stats = _current_stats.get()
+    started = conn.info.get("query_started")
+    if stats is None or not started:
+        return
+    stats.record(statement, time.perf_counter() - started.pop())
+
+
+@event.listens_for(Engine, "handle_error")
+def _on_error(exception_context) -> None:
+    # after_cursor_execute для упавшего запроса не вызывается
+    stats = _current_stats.get()
+    conn = exception_context.connection
+    started = conn.info.get("query_started") if conn is not None else None
+    if stats is None or not started:
+        return
+    stats.record(exception_context.statement or "", time.perf_counter() - started.pop())
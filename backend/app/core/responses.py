@@ -0,0 +1,115 @@
+"""
+Быстрая сериализация ответов API: orjson и однократная валидация строк ORM.
+
+По умолчанию ответ проходит валидацию дважды: model_validate в эндпоинте
+и повторно по response_model в FastAPI. Списочные эндпоинты возвращают
+ORJSONResponse напрямую — FastAPI не трогает готовый Response, а
+response_model у роутов остаётся только для OpenAPI-схемы.
+
+Строки ORM — доверенные данные: типы уже гарантирует схема БД. Если все поля
+response-схемы простые (скаляры, datetime, JSON-колонки) и у неё нет
+валидаторов/сериализаторов, строка превращается в dict прямым чтением
+атрибутов, без pydantic. Остальные схемы (вложенные модели и т.п.)
+валидируются ровно один раз — TypeAdapter списка, from_attributes.
+"""
+import types
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any, Iterable, Literal, Optional, TypeVar, Union, get_args, get_origin
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+# Ключи payload истории могут быть не строками (JSON-колонка из старых записей)
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+# Типы полей, значения которых ORM отдаёт уже в итоговом виде
+_TRUSTED_TYPES = {int, str, bool, datetime, date, dict, list, type(None), Any}
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON-ответ, сериализуемый orjson. Pydantic-модели дампятся без повторной валидации."""
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            content = content.model_dump()
+        return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+
+def _annotation_types(annotation: Any) -> set:
+    """Все типы в аннотации, включая аргументы Optional/Union/list/dict."""
+    origin = get_origin(annotation)
+    if origin is None:
+        return {annotation}
+    if origin is Literal:
+        return {type(value) for value in get_args(annotation)}
+    found = set() if origin in (Union, types.UnionType) else {origin}
+    for arg in get_args(annotation):
+        found |= _annotation_types(arg)
+    return found
+
+
+@lru_cache(maxsize=None)
+def _trusted_fields(schema: type[BaseModel]) -> Optional[tuple[str, ...]]:
+    """Имена полей схемы, если строку ORM можно отдать без валидации; иначе None."""
+    decorators = schema.__pydantic_decorators__
+    if (
+        decorators.field_validators or decorators.model_validators
+        or decorators.field_serializers or decorators.model_serializers
+        or schema.model_computed_fields
+    ):
+        return None
+    for name, field in schema.model_fields.items():
+        if field.alias not in (None, name) or field.serialization_alias not in (None, name):
+            return None
+        if not _annotation_types(field.annotation) <= _TRUSTED_TYPES:
+            return None
+    return tuple(schema.model_fields)
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(schema: type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(list[schema])
+
+
+def validate_rows(schema: type[ModelT], rows: Iterable[Any]) -> list[ModelT]:
+    """Валидирует строки ORM в схему одним вызовом pydantic-core (from_attributes)."""
+    return _list_adapter(schema).validate_python(rows, from_attributes=True)
+
+
+def dump_rows(
+    schema: type[BaseModel],
+    rows: Iterable[Any],
+    fields: Optional[tuple[str, ...]] = None,
+) -> list[dict]:
+    """
+    Строки ORM в виде dict по полям схемы (доверенный путь или один проход валидации).
+    fields — разреженный набор полей (см. app.core.fieldsets); остальные атрибуты
+    строки не читаются, поэтому отложенные load_only колонки не догружаются.
+    """
+    trusted = _trusted_fields(schema)
+    if trusted is None:
+        include = set(fields) if fields is not None else None
+        return [item.model_dump(include=include) for item in validate_rows(schema, rows)]
+    names = trusted if fields is None else fields
+    return [{name: getattr(row, name) for name in names} for row in rows]
+
+
+def list_response(
+    wrapper: type[BaseModel],
+    schema: type[BaseModel],
+    rows: Iterable[Any],
+    fields: Optional[tuple[str, ...]] = None,
+    **extra: Any,
+) -> ORJSONResponse:
+    """Ответ wrapper(items=rows, **extra) без повторной валидации: дефолты wrapper + items."""
+    content = {
+        name: field.get_default(call_default_factory=True)
+        for name, field in wrapper.model_fields.items()
+        if not field.is_required()
+    }
+    content.update(extra, items=dump_rows(schema, rows, fields))
+    return ORJSONResponse(content)
@@ -0,0 +1,279 @@
+"""
+Журнал медленных SQL-запросов.
+
+Запрос дольше SLOW_QUERY_MS логируется с нормализованным текстом
+(statement_shape), формой bind-параметров (только типы, без значений)
+и источником — методом и шаблоном роута HTTP-запроса. Запросы
+агрегируются по форме: количество, суммарное и максимальное время.
+
+Для первого появления каждой формы SELECT в фоновом потоке снимается план
+с теми же параметрами: на PostgreSQL — EXPLAIN (ANALYZE, BUFFERS) в
+откатываемой транзакции со statement_timeout, на SQLite — EXPLAIN QUERY PLAN.
+Данные — в памяти процесса, просмотр через GET /api/v1/admin/slow-queries.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import Scope
+
+from app.core.config import settings
+from app.core.metrics import registry, route_label
+from app.core.query_stats import statement_shape
+from app.core.utils import now_moscow
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERIES = registry.counter(
+    "db_slow_queries_total",
+    "SQL-запросы дольше SLOW_QUERY_MS по источнику",
+    labelnames=("origin",),
+)
+
+# Префикс плана по диалекту; ANALYZE выполняет запрос, поэтому только для SELECT
+EXPLAIN_PREFIXES = {
+    "postgresql": "EXPLAIN (ANALYZE, BUFFERS) ",
+    "sqlite": "EXPLAIN QUERY PLAN ",
+}
+# Origin запросов вне HTTP (скрипты импорта, фоновые потоки)
+BACKGROUND_ORIGIN = "background"
+
+_current_scope: ContextVar[Optional[Scope]] = ContextVar("query_origin_scope", default=None)
+
+
+@contextmanager
+def origin_scope(scope: Scope) -> Iterator[None]:
+    """Источник запросов текущего контекста — HTTP-запрос scope."""
+    token = _current_scope.set(scope)
+    try:
+        yield
+    finally:
+        _current_scope.reset(token)
+
+
+def current_origin() -> str:
+    """'METHOD /шаблон/роута' текущего HTTP-запроса или BACKGROUND_ORIGIN."""
+    scope = _current_scope.get()
+    if scope is None:
+        return BACKGROUND_ORIGIN
+    return f"{scope['method']} {route_label(scope)}"
+
+
+def parameter_shape(parameters: Any, executemany: bool = False) -> str:
+    """
+    Типы bind-параметров без значений: (int, str x3) или {id_1: int}.
+    Подряд идущие одинаковые типы (IN-списки) сворачиваются.
+    """
+    if executemany and isinstance(parameters, (list, tuple)) and parameters:
+        return f"{len(parameters)} rows of {parameter_shape(parameters[0])}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{k}: {type(v).__name__}" for k, v in parameters.items()) + "}"
+    if not isinstance(parameters, (list, tuple)):
+        return "()"
+    runs: list[list] = []
+    for value in parameters:
+        name = type(value).__name__
+        if runs and runs[-1][0] == name:
+            runs[-1][1] += 1
+        else:
+            runs.append([name, 1])
+    return "(" + ", ".join(name if n == 1 else f"{name} x{n}" for name, n in runs) + ")"
+
+
+class SlowQuery:
+    """Агрегат медленных запросов одной формы."""
+
+    __slots__ = (
+        "shape", "params", "count", "total_seconds", "max_seconds",
+        "first_seen", "last_seen", "origins", "explain", "explain_status",
+    )
+
+    def __init__(self, shape: str, params: str):
+        self.shape = shape
+        self.params = params
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.first_seen: Optional[datetime] = None
+        self.last_seen: Optional[datetime] = None
+        self.origins: Counter[str] = Counter()
+        self.explain: Optional[str] = None
+        # None — план не снимался; pending, done, skipped, failed
+        self.explain_status: Optional[str] = None
+
+    def as_dict(self) -> dict:
+        return {
+            "shape": self.shape,
+            "params": self.params,
+            "count": self.count,
+            "total_ms": round(self.total_seconds * 1000, 3),
+            "avg_ms": round(self.total_seconds * 1000 / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_seconds * 1000, 3),
+            "first_seen": self.first_seen,
+            "last_seen": self.last_seen,
+            "origins": dict(self.origins.most_common()),
+            "explain": self.explain,
+            "explain_status": self.explain_status,
+        }
+
+
+class SlowQueryLog:
+    """Медленные запросы процесса по формам с фоновым снятием планов."""
+
+    def __init__(self):
+        self._entries: dict[str, SlowQuery] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: set[Future] = set()
+
+    def observe(
+        self,
+        conn,
+        statement: str,
+        parameters: Any,
+        executemany: bool,
+        seconds: float,
+    ) -> None:
+        """Учитывает выполненный запрос, если он дольше порога."""
+        threshold = settings.SLOW_QUERY_MS
+        if threshold < 0 or seconds * 1000 < threshold:
+            return
+
+        shape = statement_shape(statement)
+        params = parameter_shape(parameters, executemany)
+        origin = current_origin()
+        now = now_moscow()
+        explain_prefix = None
+        with self._lock:
+            entry = self._entries.get(shape)
+            if entry is None:
+                self._evict()
+                entry = self._entries[shape] = SlowQuery(shape, params)
+                entry.first_seen = now
+                explain_prefix = self._explain_prefix(conn, shape, executemany)
+                if explain_prefix is not None:
+                    entry.explain_status = "pending"
+                elif settings.SLOW_QUERY_EXPLAIN and conn.dialect.name in EXPLAIN_PREFIXES:
+                    entry.explain_status = "skipped"
+            entry.count += 1
+            entry.total_seconds += seconds
+            entry.max_seconds = max(entry.max_seconds, seconds)
+            entry.last_seen = now
+            entry.origins[origin] += 1
+
+        SLOW_QUERIES.inc(origin=origin)
+        logger.warning(
+            f"Slow query {seconds * 1000:.1f} ms ({origin}): {shape[:500]} params={params}"
+        )
+        if explain_prefix is not None:
+            self._submit(conn.engine, shape, explain_prefix + statement, parameters)
+
+    @staticmethod
+    def _explain_prefix(conn, shape: str, executemany: bool) -> Optional[str]:
+        """Префикс EXPLAIN, если для формы нужно снять план (только одиночные SELECT)."""
+        if not settings.SLOW_QUERY_EXPLAIN or executemany:
+            return None
+        if not shape.upper().startswith(("SELECT", "WITH")):
+            return None
+        return EXPLAIN_PREFIXES.get(conn.dialect.name)
+
+    def _evict(self) -> None:
+        """Освобождает место под новую форму: вытесняется форма с наименьшим суммарным временем."""
+        if len(self._entries) < max(1, settings.SLOW_QUERY_MAX_SHAPES):
+            return
+        victim = min(self._entries.values(), key=lambda e: e.total_seconds)
+        del self._entries[victim.shape]
+
+    def _submit(self, engine, shape: str, statement: str, parameters: Any) -> None:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="slow-query-explain"
+                )
+            future = self._executor.submit(self._explain, engine, shape, statement, parameters)
+            self._pending.add(future)
+        future.add_done_callback(self._pending.discard)
+
+    def _explain(self, engine, shape: str, statement: str, parameters: Any) -> None:
+        """Снимает план в отдельном соединении; транзакция всегда откатывается."""
+        try:
+            with engine.connect().execution_options(slow_query_log=False) as conn:
+                with conn.begin() as transaction:
+                    if engine.dialect.name == "postgresql":
+                        conn.exec_driver_sql(
+                            "SELECT set_config('statement_timeout', %s, true)",
+                            (str(settings.SLOW_QUERY_EXPLAIN_TIMEOUT_MS),),
+                        )
+                    # statement — SQL, сгенерированный SQLAlchemy; значения идут параметрами
+                    rows = conn.exec_driver_sql(statement, parameters).all()
+                    transaction.rollback()
+            plan, status = "\n".join(str(row[-1]) for row in rows), "done"
+        except Exception as e:
+            logger.exception(f"EXPLAIN failed for slow query: {shape[:200]}")
+            plan, status = f"{type(e).__name__}: {e}", "failed"
+        with self._lock:
+            entry = self._entries.get(shape)
+            if entry is not None:
+                entry.explain, entry.explain_status = plan, status
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Дожидается снятия запланированных планов."""
+        wait(list(self._pending), timeout=timeout)
+
+    def top(self, skip: int = 0, limit: int = 20) -> tuple[list[dict], int]:
+        """Формы по убыванию суммарного времени и их общее количество."""
+        with self._lock:
+            entries = sorted(self._entries.values(), key=lambda e: e.total_seconds, reverse=True)
+            return [e.as_dict() for e in entries[skip:skip + limit]], len(entries)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+slow_query_log = SlowQueryLog()
+
+
+def _enabled(conn, context) -> bool:
+    if settings.SLOW_QUERY_MS < 0:
+        return False
+    options = context.execution_options if context is not None else conn.get_execution_options()
+    return options.get("slow_query_log", True)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _enabled(conn, context):
+        conn.info.setdefault("slow_query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = conn.info.get("slow_query_started")
+    if started:
+        slow_query_log.observe(
+            conn, statement, parameters, executemany, time.perf_counter() - started.pop()
+        )
+
+
+@event.listens_for(Engine, "handle_error")
+def _on_error(exception_context) -> None:
+    # Упавший запрос (например, по statement_timeout) тоже может быть медленным
+    conn = exception_context.connection
+    started = conn.info.get("slow_query_started") if conn is not None else None
+    if started:
+        slow_query_log.observe(
+            conn,
+            exception_context.statement or "",
+            exception_context.parameters,
+            False,
+            time.perf_counter() - started.pop(),
+        )
@@ -0,0 +1,46 @@
+"""
+Замер этапов старта приложения.
+
+Каждый этап логируется с длительностью и попадает в gauge
+app_startup_stage_seconds{stage=...} на /metrics.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+STARTUP_STAGE_SECONDS = registry.gauge(
+    "app_startup_stage_seconds",
+    "Длительность этапов старта приложения",
+    labelnames=("stage",),
+)
+
+
+class StartupTimer:
+    """Длительности этапов старта в порядке их завершения."""
+
+    def __init__(self):
+        self.stages: dict[str, float] = {}
+
+    def record(self, name: str, seconds: float) -> None:
+        self.stages[name] = seconds
+        STARTUP_STAGE_SECONDS.set(seconds, stage=name)
+        logger.info(f"Startup stage '{name}' took {seconds:.3f}s")
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def summary(self) -> dict[str, float]:
+        return {name: round(seconds, 3) for name, seconds in self.stages.items()}
+
+
+startup_timer = StartupTimer()
@@ -0,0 +1,93 @@
+"""
+Трассировка на стороне бэкенда: server span на HTTP-запрос и span на SQL.
+
+Ядро трассировки общее с ботом — telegram_bot.services.tracing. Server span
+продолжает трассу из заголовка traceparent (его шлёт APIClient), без
+заголовка начинается новая трасса со своим решением о сэмплировании.
+Имя span'а — метод и шаблон роута. SQL-запросы, выполненные в контексте
+сэмплированного span'а (в том числе в потоках threadpool sync-эндпоинтов),
+становятся его дочерними span'ами с формой запроса (statement_shape).
+"""
+import logging
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import route_label
+from app.core.query_stats import statement_shape
+from telegram_bot.services.tracing import TRACEPARENT_HEADER, current_span, parse_traceparent, tracer
+
+logger = logging.getLogger(__name__)
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware server span'ов. Снаружи от метрик и остальных middleware,
+    внутри профилировщика запросов (порядок — в app.main).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        parent = parse_traceparent(Headers(scope=scope).get(TRACEPARENT_HEADER))
+        method = scope["method"]
+        with tracer.span(
+            f"{method} {scope['path']}", kind="server", component="http",
+            parent=parent, root=parent is None,
+        ) as span:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                # Шаблон роута известен только после маршрутизации
+                span.name = f"{method} {route_label(scope)}"
+                span.set("http.method", method)
+                span.set("http.route", route_label(scope))
+                span.set("http.status_code", status_code)
+                if status_code >= 500 and span.error is None:
+                    span.error = f"HTTP {status_code}"
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    parent = current_span()
+    if parent is None or not parent.sampled:
+        return
+    shape = statement_shape(statement)
+    span = tracer.start_span(shape.split(" ", 1)[0].upper() or "SQL", component="sql", parent=parent)
+    span.set("db.system", conn.dialect.name)
+    span.set("db.statement", shape[:1000])
+    if executemany:
+        span.set("db.executemany", True)
+    conn.info.setdefault("trace_spans", []).append(span)
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    spans = conn.info.get("trace_spans")
+    if spans:
+        tracer.end_span(spans.pop())
+
+
+@event.listens_for(Engine, "handle_error")
+def _on_error(exception_context) -> None:
+    conn = exception_context.connection
+    spans = conn.info.get("trace_spans") if conn is not None else None
+    if spans:
+        span = spans.pop()
+        span.record_error(exception_context.original_exception)
+        tracer.end_span(span)
@@ -13,6 +13,13 @@ def now_moscow() -> datetime:
     return datetime.now(MOSCOW_TZ).replace(tzinfo=None)
 
 
+def to_moscow_naive(dt: datetime | None) -> datetime | None:
+    """Время со смещением — в московское naive, как now_moscow(); naive не меняется."""
+    if dt is None or dt.tzinfo is None:
+        return dt
+    return dt.astimezone(MOSCOW_TZ).replace(tzinfo=None)
+
+
 def format_datetime(dt: datetime) -> str:
     """Форматирует datetime в московское время (ДД.ММ.ГГГГ ЧЧ:ММ)."""
     if dt is None:
@@ -2,18 +2,29 @@
 Главный файл FastAPI приложения.
 """
 import logging
-from fastapi import Depends, FastAPI
+import time
+
+_import_started = time.perf_counter()
+
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from fastapi.responses import JSONResponse
-from sqlalchemy import text
-from sqlalchemy.orm import Session
 
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
-from app.core.database import get_db
 from app.core.exceptions import AppException
+from app.core.http_metrics import RequestMetricsMiddleware
+from app.core.idempotency import IdempotencyMiddleware
+from app.core.metrics import registry
+from app.core.metrics_multiprocess import SnapshotWriter
+from app.core.profiler import RequestProfilerMiddleware
 from app.api import api_router
-from app.api.telegram import router as telegram_router
+from app.api.telegram import router as telegram_router, attach_in_process_transport
+from app.api.health import router as health_router
+from app.api.metrics import router as metrics_router
+from app.core.startup import startup_timer
+from app.core.tracing import TracingMiddleware, tracer
 
 # Настройка логирования
 logging.basicConfig(
@@ -37,6 +48,12 @@ async def app_exception_handler(request, exc: AppException):
     )
 
 
+# Middleware: добавленный последним — внешний. Порядок снаружи внутрь:
+# Profiler → Tracing → Metrics → Compression → CORS → Idempotency.
+
+# Повторы POST с тем же Idempotency-Key получают сохранённый ответ
+app.add_middleware(IdempotencyMiddleware)
+
 # CORS middleware — разрешённые домены из переменной окружения
 origins = [o.strip() for o in settings.ALLOWED_ORIGINS.split(",") if o.strip()]
 app.add_middleware(
@@ -46,23 +63,32 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Сжатие gzip/brotli больших ответов (порог — COMPRESSION_MIN_SIZE)
+app.add_middleware(CompressionMiddleware)
+# Метрики запросов: время сжатия, CORS, идемпотентности и роута
+app.add_middleware(RequestMetricsMiddleware)
+# Server span трассировки (продолжает traceparent от APIClient бота), включает метрики
+app.add_middleware(TracingMiddleware)
+# Профиль отдельного запроса по заголовку X-Profile: 1 (только с верным X-API-Key) —
+# внешний слой, в профиль попадает весь стек
+app.add_middleware(RequestProfilerMiddleware)
+
+# Снимки метрик воркера для multiprocess-режима /metrics
+_snapshot_writer = (
+    SnapshotWriter(registry, settings.METRICS_MULTIPROC_DIR, settings.METRICS_MULTIPROC_INTERVAL)
+    if settings.METRICS_MULTIPROC_DIR
+    else None
+)
 
-# Health check endpoint
-@app.get("/health")
-def health(db: Session = Depends(get_db)):
-    """Health check endpoint with database verification."""
-    try:
-        db.execute(text("SELECT 1"))
-        return {"status": "healthy", "database": "connected"}
-    except Exception as e:
-        return JSONResponse(
-            status_code=503,
-            content={"status": "unhealthy", "database": str(e)},
-        )
+# Health checks: /health/live, /health/ready и прежний /health
+app.include_router(health_router)
 
 # Подключаем webhook endpoint напрямую (без префикса /api/v1)
 app.include_router(telegram_router, prefix="/webhook")
 
+# Метрики процесса (формат Prometheus)
+app.include_router(metrics_router)
+
 # Подключаем API роутер
 app.include_router(api_router)
 
@@ -71,12 +97,22 @@ app.include_router(api_router)
 async def startup_event():
     """Действия при старте приложения."""
     logger.info("Application startup")
+    with startup_timer.stage("in_process_transport"):
+        await attach_in_process_transport(app)
+    if _snapshot_writer is not None:
+        _snapshot_writer.start()
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Действия при остановке приложения."""
     logger.info("Application shutdown")
+    if _snapshot_writer is not None:
+        _snapshot_writer.stop()
+    tracer.flush()
+
+
+startup_timer.record("import", time.perf_counter() - _import_started)
 
 
 if __name__ == "__main__":
@@ -8,3 +8,4 @@ from app.models.polishing import PolishingDetails  # noqa: F401
 from app.models.return_ import Return, ReturnReason, ReturnReasonLink  # noqa: F401
 from app.models.history import HistoryEvent  # noqa: F401
 from app.models.notification import Notification  # noqa: F401
+from app.models.idempotency import IdempotencyKey  # noqa: F401
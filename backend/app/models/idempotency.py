@@ -0,0 +1,21 @@
+"""
+Модель сохранённых ответов по Idempotency-Key.
+"""
+from datetime import datetime
+from sqlalchemy import DateTime, Integer, LargeBinary, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+from app.core.utils import now_moscow
+
+
+class IdempotencyKey(Base):
+    """Ключ идемпотентности POST-запроса и сохранённый ответ (status_code NULL — в работе)."""
+    __tablename__ = "idempotency_keys"
+
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=False)
+    status_code: Mapped[int] = mapped_column(Integer, nullable=True)
+    content_type: Mapped[str] = mapped_column(String, nullable=True)
+    response_body: Mapped[bytes] = mapped_column(LargeBinary, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=now_moscow, index=True)
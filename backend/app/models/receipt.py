@@ -16,4 +16,4 @@ class Receipt(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     receipt_number: Mapped[str] = mapped_column(String, unique=True, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=now_moscow)
-    current_deadline: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    current_deadline: Mapped[datetime] = mapped_column(DateTime, nullable=True, index=True)
@@ -0,0 +1,50 @@
+"""
+Pydantic схемы служебных (admin) эндпоинтов.
+"""
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class SlowQueryResponse(BaseModel):
+    """Медленные SQL-запросы одной формы."""
+    shape: str
+    params: str
+    count: int
+    total_ms: float
+    avg_ms: float
+    max_ms: float
+    first_seen: datetime
+    last_seen: datetime
+    origins: dict[str, int]
+    explain: Optional[str] = None
+    explain_status: Optional[str] = None
+
+
+class SlowQueryListResponse(BaseModel):
+    """Топ медленных запросов по суммарному времени."""
+    items: list[SlowQueryResponse]
+    total: int
+    skip: int
+    limit: int
+    threshold_ms: float
+
+
+class RequestProfileResponse(BaseModel):
+    """Профиль одного HTTP-запроса (без стеков)."""
+    id: str
+    method: str
+    route: str
+    status: int
+    duration_ms: float
+    samples: int
+    created_at: datetime
+
+
+class RequestProfileListResponse(BaseModel):
+    """Сохранённые профили запросов."""
+    items: list[RequestProfileResponse]
+    total: int
+    skip: int
+    limit: int
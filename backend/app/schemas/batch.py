@@ -0,0 +1,53 @@
+"""
+Pydantic схемы для пакетных операций над несколькими квитанциями.
+"""
+from datetime import datetime
+from typing import Literal, Optional
+
+from pydantic import BaseModel, Field
+
+# Максимум квитанций в одном пакетном запросе
+MAX_BATCH_SIZE = 100
+
+
+class BatchRequestBase(BaseModel):
+    """Базовая схема пакетного запроса: номера квитанций и автор."""
+    receipt_numbers: list[str] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+    telegram_id: Optional[int] = None
+    telegram_username: Optional[str] = None
+
+
+class BatchAssignMasterRequest(BatchRequestBase):
+    """Выдача нескольких часов одному мастеру (дедлайн — только в будущем)."""
+    master_id: int
+    is_urgent: bool = False
+    deadline: Optional[datetime] = None
+
+
+class BatchOtkPassRequest(BatchRequestBase):
+    """Отметка прохождения ОТК для нескольких часов."""
+
+
+class BatchPolishingRequest(BatchRequestBase):
+    """Передача нескольких часов одному полировщику."""
+    polisher_id: int
+    metal_type: str
+    bracelet: bool = False
+    difficult: bool = False
+    comment: Optional[str] = None
+
+
+class BatchItemResult(BaseModel):
+    """Результат операции для одной квитанции."""
+    receipt_number: str
+    receipt_id: Optional[int] = None
+    status: Literal["ok", "error"]
+    created: bool = False
+    detail: Optional[str] = None
+
+
+class BatchResultResponse(BaseModel):
+    """Результаты пакетной операции по каждой квитанции."""
+    results: list[BatchItemResult]
+    succeeded: int
+    failed: int
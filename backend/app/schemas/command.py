@@ -0,0 +1,84 @@
+"""
+Pydantic схемы для пакета команд над квитанциями (/receipts/commands).
+"""
+from datetime import datetime
+from typing import Annotated, Literal, Optional, Union
+
+from pydantic import BaseModel, Field
+
+from app.schemas.batch import MAX_BATCH_SIZE
+
+
+class AssignMasterCommand(BaseModel):
+    """Выдать часы мастеру (sent_to_master; при срочности — смена дедлайна)."""
+    type: Literal["assign_master"]
+    receipt_id: int
+    master_id: int
+    is_urgent: bool = False
+    deadline: Optional[datetime] = None
+
+
+class SetDeadlineCommand(BaseModel):
+    """Сменить дедлайн (deadline_changed, только в будущем); None — снять дедлайн."""
+    type: Literal["set_deadline"]
+    receipt_id: int
+    deadline: Optional[datetime] = None
+
+
+class OtkPassCommand(BaseModel):
+    """Отметить прохождение ОТК (passed_otk)."""
+    type: Literal["otk_pass"]
+    receipt_id: int
+
+
+class AddCommentCommand(BaseModel):
+    """Добавить комментарий в историю (comment_added)."""
+    type: Literal["add_comment"]
+    receipt_id: int
+    comment: str = Field(..., min_length=1)
+
+
+class SendToPolishingCommand(BaseModel):
+    """Передать часы в полировку (polishing_sent)."""
+    type: Literal["send_to_polishing"]
+    receipt_id: int
+    polisher_id: int
+    metal_type: str
+    bracelet: bool = False
+    difficult: bool = False
+    comment: Optional[str] = None
+
+
+ReceiptCommand = Annotated[
+    Union[
+        AssignMasterCommand,
+        SetDeadlineCommand,
+        OtkPassCommand,
+        AddCommentCommand,
+        SendToPolishingCommand,
+    ],
+    Field(discriminator="type"),
+]
+
+
+class ReceiptCommandsRequest(BaseModel):
+    """Упорядоченный список команд, выполняемых одной транзакцией."""
+    commands: list[ReceiptCommand] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+    telegram_id: Optional[int] = None
+    telegram_username: Optional[str] = None
+
+
+class CommandResult(BaseModel):
+    """Результат применённой команды."""
+    index: int
+    type: str
+    receipt_id: int
+    status: Literal["ok"] = "ok"
+
+
+class ReceiptCommandsResponse(BaseModel):
+    """
+    Результаты по каждой команде применённого пакета. Отклонённый пакет —
+    ошибка 400/404/409 {"detail", "error_code"}, ни одна команда не применена.
+    """
+    results: list[CommandResult]
@@ -74,6 +74,29 @@ class ReceiptListResponse(BaseModel):
     limit: int = 100
 
 
+class UrgentReceiptListResponse(ReceiptListResponse):
+    """Страница списка срочных часов (курсорная пагинация)."""
+    next_cursor: Optional[str] = None
+
+
+class ReceiptImportError(BaseModel):
+    """Строка CSV, не принятая при импорте."""
+    line: int
+    receipt_number: Optional[str] = None
+    detail: str
+
+
+class ReceiptImportResponse(BaseModel):
+    """Итог импорта квитанций из CSV."""
+    rows: int = 0
+    created: int = 0
+    skipped: int = 0
+    failed: int = 0
+    notifications: int = 0
+    # Первые ошибки (не более IMPORT_MAX_ERRORS), полное число — в failed
+    errors: list[ReceiptImportError] = []
+
+
 class ReceiptWithHistoryResponse(ReceiptResponse):
     """Схема квитанции с историей."""
     history: list["HistoryEventResponse"] = []
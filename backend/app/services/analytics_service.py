@@ -6,12 +6,13 @@ from datetime import datetime, timedelta
 from typing import Optional
 
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, case, extract, DateTime
+from sqlalchemy import func, and_, case, extract, select, DateTime
 
 from app.models.operation import Operation, OperationType
 from app.models.return_ import Return, ReturnReason, ReturnReasonLink
 from app.models.polishing import PolishingDetails
 from app.models.employee import Employee
+from app.models.history import HistoryEvent
 from app.core.utils import now_moscow
 
 logger = logging.getLogger(__name__)
@@ -39,6 +40,17 @@ class AnalyticsService:
             return today_start.replace(day=1)
         return None
 
+    def data_version(self) -> tuple:
+        """
+        Версия данных аналитики для ETag — последние id строк, из которых
+        строятся отчёты (одним запросом). Возврат из полировки и прочие
+        изменения без новых строк отражаются через history_events.
+        """
+        sources = (Operation.id, Return.id, ReturnReasonLink.id, HistoryEvent.id, Employee.id)
+        return tuple(
+            self.db.query(*(select(func.max(col)).scalar_subquery() for col in sources)).one()
+        )
+
     # ---- Issue #28: качество сборки ----
 
     def assembly_quality(
@@ -0,0 +1,156 @@
+"""
+Сервис пакетных операций над несколькими квитанциями.
+
+Квитанции находятся или создаются одним запросом, операции и история
+пишутся в одной транзакции (коммит — в get_db). Ошибка по отдельной
+квитанции не отменяет остальные — она возвращается в её результате
+(для полировки — через savepoint на квитанцию).
+"""
+import logging
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.exceptions import NotFoundException, ValidationException
+from app.core.utils import now_moscow, sanitize_text, to_moscow_naive
+from app.models.employee import Employee
+from app.schemas.batch import (
+    BatchAssignMasterRequest,
+    BatchItemResult,
+    BatchOtkPassRequest,
+    BatchPolishingRequest,
+    BatchResultResponse,
+)
+from app.services.history_service import HistoryService
+from app.services.notification_service import NotificationService
+from app.services.polishing_service import PolishingService
+from app.services.receipt_service import ReceiptService
+
+logger = logging.getLogger(__name__)
+
+
+def _summary(results: list[BatchItemResult]) -> BatchResultResponse:
+    succeeded = sum(1 for r in results if r.status == "ok")
+    return BatchResultResponse(
+        results=results, succeeded=succeeded, failed=len(results) - succeeded
+    )
+
+
+class BatchService:
+    """Сервис пакетных операций."""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.receipt_service = ReceiptService(db)
+        self.history_service = HistoryService(db)
+        self.polishing_service = PolishingService(db)
+
+    def _get_employee(self, employee_id: int, resource: str) -> Employee:
+        employee = self.db.query(Employee).filter(Employee.id == employee_id).first()
+        if not employee:
+            raise NotFoundException(resource, employee_id)
+        return employee
+
+    def assign_to_master(self, data: BatchAssignMasterRequest) -> BatchResultResponse:
+        """
+        Выдать несколько часов мастеру (history_event: sent_to_master).
+        Срочный дедлайн пишется всем квитанциям одним flush, уведомления
+        перепланируются после него.
+        """
+        deadline = to_moscow_naive(data.deadline)
+        if deadline is not None and deadline <= now_moscow():
+            raise ValidationException(f"Дедлайн {deadline:%d.%m.%Y %H:%M} уже прошёл")
+        master = self._get_employee(data.master_id, "Мастер")
+        receipts = self.receipt_service.get_or_create_many(
+            data.receipt_numbers, data.telegram_id, data.telegram_username
+        )
+        set_deadline = data.is_urgent and deadline is not None
+
+        results = []
+        for number, (receipt, created) in receipts.items():
+            if set_deadline:
+                self.receipt_service.record_deadline(
+                    receipt, deadline, data.telegram_id, data.telegram_username
+                )
+            self.receipt_service.record_sent_to_master(
+                receipt.id,
+                master,
+                data.is_urgent,
+                deadline,
+                data.telegram_id,
+                data.telegram_username,
+            )
+            results.append(BatchItemResult(
+                receipt_number=number, receipt_id=receipt.id, status="ok", created=created
+            ))
+
+        self.db.flush()
+        if set_deadline:
+            notification_service = NotificationService(self.db)
+            for receipt, _ in receipts.values():
+                notification_service.schedule_notifications(receipt.id, deadline)
+        logger.info("Batch assigned %s receipts to master %s", len(results), data.master_id)
+        return _summary(results)
+
+    def otk_pass(self, data: BatchOtkPassRequest) -> BatchResultResponse:
+        """Отметить прохождение ОТК для нескольких часов (history_event: passed_otk)."""
+        receipts = self.receipt_service.get_or_create_many(
+            data.receipt_numbers, data.telegram_id, data.telegram_username
+        )
+
+        results = []
+        for number, (receipt, created) in receipts.items():
+            self.history_service.add(
+                receipt.id, "passed_otk", {}, data.telegram_id, data.telegram_username
+            )
+            results.append(BatchItemResult(
+                receipt_number=number, receipt_id=receipt.id, status="ok", created=created
+            ))
+
+        self.db.flush()
+        logger.info("Batch OTK pass for %s receipts", len(results))
+        return _summary(results)
+
+    def send_to_polishing(self, data: BatchPolishingRequest) -> BatchResultResponse:
+        """
+        Передать несколько часов полировщику (history_event: polishing_sent).
+        Квитанции, уже бывшие в полировке, возвращаются с ошибкой.
+        """
+        polisher = self._get_employee(data.polisher_id, "Полировщик")
+        receipts = self.receipt_service.get_or_create_many(
+            data.receipt_numbers, data.telegram_id, data.telegram_username
+        )
+        comment = sanitize_text(data.comment)
+
+        results = []
+        for number, (receipt, created) in receipts.items():
+            # Повторную передачу отсекает первичный ключ polishing_details:
+            # откатывается только savepoint этой квитанции
+            try:
+                with self.db.begin_nested():
+                    self.polishing_service.add_polishing(
+                        receipt_id=receipt.id,
+                        polisher=polisher,
+                        metal_type=data.metal_type,
+                        bracelet=data.bracelet,
+                        difficult=data.difficult,
+                        comment=comment,
+                        telegram_id=data.telegram_id,
+                        telegram_username=data.telegram_username,
+                    )
+            except IntegrityError:
+                results.append(BatchItemResult(
+                    receipt_number=number,
+                    receipt_id=receipt.id,
+                    status="error",
+                    created=created,
+                    detail=f"Квитанция {number} уже в полировке",
+                ))
+                continue
+            results.append(BatchItemResult(
+                receipt_number=number, receipt_id=receipt.id, status="ok", created=created
+            ))
+
+        self.db.flush()
+        logger.info("Batch sent %s receipts to polisher %s", len(results), data.polisher_id)
+        return _summary(results)
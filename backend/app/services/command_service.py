@@ -0,0 +1,220 @@
+"""
+Сервис пакета команд над квитанциями: несколько шагов сценария бота
+(выдача мастеру, дедлайн, ОТК, комментарий, полировка) за один запрос.
+
+Все квитанции, сотрудники и записи полировки загружаются тремя запросами
+до выполнения. Команды сначала проверяются по загруженным данным (с учётом
+предыдущих команд пакета): при любой ошибке пакет отклоняется целиком,
+ничего не пишется, а ответ — ошибка с причинами по каждой команде в detail:
+400 VALIDATION_ERROR (дедлайн в прошлом, пустой комментарий), иначе
+404 NOT_FOUND (квитанция или сотрудник), иначе 409 DUPLICATE (уже
+в полировке). Затем команды применяются по порядку, история пишется
+одним flush, уведомления перепланируются один раз на квитанцию по
+итоговому дедлайну. Коммит — в get_db.
+"""
+import logging
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.exceptions import AppException, DuplicateError, ValidationException
+from app.core.utils import now_moscow, sanitize_text, to_moscow_naive
+from app.models.employee import Employee
+from app.models.polishing import PolishingDetails
+from app.models.receipt import Receipt
+from app.schemas.command import (
+    AddCommentCommand,
+    AssignMasterCommand,
+    CommandResult,
+    OtkPassCommand,
+    ReceiptCommand,
+    ReceiptCommandsRequest,
+    ReceiptCommandsResponse,
+    SendToPolishingCommand,
+    SetDeadlineCommand,
+)
+from app.services.history_service import HistoryService
+from app.services.notification_service import NotificationService
+from app.services.polishing_service import PolishingService
+from app.services.receipt_service import ReceiptService
+
+logger = logging.getLogger(__name__)
+
+# Вид ошибки команды → исключение для пакета (по порядку приоритета)
+VALIDATION, NOT_FOUND, DUPLICATE = "validation", "not_found", "duplicate"
+
+
+class ReceiptCommandService:
+    """Выполнение пакета команд над квитанциями в одной транзакции."""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.receipt_service = ReceiptService(db)
+        self.history_service = HistoryService(db)
+        self.polishing_service = PolishingService(db)
+        self.receipts: dict[int, Receipt] = {}
+        self.employees: dict[int, Employee] = {}
+        self.polished: set[int] = set()
+        # Итоговый дедлайн по квитанциям, где он менялся
+        self.deadlines: dict[int, Optional[datetime]] = {}
+
+    def execute(self, data: ReceiptCommandsRequest) -> ReceiptCommandsResponse:
+        self._normalize(data.commands)
+        self._preload(data.commands)
+
+        errors = self._validate(data.commands)
+        if errors:
+            logger.info("Receipt commands rejected: %s of %s failed", len(errors), len(data.commands))
+            self._reject(data.commands, errors)
+
+        for command in data.commands:
+            self._apply(command, data.telegram_id, data.telegram_username)
+        self.db.flush()
+
+        notification_service = NotificationService(self.db)
+        for receipt_id, deadline in self.deadlines.items():
+            if deadline:
+                notification_service.schedule_notifications(receipt_id, deadline)
+            else:
+                notification_service.cancel_notifications(receipt_id)
+
+        logger.info("Receipt commands applied: %s", len(data.commands))
+        return ReceiptCommandsResponse(
+            results=[
+                CommandResult(index=index, type=command.type, receipt_id=command.receipt_id)
+                for index, command in enumerate(data.commands)
+            ],
+        )
+
+    @staticmethod
+    def _normalize(commands: list[ReceiptCommand]) -> None:
+        """
+        Очистка комментариев (sanitize_text) и дедлайны со смещением — в московское
+        naive время, как now_moscow(). Дальше везде используются эти значения.
+        """
+        for command in commands:
+            if isinstance(command, (AddCommentCommand, SendToPolishingCommand)):
+                command.comment = sanitize_text(command.comment)
+            if isinstance(command, (AssignMasterCommand, SetDeadlineCommand)):
+                command.deadline = to_moscow_naive(command.deadline)
+
+    def _preload(self, commands: list[ReceiptCommand]) -> None:
+        """Квитанции, сотрудники и уже переданные в полировку — по одному запросу."""
+        receipt_ids = {command.receipt_id for command in commands}
+        employee_ids = {
+            command.master_id if isinstance(command, AssignMasterCommand) else command.polisher_id
+            for command in commands
+            if isinstance(command, (AssignMasterCommand, SendToPolishingCommand))
+        }
+        self.receipts = {
+            receipt.id: receipt
+            for receipt in self.db.query(Receipt).filter(Receipt.id.in_(receipt_ids))
+        }
+        if employee_ids:
+            self.employees = {
+                employee.id: employee
+                for employee in self.db.query(Employee).filter(Employee.id.in_(employee_ids))
+            }
+        if any(isinstance(command, SendToPolishingCommand) for command in commands):
+            self.polished = {
+                receipt_id
+                for (receipt_id,) in self.db.query(PolishingDetails.receipt_id)
+                .filter(PolishingDetails.receipt_id.in_(receipt_ids))
+            }
+
+    def _validate(self, commands: list[ReceiptCommand]) -> dict[int, tuple[str, str]]:
+        """Ошибки по индексам команд: (вид, причина); пустой dict — пакет можно применять."""
+        errors: dict[int, tuple[str, str]] = {}
+        polished = set(self.polished)
+        now = now_moscow()
+        for index, command in enumerate(commands):
+            deadline = getattr(command, "deadline", None)
+            if deadline is not None and deadline <= now:
+                errors[index] = (VALIDATION, f"Дедлайн {deadline:%d.%m.%Y %H:%M} уже прошёл")
+            elif isinstance(command, AddCommentCommand) and not command.comment:
+                errors[index] = (VALIDATION, "Пустой комментарий")
+            elif command.receipt_id not in self.receipts:
+                errors[index] = (NOT_FOUND, f"Квитанция с id {command.receipt_id} не найдена")
+            elif isinstance(command, AssignMasterCommand) and command.master_id not in self.employees:
+                errors[index] = (NOT_FOUND, f"Мастер с id {command.master_id} не найден")
+            elif isinstance(command, SendToPolishingCommand):
+                if command.polisher_id not in self.employees:
+                    errors[index] = (NOT_FOUND, f"Полировщик с id {command.polisher_id} не найден")
+                elif command.receipt_id in polished:
+                    errors[index] = (DUPLICATE, f"Квитанция {command.receipt_id} уже в полировке")
+                else:
+                    polished.add(command.receipt_id)
+        return errors
+
+    @staticmethod
+    def _reject(commands: list[ReceiptCommand], errors: dict[int, tuple[str, str]]) -> None:
+        """Отклоняет пакет: причины всех невыполнимых команд — в detail."""
+        detail = "; ".join(
+            f"команда {index} ({commands[index].type}): {reason}"
+            for index, (_, reason) in sorted(errors.items())
+        )
+        kinds = {kind for kind, _ in errors.values()}
+        if VALIDATION in kinds:
+            raise ValidationException(detail)
+        if NOT_FOUND in kinds:
+            raise AppException(404, detail, "NOT_FOUND")
+        raise DuplicateError(detail)
+
+    def _set_deadline(
+        self,
+        receipt: Receipt,
+        deadline: Optional[datetime],
+        telegram_id: Optional[int],
+        telegram_username: Optional[str],
+    ) -> None:
+        """Как ReceiptService.update_deadline, но уведомления — после всех команд."""
+        self.deadlines[receipt.id] = deadline
+        self.receipt_service.record_deadline(receipt, deadline, telegram_id, telegram_username)
+
+    def _apply(
+        self,
+        command: ReceiptCommand,
+        telegram_id: Optional[int],
+        telegram_username: Optional[str],
+    ) -> None:
+        receipt = self.receipts[command.receipt_id]
+
+        if isinstance(command, SetDeadlineCommand):
+            self._set_deadline(receipt, command.deadline, telegram_id, telegram_username)
+
+        elif isinstance(command, AssignMasterCommand):
+            if command.is_urgent and command.deadline:
+                self._set_deadline(receipt, command.deadline, telegram_id, telegram_username)
+            self.receipt_service.record_sent_to_master(
+                receipt.id,
+                self.employees[command.master_id],
+                command.is_urgent,
+                command.deadline,
+                telegram_id,
+                telegram_username,
+            )
+
+        elif isinstance(command, OtkPassCommand):
+            self.history_service.add(receipt.id, "passed_otk", {}, telegram_id, telegram_username)
+
+        elif isinstance(command, AddCommentCommand):
+            self.history_service.add(
+                receipt.id,
+                "comment_added",
+                {"comment": command.comment},
+                telegram_id,
+                telegram_username,
+            )
+
+        elif isinstance(command, SendToPolishingCommand):
+            self.polishing_service.add_polishing(
+                receipt_id=receipt.id,
+                polisher=self.employees[command.polisher_id],
+                metal_type=command.metal_type,
+                bracelet=command.bracelet,
+                difficult=command.difficult,
+                comment=command.comment,
+                telegram_id=telegram_id,
+                telegram_username=telegram_username,
+            )
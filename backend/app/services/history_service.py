@@ -7,6 +7,7 @@ from typing import Optional
 from sqlalchemy.orm import Session
 from sqlalchemy import asc, desc, func
 
+from app.core.fieldsets import FieldSet, load_columns
 from app.models.history import HistoryEvent
 from app.schemas.history import HistoryEventCreate
 
@@ -28,10 +29,11 @@ class HistoryService:
         receipt_id: int,
         skip: int = 0,
         limit: int = 100,
+        fields: FieldSet = None,
     ) -> list[HistoryEvent]:
-        """Получить историю событий по квитанции."""
+        """Получить историю событий по квитанции (fields — только эти колонки)."""
         return (
-            self.db.query(HistoryEvent)
+            load_columns(self.db.query(HistoryEvent), HistoryEvent, fields)
             .filter(HistoryEvent.receipt_id == receipt_id)
             .order_by(asc(HistoryEvent.created_at))
             .offset(skip)
@@ -47,6 +49,18 @@ class HistoryService:
             .scalar()
         )
 
+    def receipt_version(self, receipt_id: int) -> tuple[Optional[int], int]:
+        """
+        Версия истории квитанции для ETag: (max id события, количество).
+        История только дополняется, поэтому новое событие всегда меняет версию.
+        """
+        max_id, count = (
+            self.db.query(func.max(HistoryEvent.id), func.count(HistoryEvent.id))
+            .filter(HistoryEvent.receipt_id == receipt_id)
+            .one()
+        )
+        return max_id, count
+
     def count_all(self, event_type: str | None = None) -> int:
         """Получить общее количество событий с опциональной фильтрацией."""
         query = self.db.query(func.count(HistoryEvent.id))
@@ -59,9 +73,10 @@ class HistoryService:
         skip: int = 0,
         limit: int = 100,
         event_type: Optional[str] = None,
+        fields: FieldSet = None,
     ) -> list[HistoryEvent]:
         """Получить все события истории с возможной фильтрацией по типу."""
-        query = self.db.query(HistoryEvent)
+        query = load_columns(self.db.query(HistoryEvent), HistoryEvent, fields)
         
         if event_type:
             query = query.filter(HistoryEvent.event_type == event_type)
@@ -73,17 +88,31 @@ class HistoryService:
             .all()
         )
     
+    def add(
+        self,
+        receipt_id: int,
+        event_type: str,
+        payload: dict,
+        telegram_id: Optional[int] = None,
+        telegram_username: Optional[str] = None,
+    ) -> HistoryEvent:
+        """Добавить событие в сессию без flush — для записи вместе с другими изменениями."""
+        event = HistoryEvent(
+            receipt_id=receipt_id,
+            event_type=event_type,
+            payload=payload,
+            telegram_id=telegram_id,
+            telegram_username=telegram_username,
+        )
+        self.db.add(event)
+        return event
+
     def create(self, data: HistoryEventCreate) -> HistoryEvent:
         """Создать новое событие истории."""
         logger.info("Creating history event: receipt_id=%s, type=%s", data.receipt_id, data.event_type)
-        event = HistoryEvent(
-            receipt_id=data.receipt_id,
-            event_type=data.event_type,
-            payload=data.payload,
-            telegram_id=data.telegram_id,
-            telegram_username=data.telegram_username,
+        event = self.add(
+            data.receipt_id, data.event_type, data.payload, data.telegram_id, data.telegram_username
         )
-        self.db.add(event)
         self.db.flush()
         self.db.refresh(event)
         return event
@@ -0,0 +1,81 @@
+"""
+Сервис ключей идемпотентности: резервирование ключа, сохранение и выдача ответа.
+"""
+import logging
+from datetime import timedelta
+from typing import Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.utils import now_moscow
+from app.models.idempotency import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+
+class IdempotencyKeyBusy(Exception):
+    """Ключ уже зарезервирован параллельным запросом."""
+
+
+class IdempotencyService:
+    """Хранение ответов POST-запросов по Idempotency-Key (TTL — IDEMPOTENCY_TTL)."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _cutoff(self):
+        return now_moscow() - timedelta(seconds=settings.IDEMPOTENCY_TTL)
+
+    def reserve(self, key: str, fingerprint: str) -> Optional[IdempotencyKey]:
+        """
+        Возвращает действующую запись по ключу или резервирует ключ (запись
+        без ответа) и возвращает None — тогда запрос нужно выполнить.
+        Одновременная вставка того же ключа — IdempotencyKeyBusy.
+        """
+        record = (
+            self.db.query(IdempotencyKey)
+            .filter(IdempotencyKey.key == key, IdempotencyKey.created_at >= self._cutoff())
+            .first()
+        )
+        if record is not None:
+            return record
+
+        # Просроченная запись с тем же ключом больше не действует
+        self.db.query(IdempotencyKey).filter(IdempotencyKey.key == key).delete()
+        self.db.add(IdempotencyKey(key=key, fingerprint=fingerprint))
+        try:
+            self.db.flush()
+        except IntegrityError:
+            self.db.rollback()
+            raise IdempotencyKeyBusy(key)
+        return None
+
+    def complete(self, key: str, status_code: int, content_type: Optional[str], body: bytes) -> None:
+        """Сохраняет ответ для повторов с тем же ключом."""
+        self.db.query(IdempotencyKey).filter(IdempotencyKey.key == key).update({
+            "status_code": status_code,
+            "content_type": content_type,
+            "response_body": body,
+        })
+        self.db.flush()
+
+    def release(self, key: str) -> None:
+        """Снимает резерв (ответ не сохранён) — повтор выполнит запрос заново."""
+        self.db.query(IdempotencyKey).filter(
+            IdempotencyKey.key == key, IdempotencyKey.status_code.is_(None)
+        ).delete()
+        self.db.flush()
+
+    def purge_expired(self) -> int:
+        """Удаляет записи старше TTL."""
+        count = (
+            self.db.query(IdempotencyKey)
+            .filter(IdempotencyKey.created_at < self._cutoff())
+            .delete()
+        )
+        self.db.flush()
+        if count:
+            logger.info("Purged %s expired idempotency keys", count)
+        return count
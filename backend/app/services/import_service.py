@@ -0,0 +1,223 @@
+"""
+Сервис импорта квитанций из CSV (подключение мастерской, сверка с фронт-офисом).
+
+CSV: receipt_number[,deadline], заголовок необязателен. Дедлайн — ISO 8601
+или «дд.мм.гггг[ чч:мм]», только в будущем (прошедший — ошибка строки). Файл обрабатывается пачками (IMPORT_CHUNK_SIZE
+строк): на пачку один SELECT существующих номеров и по одному bulk INSERT
+квитанций, событий receipt_created и уведомлений — память не растёт
+с размером файла. Уже существующие и повторные номера пропускаются.
+Коммит — в get_db (API) или в CLI: весь импорт — одна транзакция.
+"""
+import codecs
+import csv
+import logging
+from datetime import datetime
+from typing import AsyncIterable, AsyncIterator, Iterable, NamedTuple, Optional
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.exceptions import DuplicateError, ValidationException
+from app.core.utils import now_moscow, sanitize_text, to_moscow_naive
+from app.models.history import HistoryEvent
+from app.models.notification import Notification
+from app.models.receipt import Receipt
+from app.schemas.receipt import ReceiptImportError, ReceiptImportResponse
+from app.services.notification_service import plan_notifications
+
+logger = logging.getLogger(__name__)
+
+DEADLINE_FORMATS = ("%d.%m.%Y %H:%M", "%d.%m.%Y")
+
+
+class ImportRow(NamedTuple):
+    """Строка CSV: номер строки в файле, номер квитанции, дедлайн (как в файле)."""
+    line: int
+    receipt_number: str
+    deadline: Optional[str]
+
+
+class ReceiptCsvReader:
+    """Разбор CSV по частям: заголовок и нумерация строк сохраняются между пачками."""
+
+    def __init__(self):
+        self.line = 0
+        self.columns: Optional[tuple[int, Optional[int]]] = None
+
+    def feed(self, lines: Iterable[str]) -> list[ImportRow]:
+        rows = []
+        for cells in csv.reader(lines):
+            self.line += 1
+            if not cells or not any(cell.strip() for cell in cells):
+                continue
+            if self.columns is None:
+                header = [cell.strip().lower() for cell in cells]
+                if "receipt_number" in header:
+                    deadline = header.index("deadline") if "deadline" in header else None
+                    self.columns = (header.index("receipt_number"), deadline)
+                    continue
+                self.columns = (0, 1)
+            number_col, deadline_col = self.columns
+            rows.append(ImportRow(
+                line=self.line,
+                receipt_number=cells[number_col] if number_col < len(cells) else "",
+                deadline=(
+                    cells[deadline_col]
+                    if deadline_col is not None and deadline_col < len(cells)
+                    else None
+                ),
+            ))
+        return rows
+
+
+def parse_deadline(value: Optional[str]) -> Optional[datetime]:
+    """
+    Дедлайн из CSV; пустое значение — без дедлайна. ValueError — формат не распознан.
+    Время со смещением (ISO 8601 с +03:00, Z) переводится в московское naive,
+    как now_moscow(); без смещения считается московским.
+    """
+    if value is None or not value.strip():
+        return None
+    value = value.strip()
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        pass
+    else:
+        return to_moscow_naive(parsed)
+    for fmt in DEADLINE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise ValueError(f"Не удалось разобрать дедлайн «{value}»")
+
+
+async def iter_line_batches(
+    chunks: AsyncIterable[bytes], size: int
+) -> AsyncIterator[list[str]]:
+    """Потоковое тело запроса (UTF-8, допускается BOM) → пачки по size строк."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    tail = ""
+    batch: list[str] = []
+    try:
+        async for chunk in chunks:
+            *lines, tail = (tail + decoder.decode(chunk)).split("\n")
+            for line in lines:
+                batch.append(line)
+                if len(batch) >= size:
+                    yield batch
+                    batch = []
+        tail += decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise ValidationException("CSV должен быть в кодировке UTF-8")
+    if tail:
+        batch.append(tail)
+    if batch:
+        yield batch
+
+
+class ReceiptImportService:
+    """Импорт квитанций пачками с bulk INSERT."""
+
+    def __init__(
+        self,
+        db: Session,
+        telegram_id: Optional[int] = None,
+        telegram_username: Optional[str] = None,
+    ):
+        self.db = db
+        self.telegram_id = telegram_id
+        self.telegram_username = telegram_username
+        self.reader = ReceiptCsvReader()
+        self.result = ReceiptImportResponse()
+
+    def _error(self, row: ImportRow, detail: str) -> None:
+        self.result.failed += 1
+        if len(self.result.errors) < settings.IMPORT_MAX_ERRORS:
+            self.result.errors.append(ReceiptImportError(
+                line=row.line, receipt_number=row.receipt_number or None, detail=detail
+            ))
+
+    def import_lines(self, lines: Iterable[str]) -> None:
+        """Разбирает и импортирует очередную пачку строк CSV."""
+        self.import_rows(self.reader.feed(lines))
+
+    def import_rows(self, rows: list[ImportRow]) -> None:
+        """Импортирует одну пачку строк: один SELECT и bulk INSERT'ы."""
+        self.result.rows += len(rows)
+        pending: dict[str, Optional[datetime]] = {}
+        now = now_moscow()
+        for row in rows:
+            number = sanitize_text(row.receipt_number, max_length=100)
+            if not number:
+                self._error(row, "Пустой номер квитанции")
+                continue
+            try:
+                deadline = parse_deadline(row.deadline)
+            except ValueError as e:
+                self._error(row, str(e))
+                continue
+            if deadline is not None and deadline <= now:
+                self._error(row, f"Дедлайн {deadline:%d.%m.%Y %H:%M} уже прошёл")
+                continue
+            if number in pending:
+                self.result.skipped += 1
+                continue
+            pending[number] = deadline
+
+        if not pending:
+            return
+        existing = set(self.db.scalars(
+            select(Receipt.receipt_number).where(Receipt.receipt_number.in_(pending))
+        ))
+        self.result.skipped += len(existing)
+        new = {number: deadline for number, deadline in pending.items() if number not in existing}
+        if not new:
+            return
+
+        try:
+            created = self.db.execute(
+                insert(Receipt).returning(Receipt.id, Receipt.receipt_number),
+                [
+                    {"receipt_number": number, "current_deadline": deadline}
+                    for number, deadline in new.items()
+                ],
+            ).all()
+        except IntegrityError:
+            self.db.rollback()
+            logger.warning("Duplicate receipt numbers during import")
+            raise DuplicateError("Квитанции из файла уже созданы параллельным запросом")
+
+        self.db.execute(insert(HistoryEvent), [
+            {
+                "receipt_id": receipt_id,
+                "event_type": "receipt_created",
+                "payload": {
+                    "receipt_number": number,
+                    "deadline": new[number].isoformat() if new[number] else None,
+                    "source": "import",
+                },
+                "telegram_id": self.telegram_id,
+                "telegram_username": self.telegram_username,
+            }
+            for receipt_id, number in created
+        ])
+
+        notifications = [
+            {"receipt_id": receipt_id, "notification_type": kind, "scheduled_at": at}
+            for receipt_id, number in created
+            if new[number]
+            for kind, at in plan_notifications(new[number])
+        ]
+        if notifications:
+            self.db.execute(insert(Notification), notifications)
+
+        self.result.created += len(created)
+        self.result.notifications += len(notifications)
+        logger.info(
+            "Imported receipts chunk: created=%s, skipped=%s, notifications=%s",
+            len(created), len(pending) - len(created), len(notifications),
+        )
@@ -11,9 +11,36 @@ from sqlalchemy import and_
 from app.models.notification import Notification
 from app.models.receipt import Receipt
 from app.core.utils import now_moscow
+from app.core.metrics import registry
 
 logger = logging.getLogger(__name__)
 
+# Задержка доставки: sent_at - scheduled_at (секунды)
+DELIVERY_LAG = registry.histogram(
+    "notification_delivery_lag_seconds",
+    "Задержка отправки уведомления относительно scheduled_at",
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600),
+)
+BACKLOG_SIZE = registry.gauge(
+    "notification_backlog_size",
+    "Количество неотправленных уведомлений, время которых наступило",
+    multiprocess_mode="max",
+)
+
+
+def plan_notifications(deadline: datetime) -> list[tuple[str, datetime]]:
+    """
+    Уведомления для дедлайна: (тип, время отправки), только ещё не наступившие.
+    - deadline_today: в 10:00 в день дедлайна
+    - deadline_1h: за 1 час до дедлайна
+    """
+    now = now_moscow()
+    planned = [
+        ("deadline_today", deadline.replace(hour=10, minute=0, second=0, microsecond=0)),
+        ("deadline_1h", deadline - timedelta(hours=1)),
+    ]
+    return [(notification_type, at) for notification_type, at in planned if at > now]
+
 
 class NotificationService:
     """Сервис для управления уведомлениями."""
@@ -31,29 +58,15 @@ class NotificationService:
         # Сначала отменяем старые неотправленные уведомления
         self.cancel_notifications(receipt_id)
 
-        notifications = []
-
-        # Уведомление в 10:00 в день дедлайна
-        day_start = deadline.replace(hour=10, minute=0, second=0, microsecond=0)
-        if day_start > now_moscow():
-            notif_today = Notification(
-                receipt_id=receipt_id,
-                notification_type="deadline_today",
-                scheduled_at=day_start,
-            )
-            self.db.add(notif_today)
-            notifications.append(notif_today)
-
-        # Уведомление за 1 час до дедлайна
-        one_hour_before = deadline - timedelta(hours=1)
-        if one_hour_before > now_moscow():
-            notif_1h = Notification(
+        notifications = [
+            Notification(
                 receipt_id=receipt_id,
-                notification_type="deadline_1h",
-                scheduled_at=one_hour_before,
+                notification_type=notification_type,
+                scheduled_at=scheduled_at,
             )
-            self.db.add(notif_1h)
-            notifications.append(notif_1h)
+            for notification_type, scheduled_at in plan_notifications(deadline)
+        ]
+        self.db.add_all(notifications)
 
         self.db.flush()
         logger.info(f"Scheduled {len(notifications)} notifications for receipt {receipt_id}, deadline {deadline}")
@@ -80,7 +93,7 @@ class NotificationService:
     def get_pending(self) -> list[Notification]:
         """Получает неотправленные уведомления, время которых наступило."""
         now = now_moscow()
-        return (
+        pending = (
             self.db.query(Notification)
             .filter(
                 and_(
@@ -91,6 +104,8 @@ class NotificationService:
             )
             .all()
         )
+        BACKLOG_SIZE.set(len(pending))
+        return pending
 
     def mark_sent(self, notification_id: int) -> None:
         """Отмечает уведомление как отправленное."""
@@ -98,6 +113,9 @@ class NotificationService:
         if notif:
             notif.sent_at = now_moscow()
             self.db.flush()
+            lag = (notif.sent_at - notif.scheduled_at).total_seconds()
+            DELIVERY_LAG.observe(max(lag, 0.0))
+            logger.info("Notification %s marked sent, lag=%.1fs", notification_id, lag)
 
     def get_receipt_for_notification(self, receipt_id: int) -> Optional[Receipt]:
         """Получает квитанцию для уведомления."""
@@ -93,10 +93,11 @@ class OperationService:
         if not employee:
             raise NotFoundException("Сотрудник", data.employee_id)
 
+        # Связи задаём объектами: ответу не нужны ленивые запросы после flush
         operation = Operation(
             receipt_id=data.receipt_id,
-            operation_type_id=data.operation_type_id,
-            employee_id=data.employee_id,
+            operation_type=operation_type,
+            employee=employee,
         )
         self.db.add(operation)
         self.db.flush()  # Получаем ID до коммита
@@ -118,6 +119,5 @@ class OperationService:
         self.db.add(history_event)
         
         self.db.flush()
-        self.db.refresh(operation)
         logger.info("Operation created: id=%s", operation.id)
         return operation
@@ -14,6 +14,7 @@ from app.models.employee import Employee
 from app.models.receipt import Receipt
 from app.models.history import HistoryEvent
 from app.schemas.polishing import PolishingDetailsCreate
+from app.services.history_service import HistoryService
 from app.core.exceptions import NotFoundException, ValidationException
 from app.core.utils import sanitize_text, now_moscow
 
@@ -91,43 +92,67 @@ class PolishingService:
         if not polisher:
             raise NotFoundException("Полировщик", data.polisher_id)
 
-        polishing = PolishingDetails(
+        polishing = self.add_polishing(
             receipt_id=data.receipt_id,
-            polisher_id=data.polisher_id,
+            polisher=polisher,
             metal_type=data.metal_type,
             bracelet=data.bracelet,
             difficult=data.difficult,
             comment=sanitize_text(data.comment),
+            telegram_id=telegram_id,
+            telegram_username=telegram_username,
         )
-        self.db.add(polishing)
         try:
             self.db.flush()
         except IntegrityError:
             self.db.rollback()
             raise ValidationException(f"Квитанция {data.receipt_id} уже в полировке")
-        
-        # Логируем передачу в полировку
-        history_event = HistoryEvent(
-            receipt_id=data.receipt_id,
-            event_type="polishing_sent",
-            payload={
-                "polisher_id": data.polisher_id,
-                "polisher_name": polisher.name if polisher else None,
-                "metal_type": data.metal_type,
-                "bracelet": data.bracelet,
-                "difficult": data.difficult,
-                "comment": data.comment,
-            },
-            telegram_id=telegram_id,
-            telegram_username=telegram_username,
-        )
-        self.db.add(history_event)
-        
-        self.db.flush()
+
         self.db.refresh(polishing)
         logger.info("Polishing created: receipt_id=%s", data.receipt_id)
         return polishing
 
+    def add_polishing(
+        self,
+        receipt_id: int,
+        polisher: Employee,
+        metal_type: str,
+        bracelet: bool,
+        difficult: bool,
+        comment: Optional[str],
+        telegram_id: Optional[int] = None,
+        telegram_username: Optional[str] = None,
+    ) -> PolishingDetails:
+        """
+        Добавить запись полировки и событие polishing_sent без flush.
+        comment — уже очищенный sanitize_text. Повторная передача квитанции
+        нарушает первичный ключ — IntegrityError при flush у вызывающего.
+        """
+        polishing = PolishingDetails(
+            receipt_id=receipt_id,
+            polisher_id=polisher.id,
+            metal_type=metal_type,
+            bracelet=bracelet,
+            difficult=difficult,
+            comment=comment,
+        )
+        self.db.add(polishing)
+        HistoryService(self.db).add(
+            receipt_id,
+            "polishing_sent",
+            {
+                "polisher_id": polisher.id,
+                "polisher_name": polisher.name,
+                "metal_type": metal_type,
+                "bracelet": bracelet,
+                "difficult": difficult,
+                "comment": comment,
+            },
+            telegram_id,
+            telegram_username,
+        )
+        return polishing
+
     def mark_returned(
         self,
         receipt_id: int,
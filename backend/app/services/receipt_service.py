@@ -1,23 +1,65 @@
 """
 Сервис для работы с квитанциями.
 """
+import base64
+import binascii
 import logging
 from typing import Optional
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import desc, exists, and_, func
+from sqlalchemy import desc, exists, and_, or_, func
 
+from app.models.employee import Employee
 from app.models.receipt import Receipt
 from app.models.history import HistoryEvent
 from app.schemas.receipt import ReceiptCreate, ReceiptUpdate
+from app.services.history_service import HistoryService
 from app.services.notification_service import NotificationService
-from app.core.exceptions import DuplicateError
-from app.core.utils import sanitize_text
+from app.core.exceptions import DuplicateError, ValidationException
+from app.core.fieldsets import FieldSet, load_columns
+from app.core.utils import now_moscow, sanitize_text
 
 logger = logging.getLogger(__name__)
 
+# Окна по дедлайну для списка срочных часов
+URGENT_WINDOWS = ("overdue", "today", "week")
+
+
+def urgent_window_bounds(window: str) -> tuple[Optional[datetime], datetime]:
+    """
+    Границы окна [start, end) по дедлайну относительно текущего времени.
+    overdue — уже просроченные, today — до конца сегодняшнего дня,
+    week — до конца текущей недели (понедельник 00:00).
+    """
+    now = now_moscow()
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if window == "overdue":
+        return None, now
+    if window == "today":
+        return now, today_start + timedelta(days=1)
+    if window == "week":
+        return now, today_start + timedelta(days=7 - today_start.weekday())
+    raise ValidationException(
+        f"Неизвестное окно '{window}', допустимые: {', '.join(URGENT_WINDOWS)}"
+    )
+
+
+def encode_urgent_cursor(deadline: datetime, receipt_id: int) -> str:
+    """Курсор страницы срочных часов: последняя пара (current_deadline, id)."""
+    raw = f"{deadline.isoformat()}|{receipt_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_urgent_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        deadline, receipt_id = raw.split("|")
+        return datetime.fromisoformat(deadline), int(receipt_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValidationException("Некорректный курсор")
+
 
 class ReceiptService:
     """Сервис для управления квитанциями."""
@@ -33,11 +75,13 @@ class ReceiptService:
         """Получить квитанцию по номеру."""
         return self.db.query(Receipt).filter(Receipt.receipt_number == receipt_number).first()
     
-    def get_all(self, skip: int = 0, limit: int = 100) -> tuple[list[Receipt], int]:
-        """Получить список всех квитанций с общим количеством."""
+    def get_all(
+        self, skip: int = 0, limit: int = 100, fields: FieldSet = None
+    ) -> tuple[list[Receipt], int]:
+        """Получить список всех квитанций с общим количеством (fields — только эти колонки)."""
         total = self.db.query(func.count(Receipt.id)).scalar()
         items = (
-            self.db.query(Receipt)
+            load_columns(self.db.query(Receipt), Receipt, fields)
             .order_by(desc(Receipt.created_at))
             .offset(skip)
             .limit(limit)
@@ -45,11 +89,10 @@ class ReceiptService:
         )
         return items, total
     
-    def get_urgent(self) -> list[Receipt]:
+    def _urgent_query(self, window: Optional[str] = None, fields: FieldSet = None):
         """
-        Получить список срочных часов.
-        Согласно ТЗ Sprint 3: только часы с current_deadline, не прошедшие ОТК.
-        Один SQL-запрос с NOT EXISTS вместо N+1.
+        Запрос срочных часов: с current_deadline, не прошедшие ОТК, в окне window.
+        current_deadline грузится всегда — по нему сортировка и курсор страницы.
         """
         otk_exists = (
             exists()
@@ -61,16 +104,66 @@ class ReceiptService:
             )
         )
 
+        query = load_columns(
+            self.db.query(Receipt), Receipt, fields, required=("current_deadline",)
+        ).filter(
+            Receipt.current_deadline.isnot(None),
+            ~otk_exists,
+        )
+        if window is not None:
+            start, end = urgent_window_bounds(window)
+            if start is not None:
+                query = query.filter(Receipt.current_deadline >= start)
+            query = query.filter(Receipt.current_deadline < end)
+        return query
+
+    def get_urgent(self, window: Optional[str] = None, fields: FieldSet = None) -> list[Receipt]:
+        """
+        Получить список срочных часов.
+        Согласно ТЗ Sprint 3: только часы с current_deadline, не прошедшие ОТК.
+        Один SQL-запрос с NOT EXISTS вместо N+1.
+        """
         return (
-            self.db.query(Receipt)
-            .filter(
-                Receipt.current_deadline.isnot(None),
-                ~otk_exists,
+            self._urgent_query(window, fields)
+            .order_by(Receipt.current_deadline, Receipt.id)
+            .all()
+        )
+
+    def get_urgent_page(
+        self,
+        window: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = 10,
+        fields: FieldSet = None,
+    ) -> tuple[list[Receipt], int, Optional[str]]:
+        """
+        Страница срочных часов с keyset-пагинацией по (current_deadline, id).
+        Возвращает (страница, всего в окне, курсор следующей страницы или None).
+        """
+        query = self._urgent_query(window, fields)
+        total = query.count()
+
+        if cursor is not None:
+            after_deadline, after_id = decode_urgent_cursor(cursor)
+            query = query.filter(
+                or_(
+                    Receipt.current_deadline > after_deadline,
+                    and_(Receipt.current_deadline == after_deadline, Receipt.id > after_id),
+                )
             )
-            .order_by(Receipt.current_deadline)
+        # Берём на одну запись больше, чтобы понять, есть ли следующая страница
+        rows = (
+            query.order_by(Receipt.current_deadline, Receipt.id)
+            .limit(limit + 1)
             .all()
         )
-    
+        items = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit:
+            last = items[-1]
+            next_cursor = encode_urgent_cursor(last.current_deadline, last.id)
+        return items, total, next_cursor
+
     def create(
         self,
         data: ReceiptCreate,
@@ -115,30 +208,109 @@ class ReceiptService:
         logger.info("Receipt created: id=%s, number=%s", receipt.id, receipt.receipt_number)
         return receipt
 
-    def update_deadline(
+    def get_or_create_many(
+        self,
+        receipt_numbers: list[str],
+        telegram_id: Optional[int] = None,
+        telegram_username: Optional[str] = None,
+    ) -> dict[str, tuple[Receipt, bool]]:
+        """
+        Получить или создать квитанции по списку номеров.
+        Один SELECT ... IN для существующих и один flush для новых.
+        Возвращает {номер: (квитанция, создана ли)} в порядке входного списка.
+        """
+        numbers = list(dict.fromkeys(
+            sanitize_text(number, max_length=100) for number in receipt_numbers
+        ))
+        existing = {
+            receipt.receipt_number: receipt
+            for receipt in self.db.query(Receipt).filter(Receipt.receipt_number.in_(numbers))
+        }
+
+        created: dict[str, Receipt] = {}
+        for number in numbers:
+            if number not in existing:
+                created[number] = Receipt(receipt_number=number)
+                self.db.add(created[number])
+        if created:
+            try:
+                self.db.flush()
+            except IntegrityError:
+                self.db.rollback()
+                logger.warning("Duplicate receipt numbers in batch create")
+                raise DuplicateError("Квитанции из списка уже созданы параллельным запросом")
+            for receipt in created.values():
+                self.db.add(HistoryEvent(
+                    receipt_id=receipt.id,
+                    event_type="receipt_created",
+                    payload={"receipt_number": receipt.receipt_number, "deadline": None},
+                    telegram_id=telegram_id,
+                    telegram_username=telegram_username,
+                ))
+            logger.info("Batch created %s receipts", len(created))
+
+        result = {}
+        for number in numbers:
+            if number in created:
+                result[number] = (created[number], True)
+            else:
+                result[number] = (existing[number], False)
+        return result
+
+    def record_deadline(
         self,
         receipt: Receipt,
         new_deadline: Optional[datetime],
         telegram_id: Optional[int] = None,
         telegram_username: Optional[str] = None,
-    ) -> Receipt:
-        """Обновить дедлайн квитанции с логированием в историю."""
-        logger.info("Updating deadline: receipt_id=%s", receipt.id)
+    ) -> None:
+        """Сменить дедлайн и записать deadline_changed — без flush и перепланирования уведомлений."""
         old_deadline = receipt.current_deadline
         receipt.current_deadline = new_deadline
-        
-        # Логируем изменение дедлайна
-        history_event = HistoryEvent(
-            receipt_id=receipt.id,
-            event_type="deadline_changed",
-            payload={
+        HistoryService(self.db).add(
+            receipt.id,
+            "deadline_changed",
+            {
                 "old_deadline": old_deadline.isoformat() if old_deadline else None,
                 "new_deadline": new_deadline.isoformat() if new_deadline else None,
             },
-            telegram_id=telegram_id,
-            telegram_username=telegram_username,
+            telegram_id,
+            telegram_username,
         )
-        self.db.add(history_event)
+
+    def record_sent_to_master(
+        self,
+        receipt_id: int,
+        master: Employee,
+        is_urgent: bool,
+        deadline: Optional[datetime],
+        telegram_id: Optional[int] = None,
+        telegram_username: Optional[str] = None,
+    ) -> None:
+        """Записать выдачу мастеру (sent_to_master) без flush."""
+        HistoryService(self.db).add(
+            receipt_id,
+            "sent_to_master",
+            {
+                "master_id": master.id,
+                "master_name": master.name,
+                "urgent": is_urgent,
+                "deadline": deadline.isoformat() if deadline else None,
+            },
+            telegram_id,
+            telegram_username,
+        )
+
+    def update_deadline(
+        self,
+        receipt: Receipt,
+        new_deadline: Optional[datetime],
+        telegram_id: Optional[int] = None,
+        telegram_username: Optional[str] = None,
+    ) -> Receipt:
+        """Обновить дедлайн квитанции с логированием в историю."""
+        logger.info("Updating deadline: receipt_id=%s", receipt.id)
+        self.record_deadline(receipt, new_deadline, telegram_id, telegram_username)
 
         self.db.flush()
         self.db.refresh(receipt)
@@ -85,15 +85,24 @@ class ReturnService:
         if not receipt:
             raise NotFoundException("Квитанция", data.receipt_id)
 
+        # Справочники для всех причин — двумя запросами, а не по запросу на причину
+        reason_ids = {link.reason_id for link in data.reasons}
+        employee_ids = {link.guilty_employee_id for link in data.reasons if link.guilty_employee_id}
+        reasons = {
+            r.id: r
+            for r in self.db.query(ReturnReason).filter(ReturnReason.id.in_(reason_ids))
+        } if reason_ids else {}
+        employees = {
+            e.id: e
+            for e in self.db.query(Employee).filter(Employee.id.in_(employee_ids))
+        } if employee_ids else {}
+
         # Валидация FK для каждой причины
         for reason_link in data.reasons:
-            reason = self.db.query(ReturnReason).get(reason_link.reason_id)
-            if not reason:
+            if reason_link.reason_id not in reasons:
                 raise NotFoundException("Причина возврата", reason_link.reason_id)
-            if reason_link.guilty_employee_id:
-                guilty = self.db.query(Employee).get(reason_link.guilty_employee_id)
-                if not guilty:
-                    raise NotFoundException("Сотрудник", reason_link.guilty_employee_id)
+            if reason_link.guilty_employee_id and reason_link.guilty_employee_id not in employees:
+                raise NotFoundException("Сотрудник", reason_link.guilty_employee_id)
 
         # Создаем возврат
         return_record = Return(
@@ -106,27 +115,22 @@ class ReturnService:
         # Добавляем причины возврата
         reasons_data = []
         for reason_link in data.reasons:
-            return_reason_link = ReturnReasonLink(
+            self.db.add(ReturnReasonLink(
                 return_id=return_record.id,
                 reason_id=reason_link.reason_id,
                 guilty_employee_id=reason_link.guilty_employee_id,
-            )
-            self.db.add(return_reason_link)
-            
+            ))
+
             # Собираем данные для истории
-            reason = self.db.query(ReturnReason).get(reason_link.reason_id)
-            guilty_name = None
-            if reason_link.guilty_employee_id:
-                guilty = self.db.query(Employee).get(reason_link.guilty_employee_id)
-                guilty_name = guilty.name if guilty else None
-            
+            reason = reasons[reason_link.reason_id]
+            guilty = employees.get(reason_link.guilty_employee_id)
             reasons_data.append({
                 "reason_id": reason_link.reason_id,
-                "reason_code": reason.code if reason else None,
-                "reason_name": reason.name if reason else None,
-                "affects": reason.affects if reason else None,
+                "reason_code": reason.code,
+                "reason_name": reason.name,
+                "affects": reason.affects,
                 "guilty_employee_id": reason_link.guilty_employee_id,
-                "guilty_employee_name": guilty_name,
+                "guilty_employee_name": guilty.name if guilty else None,
             })
         
         # Логируем возврат в историю
@@ -144,6 +148,6 @@ class ReturnService:
         self.db.add(history_event)
         
         self.db.flush()
-        self.db.refresh(return_record)
         logger.info("Return created: id=%s, receipt_id=%s", return_record.id, data.receipt_id)
-        return return_record
+        # Причины с названиями и виновными — одним запросом для ответа
+        return self.get_by_id(return_record.id)
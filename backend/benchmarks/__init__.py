@@ -0,0 +1,3 @@
+"""
+Бенчмарки производительности (запускаются вручную, не входят в pytest).
+"""
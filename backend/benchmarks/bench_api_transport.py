@@ -0,0 +1,114 @@
+"""
+Бенчмарк транспорта APIClient: HTTP через localhost vs in-process ASGI.
+
+Запуск (из каталога backend):
+    PYTHONPATH=.. python -m benchmarks.bench_api_transport --calls 300
+
+Поднимает FastAPI на SQLite-файле в фоновом потоке uvicorn и сравнивает
+среднее время вызова APIClient.get_return_reasons() для обоих транспортов.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+_DB_FILE = os.path.join(tempfile.mkdtemp(prefix="bench-transport-"), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_DB_FILE}")
+os.environ.setdefault("API_KEY", "bench-api-key")
+os.environ["TELEGRAM_BOT_TOKEN"] = ""
+os.environ["TELEGRAM_BOT_WEBHOOK_URL"] = ""
+
+import uvicorn  # noqa: E402
+
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+from app.main import app as fastapi_app  # noqa: E402
+from app.seeds.return_reasons import seed_return_reasons  # noqa: E402
+import app.models  # noqa: E402,F401
+from telegram_bot.services.api_client import APIClient  # noqa: E402
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_server(port: int) -> uvicorn.Server:
+    config = uvicorn.Config(fastapi_app, host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def _measure(client: APIClient, calls: int, warmup: int = 20) -> list[float]:
+    for _ in range(warmup):
+        await client.get_return_reasons()
+    timings = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        await client.get_return_reasons()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def _report(name: str, timings: list[float]) -> dict:
+    timings_sorted = sorted(timings)
+    result = {
+        "transport": name,
+        "mean_ms": statistics.mean(timings),
+        "p50_ms": timings_sorted[len(timings) // 2],
+        "p95_ms": timings_sorted[int(len(timings) * 0.95) - 1],
+    }
+    print(
+        f"{name:>6}: mean={result['mean_ms']:.3f} ms  "
+        f"p50={result['p50_ms']:.3f} ms  p95={result['p95_ms']:.3f} ms"
+    )
+    return result
+
+
+async def run(calls: int) -> None:
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        seed_return_reasons(db)
+
+    port = _free_port()
+    server = _start_server(port)
+
+    from telegram_bot.config import bot_config
+    bot_config.API_KEY = os.environ["API_KEY"]
+
+    client = APIClient(base_url=f"http://127.0.0.1:{port}")
+    try:
+        http_result = _report("http", await _measure(client, calls))
+        await client.use_asgi_app(fastapi_app)
+        asgi_result = _report("asgi", await _measure(client, calls))
+    finally:
+        await client.close()
+        server.should_exit = True
+
+    saving = http_result["mean_ms"] - asgi_result["mean_ms"]
+    print(
+        f"saving per call: {saving:.3f} ms "
+        f"({saving / http_result['mean_ms'] * 100:.1f}% of HTTP mean)"
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=300, help="Количество вызовов на транспорт")
+    args = parser.parse_args(argv)
+    asyncio.run(run(args.calls))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
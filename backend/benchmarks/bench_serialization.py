@@ -0,0 +1,116 @@
+"""
+Бенчмарк сериализации списочных ответов: стоимость на 1000 строк ORM.
+
+Запуск (из каталога backend):
+    PYTHONPATH=.. python -m benchmarks.bench_serialization --rows 1000 --repeat 50
+
+Сравнивает три пути для списка квитанций и списка истории:
+    legacy  — model_validate по строке, повторная валидация response_model,
+              jsonable_encoder + stdlib json (прежний путь FastAPI);
+    before  — то же, но с dump_json из pydantic-core (текущий FastAPI без
+              собственного response_class);
+    after   — list_response: доверенные строки ORM без валидации + orjson.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.core.database import Base  # noqa: E402
+from app.core.responses import list_response  # noqa: E402
+from app.models.history import HistoryEvent  # noqa: E402
+from app.models.receipt import Receipt  # noqa: E402
+from app.schemas.history import HistoryEventListResponse, HistoryEventResponse  # noqa: E402
+from app.schemas.receipt import ReceiptListResponse, ReceiptResponse  # noqa: E402
+import app.models  # noqa: E402,F401
+
+
+def _load_rows(count: int) -> tuple[list[Receipt], list[HistoryEvent]]:
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    receipts = [Receipt(receipt_number=str(100000 + i)) for i in range(count)]
+    db.add_all(receipts)
+    db.flush()
+    db.add_all(
+        HistoryEvent(
+            receipt_id=r.id,
+            event_type="sent_to_master",
+            payload={"master_id": 1, "master_name": "Мастер", "urgent": False},
+            telegram_id=123,
+            telegram_username="bench",
+        )
+        for r in receipts
+    )
+    db.commit()
+    return db.query(Receipt).all(), db.query(HistoryEvent).all()
+
+
+def _paths(wrapper, schema, rows) -> dict:
+    adapter = TypeAdapter(wrapper)
+
+    def legacy() -> bytes:
+        model = wrapper(items=[schema.model_validate(r) for r in rows], total=len(rows))
+        return json.dumps(jsonable_encoder(adapter.validate_python(model))).encode()
+
+    def before() -> bytes:
+        model = wrapper(items=[schema.model_validate(r) for r in rows], total=len(rows))
+        return adapter.dump_json(adapter.validate_python(model))
+
+    def after() -> bytes:
+        return list_response(wrapper, schema, rows, total=len(rows)).body
+
+    return {"legacy": legacy, "before": before, "after": after}
+
+
+def _measure(func, repeat: int) -> list[float]:
+    func()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def run(rows: int, repeat: int) -> None:
+    receipts, history = _load_rows(rows)
+    cases = {
+        "receipts": _paths(ReceiptListResponse, ReceiptResponse, receipts),
+        "history": _paths(HistoryEventListResponse, HistoryEventResponse, history),
+    }
+    scale = 1000 / rows
+    for name, paths in cases.items():
+        assert json.loads(paths["after"]()) == json.loads(paths["before"]())
+        means = {}
+        for path, func in paths.items():
+            means[path] = statistics.mean(_measure(func, repeat)) * scale
+            print(f"{name:>8} {path:>6}: {means[path]:.3f} ms / 1000 rows")
+        print(
+            f"{name:>8} speedup: {means['before'] / means['after']:.2f}x vs before, "
+            f"{means['legacy'] / means['after']:.2f}x vs legacy"
+        )
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000, help="Количество строк в ответе")
+    parser.add_argument("--repeat", type=int, default=50, help="Повторов на каждый путь")
+    args = parser.parse_args(argv)
+    run(args.rows, args.repeat)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
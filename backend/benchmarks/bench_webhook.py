@@ -0,0 +1,516 @@
+"""
+Нагрузочный стенд webhook бота: сценарии операторов через /webhook/telegram/webhook.
+
+Запуск (из каталога backend):
+    PYTHONPATH=.. python -m benchmarks.bench_webhook --operators 20 --iterations 3
+    PYTHONPATH=.. python -m benchmarks.bench_webhook --operators 50 --workers 8 \\
+        --scenarios master,analytics --output webhook.json
+
+В одном event loop поднимаются:
+- FastAPI-приложение под uvicorn (полный стек: webhook, очередь обновлений,
+  диспетчер aiogram, APIClient через in-process ASGI, SQLite во временном файле
+  с синтетическими данными из benchmarks.datagen);
+- фейковый Bot API (benchmarks.fake_telegram) — бот ходит в него вместо Telegram;
+- FSM-хранилище поверх fakeredis вместо Redis.
+
+Каждый виртуальный оператор — отдельный чат: шлёт /start и проходит сценарии
+из SCENARIOS, нажимая кнопки с последнего экрана, как человек. Шаг —
+один update: POST на webhook, затем ожидание окончания его обработки.
+В отчёте — пропускная способность и по каждому шагу: латентность ответа
+webhook (ack), до первого sendMessage/editMessageText (reply) и до конца
+обработки (done), вызовы бэкенда и SQL-запросы на один update.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import NamedTuple, Optional
+
+API_KEY = "bench-api-key"
+BOT_TOKEN = "123456:BENCH-webhook-token"
+WEBHOOK_SECRET = "bench-webhook-secret"
+WEBHOOK_PATH = "/webhook/telegram/webhook"
+
+# ID чатов операторов и номера квитанций сценариев (только цифры — как вводят люди)
+OPERATOR_BASE_ID = 700_000_000
+RECEIPT_BASE = 9_000_000
+HISTORY_RECEIPT_BASE = 8_000_000
+HISTORY_EVENTS = 30
+
+
+class Step(NamedTuple):
+    """
+    Шаг сценария. action: "text" — отправить сообщение value
+    ({receipt} и {history_receipt} подставляются), "press" — нажать кнопку
+    с callback_data, начинающимся с value, "press_text" — кнопку с текстом value.
+    """
+
+    name: str
+    action: str
+    value: str
+
+
+SCENARIOS: dict[str, tuple[Step, ...]] = {
+    "master": (
+        Step("open", "press", "menu:master"),
+        Step("receipt", "text", "{receipt}"),
+        Step("choose_master", "press", "master:"),
+        Step("not_urgent", "press", "urgent:no"),
+        Step("confirm", "press", "confirm"),
+        Step("home", "press", "menu:main"),
+    ),
+    "otk_return": (
+        Step("open", "press", "menu:otk"),
+        Step("receipt", "text", "{receipt}"),
+        Step("return", "press", "otk:return"),
+        Step("reason", "press", "otk:reason:"),
+        Step("reasons_done", "press", "otk:reasons_done"),
+        Step("confirm", "press", "otk:return:confirm"),
+        Step("home", "press", "menu:main"),
+    ),
+    "history": (
+        Step("open", "press", "menu:history"),
+        Step("receipt", "text", "{history_receipt}"),
+        Step("next_page", "press_text", "▶"),
+        Step("next_page_2", "press_text", "▶"),
+        Step("prev_page", "press_text", "◀"),
+        Step("home", "press", "menu:main"),
+    ),
+    "analytics": (
+        Step("open", "press", "menu:analytics"),
+        Step("assembly", "press", "analytics:assembly"),
+        Step("assembly_month", "press", "aperiod:assembly:month"),
+        Step("back", "press", "analytics:menu"),
+        Step("performance", "press", "analytics:performance"),
+        Step("performance_week", "press", "aperiod:performance:week"),
+        Step("back_2", "press", "analytics:menu"),
+        Step("workload", "press", "analytics:workload"),
+        Step("home", "press", "menu:main"),
+    ),
+}
+
+
+@dataclass
+class UpdateTrace:
+    """Что произошло при обработке одного update."""
+
+    started: float = 0.0
+    finished: float = 0.0
+    backend_calls: Counter = field(default_factory=Counter)
+    backend_errors: int = 0
+    queries: int = 0
+
+
+_current_trace: ContextVar[Optional[UpdateTrace]] = ContextVar("webhook_trace", default=None)
+
+
+class UpdateTracer:
+    """Обработчик очереди webhook: process_update + трасса и сигнал окончания."""
+
+    def __init__(self, process_update):
+        self.process_update = process_update
+        self._waiters: dict[int, asyncio.Future] = {}
+
+    def expect(self, update_id: int) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[update_id] = future
+        return future
+
+    async def handle(self, update) -> None:
+        trace = UpdateTrace(started=time.perf_counter())
+        token = _current_trace.set(trace)
+        try:
+            await self.process_update(update)
+        finally:
+            _current_trace.reset(token)
+            trace.finished = time.perf_counter()
+            future = self._waiters.pop(update.update_id, None)
+            if future is not None and not future.done():
+                future.set_result(trace)
+
+
+class BackendCallCounter:
+    """ASGI-обёртка приложения для APIClient: вызовы бэкенда в трассу текущего update."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        from app.core.metrics import route_label
+
+        trace = _current_trace.get()
+        if trace is None or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            trace.backend_calls[f"{scope['method']} {route_label(scope)}"] += 1
+            if status_code >= 400:
+                trace.backend_errors += 1
+
+
+def _count_query(*args) -> None:
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.queries += 1
+
+
+@dataclass
+class StepStats:
+    """Замеры одного шага сценария по всем операторам."""
+
+    ack_ms: list[float] = field(default_factory=list)
+    reply_ms: list[float] = field(default_factory=list)
+    done_ms: list[float] = field(default_factory=list)
+    backend_calls: list[int] = field(default_factory=list)
+    queries: list[int] = field(default_factory=list)
+    bot_calls: list[int] = field(default_factory=list)
+    routes: Counter = field(default_factory=Counter)
+    backend_errors: int = 0
+    failures: int = 0
+
+    def summary(self) -> dict:
+        count = len(self.done_ms)
+        result = {"count": count, "failures": self.failures, "backend_errors": self.backend_errors}
+        if not count:
+            return result
+        for name in ("ack_ms", "reply_ms", "done_ms"):
+            values = getattr(self, name)
+            if values:
+                result[name] = {
+                    "median": round(statistics.median(values), 3),
+                    "p95": round(_percentile(values, 0.95), 3),
+                    "max": round(max(values), 3),
+                }
+        result["backend_calls_per_update"] = round(statistics.mean(self.backend_calls), 2)
+        result["queries_per_update"] = round(statistics.mean(self.queries), 2)
+        result["bot_calls_per_update"] = round(statistics.mean(self.bot_calls), 2)
+        result["routes"] = dict(self.routes.most_common())
+        return result
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+class StepFailed(Exception):
+    """Шаг не выполнен: нет нужной кнопки, webhook ответил ошибкой или таймаут."""
+
+
+class WebhookHarness:
+    """Виртуальные операторы поверх webhook, фейкового Bot API и трассировки update."""
+
+    def __init__(self, http, fake_api, tracer: UpdateTracer, timeout: float):
+        from benchmarks.fake_telegram import UpdateFactory
+
+        self.http = http
+        self.fake_api = fake_api
+        self.tracer = tracer
+        self.timeout = timeout
+        self.updates = UpdateFactory()
+        self.steps: dict[str, StepStats] = {}
+        self.busy_retries = 0
+        self.scenarios_completed = 0
+
+    async def send(self, name: str, chat_id: int, update: dict) -> None:
+        """POST update на webhook и ожидание конца его обработки."""
+        from benchmarks.fake_telegram import SCREEN_METHODS
+
+        stats = self.steps.setdefault(name, StepStats())
+        calls_before = len(self.fake_api.chat_calls(chat_id))
+        waiter = self.tracer.expect(update["update_id"])
+        posted = time.perf_counter()
+        while True:
+            response = await self.http.post(
+                WEBHOOK_PATH,
+                json=update,
+                headers={"X-Telegram-Bot-Api-Secret-Token": WEBHOOK_SECRET},
+            )
+            if response.status_code != 503:
+                break
+            # Очередь переполнена — Telegram повторил бы доставку позже
+            self.busy_retries += 1
+            await asyncio.sleep(0.05)
+        acked = time.perf_counter()
+        if response.status_code != 200 or response.json().get("status") != "ok":
+            stats.failures += 1
+            raise StepFailed(f"{name}: webhook answered {response.status_code} {response.text}")
+        try:
+            trace = await asyncio.wait_for(waiter, self.timeout)
+        except asyncio.TimeoutError:
+            stats.failures += 1
+            raise StepFailed(f"{name}: update {update['update_id']} not processed in time")
+
+        new_calls = self.fake_api.chat_calls(chat_id)[calls_before:]
+        reply_at = next((c.at for c in new_calls if c.method in SCREEN_METHODS), None)
+        stats.ack_ms.append((acked - posted) * 1000)
+        if reply_at is not None:
+            stats.reply_ms.append((reply_at - posted) * 1000)
+        stats.done_ms.append((trace.finished - posted) * 1000)
+        stats.backend_calls.append(sum(trace.backend_calls.values()))
+        stats.routes.update(trace.backend_calls)
+        stats.backend_errors += trace.backend_errors
+        stats.queries.append(trace.queries)
+        stats.bot_calls.append(len(new_calls))
+
+    async def run_step(self, scenario: str, step: Step, chat_id: int, values: dict) -> None:
+        from benchmarks.fake_telegram import find_button
+
+        name = f"{scenario}.{step.name}"
+        if step.action == "text":
+            update = self.updates.message(chat_id, step.value.format(**values))
+        else:
+            screen = self.fake_api.screens.get(chat_id)
+            if step.action == "press_text":
+                button = find_button(screen, text=step.value)
+            else:
+                button = find_button(screen, callback_prefix=step.value)
+            if button is None:
+                self.steps.setdefault(name, StepStats()).failures += 1
+                raise StepFailed(f"{name}: no button {step.value!r} on screen")
+            update = self.updates.callback(chat_id, button["callback_data"], screen)
+        await self.send(name, chat_id, update)
+
+    async def run_operator(self, index: int, scenarios: list[str], iterations: int,
+                           history_receipts: int) -> None:
+        chat_id = OPERATOR_BASE_ID + index
+        await self.send("start", chat_id, self.updates.message(chat_id, "/start"))
+        for iteration in range(iterations):
+            values = {
+                "receipt": RECEIPT_BASE + index * 1_000 + iteration,
+                "history_receipt": HISTORY_RECEIPT_BASE + (index + iteration) % history_receipts,
+            }
+            for scenario in scenarios:
+                try:
+                    for step in SCENARIOS[scenario]:
+                        await self.run_step(scenario, step, chat_id, values)
+                    self.scenarios_completed += 1
+                except StepFailed as e:
+                    logging.getLogger(__name__).warning(f"Operator {index}: {e}")
+                    # Сброс диалога, как сделал бы человек
+                    await self.send("start", chat_id, self.updates.message(chat_id, "/start"))
+
+
+def _configure_env(database_url: str, workers: int) -> None:
+    """Окружение до импорта app и бота: БД, токен для фейкового Bot API, очередь."""
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["API_KEY"] = API_KEY
+    os.environ["TELEGRAM_BOT_TOKEN"] = BOT_TOKEN
+    os.environ["TELEGRAM_BOT_WEBHOOK_URL"] = ""
+    os.environ["TELEGRAM_WEBHOOK_SECRET"] = WEBHOOK_SECRET
+    os.environ["TELEGRAM_ALLOWED_IDS"] = ""
+    # Транспорт APIClient подключает стенд (с подсчётом вызовов), а не startup
+    os.environ["API_TRANSPORT"] = "http"
+    os.environ["WEBHOOK_WORKERS"] = str(workers)
+    os.environ.setdefault("SQL_QUERY_BUDGET", "-1")
+    os.environ.setdefault("SQL_REPEATED_THRESHOLD", "0")
+
+
+def seed_database(receipts: int, history_receipts: int, seed: int) -> dict:
+    """Синтетические данные и квитанции с длинной историей для листания страниц."""
+    from sqlalchemy import insert
+
+    from app.core.database import Base, SessionLocal, engine
+    from app.core.utils import now_moscow
+    from app.models.history import HistoryEvent
+    from app.models.receipt import Receipt
+    import app.models  # noqa: F401
+    from benchmarks.datagen import DataGenerator
+
+    Base.metadata.create_all(bind=engine)
+    anchor = now_moscow().replace(microsecond=0)
+    with SessionLocal() as db:
+        counts = DataGenerator(db, seed=seed, anchor=anchor).generate(receipts)
+        ids = db.execute(
+            insert(Receipt).returning(Receipt.id, sort_by_parameter_order=True),
+            [
+                {"receipt_number": str(HISTORY_RECEIPT_BASE + i), "created_at": anchor}
+                for i in range(history_receipts)
+            ],
+        ).scalars().all()
+        db.execute(insert(HistoryEvent), [
+            {
+                "receipt_id": receipt_id,
+                "event_type": "comment_added",
+                "payload": {"comment": f"Комментарий {n + 1}"},
+                "created_at": anchor - timedelta(minutes=HISTORY_EVENTS - n),
+            }
+            for receipt_id in ids
+            for n in range(HISTORY_EVENTS)
+        ])
+        db.commit()
+    return counts.as_dict()
+
+
+async def run(args) -> dict:
+    import httpx
+    import uvicorn
+    from aiogram import Bot
+    from aiogram.client.default import DefaultBotProperties
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+    from aiogram.enums import ParseMode
+    from aiogram.fsm.storage.redis import RedisStorage
+    from fakeredis.aioredis import FakeRedis
+    from sqlalchemy import event
+
+    import telegram_bot.bot as bot_module
+    from app.core.database import engine
+    from app.main import app as fastapi_app
+    from benchmarks.fake_telegram import FakeBotAPI
+    from telegram_bot.services.api_client import get_api_client
+    from telegram_bot.services.fsm_storage import CachedRedisStorage
+
+    fake_api = FakeBotAPI()
+    await fake_api.start()
+    bot = Bot(
+        token=BOT_TOKEN,
+        session=AiohttpSession(api=TelegramAPIServer.from_base(fake_api.url)),
+        default=DefaultBotProperties(parse_mode=ParseMode.HTML),
+    )
+    storage_kwargs = {"state_ttl": timedelta(hours=24), "data_ttl": timedelta(hours=24)}
+    if args.fsm_l1_cache:
+        storage = CachedRedisStorage(redis=FakeRedis(), **storage_kwargs)
+    else:
+        storage = RedisStorage(redis=FakeRedis(), **storage_kwargs)
+    tracer = UpdateTracer(bot_module.process_update)
+    bot_module.configure_runtime(bot, bot_module.create_dispatcher(storage), tracer.handle)
+
+    config = uvicorn.Config(fastapi_app, host="127.0.0.1", port=0, log_level="warning")
+    server = uvicorn.Server(config)
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        if server_task.done():
+            server_task.result()
+        await asyncio.sleep(0.05)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    await get_api_client().use_asgi_app(BackendCallCounter(fastapi_app))
+    event.listen(engine, "before_cursor_execute", _count_query)
+
+    report = {
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "operators": args.operators,
+        "iterations": args.iterations,
+        "scenarios": args.scenarios,
+        "workers": args.workers,
+        "fsm_l1_cache": args.fsm_l1_cache,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=30) as http:
+            harness = WebhookHarness(http, fake_api, tracer, timeout=args.timeout)
+            started = time.perf_counter()
+            await asyncio.gather(*(
+                harness.run_operator(i, args.scenarios, args.iterations, args.history_receipts)
+                for i in range(args.operators)
+            ))
+            elapsed = time.perf_counter() - started
+    finally:
+        event.remove(engine, "before_cursor_execute", _count_query)
+        server.should_exit = True
+        await server_task
+        await fake_api.stop()
+
+    updates = sum(len(s.done_ms) for s in harness.steps.values())
+    report.update({
+        "seconds": round(elapsed, 3),
+        "updates": updates,
+        "updates_per_second": round(updates / elapsed, 2),
+        "scenarios_completed": harness.scenarios_completed,
+        "scenarios_per_second": round(harness.scenarios_completed / elapsed, 2),
+        "busy_retries": harness.busy_retries,
+        "bot_api_calls": fake_api.method_counts(),
+        "update_queue": bot_module.get_update_queue().summary(),
+        "fsm_storage": bot_module.get_fsm_storage_stats(),
+        "api_client": get_api_client().coalescing_stats(),
+        "steps": {name: stats.summary() for name, stats in harness.steps.items()},
+    })
+    return report
+
+
+def print_report(report: dict) -> None:
+    print(
+        f"{report['updates']} updates in {report['seconds']:.2f} s: "
+        f"{report['updates_per_second']:.1f} updates/s, "
+        f"{report['scenarios_per_second']:.2f} scenarios/s, "
+        f"busy retries {report['busy_retries']}"
+    )
+    for name, row in report["steps"].items():
+        if not row["count"]:
+            print(f"{name:<30} failures {row['failures']}")
+            continue
+        print(
+            f"{name:<30} done {row['done_ms']['median']:>8.2f} ms "
+            f"(p95 {row['done_ms']['p95']:.2f})  ack {row['ack_ms']['median']:.2f} ms  "
+            f"{row['backend_calls_per_update']:>5.2f} calls  {row['queries_per_update']:>6.2f} q"
+            + (f"  failures {row['failures']}" if row["failures"] else "")
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--operators", type=int, default=10, help="Одновременных операторов (чатов)")
+    parser.add_argument("--iterations", type=int, default=2, help="Прогонов сценариев на оператора")
+    parser.add_argument(
+        "--scenarios", default=",".join(SCENARIOS),
+        help=f"Сценарии через запятую: {', '.join(SCENARIOS)}",
+    )
+    parser.add_argument("--workers", type=int, default=4, help="Воркеров очереди webhook")
+    parser.add_argument("--receipts", default="2000", help="Синтетических квитанций (2000, 10k, ...)")
+    parser.add_argument("--history-receipts", type=int, default=10)
+    parser.add_argument(
+        "--fsm-l1-cache", action=argparse.BooleanOptionalAction, default=True,
+        help="CachedRedisStorage (по умолчанию) или обычный RedisStorage",
+    )
+    parser.add_argument("--timeout", type=float, default=30.0, help="Ожидание обработки update, с")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="bench_webhook.json", help="Файл результатов (JSON)")
+    args = parser.parse_args(argv)
+    args.scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = [s for s in args.scenarios if s not in SCENARIOS]
+    if unknown:
+        parser.error(f"Неизвестные сценарии: {', '.join(unknown)}")
+
+    database_url = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="bench-webhook-"), "bench.db")
+    _configure_env(database_url, args.workers)
+    logging.basicConfig(level=logging.WARNING)
+
+    from benchmarks.datagen import parse_scale
+
+    args.seeded = seed_database(parse_scale(args.receipts), args.history_receipts, args.seed)
+
+    report = asyncio.run(run(args))
+    report["seeded"] = args.seeded
+    print_report(report)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Results written to {args.output}")
+    return 1 if any(row["failures"] for row in report["steps"].values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
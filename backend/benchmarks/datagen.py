@@ -0,0 +1,414 @@
+"""
+Детерминированный генератор синтетических данных мастерской.
+
+Запуск (из каталога backend, БД — из DATABASE_URL):
+    PYTHONPATH=.. python -m benchmarks.datagen --scale 100k --seed 42
+
+Создаёт сотрудников, квитанции, операции, полировки, возвраты и историю
+в пропорциях, близких к рабочим. Размер задаётся числом квитанций
+(10k, 100k, 1m или число). Генерация дописывает данные к уже
+существующим — так бенчмарк растит одну БД от меньшего размера к большему.
+При одинаковых seed, anchor и последовательности вызовов данные совпадают.
+
+Время событий — за год до anchor (по умолчанию — текущее время),
+поэтому фильтры периодов аналитики (day/week/month) получают данные.
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Optional
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///bench.db")
+
+from sqlalchemy import func, insert  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.core.utils import now_moscow  # noqa: E402
+from app.models.employee import Employee  # noqa: E402
+from app.models.history import HistoryEvent  # noqa: E402
+from app.models.operation import Operation, OperationType  # noqa: E402
+from app.models.polishing import PolishingDetails  # noqa: E402
+from app.models.receipt import Receipt  # noqa: E402
+from app.models.return_ import Return, ReturnReason, ReturnReasonLink  # noqa: E402
+from app.seeds.operation_types import seed_operation_types  # noqa: E402
+from app.seeds.return_reasons import seed_return_reasons  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+# Квитанций на одного мастера / полировщика
+RECEIPTS_PER_MASTER = 2_000
+RECEIPTS_PER_POLISHER = 8_000
+# Доли квитанций
+MECHANISM_SHARE = 0.4
+POLISHING_SHARE = 0.3
+POLISHING_RETURNED_SHARE = 0.85
+RETURN_SHARE = 0.05
+# Прошедшие ОТК: почти все старые квитанции и половина последних RECENT_DAYS дней
+OTK_PASSED_SHARE = 0.98
+OTK_PASSED_RECENT_SHARE = 0.5
+RECENT_DAYS = 30
+DEADLINE_SHARE = 0.6
+DEADLINE_CHANGED_SHARE = 0.15
+COMMENT_SHARE = 0.1
+# Квитанций в одной пачке вставки
+BATCH_SIZE = 5_000
+HISTORY_DAYS = 365
+
+METALS = ("steel", "gold", "titanium", "silver")
+
+
+def parse_scale(value: str) -> int:
+    """Размер по имени (10k, 100k, 1m) или числом квитанций."""
+    value = value.strip().lower()
+    if value in SCALES:
+        return SCALES[value]
+    count = int(value)
+    if count <= 0:
+        raise ValueError("Размер должен быть положительным")
+    return count
+
+
+@dataclass
+class GeneratedCounts:
+    """Сколько строк создано по таблицам."""
+
+    employees: int = 0
+    receipts: int = 0
+    operations: int = 0
+    polishing: int = 0
+    returns: int = 0
+    return_reasons: int = 0
+    history: int = 0
+
+    def add(self, other: "GeneratedCounts") -> None:
+        for name in self.__dataclass_fields__:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+    def as_dict(self) -> dict[str, int]:
+        return {name: getattr(self, name) for name in self.__dataclass_fields__}
+
+
+@dataclass
+class _Refs:
+    """Справочники и сотрудники, нужные для генерации квитанций."""
+
+    operation_types: dict[str, int]
+    reasons: list[tuple[int, str, str, str]]  # id, code, name, affects
+    masters: list[tuple[int, str]] = field(default_factory=list)
+    polishers: list[tuple[int, str]] = field(default_factory=list)
+
+    @property
+    def names(self) -> dict[int, str]:
+        return dict(self.masters + self.polishers)
+
+
+class DataGenerator:
+    """Генератор синтетических данных поверх сессии SQLAlchemy."""
+
+    def __init__(self, db: Session, seed: int = 42, anchor: Optional[datetime] = None):
+        self.db = db
+        self.seed = seed
+        self.anchor = anchor or now_moscow()
+
+    def _rng(self, *parts) -> random.Random:
+        # Отдельный генератор на пачку: пачка воспроизводима по seed и смещению
+        return random.Random(":".join(str(p) for p in (self.seed, *parts)))
+
+    def _refs(self) -> _Refs:
+        seed_operation_types(self.db)
+        seed_return_reasons(self.db)
+        return _Refs(
+            operation_types={t.code: t.id for t in self.db.query(OperationType)},
+            reasons=[
+                (r.id, r.code, r.name, r.affects)
+                for r in self.db.query(ReturnReason).order_by(ReturnReason.id)
+            ],
+        )
+
+    def _ensure_employees(self, refs: _Refs, total_receipts: int) -> int:
+        """Досоздаёт сотрудников под нужный объём квитанций."""
+        need = {
+            "master": max(5, total_receipts // RECEIPTS_PER_MASTER),
+            "polisher": max(2, total_receipts // RECEIPTS_PER_POLISHER),
+        }
+        created = 0
+        for role, count in need.items():
+            existing = self.db.query(func.count(Employee.id)).filter(Employee.role == role).scalar()
+            rows = [
+                {
+                    "name": f"{'Мастер' if role == 'master' else 'Полировщик'} {i + 1}",
+                    "role": role,
+                    "telegram_id": (1 if role == "master" else 2) * 10_000_000 + i,
+                    "telegram_username": f"{role}_{i + 1}",
+                    "is_active": self._rng("employee", role, i).random() > 0.05,
+                    "created_at": self.anchor - timedelta(days=HISTORY_DAYS + 30),
+                }
+                for i in range(existing, count)
+            ]
+            if rows:
+                self.db.execute(insert(Employee), rows)
+                created += len(rows)
+        for employee in self.db.query(Employee).order_by(Employee.id):
+            target = refs.masters if employee.role == "master" else refs.polishers
+            target.append((employee.id, employee.name))
+        return created
+
+    def generate(self, receipts: int, batch_size: int = BATCH_SIZE) -> GeneratedCounts:
+        """Добавляет receipts квитанций со всеми связанными данными."""
+        start = self.db.query(func.count(Receipt.id)).scalar()
+        refs = self._refs()
+        counts = GeneratedCounts()
+        counts.employees = self._ensure_employees(refs, start + receipts)
+        for offset in range(start, start + receipts, batch_size):
+            size = min(batch_size, start + receipts - offset)
+            counts.add(self._batch(refs, offset, size))
+            self.db.commit()
+            logger.info(f"Generated receipts {offset + size}/{start + receipts}")
+        return counts
+
+    def _batch(self, refs: _Refs, offset: int, size: int) -> GeneratedCounts:
+        rng = self._rng("batch", offset)
+        counts = GeneratedCounts(receipts=size)
+        plans = []
+        receipt_rows = []
+        for i in range(offset, offset + size):
+            created_at = self.anchor - timedelta(seconds=rng.randint(3600, HISTORY_DAYS * 86400))
+            deadline = None
+            if rng.random() < DEADLINE_SHARE:
+                deadline = created_at + timedelta(hours=rng.randint(24, 24 * 21))
+            receipt_rows.append({
+                "receipt_number": f"SYN-{i + 1:07d}",
+                "created_at": created_at,
+                "current_deadline": deadline,
+            })
+            plans.append((created_at, deadline))
+
+        ids = self.db.execute(
+            insert(Receipt).returning(Receipt.id, sort_by_parameter_order=True), receipt_rows
+        ).scalars().all()
+
+        operations, polishing, history, returns = [], [], [], []
+        for receipt_id, row, (created_at, deadline) in zip(ids, receipt_rows, plans):
+            self._receipt(
+                rng, refs, receipt_id, row["receipt_number"], created_at, deadline,
+                operations, polishing, history, returns,
+            )
+
+        if operations:
+            self.db.execute(insert(Operation), operations)
+        if polishing:
+            self.db.execute(insert(PolishingDetails), polishing)
+        counts.operations = len(operations)
+        counts.polishing = len(polishing)
+
+        if returns:
+            return_ids = self.db.execute(
+                insert(Return).returning(Return.id, sort_by_parameter_order=True),
+                [r for r, _ in returns],
+            ).scalars().all()
+            names = refs.names
+            reasons_by_id = {r[0]: r for r in refs.reasons}
+            links = []
+            for return_id, (row, reasons) in zip(return_ids, returns):
+                for link in reasons:
+                    links.append({"return_id": return_id, **link})
+                history.append({
+                    "receipt_id": row["receipt_id"],
+                    "event_type": "return_created",
+                    "payload": {
+                        "return_id": return_id,
+                        "comment": row["comment"],
+                        "reasons": [
+                            self._reason_payload(reasons_by_id[link["reason_id"]], link, names)
+                            for link in reasons
+                        ],
+                    },
+                    "created_at": row["created_at"],
+                })
+            self.db.execute(insert(ReturnReasonLink), links)
+            counts.returns = len(returns)
+            counts.return_reasons = len(links)
+
+        for event in history:
+            event.setdefault("telegram_id", None)
+            event.setdefault("telegram_username", None)
+        self.db.execute(insert(HistoryEvent), history)
+        counts.history = len(history)
+        return counts
+
+    @staticmethod
+    def _reason_payload(reason: tuple, link: dict, names: dict[int, str]) -> dict:
+        """Payload причины как у ReturnService.create."""
+        guilty = names.get(link["guilty_employee_id"])
+        return {
+            "reason_id": reason[0],
+            "reason_code": reason[1],
+            "reason_name": reason[2],
+            "affects": reason[3],
+            "guilty_employee_id": link["guilty_employee_id"],
+            "guilty_employee_name": guilty,
+        }
+
+    def _receipt(
+        self, rng: random.Random, refs: _Refs, receipt_id: int, number: str,
+        created_at: datetime, deadline: Optional[datetime],
+        operations: list, polishing: list, history: list, returns: list,
+    ) -> None:
+        """План жизни одной квитанции: мастер, операции, полировка, ОТК, возврат."""
+        user_id = 10_000_000 + rng.randint(0, 50)
+
+        def event(event_type: str, at: datetime, payload: dict) -> None:
+            history.append({
+                "receipt_id": receipt_id,
+                "event_type": event_type,
+                "payload": payload,
+                "telegram_id": user_id,
+                "telegram_username": f"user_{user_id % 100}",
+                "created_at": min(at, self.anchor),
+            })
+
+        at = created_at
+        event("receipt_created", at, {
+            "receipt_number": number,
+            "deadline": deadline.isoformat() if deadline else None,
+        })
+
+        master_id, master_name = rng.choice(refs.masters)
+        at += timedelta(minutes=rng.randint(5, 240))
+        event("sent_to_master", at, {
+            "master_id": master_id,
+            "master_name": master_name,
+            "urgent": deadline is not None,
+            "deadline": deadline.isoformat() if deadline else None,
+        })
+
+        if deadline is not None and rng.random() < DEADLINE_CHANGED_SHARE:
+            at += timedelta(hours=rng.randint(1, 48))
+            # В квитанции — уже перенесённый дедлайн
+            old_deadline = deadline - timedelta(days=rng.randint(1, 7))
+            event("deadline_changed", at, {
+                "old_deadline": old_deadline.isoformat(),
+                "new_deadline": deadline.isoformat(),
+            })
+
+        at += timedelta(hours=rng.randint(2, 72))
+        operations.append({
+            "receipt_id": receipt_id,
+            "operation_type_id": refs.operation_types["assembly"],
+            "employee_id": master_id,
+            "created_at": min(at, self.anchor),
+        })
+        if rng.random() < MECHANISM_SHARE:
+            operations.append({
+                "receipt_id": receipt_id,
+                "operation_type_id": refs.operation_types["mechanism"],
+                "employee_id": master_id,
+                "created_at": min(at + timedelta(minutes=rng.randint(10, 600)), self.anchor),
+            })
+
+        polisher_id = None
+        if rng.random() < POLISHING_SHARE:
+            polisher_id, polisher_name = rng.choice(refs.polishers)
+            sent_at = min(at + timedelta(hours=rng.randint(1, 24)), self.anchor)
+            returned_at = None
+            if rng.random() < POLISHING_RETURNED_SHARE:
+                returned_at = sent_at + timedelta(hours=rng.randint(4, 120))
+                if returned_at > self.anchor:
+                    # Ещё в полировке
+                    returned_at = None
+            metal = rng.choice(METALS)
+            bracelet = rng.random() < 0.5
+            difficult = rng.random() < 0.2
+            polishing.append({
+                "receipt_id": receipt_id,
+                "polisher_id": polisher_id,
+                "metal_type": metal,
+                "bracelet": bracelet,
+                "difficult": difficult,
+                "comment": None,
+                "sent_at": sent_at,
+                "returned_at": returned_at,
+            })
+            event("polishing_sent", sent_at, {
+                "polisher_id": polisher_id,
+                "polisher_name": polisher_name,
+                "metal_type": metal,
+                "bracelet": bracelet,
+                "difficult": difficult,
+                "comment": None,
+            })
+            if returned_at is not None:
+                operations.append({
+                    "receipt_id": receipt_id,
+                    "operation_type_id": refs.operation_types["polishing"],
+                    "employee_id": polisher_id,
+                    "created_at": returned_at,
+                })
+                event("polishing_returned", returned_at, {
+                    "polisher_id": polisher_id,
+                    "returned_at": returned_at.isoformat(),
+                })
+                at = returned_at
+
+        if rng.random() < COMMENT_SHARE:
+            at += timedelta(minutes=rng.randint(1, 120))
+            event("comment_added", at, {"comment": "Клиент просил позвонить"})
+
+        otk_share = OTK_PASSED_SHARE
+        if self.anchor - created_at < timedelta(days=RECENT_DAYS):
+            otk_share = OTK_PASSED_RECENT_SHARE
+        if rng.random() < otk_share:
+            at += timedelta(hours=rng.randint(1, 48))
+            event("passed_otk", at, {})
+
+            if rng.random() < RETURN_SHARE / otk_share:
+                returned = at + timedelta(days=rng.randint(1, 60))
+                reasons = []
+                for reason_id, _, _, affects in rng.sample(refs.reasons, rng.randint(1, 2)):
+                    guilty = polisher_id if affects == "polishing" else master_id
+                    reasons.append({
+                        "reason_id": reason_id,
+                        "guilty_employee_id": guilty if rng.random() < 0.7 else None,
+                    })
+                returns.append(({
+                    "receipt_id": receipt_id,
+                    "comment": None,
+                    "created_at": min(returned, self.anchor),
+                }, reasons))
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scale", default="10k", help="Квитанций: 10k, 100k, 1m или число")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument(
+        "--anchor", type=datetime.fromisoformat, default=None,
+        help="Конец периода данных (ISO); по умолчанию — текущее время",
+    )
+    parser.add_argument("--create-tables", action="store_true", help="Создать таблицы по моделям")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+    from app.core.database import Base, SessionLocal, engine
+    import app.models  # noqa: F401
+
+    if args.create_tables:
+        Base.metadata.create_all(bind=engine)
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        counts = DataGenerator(db, seed=args.seed, anchor=args.anchor).generate(
+            parse_scale(args.scale), batch_size=args.batch_size
+        )
+    logger.info(f"Done in {time.perf_counter() - started:.1f}s: {counts.as_dict()}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,161 @@
+"""
+Фейковый Telegram Bot API и конструктор входящих update для нагрузочного стенда.
+
+FakeBotAPI — aiohttp-сервер с маршрутом /bot<token>/<method>, куда aiogram
+ходит вместо api.telegram.org (TelegramAPIServer.from_base). Все вызовы
+записываются; sendMessage и editMessageText отвечают объектом Message,
+как настоящий Bot API, и запоминаются как текущий «экран» чата — по его
+inline-клавиатуре виртуальный оператор выбирает, какую кнопку нажать.
+"""
+import itertools
+import json
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from aiohttp import web
+
+# Методы, меняющие то, что видит оператор
+SCREEN_METHODS = frozenset({"sendMessage", "editMessageText"})
+
+
+@dataclass
+class BotCall:
+    """Один вызов Bot API (at — time.perf_counter() приёма запроса)."""
+
+    method: str
+    chat_id: Optional[int]
+    params: dict[str, str]
+    at: float
+
+
+class FakeBotAPI:
+    """Локальный Bot API: записывает вызовы и хранит последний экран каждого чата."""
+
+    def __init__(self, bot_id: int = 1):
+        self.bot_user = {
+            "id": bot_id,
+            "is_bot": True,
+            "first_name": "Bench",
+            "username": "bench_bot",
+        }
+        self.calls: list[BotCall] = []
+        self.screens: dict[int, dict] = {}
+        self._chat_calls: dict[int, list[BotCall]] = {}
+        self._message_ids = itertools.count(1)
+        self._runner: Optional[web.AppRunner] = None
+        self.url = ""
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Запускает сервер в текущем event loop, возвращает базовый URL."""
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        self.url = f"http://{host}:{self._runner.addresses[0][1]}"
+        return self.url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def chat_calls(self, chat_id: int) -> list[BotCall]:
+        return self._chat_calls.get(chat_id, [])
+
+    def method_counts(self) -> dict[str, int]:
+        return dict(Counter(call.method for call in self.calls))
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params = {key: str(value) for key, value in (await request.post()).items()}
+        chat_id = int(params["chat_id"]) if "chat_id" in params else None
+        call = BotCall(method=method, chat_id=chat_id, params=params, at=time.perf_counter())
+        self.calls.append(call)
+        if chat_id is not None:
+            self._chat_calls.setdefault(chat_id, []).append(call)
+        return web.json_response({"ok": True, "result": self.respond(call)})
+
+    def respond(self, call: BotCall) -> Any:
+        """Ответ Bot API на вызов: Message для экранных методов, иначе True."""
+        if call.method == "getMe":
+            return self.bot_user
+        if call.method not in SCREEN_METHODS or call.chat_id is None:
+            return True
+        if call.method == "editMessageText":
+            message_id = int(call.params["message_id"])
+        else:
+            message_id = next(self._message_ids)
+        message = {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": call.chat_id, "type": "private"},
+            "from": self.bot_user,
+            "text": call.params.get("text", ""),
+        }
+        markup = json.loads(call.params.get("reply_markup") or "{}")
+        if "inline_keyboard" in markup:
+            message["reply_markup"] = markup
+        self.screens[call.chat_id] = message
+        return message
+
+
+def find_button(screen: Optional[dict], callback_prefix: str = "", text: str = "") -> Optional[dict]:
+    """Первая кнопка экрана с callback_data, начинающимся с callback_prefix (или с таким текстом)."""
+    if not screen:
+        return None
+    for row in screen.get("reply_markup", {}).get("inline_keyboard", []):
+        for button in row:
+            data = button.get("callback_data")
+            if data is None:
+                continue
+            if (text and button.get("text") == text) or (
+                callback_prefix and data.startswith(callback_prefix)
+            ):
+                return button
+    return None
+
+
+class UpdateFactory:
+    """Входящие update от имени пользователей в личных чатах (chat_id == user_id)."""
+
+    def __init__(self, first_update_id: int = 1):
+        self._update_ids = itertools.count(first_update_id)
+        self._message_ids = itertools.count(1_000_000)
+
+    @staticmethod
+    def user(user_id: int) -> dict:
+        return {
+            "id": user_id,
+            "is_bot": False,
+            "first_name": f"Operator {user_id}",
+            "username": f"operator_{user_id}",
+        }
+
+    def message(self, user_id: int, text: str) -> dict:
+        return {
+            "update_id": next(self._update_ids),
+            "message": {
+                "message_id": next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "from": self.user(user_id),
+                "text": text,
+            },
+        }
+
+    def callback(self, user_id: int, data: str, screen: dict) -> dict:
+        """Нажатие inline-кнопки под сообщением screen."""
+        update_id = next(self._update_ids)
+        return {
+            "update_id": update_id,
+            "callback_query": {
+                "id": str(update_id),
+                "from": self.user(user_id),
+                "chat_instance": str(user_id),
+                "message": screen,
+                "data": data,
+            },
+        }
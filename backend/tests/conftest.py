@@ -11,12 +11,16 @@ os.environ["TELEGRAM_BOT_WEBHOOK_URL"] = ""
 os.environ["API_KEY"] = "test-api-key"
 os.environ["TELEGRAM_WEBHOOK_SECRET"] = "test-webhook-secret"
 os.environ["DATABASE_URL"] = "sqlite://"
+# EXPLAIN медленных запросов идёт в фоновом потоке — не на общем соединении StaticPool
+os.environ["SLOW_QUERY_EXPLAIN"] = "0"
 
 # Принудительно обнуляем config бота (мог быть уже загружен с реальным TOKEN)
 import telegram_bot.config
 telegram_bot.config.bot_config.TOKEN = ""
 telegram_bot.config.bot_config.WEBHOOK_URL = ""
 
+from contextlib import contextmanager
+
 import pytest
 from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, Session
@@ -24,6 +28,7 @@ from sqlalchemy.pool import StaticPool
 from fastapi.testclient import TestClient
 
 from app.core.database import Base, get_db
+from app.core.query_stats import QueryStats
 from app.main import app as fastapi_app
 from app.seeds.operation_types import seed_operation_types
 from app.seeds.return_reasons import seed_return_reasons
@@ -135,6 +140,35 @@ def seeded_client(seeded_db: Session) -> TestClient:
     fastapi_app.dependency_overrides.clear()
 
 
+@pytest.fixture
+def query_budget():
+    """
+    Ограничение числа SQL-запросов в блоке:
+
+        with query_budget(3) as stats:
+            client.get(...)
+
+    Падает с отчётом о самых частых формах запросов, если их больше max_queries.
+    """
+    @contextmanager
+    def budget(max_queries: int):
+        stats = QueryStats()
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            stats.record(statement)
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            yield stats
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        assert stats.count <= max_queries, (
+            f"Ожидалось не больше {max_queries} SQL-запросов, выполнено {stats.report()}"
+        )
+
+    return budget
+
+
 # --- Вспомогательные функции для создания тестовых данных ---
 
 def create_receipt(c: TestClient, receipt_number: str = "TEST-001") -> dict:
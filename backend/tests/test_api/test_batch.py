@@ -0,0 +1,157 @@
+"""Тесты пакетных операций над несколькими квитанциями."""
+from app.models.notification import Notification
+from tests.conftest import create_receipt, create_employee
+
+
+class TestBatchAssignMaster:
+
+    def test_resolves_and_creates_receipts(self, client):
+        master = create_employee(client, "Мастер", "master")
+        existing = create_receipt(client, "100")
+
+        resp = client.post("/api/v1/receipts/batch/assign-master", json={
+            "receipt_numbers": ["100", "101", "102", "101"],
+            "master_id": master["id"],
+            "telegram_id": 1,
+        })
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["succeeded"] == 3 and data["failed"] == 0
+        assert [r["receipt_number"] for r in data["results"]] == ["100", "101", "102"]
+        assert data["results"][0]["receipt_id"] == existing["id"]
+        assert [r["created"] for r in data["results"]] == [False, True, True]
+
+        history = client.get(f"/api/v1/receipts/{existing['id']}/history").json()["history"]
+        assert [e["event_type"] for e in history][-1] == "sent_to_master"
+
+    def test_urgent_sets_deadline(self, client):
+        master = create_employee(client, "Мастер", "master")
+        client.post("/api/v1/receipts/batch/assign-master", json={
+            "receipt_numbers": ["200", "201"],
+            "master_id": master["id"],
+            "is_urgent": True,
+            "deadline": "2099-12-31T12:00:00",
+        })
+        assert client.get("/api/v1/receipts/urgent").json()["total"] == 2
+
+    def test_urgent_deadline_flushed_once(self, client, db_session, query_budget):
+        """Дедлайн пакета пишется одним flush, уведомления перепланируются после него."""
+        master = create_employee(client, "Мастер", "master")
+
+        def assign(numbers: list[str]):
+            with query_budget(1000) as stats:
+                resp = client.post("/api/v1/receipts/batch/assign-master", json={
+                    "receipt_numbers": numbers,
+                    "master_id": master["id"],
+                    "is_urgent": True,
+                    "deadline": "2099-12-31T12:00:00+00:00",
+                })
+            assert resp.json()["succeeded"] == len(numbers)
+            # Вставки строк истории и уведомлений неизбежны; считаем остальное
+            return sum(n for shape, n in stats.shapes.items() if not shape.startswith("INSERT"))
+
+        small = assign(["600", "601"])
+        large = assign([str(n) for n in range(610, 630)])
+        # На квитанцию — только отмена старых уведомлений (без flush и refresh)
+        assert large - small <= 18
+
+        receipt = client.get("/api/v1/receipts/number/615").json()
+        assert receipt["current_deadline"] == "2099-12-31T15:00:00"
+        notifications = db_session.query(Notification).filter(
+            Notification.receipt_id == receipt["id"]
+        ).all()
+        assert {n.notification_type for n in notifications} == {"deadline_today", "deadline_1h"}
+
+    def test_past_deadline_rejected(self, client):
+        master = create_employee(client, "Мастер", "master")
+        resp = client.post("/api/v1/receipts/batch/assign-master", json={
+            "receipt_numbers": ["700"],
+            "master_id": master["id"],
+            "is_urgent": True,
+            "deadline": "2020-01-01T10:00:00+03:00",
+        })
+        assert resp.status_code == 400
+        assert "уже прошёл" in resp.json()["detail"]
+        assert client.get("/api/v1/receipts/number/700").status_code == 404
+
+    def test_unknown_master(self, client):
+        resp = client.post("/api/v1/receipts/batch/assign-master", json={
+            "receipt_numbers": ["300"], "master_id": 999,
+        })
+        assert resp.status_code == 404
+        assert client.get("/api/v1/receipts/number/300").status_code == 404
+
+    def test_batch_size_limits(self, client):
+        master = create_employee(client, "Мастер", "master")
+        for numbers in ([], [str(i) for i in range(101)]):
+            resp = client.post("/api/v1/receipts/batch/assign-master", json={
+                "receipt_numbers": numbers, "master_id": master["id"],
+            })
+            assert resp.status_code == 422
+
+
+class TestBatchOtkPass:
+
+    def test_otk_pass_removes_from_urgent(self, client):
+        master = create_employee(client, "Мастер", "master")
+        client.post("/api/v1/receipts/batch/assign-master", json={
+            "receipt_numbers": ["400", "401"],
+            "master_id": master["id"],
+            "is_urgent": True,
+            "deadline": "2099-12-31T12:00:00",
+        })
+
+        resp = client.post("/api/v1/receipts/batch/otk-pass", json={"receipt_numbers": ["400", "401"]})
+        assert resp.status_code == 200
+        assert resp.json()["succeeded"] == 2
+        assert client.get("/api/v1/receipts/urgent").json()["total"] == 0
+
+
+class TestBatchPolishing:
+
+    def test_partial_failure_for_already_polished(self, client):
+        polisher = create_employee(client, "Полировщик", "polisher")
+        receipt = create_receipt(client, "500")
+        client.post("/api/v1/polishing", json={
+            "receipt_id": receipt["id"], "polisher_id": polisher["id"], "metal_type": "gold",
+        })
+
+        resp = client.post("/api/v1/polishing/batch", json={
+            "receipt_numbers": ["500", "501"],
+            "polisher_id": polisher["id"],
+            "metal_type": "steel",
+            "bracelet": True,
+        })
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["succeeded"] == 1 and data["failed"] == 1
+        assert data["results"][0]["status"] == "error"
+        assert data["results"][1]["status"] == "ok"
+
+        new_id = data["results"][1]["receipt_id"]
+        polishing = client.get(f"/api/v1/polishing/receipt/{new_id}").json()
+        assert polishing["metal_type"] == "steel" and polishing["bracelet"] is True
+
+    def test_duplicate_rolls_back_only_its_savepoint(self, client):
+        """Уже существующие квитанции: повтор отсекается ограничением, остальные пишутся."""
+        polisher = create_employee(client, "Полировщик", "polisher")
+        first = create_receipt(client, "510")
+        second = create_receipt(client, "511")
+        client.post("/api/v1/polishing", json={
+            "receipt_id": second["id"], "polisher_id": polisher["id"], "metal_type": "gold",
+        })
+
+        resp = client.post("/api/v1/polishing/batch", json={
+            "receipt_numbers": ["511", "510"],
+            "polisher_id": polisher["id"],
+            "metal_type": "steel",
+            "comment": " матовый\x07",
+        })
+        data = resp.json()
+        assert [r["status"] for r in data["results"]] == ["error", "ok"]
+        assert "уже в полировке" in data["results"][0]["detail"]
+
+        assert client.get(f"/api/v1/polishing/receipt/{second['id']}").json()["metal_type"] == "gold"
+        assert client.get(f"/api/v1/polishing/receipt/{first['id']}").json()["comment"] == "матовый"
+        events = client.get(f"/api/v1/receipts/{second['id']}/history").json()["history"]
+        assert [e["event_type"] for e in events].count("polishing_sent") == 1
@@ -0,0 +1,154 @@
+"""Тесты пакета команд над квитанциями (/receipts/commands)."""
+from app.models.history import HistoryEvent
+from app.models.notification import Notification
+from app.models.polishing import PolishingDetails
+from tests.conftest import create_employee, create_receipt
+
+URL = "/api/v1/receipts/commands"
+
+
+def _events(db_session, receipt_id: int) -> list[str]:
+    return [
+        event.event_type
+        for event in db_session.query(HistoryEvent)
+        .filter(HistoryEvent.receipt_id == receipt_id)
+        .order_by(HistoryEvent.id)
+    ]
+
+
+def test_commands_applied_in_order(client, db_session):
+    master = create_employee(client, "Мастер", "master")
+    polisher = create_employee(client, "Полировщик", "polisher")
+    receipt = create_receipt(client, "800")
+    other = create_receipt(client, "801")
+
+    resp = client.post(URL, json={
+        "telegram_id": 42,
+        "commands": [
+            {"type": "assign_master", "receipt_id": receipt["id"], "master_id": master["id"],
+             "is_urgent": True, "deadline": "2099-01-10T15:00:00"},
+            {"type": "add_comment", "receipt_id": receipt["id"], "comment": "царапина"},
+            {"type": "set_deadline", "receipt_id": receipt["id"], "deadline": "2099-01-12T15:00:00"},
+            {"type": "send_to_polishing", "receipt_id": other["id"], "polisher_id": polisher["id"],
+             "metal_type": "steel"},
+            {"type": "otk_pass", "receipt_id": other["id"]},
+        ],
+    })
+    assert resp.status_code == 200
+    body = resp.json()
+    assert [r["status"] for r in body["results"]] == ["ok"] * 5
+    assert [r["index"] for r in body["results"]] == list(range(5))
+
+    assert _events(db_session, receipt["id"])[1:] == [
+        "deadline_changed", "sent_to_master", "comment_added", "deadline_changed",
+    ]
+    assert _events(db_session, other["id"])[1:] == ["polishing_sent", "passed_otk"]
+    assert client.get(f"/api/v1/receipts/{receipt['id']}").json()["current_deadline"] == (
+        "2099-01-12T15:00:00"
+    )
+
+    # Уведомления запланированы один раз — по итоговому дедлайну
+    active = db_session.query(Notification).filter(
+        Notification.receipt_id == receipt["id"], Notification.is_cancelled == False,  # noqa: E712
+    ).all()
+    assert {n.scheduled_at.day for n in active} == {12}
+
+
+def test_invalid_command_rejects_whole_batch(client, db_session):
+    polisher = create_employee(client, "Полировщик", "polisher")
+    receipt = create_receipt(client, "810")
+    polishing = {
+        "type": "send_to_polishing", "receipt_id": receipt["id"],
+        "polisher_id": polisher["id"], "metal_type": "gold",
+    }
+
+    resp = client.post(URL, json={"commands": [
+        {"type": "otk_pass", "receipt_id": receipt["id"]},
+        polishing,
+        polishing,
+        {"type": "assign_master", "receipt_id": 99999, "master_id": polisher["id"]},
+    ]})
+    assert resp.status_code == 404
+    body = resp.json()
+    assert body["error_code"] == "NOT_FOUND"
+    assert "команда 2 (send_to_polishing)" in body["detail"]
+    assert "уже в полировке" in body["detail"]
+    assert "99999" in body["detail"]
+    assert "команда 0" not in body["detail"]
+
+    assert _events(db_session, receipt["id"]) == ["receipt_created"]
+    assert db_session.query(PolishingDetails).count() == 0
+
+
+def test_already_polished_is_409(client, db_session):
+    polisher = create_employee(client, "Полировщик", "polisher")
+    receipt = create_receipt(client, "811")
+    polishing = {
+        "type": "send_to_polishing", "receipt_id": receipt["id"],
+        "polisher_id": polisher["id"], "metal_type": "gold",
+    }
+
+    resp = client.post(URL, json={"commands": [polishing, polishing]})
+    assert resp.status_code == 409
+    assert resp.json()["error_code"] == "DUPLICATE"
+    assert db_session.query(PolishingDetails).count() == 0
+
+
+def test_past_deadline_is_400(client, db_session):
+    master = create_employee(client, "Мастер", "master")
+    receipt = create_receipt(client, "812")
+
+    for command in (
+        {"type": "set_deadline", "receipt_id": receipt["id"], "deadline": "2020-01-01T10:00:00"},
+        {"type": "assign_master", "receipt_id": receipt["id"], "master_id": master["id"],
+         "is_urgent": True, "deadline": "2020-01-01T10:00:00+03:00"},
+    ):
+        resp = client.post(URL, json={"commands": [command]})
+        assert resp.status_code == 400
+        assert resp.json()["error_code"] == "VALIDATION_ERROR"
+        assert "уже прошёл" in resp.json()["detail"]
+    assert _events(db_session, receipt["id"]) == ["receipt_created"]
+
+
+def test_offset_deadline_stored_in_moscow_time(client):
+    receipt = create_receipt(client, "813")
+    resp = client.post(URL, json={"commands": [
+        {"type": "set_deadline", "receipt_id": receipt["id"], "deadline": "2099-01-10T12:00:00+00:00"},
+    ]})
+    assert resp.status_code == 200
+    assert client.get(f"/api/v1/receipts/{receipt['id']}").json()["current_deadline"] == (
+        "2099-01-10T15:00:00"
+    )
+
+
+def test_comments_sanitized(client, db_session):
+    polisher = create_employee(client, "Полировщик", "polisher")
+    receipt = create_receipt(client, "814")
+
+    resp = client.post(URL, json={"commands": [
+        {"type": "add_comment", "receipt_id": receipt["id"], "comment": "  ца\x00рапина \x07"},
+        {"type": "send_to_polishing", "receipt_id": receipt["id"], "polisher_id": polisher["id"],
+         "metal_type": "steel", "comment": "\x1bматовый "},
+    ]})
+    assert resp.status_code == 200
+    events = (
+        db_session.query(HistoryEvent)
+        .filter(HistoryEvent.receipt_id == receipt["id"])
+        .order_by(HistoryEvent.id)
+        .all()
+    )
+    assert events[1].payload["comment"] == "царапина"
+    assert events[2].payload["comment"] == "матовый"
+    assert db_session.query(PolishingDetails).one().comment == "матовый"
+
+    empty = client.post(URL, json={"commands": [
+        {"type": "add_comment", "receipt_id": receipt["id"], "comment": "\x00 "},
+    ]})
+    assert empty.status_code == 400
+
+
+def test_unknown_command_type_is_422(client):
+    receipt = create_receipt(client, "820")
+    resp = client.post(URL, json={"commands": [{"type": "explode", "receipt_id": receipt["id"]}]})
+    assert resp.status_code == 422
+    assert client.post(URL, json={"commands": []}).status_code == 422
@@ -0,0 +1,99 @@
+"""Тесты сжатия ответов: согласование кодировки, порог, потоковый режим, метрики."""
+import gzip
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core import compression
+from app.core.compression import CompressionMiddleware, is_compressible, negotiate_encoding
+from tests.conftest import create_receipt
+
+
+def _app(minimum_size: int = 100) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=minimum_size)
+
+    @app.get("/text")
+    def text(size: int = 1000):
+        return PlainTextResponse("x" * size)
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(
+            (f"line {i}\n".encode() for i in range(500)), media_type="text/csv"
+        )
+
+    @app.get("/binary")
+    def binary():
+        return PlainTextResponse(b"\0" * 1000, media_type="application/octet-stream")
+
+    return app
+
+
+def test_negotiate_encoding(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    assert negotiate_encoding(None) is None
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("gzip, deflate") == "gzip"
+    assert negotiate_encoding("gzip;q=0") is None
+    assert negotiate_encoding("*") == "gzip"
+    assert negotiate_encoding("br") is None
+
+    monkeypatch.setattr(compression, "brotli", object())
+    assert negotiate_encoding("gzip, br") == "br"
+    assert negotiate_encoding("gzip;q=1, br;q=0.5") == "gzip"
+
+    assert is_compressible("application/json")
+    assert is_compressible("text/csv; charset=utf-8")
+    assert not is_compressible("image/png")
+
+
+def test_gzip_buffered_response_and_threshold():
+    client = TestClient(_app())
+    resp = client.get("/text", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["content-encoding"] == "gzip"
+    assert resp.headers["vary"] == "Accept-Encoding"
+    assert int(resp.headers["content-length"]) < 1000
+    assert resp.text == "x" * 1000
+
+    small = client.get("/text?size=10", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+    assert small.text == "x" * 10
+
+    plain = client.get("/text", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    binary = client.get("/binary", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in binary.headers
+
+
+def test_streaming_response_compressed_per_chunk():
+    with TestClient(_app()).stream(
+        "GET", "/stream", headers={"Accept-Encoding": "gzip"}
+    ) as resp:
+        assert resp.headers["content-encoding"] == "gzip"
+        assert "content-length" not in resp.headers
+        raw = b"".join(resp.iter_raw())
+    assert gzip.decompress(raw) == b"".join(f"line {i}\n".encode() for i in range(500))
+
+
+def test_list_endpoint_compressed_with_route_metrics(client):
+    for number in range(30):
+        create_receipt(client, str(5000 + number))
+
+    labels = {"route": "/api/v1/receipts", "encoding": "gzip"}
+    before_in = compression.COMPRESSION_BYTES_IN.value(**labels)
+    before_out = compression.COMPRESSION_BYTES_OUT.value(**labels)
+
+    resp = client.get("/api/v1/receipts?limit=100", headers={"Accept-Encoding": "gzip"})
+    assert resp.status_code == 200
+    assert resp.headers["content-encoding"] == "gzip"
+    assert resp.json()["total"] == 30
+
+    bytes_in = compression.COMPRESSION_BYTES_IN.value(**labels) - before_in
+    bytes_out = compression.COMPRESSION_BYTES_OUT.value(**labels) - before_out
+    assert bytes_in == len(resp.content)
+    assert 0 < bytes_out < bytes_in
+
+    rendered = client.get("/metrics").text
+    assert 'http_compression_cpu_seconds_count{route="/api/v1/receipts",encoding="gzip"}' in rendered
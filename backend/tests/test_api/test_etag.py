@@ -0,0 +1,83 @@
+"""Тесты ETag и условных GET (If-None-Match → 304)."""
+from app.core.etag import etag_matches, make_etag
+from tests.conftest import create_employee, create_receipt
+
+
+def test_etag_matching_rules():
+    etag = make_etag("history", 1, 10)
+    assert etag.startswith('W/"')
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", {etag.removeprefix("W/")}', etag)  # слабое сравнение, список
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches(make_etag("history", 1, 11), etag)
+
+
+class TestHistoryETag:
+
+    def test_not_modified_until_new_event(self, client):
+        receipt = create_receipt(client, "800")
+        url = f"/api/v1/history/receipt/{receipt['id']}"
+
+        first = client.get(url)
+        etag = first.headers["etag"]
+        assert first.headers["cache-control"] == "private, no-cache"
+
+        cached = client.get(url, headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["etag"] == etag
+
+        client.post("/api/v1/history", json={"receipt_id": receipt["id"], "event_type": "note"})
+        changed = client.get(url, headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.headers["etag"] != etag
+        assert changed.json()["total"] == first.json()["total"] + 1
+
+    def test_etag_depends_on_page(self, client):
+        receipt = create_receipt(client, "801")
+        url = f"/api/v1/history/receipt/{receipt['id']}"
+        assert client.get(url).headers["etag"] != client.get(url, params={"limit": 5}).headers["etag"]
+
+    def test_receipt_with_history_tracks_deadline(self, client):
+        receipt = create_receipt(client, "802")
+        url = f"/api/v1/receipts/{receipt['id']}/history"
+        etag = client.get(url).headers["etag"]
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+        client.patch(
+            f"/api/v1/receipts/{receipt['id']}/deadline",
+            json={"current_deadline": "2099-01-01T10:00:00"},
+        )
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 200
+
+    def test_receipt_by_id(self, client):
+        receipt = create_receipt(client, "803")
+        url = f"/api/v1/receipts/{receipt['id']}"
+        response = client.get(url)
+        assert response.json() == receipt
+        assert client.get(url, headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+        assert client.get("/api/v1/receipts/999999").status_code == 404
+
+
+class TestAnalyticsETag:
+
+    def test_report_not_modified_until_new_operation(self, seeded_client):
+        client = seeded_client
+        url = "/api/v1/analytics/performance"
+        first = client.get(url, params={"period": "all"})
+        etag = first.headers["etag"]
+        assert client.get(url, params={"period": "all"}, headers={"If-None-Match": etag}).status_code == 304
+        # Другие параметры — другой ETag
+        assert client.get(url, params={"period": "day"}).headers["etag"] != etag
+
+        employee = create_employee(client, "Сборщик", "master")
+        receipt = create_receipt(client, "810")
+        type_id = client.get("/api/v1/operations/types/assembly").json()["id"]
+        client.post("/api/v1/operations", json={
+            "receipt_id": receipt["id"], "operation_type_id": type_id, "employee_id": employee["id"],
+        })
+
+        changed = client.get(url, params={"period": "all"}, headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.json()["total_operations"] == 1
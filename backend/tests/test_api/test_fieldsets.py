@@ -0,0 +1,87 @@
+"""Тесты разреженных наборов полей (?fields=) списочных эндпоинтов."""
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from app.core.exceptions import ValidationException
+from app.core.fieldsets import parse_fields
+from app.schemas.receipt import ReceiptResponse
+from tests.conftest import create_receipt, engine
+
+
+@contextmanager
+def captured_selects():
+    statements: list[str] = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_execute)
+
+
+def test_parse_fields_keeps_schema_order_and_rejects_unknown():
+    assert parse_fields(ReceiptResponse, None) is None
+    assert parse_fields(ReceiptResponse, " , ") is None
+    assert parse_fields(ReceiptResponse, "current_deadline, id") == ("current_deadline", "id")
+    with pytest.raises(ValidationException, match="payload"):
+        parse_fields(ReceiptResponse, "id,payload")
+
+
+def test_receipts_list_selects_only_requested_columns(client):
+    create_receipt(client, "900")
+    create_receipt(client, "901")
+
+    with captured_selects() as statements:
+        resp = client.get("/api/v1/receipts", params={"fields": "id,receipt_number"})
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["total"] == 2
+    assert [set(item) for item in body["items"]] == [{"id", "receipt_number"}] * 2
+
+    list_select = next(s for s in statements if "FROM receipts" in s and "count" not in s.lower())
+    assert "receipt_number" in list_select
+    assert "created_at" not in list_select.split("FROM")[0]
+
+
+def test_unknown_field_rejected(client):
+    resp = client.get("/api/v1/receipts/urgent", params={"fields": "id,secret"})
+    assert resp.status_code == 400
+    assert resp.json()["error_code"] == "VALIDATION_ERROR"
+    assert "secret" in resp.json()["detail"]
+
+
+def test_urgent_page_with_fields_keeps_cursor(client):
+    for number in ("910", "911", "912"):
+        receipt = create_receipt(client, number)
+        client.patch(f"/api/v1/receipts/{receipt['id']}/deadline", json={
+            "current_deadline": f"2030-01-0{int(number) - 909}T12:00:00",
+        })
+
+    params = {"limit": 2, "fields": "id,receipt_number"}
+    first = client.get("/api/v1/receipts/urgent", params=params).json()
+    assert [set(item) for item in first["items"]] == [{"id", "receipt_number"}] * 2
+    second = client.get(
+        "/api/v1/receipts/urgent", params={**params, "cursor": first["next_cursor"]}
+    ).json()
+    assert [item["receipt_number"] for item in second["items"]] == ["912"]
+
+
+def test_history_fields_skip_payload(client):
+    receipt = create_receipt(client, "920")
+    with captured_selects() as statements:
+        resp = client.get(
+            f"/api/v1/history/receipt/{receipt['id']}", params={"fields": "event_type,created_at"}
+        )
+    item = resp.json()["items"][0]
+    assert item == {"event_type": "receipt_created", "created_at": item["created_at"]}
+    assert not any("payload" in s for s in statements if "FROM history" in s)
+
+    full = client.get(f"/api/v1/history/receipt/{receipt['id']}")
+    assert full.headers["etag"] != resp.headers["etag"]
+    assert "payload" in full.json()["items"][0]
@@ -1,11 +1,54 @@
-"""Smoke-тест: проверка инфраструктуры."""
+"""Smoke-тест: проверка инфраструктуры и health checks."""
+import time
+from types import SimpleNamespace
+
+import pytest
+from fakeredis.aioredis import FakeRedis
+
+from app.core import health as health_checks
+from app.core.config import settings
+from app.core.health import readiness
+from telegram_bot.services.notification_scheduler import CHECK_INTERVAL, scheduler_stats
+from telegram_bot.services.update_queue import UpdateQueue
+
+
+@pytest.fixture(autouse=True)
+def fresh_readiness(monkeypatch):
+    """Без кэша между тестами и без модуля бота (его мог загрузить другой тест)."""
+    readiness.reset()
+    monkeypatch.setattr(health_checks, "_bot_module", lambda: None)
+    yield
+    readiness.reset()
+
+
+@pytest.fixture
+def db_roundtrips(monkeypatch):
+    calls = []
+    original = health_checks._db_roundtrip
+
+    def counted():
+        calls.append(1)
+        original()
+
+    monkeypatch.setattr(health_checks, "_db_roundtrip", counted)
+    return calls
+
+
+def fail_db(monkeypatch):
+    def broken():
+        raise ConnectionError("db down")
+
+    monkeypatch.setattr(health_checks, "_db_roundtrip", broken)
 
 
 def test_health_check(client):
     """Health endpoint отвечает 200."""
     response = client.get("/health")
     assert response.status_code == 200
-    assert response.json() == {"status": "healthy", "database": "connected"}
+    body = response.json()
+    assert body["status"] == "healthy"
+    assert body["database"] == "connected"
+    assert set(body["notifications"]) == {"backlog", "delivery_lag_seconds", "scheduler"}
 
 
 def test_database_tables_created(db_session):
@@ -13,3 +56,71 @@ def test_database_tables_created(db_session):
     from app.models.receipt import Receipt
     result = db_session.query(Receipt).all()
     assert result == []
+
+
+def test_live_does_not_touch_dependencies(client, monkeypatch):
+    fail_db(monkeypatch)
+    response = client.get("/health/live")
+    assert response.status_code == 200
+    assert response.json()["status"] == "alive"
+
+
+def test_ready_result_cached(client, db_roundtrips):
+    first = client.get("/health/ready")
+    second = client.get("/health/ready")
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json()
+    assert len(db_roundtrips) == 1
+
+    body = first.json()
+    assert body["status"] == "ready"
+    assert body["checks"]["database"]["status"] == "ok"
+    assert body["checks"]["database"]["latency_ms"] >= 0
+    assert {body["checks"][name]["status"] for name in ("redis", "webhook", "scheduler")} == {"skipped"}
+
+
+def test_ready_fails_without_database(client, monkeypatch):
+    fail_db(monkeypatch)
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "not_ready"
+    assert "db down" in response.json()["checks"]["database"]["error"]
+
+    legacy = client.get("/health")
+    assert legacy.status_code == 503
+    assert legacy.json()["status"] == "unhealthy"
+
+
+def test_ready_reports_bot_dependencies(client, monkeypatch):
+    queue = UpdateQueue(handler=None, workers=1, maxsize=10)
+    for seconds in (0.1, 0.2, 7.0):
+        queue.stats.observe_processing(seconds)
+    bot_module = SimpleNamespace(get_fsm_redis=lambda: FakeRedis(), get_update_queue=lambda: queue)
+    monkeypatch.setattr(health_checks, "_bot_module", lambda: bot_module)
+    monkeypatch.setattr(scheduler_stats, "last_iteration_at", time.time() - CHECK_INTERVAL - 300)
+    monkeypatch.setattr(settings, "HEALTH_SCHEDULER_MAX_LAG", 120)
+
+    body = client.get("/health/ready").json()
+    checks = body["checks"]
+    assert body["status"] == "degraded"
+    assert checks["redis"]["status"] == "ok" and checks["redis"]["latency_ms"] >= 0
+    assert checks["webhook"]["status"] == "degraded"
+    assert checks["webhook"]["recent_count"] == 3
+    assert checks["webhook"]["recent_max_seconds"] == 7.0
+    assert checks["scheduler"]["status"] == "degraded"
+    assert checks["scheduler"]["lag_seconds"] >= 300
+
+
+def test_ready_fails_without_redis(client, monkeypatch):
+    class BrokenRedis:
+        async def ping(self):
+            raise ConnectionError("redis down")
+
+    bot_module = SimpleNamespace(
+        get_fsm_redis=BrokenRedis,
+        get_update_queue=lambda: UpdateQueue(handler=None, workers=1),
+    )
+    monkeypatch.setattr(health_checks, "_bot_module", lambda: bot_module)
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["checks"]["redis"]["status"] == "error"
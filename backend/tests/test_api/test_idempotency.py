@@ -0,0 +1,98 @@
+"""Тесты Idempotency-Key для POST-запросов."""
+from datetime import timedelta
+
+from app.core.idempotency import request_fingerprint
+from app.core.utils import now_moscow
+from app.models.history import HistoryEvent
+from app.models.idempotency import IdempotencyKey
+from app.models.receipt import Receipt
+from app.services.idempotency_service import IdempotencyService
+
+URL = "/api/v1/receipts"
+
+
+def _post(client, number: str, key: str, **kwargs):
+    return client.post(URL, json={"receipt_number": number}, headers={"Idempotency-Key": key}, **kwargs)
+
+
+def test_retry_replays_stored_response(client, db_session):
+    first = _post(client, "IDEM-1", "key-1")
+    assert first.status_code == 201
+    assert "idempotent-replayed" not in first.headers
+
+    second = _post(client, "IDEM-1", "key-1")
+    assert second.status_code == 201
+    assert second.headers["idempotent-replayed"] == "true"
+    assert second.json() == first.json()
+
+    assert db_session.query(Receipt).count() == 1
+    assert db_session.query(HistoryEvent).count() == 1
+
+
+def test_key_reused_with_other_body(client):
+    _post(client, "IDEM-2", "key-2")
+    resp = _post(client, "IDEM-3", "key-2")
+    assert resp.status_code == 400
+    assert resp.json()["error_code"] == "IDEMPOTENCY_KEY_REUSED"
+
+
+def test_in_progress_key_conflicts(client, db_session):
+    body = b'{"receipt_number": "IDEM-4"}'
+    scope = {"method": "POST", "path": URL, "query_string": b""}
+    IdempotencyService(db_session).reserve("key-3", request_fingerprint(scope, body))
+
+    resp = client.post(
+        URL, content=body,
+        headers={"Idempotency-Key": "key-3", "Content-Type": "application/json"},
+    )
+    assert resp.status_code == 409
+    assert resp.json()["error_code"] == "IDEMPOTENCY_IN_PROGRESS"
+    assert resp.headers["retry-after"] == "1"
+    assert db_session.query(Receipt).count() == 0
+
+
+def test_store_failure_releases_key(client, db_session, monkeypatch):
+    def broken_complete(self, *args):
+        raise RuntimeError("db is gone")
+
+    monkeypatch.setattr(IdempotencyService, "complete", broken_complete)
+    assert _post(client, "IDEM-6", "key-6").status_code == 201
+    assert db_session.get(IdempotencyKey, "key-6") is None
+
+    monkeypatch.undo()
+    # Резерв снят — повтор выполняется (квитанция уже есть), а не ждёт конца TTL
+    retry = _post(client, "IDEM-6", "key-6")
+    assert retry.json()["error_code"] == "DUPLICATE"
+    assert "idempotent-replayed" not in retry.headers
+
+
+def test_client_errors_replayed_and_expired_keys_execute_again(client, db_session):
+    missing = client.post("/api/v1/receipts/999/otk-pass", json={}, headers={"Idempotency-Key": "key-4"})
+    assert missing.status_code == 404
+    replay = client.post("/api/v1/receipts/999/otk-pass", json={}, headers={"Idempotency-Key": "key-4"})
+    assert replay.status_code == 404
+    assert replay.headers["idempotent-replayed"] == "true"
+
+    assert _post(client, "IDEM-5", "key-5").status_code == 201
+    db_session.get(IdempotencyKey, "key-5").created_at = now_moscow() - timedelta(days=2)
+    db_session.flush()
+    # Ключ просрочен — запрос выполняется заново, квитанция уже существует
+    again = _post(client, "IDEM-5", "key-5")
+    assert again.status_code != 201
+    assert "idempotent-replayed" not in again.headers
+
+
+def test_without_valid_api_key_nothing_is_stored(client_no_auth, db_session):
+    resp = client_no_auth.post(URL, json={"receipt_number": "X"}, headers={"Idempotency-Key": "k"})
+    assert resp.status_code == 401
+    assert db_session.query(IdempotencyKey).count() == 0
+
+
+def test_purge_expired(db_session):
+    service = IdempotencyService(db_session)
+    service.reserve("old", "f")
+    service.reserve("new", "f")
+    db_session.get(IdempotencyKey, "old").created_at = now_moscow() - timedelta(days=2)
+    db_session.flush()
+    assert service.purge_expired() == 1
+    assert [k.key for k in db_session.query(IdempotencyKey)] == ["new"]
@@ -0,0 +1,110 @@
+"""Тесты импорта квитанций из CSV (API и CLI)."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.cli import import_receipts
+from app.core.config import settings
+from app.core.utils import now_moscow
+from app.models.history import HistoryEvent
+from app.models.notification import Notification
+from app.models.receipt import Receipt
+from app.services.import_service import ReceiptCsvReader, parse_deadline
+from tests.conftest import TestingSessionLocal, create_receipt
+
+URL = "/api/v1/receipts/import"
+
+
+def _post_csv(client, text: str):
+    return client.post(URL, content=text.encode(), headers={"Content-Type": "text/csv"})
+
+
+def test_reader_header_and_positional_columns():
+    reader = ReceiptCsvReader()
+    rows = reader.feed(["deadline,receipt_number\n", "2030-01-01T10:00,A1\n"])
+    assert [(r.line, r.receipt_number, r.deadline) for r in rows] == [(2, "A1", "2030-01-01T10:00")]
+    # Заголовок запоминается между пачками
+    assert reader.feed(["2030-01-02T10:00,A2\n"])[0].receipt_number == "A2"
+
+    rows = ReceiptCsvReader().feed(["B1\n", "\n", "B2,01.02.2030 12:30\n"])
+    assert [(r.line, r.receipt_number, r.deadline) for r in rows] == [
+        (1, "B1", None), (3, "B2", "01.02.2030 12:30"),
+    ]
+    assert parse_deadline("01.02.2030 12:30").hour == 12
+    assert parse_deadline(" ") is None
+    with pytest.raises(ValueError):
+        parse_deadline("завтра")
+
+
+def test_import_creates_receipts_history_and_notifications(client, db_session, monkeypatch):
+    monkeypatch.setattr(settings, "IMPORT_CHUNK_SIZE", 2)
+    create_receipt(client, "EXIST")
+    deadline = (now_moscow() + timedelta(days=3)).replace(tzinfo=None, microsecond=0)
+    csv_text = (
+        "\ufeffreceipt_number,deadline\n"
+        f"N1,{deadline.isoformat()}\n"
+        "EXIST,\n"
+        "N2,\n"
+        "N1,\n"
+        ",2030-01-01\n"
+        "N3,когда-нибудь\n"
+        "N4"
+    )
+
+    resp = _post_csv(client, csv_text)
+    assert resp.status_code == 200
+    assert resp.json() == {
+        "rows": 7, "created": 3, "skipped": 2, "failed": 2, "notifications": 2,
+        "errors": [
+            {"line": 6, "receipt_number": None, "detail": "Пустой номер квитанции"},
+            {"line": 7, "receipt_number": "N3", "detail": "Не удалось разобрать дедлайн «когда-нибудь»"},
+        ],
+    }
+
+    receipts = {r.receipt_number: r for r in db_session.query(Receipt)}
+    assert set(receipts) == {"EXIST", "N1", "N2", "N4"}
+    assert receipts["N1"].current_deadline == deadline
+    events = db_session.query(HistoryEvent).filter(HistoryEvent.receipt_id == receipts["N1"].id).all()
+    assert [(e.event_type, e.payload["source"]) for e in events] == [("receipt_created", "import")]
+    assert {n.receipt_id for n in db_session.query(Notification)} == {receipts["N1"].id}
+
+    # Повторный импорт того же файла ничего не создаёт
+    again = _post_csv(client, csv_text).json()
+    assert again["created"] == 0 and again["skipped"] == 5
+
+
+def test_import_rejects_non_utf8(client):
+    resp = client.post(URL, content="номер".encode("cp1251"), headers={"Content-Type": "text/csv"})
+    assert resp.status_code == 400
+    assert resp.json()["error_code"] == "VALIDATION_ERROR"
+
+
+def test_cli_import_and_dry_run(tmp_path, db_session, monkeypatch):
+    monkeypatch.setattr(import_receipts, "SessionLocal", TestingSessionLocal)
+    path = tmp_path / "receipts.csv"
+    path.write_text("C1\nC2\nC3\n", encoding="utf-8")
+
+    dry = import_receipts.import_file(str(path), chunk_size=2, dry_run=True)
+    assert dry.created == 3
+    assert db_session.query(Receipt).count() == 0
+
+    assert import_receipts.main([str(path), "--chunk-size", "2"]) == 0
+    assert {r.receipt_number for r in db_session.query(Receipt)} == {"C1", "C2", "C3"}
+
+
+def test_parse_deadline_with_offset_is_moscow_naive():
+    assert parse_deadline("2030-10-20T10:00+03:00") == datetime(2030, 10, 20, 10, 0)
+    assert parse_deadline("2030-10-20T07:00Z") == datetime(2030, 10, 20, 10, 0)
+    assert parse_deadline("2030-10-20T10:00").tzinfo is None
+
+
+def test_import_offset_and_past_deadlines(client, db_session):
+    resp = _post_csv(client, "P1,2030-10-20T10:00+03:00\nP2,01.01.2020 12:00\n")
+    assert resp.status_code == 200
+    body = resp.json()
+    assert (body["created"], body["failed"], body["notifications"]) == (1, 1, 2)
+    assert body["errors"] == [
+        {"line": 2, "receipt_number": "P2", "detail": "Дедлайн 01.01.2020 12:00 уже прошёл"},
+    ]
+    receipt = db_session.query(Receipt).filter(Receipt.receipt_number == "P1").one()
+    assert receipt.current_deadline == datetime(2030, 10, 20, 10, 0)
@@ -0,0 +1,217 @@
+"""Тесты эндпоинта метрик и реестра метрик."""
+import json
+import os
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+from app.core.config import settings
+from app.core.database import DB_POOL_CHECKOUT_SECONDS, InstrumentedQueuePool, pool_stats
+from app.core.http_metrics import (
+    HTTP_DB_QUERIES,
+    HTTP_IN_FLIGHT,
+    HTTP_REQUEST_SECONDS,
+    HTTP_REQUESTS,
+)
+from app.core.metrics import MetricsRegistry
+from app.core.metrics_multiprocess import merge_snapshots, registry_snapshot
+from telegram_bot.services.notification_scheduler import (
+    process_pending_notifications,
+    scheduler_stats,
+)
+from tests.conftest import create_receipt
+
+ROUTE = "/api/v1/receipts/{receipt_id}"
+
+
+@pytest.fixture(autouse=True)
+def reset_scheduler_stats():
+    scheduler_stats.reset()
+    yield
+    scheduler_stats.reset()
+
+
+class TestRegistry:
+    """Тесты реестра метрик."""
+
+    def test_histogram_render(self):
+        reg = MetricsRegistry()
+        hist = reg.histogram("lag_seconds", "Lag", buckets=(1, 10))
+        hist.observe(0.5)
+        hist.observe(5)
+        text = reg.render()
+        assert 'lag_seconds_bucket{le="1"} 1' in text
+        assert 'lag_seconds_bucket{le="10"} 2' in text
+        assert 'lag_seconds_bucket{le="+Inf"} 2' in text
+        assert "lag_seconds_count 2" in text
+
+    def test_counter_labels(self):
+        reg = MetricsRegistry()
+        counter = reg.counter("failures_total", "Failures", labelnames=("recipient",))
+        counter.inc(recipient="1")
+        counter.inc(2, recipient="1")
+        assert counter.value(recipient="1") == 3
+        assert 'failures_total{recipient="1"} 3' in reg.render()
+
+    def test_same_name_different_type_rejected(self):
+        reg = MetricsRegistry()
+        reg.counter("x", "X")
+        with pytest.raises(ValueError):
+            reg.gauge("x", "X")
+
+
+class TestMetricsEndpoint:
+    """Тесты /metrics."""
+
+    def test_requires_api_key(self, client_no_auth):
+        assert client_no_auth.get("/metrics").status_code == 401
+
+    def test_prometheus_format(self, client):
+        resp = client.get("/metrics")
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/plain")
+        assert "# TYPE notification_delivery_lag_seconds histogram" in resp.text
+        assert "notification_scheduler_iterations_total" in resp.text
+
+
+class TestSchedulerInstrumentation:
+    """Scheduler уведомлений собирает длительность итерации, backlog и ошибки отправки."""
+
+    @pytest.mark.asyncio
+    async def test_iteration_stats_and_failures(self, client):
+        api = AsyncMock()
+        api.get_pending_notifications.return_value = [
+            {"id": 1, "receipt_id": 10, "notification_type": "deadline_1h"},
+        ]
+        api.get_receipt.return_value = {"receipt_number": "R-10"}
+        bot = MagicMock()
+        bot.send_message = AsyncMock(side_effect=[None, Exception("blocked")])
+
+        with patch(
+            "telegram_bot.services.notification_scheduler.get_api_client", return_value=api
+        ), patch(
+            "telegram_bot.services.notification_scheduler.bot_config.ADMIN_IDS", [111, 222]
+        ):
+            await process_pending_notifications(bot)
+
+        assert scheduler_stats.iterations == 1
+        assert scheduler_stats.last_backlog == 1
+        assert scheduler_stats.notifications_sent == 1
+        assert scheduler_stats.send_failures == {222: 1}
+
+        resp = client.get("/metrics")
+        assert 'notification_send_failures_total{recipient="222"} 1' in resp.text
+
+        health = client.get("/health").json()
+        assert health["notifications"]["scheduler"]["send_failures"] == 1
+
+
+class TestRequestMetrics:
+    """Метрики HTTP-запросов по шаблону роута и SQL-запросы на запрос."""
+
+    def test_route_template_latency_and_queries(self, client):
+        created = create_receipt(client, "M-1")
+        before = HTTP_REQUESTS.value(method="GET", route=ROUTE, status="200")
+        queries_before = HTTP_DB_QUERIES.sum(method="GET", route=ROUTE)
+
+        assert client.get(f"/api/v1/receipts/{created['id']}").status_code == 200
+        assert client.get("/api/v1/receipts/999999").status_code == 404
+
+        assert HTTP_REQUESTS.value(method="GET", route=ROUTE, status="200") == before + 1
+        assert HTTP_REQUESTS.value(method="GET", route=ROUTE, status="404") >= 1
+        assert HTTP_REQUEST_SECONDS.count(method="GET", route=ROUTE) >= 2
+        # sync-эндпоинт выполняется в threadpool — запросы всё равно учтены
+        assert HTTP_DB_QUERIES.sum(method="GET", route=ROUTE) > queries_before
+        assert HTTP_IN_FLIGHT.value() == 0
+
+        text = client.get("/metrics").text
+        assert f'http_request_duration_seconds_count{{method="GET",route="{ROUTE}"}}' in text
+        assert "http_requests_in_flight" in text
+
+    def test_pool_checkout_wait_and_stats(self, tmp_path):
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'pool.db'}",
+            poolclass=InstrumentedQueuePool, pool_size=2, max_overflow=1,
+        )
+        count = DB_POOL_CHECKOUT_SECONDS.count()
+        connections = [engine.connect() for _ in range(3)]
+        assert DB_POOL_CHECKOUT_SECONDS.count() == count + 3
+        assert pool_stats(engine.pool) == {
+            "size": 2, "checked_in": 0, "checked_out": 3, "overflow": 1,
+        }
+        for conn in connections:
+            conn.close()
+        engine.dispose()
+        assert pool_stats(StaticPool(lambda: None)) == {}
+
+
+def test_middleware_order_matches_docs():
+    """Порядок снаружи внутрь, описанный в app.main и docstring'ах middleware."""
+    from app.main import app as fastapi_app
+
+    names = [m.cls.__name__ for m in fastapi_app.user_middleware]
+    assert names == [
+        "RequestProfilerMiddleware",
+        "TracingMiddleware",
+        "RequestMetricsMiddleware",
+        "CompressionMiddleware",
+        "CORSMiddleware",
+        "IdempotencyMiddleware",
+    ]
+
+
+class TestMultiprocess:
+    """Объединение снимков метрик нескольких воркеров."""
+
+    @staticmethod
+    def _snapshot(pid: int, requests: int, in_flight: int, backlog: int) -> dict:
+        reg = MetricsRegistry()
+        reg.counter("req_total", "R", labelnames=("route",)).inc(requests, route="/a")
+        reg.histogram("lat_seconds", "L", buckets=(1,)).observe(0.5)
+        reg.gauge("in_flight", "F", multiprocess_mode="sum").set(in_flight)
+        reg.gauge("backlog", "B", multiprocess_mode="max").set(backlog)
+        reg.gauge("started", "S").set(pid)
+        reg.register_collector(lambda: [
+            ("queue_depth", {}, 2),
+            ("updates_processed_total", {}, requests),
+            ("processing_seconds_max", {}, requests / 10),
+        ])
+        snapshot = registry_snapshot(reg)
+        snapshot["pid"] = pid
+        return snapshot
+
+    def test_merge_modes(self):
+        snapshots = [self._snapshot(1, 3, 1, 5), self._snapshot(2, 4, 2, 7)]
+        text = merge_snapshots(snapshots, live_pids={1, 2})
+        assert 'req_total{route="/a"} 7' in text
+        assert 'lat_seconds_bucket{le="1"} 2' in text
+        assert "in_flight 3" in text
+        assert "backlog 7" in text
+        assert 'started{pid="1"} 1' in text and 'started{pid="2"} 2' in text
+        assert "queue_depth 4" in text
+        assert "updates_processed_total 7" in text
+        assert "processing_seconds_max 0.4" in text
+
+    def test_dead_process_keeps_counters_only(self):
+        snapshots = [self._snapshot(1, 3, 1, 5), self._snapshot(2, 4, 2, 7)]
+        text = merge_snapshots(snapshots, live_pids={1})
+        assert 'req_total{route="/a"} 7' in text
+        assert "in_flight 1" in text
+        assert "backlog 5" in text
+        assert 'pid="2"' not in text
+        assert "queue_depth 2" in text
+        # Счётчики и максимумы коллекторов завершившегося процесса не теряются
+        assert "updates_processed_total 7" in text
+        assert "processing_seconds_max 0.4" in text
+
+    def test_endpoint_merges_snapshot_dir(self, client, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "METRICS_MULTIPROC_DIR", str(tmp_path))
+        other = self._snapshot(os.getpid() + 100000, 5, 0, 0)
+        (tmp_path / "metrics_other.json").write_text(json.dumps(other))
+        client.get("/metrics")
+        assert (tmp_path / f"metrics_{os.getpid()}.json").exists()
+        text = client.get("/metrics").text
+        assert 'req_total{route="/a"} 5' in text
+        assert "http_requests_total" in text
@@ -0,0 +1,111 @@
+"""Тесты сэмплирующего профилировщика: профиль процесса и профиль запроса по X-Profile."""
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.profiler import RequestProfilerMiddleware, request_profiles
+
+
+@pytest.fixture(autouse=True)
+def clean_profiles():
+    request_profiles.clear()
+    yield
+    request_profiles.clear()
+
+
+@pytest.fixture
+def background_spin():
+    """Поток, занятый CPU, пока идёт тест."""
+    stop = threading.Event()
+
+    def spin_in_background():
+        while not stop.is_set():
+            sum(range(1000))
+
+    thread = threading.Thread(target=spin_in_background, name="bench-spinner-1")
+    thread.start()
+    yield
+    stop.set()
+    thread.join()
+
+
+def spin_for(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+
+
+def assert_collapsed(text: str) -> None:
+    for line in text.splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert stack and int(count) > 0
+
+
+def test_process_profile_covers_threads(client, background_spin):
+    resp = client.get("/api/v1/admin/profile", params={"seconds": 0.3, "interval_ms": 5})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    assert int(resp.headers["x-profile-samples"]) > 0
+    assert_collapsed(resp.text)
+    assert "bench-spinner-N;" in resp.text
+    assert "spin_in_background (" in resp.text
+
+
+def test_process_profile_limits_and_auth(client, client_no_auth, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILER_MAX_SECONDS", 1)
+    assert client.get("/api/v1/admin/profile", params={"seconds": 5}).status_code == 400
+    assert client_no_auth.get("/api/v1/admin/profile", params={"seconds": 0.1}).status_code == 401
+
+
+def test_request_profile_only_that_request(background_spin):
+    app = FastAPI()
+    app.add_middleware(RequestProfilerMiddleware)
+
+    @app.get("/sync")
+    def sync_endpoint():
+        spin_for(0.1)
+        return {"ok": True}
+
+    @app.get("/async")
+    async def async_endpoint():
+        spin_for(0.05)
+        return {"ok": True}
+
+    with TestClient(app) as test_client:
+        headers = {"X-Profile": "1", "X-API-Key": settings.API_KEY}
+        sync_resp = test_client.get("/sync", headers=headers)
+        async_resp = test_client.get("/async", headers=headers)
+        plain_resp = test_client.get("/sync", headers={"X-Profile": "1"})
+
+    assert "x-profile-id" not in plain_resp.headers
+    sync_profile = request_profiles.get(sync_resp.headers["x-profile-id"])
+    async_profile = request_profiles.get(async_resp.headers["x-profile-id"])
+    assert sync_profile.route == "/sync" and sync_profile.status == 200
+    assert sync_profile.samples > 0 and async_profile.samples > 0
+    assert "sync_endpoint (" in sync_profile.collapsed
+    assert "async_endpoint (" in async_profile.collapsed
+    # Фоновая работа процесса в профиль запроса не попадает
+    for profile in (sync_profile, async_profile):
+        assert_collapsed(profile.collapsed)
+        assert "spin_in_background" not in profile.collapsed
+
+
+def test_request_profile_listed(client):
+    resp = client.get("/api/v1/receipts", headers={"X-Profile": "1"})
+    assert resp.status_code == 200
+    profile_id = resp.headers["x-profile-id"]
+
+    listing = client.get("/api/v1/admin/profiles").json()
+    assert listing["total"] == 1
+    assert listing["items"][0]["id"] == profile_id
+    assert listing["items"][0]["route"] == "/api/v1/receipts"
+    assert listing["items"][0]["method"] == "GET"
+
+    detail = client.get(f"/api/v1/admin/profiles/{profile_id}")
+    assert detail.status_code == 200
+    assert "x-profile-samples" in detail.headers
+    assert client.get("/api/v1/admin/profiles/missing").status_code == 404
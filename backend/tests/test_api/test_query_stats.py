@@ -0,0 +1,84 @@
+"""Тесты учёта SQL-запросов на HTTP-запрос и детектора N+1."""
+import logging
+
+import pytest
+
+from app.core.config import settings
+from app.core.http_metrics import QUERY_BUDGET_EXCEEDED
+from app.core.query_stats import QueryStats, statement_shape, track_queries
+from app.models.receipt import Receipt
+from tests.conftest import create_employee, create_receipt
+
+
+def test_statement_shape_strips_values():
+    assert statement_shape("SELECT *\n  FROM t WHERE id = 5 AND name = 'O''Neil'") == (
+        "SELECT * FROM t WHERE id = ? AND name = ?"
+    )
+    assert statement_shape("SELECT * FROM t WHERE id IN (?, ?, ?)") == "SELECT * FROM t WHERE id IN (?)"
+
+
+def test_repeated_shapes_and_report():
+    stats = QueryStats()
+    for i in range(3):
+        stats.record(f"SELECT * FROM employees WHERE id = {i}", 0.001)
+    stats.record("SELECT count(*) FROM receipts")
+    assert stats.count == 4
+    assert stats.repeated(3) == [("SELECT * FROM employees WHERE id = ?", 3)]
+    assert stats.report().startswith("4 queries")
+
+
+def test_track_queries_counts_context(db_session):
+    with track_queries() as stats:
+        db_session.query(Receipt).all()
+        db_session.query(Receipt).count()
+    assert stats.count == 2
+    assert stats.seconds >= 0
+    db_session.query(Receipt).all()
+    assert stats.count == 2
+
+
+def test_request_over_budget_logged(client, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "SQL_QUERY_BUDGET", 1)
+    before = QUERY_BUDGET_EXCEEDED.value(method="GET", route="/api/v1/receipts", reason="budget")
+    with caplog.at_level(logging.WARNING, logger="app.core.http_metrics"):
+        assert client.get("/api/v1/receipts").status_code == 200
+    assert QUERY_BUDGET_EXCEEDED.value(method="GET", route="/api/v1/receipts", reason="budget") == before + 1
+    assert "SQL budget exceeded (budget): GET /api/v1/receipts: 2 queries" in caplog.text
+
+
+def test_return_create_does_not_query_per_reason(seeded_client, query_budget):
+    receipt = create_receipt(seeded_client, "R-N1")
+    employees = [create_employee(seeded_client, f"Мастер {i}") for i in range(3)]
+    codes = ("dirt_inside", "mechanism_defect", "wrong_assembly")
+    reasons = [seeded_client.get(f"/api/v1/returns/reasons/{code}").json() for code in codes]
+    body = {
+        "receipt_id": receipt["id"],
+        "reasons": [
+            {"reason_id": r["id"], "guilty_employee_id": e["id"]} for r, e in zip(reasons, employees)
+        ],
+    }
+    # квитанция, причины, сотрудники, возврат, 3 связи, история, ответ
+    with query_budget(9) as stats:
+        resp = seeded_client.post("/api/v1/returns", json=body)
+    assert resp.status_code == 201
+    assert {r["guilty_employee_id"] for r in resp.json()["reasons"]} == {e["id"] for e in employees}
+    assert not [shape for shape, _ in stats.repeated(2) if shape.startswith("SELECT")]
+
+
+def test_operation_create_query_budget(seeded_client, query_budget):
+    receipt = create_receipt(seeded_client, "R-N2")
+    employee = create_employee(seeded_client, "Мастер")
+    type_id = seeded_client.get("/api/v1/operations/types/assembly").json()["id"]
+    with query_budget(5):
+        resp = seeded_client.post(
+            "/api/v1/operations",
+            json={"receipt_id": receipt["id"], "operation_type_id": type_id, "employee_id": employee["id"]},
+        )
+    assert resp.json()["employee"]["name"] == "Мастер"
+    assert resp.json()["operation_type"]["code"] == "assembly"
+
+
+def test_query_budget_fixture_fails_with_report(client, query_budget):
+    with pytest.raises(AssertionError, match="Ожидалось не больше 0 SQL-запросов"):
+        with query_budget(0):
+            client.get("/api/v1/receipts")
@@ -130,6 +130,41 @@ class TestUrgent:
         assert resp.status_code == 200
         assert resp.json()["total"] == 0
 
+    def test_urgent_cursor_pagination(self, client):
+        for i in range(3):
+            receipt = create_receipt(client, f"R-00{i}")
+            client.patch(
+                f"/api/v1/receipts/{receipt['id']}/deadline",
+                json={"current_deadline": f"2099-12-2{i}T10:00:00"},
+            )
+
+        first = client.get("/api/v1/receipts/urgent", params={"limit": 2}).json()
+        assert first["total"] == 3
+        assert len(first["items"]) == 2
+        assert first["next_cursor"]
+
+        second = client.get(
+            "/api/v1/receipts/urgent", params={"limit": 2, "cursor": first["next_cursor"]}
+        ).json()
+        assert len(second["items"]) == 1
+        assert second["next_cursor"] is None
+        ids = {r["id"] for r in first["items"]} | {r["id"] for r in second["items"]}
+        assert len(ids) == 3
+
+    def test_urgent_window_filter(self, client):
+        receipt = create_receipt(client, "R-001")
+        client.patch(
+            f"/api/v1/receipts/{receipt['id']}/deadline",
+            json={"current_deadline": "2099-12-31T23:59:00"},
+        )
+        resp = client.get("/api/v1/receipts/urgent", params={"window": "overdue"})
+        assert resp.status_code == 200
+        assert resp.json()["total"] == 0
+
+    def test_urgent_invalid_window_and_cursor(self, client):
+        assert client.get("/api/v1/receipts/urgent", params={"window": "year"}).status_code == 422
+        assert client.get("/api/v1/receipts/urgent", params={"cursor": "%%%"}).status_code == 400
+
 
 class TestAssignMaster:
     """Выдача часов мастеру."""
@@ -0,0 +1,78 @@
+"""Тесты быстрого пути сериализации списочных ответов (orjson, без повторной валидации)."""
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Optional
+
+import orjson
+from pydantic import BaseModel, field_validator
+
+from app.core.responses import ORJSONResponse, _trusted_fields, dump_rows, list_response
+from app.schemas.employee import EmployeeResponse
+from app.schemas.history import HistoryEventListResponse, HistoryEventResponse
+from app.schemas.polishing import PolishingDetailsResponse
+from tests.conftest import create_employee, create_receipt
+
+
+def test_trusted_schemas_skip_validation():
+    assert _trusted_fields(HistoryEventResponse) is not None
+    assert _trusted_fields(EmployeeResponse) is not None  # Literal-роль — тоже скаляр
+    # Вложенная модель — только через pydantic
+    assert _trusted_fields(PolishingDetailsResponse) is None
+
+    class WithValidator(BaseModel):
+        name: str
+
+        @field_validator("name")
+        @classmethod
+        def upper(cls, value: str) -> str:
+            return value.upper()
+
+    assert _trusted_fields(WithValidator) is None
+
+
+def test_list_response_matches_pydantic_dump():
+    row = SimpleNamespace(
+        id=1, receipt_id=2, event_type="sent_to_master", payload={"urgent": True},
+        telegram_id=None, telegram_username="user", created_at=datetime(2026, 1, 2, 3, 4, 5),
+    )
+    expected = HistoryEventListResponse(
+        items=[HistoryEventResponse.model_validate(row)], total=1
+    ).model_dump(mode="json")
+
+    response = list_response(HistoryEventListResponse, HistoryEventResponse, [row], total=1)
+    assert response.media_type == "application/json"
+    assert orjson.loads(response.body) == expected
+
+
+def test_untrusted_schema_validated_once():
+    class Item(BaseModel):
+        value: int
+        label: Optional[str] = None
+
+        @field_validator("value")
+        @classmethod
+        def double(cls, value: int) -> int:
+            return value * 2
+
+    assert dump_rows(Item, [SimpleNamespace(value=2, label=None)]) == [{"value": 4, "label": None}]
+    assert orjson.loads(ORJSONResponse(Item(value=1)).body) == {"value": 2, "label": None}
+
+
+def test_list_endpoints_keep_wire_format(client):
+    master = create_employee(client, "Мастер", "master")
+    receipt = create_receipt(client, "700")
+    client.post("/api/v1/receipts/assign-master", json={
+        "receipt_id": receipt["id"], "master_id": master["id"],
+    })
+
+    receipts = client.get("/api/v1/receipts").json()
+    assert receipts["total"] == 1 and receipts["skip"] == 0 and receipts["limit"] == 100
+    assert receipts["items"][0] == receipt
+
+    with_history = client.get(f"/api/v1/receipts/{receipt['id']}/history").json()
+    assert with_history["receipt_number"] == "700"
+    assert [e["event_type"] for e in with_history["history"]][-1] == "sent_to_master"
+    assert with_history["history"][-1]["payload"]["master_id"] == master["id"]
+
+    employees = client.get("/api/v1/employees").json()
+    assert employees["items"][0]["role"] == "master"
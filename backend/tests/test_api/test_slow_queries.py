@@ -0,0 +1,97 @@
+"""Тесты журнала медленных SQL-запросов и admin-эндпоинта."""
+import logging
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.core.config import settings
+from app.core.slow_queries import BACKGROUND_ORIGIN, parameter_shape, slow_query_log
+
+
+@pytest.fixture(autouse=True)
+def clean_log():
+    slow_query_log.reset()
+    yield
+    slow_query_log.reset()
+
+
+@pytest.fixture
+def file_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'slow.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+    yield engine
+    engine.dispose()
+
+
+def test_parameter_shape_hides_values():
+    assert parameter_shape((1, 2, 3, "x", None)) == "(int x3, str, NoneType)"
+    assert parameter_shape({"id_1": 5}) == "{id_1: int}"
+    assert parameter_shape([(1, "a"), (2, "b")], executemany=True) == "2 rows of (int, str)"
+    assert parameter_shape(None) == "()"
+
+
+def test_slow_request_listed_with_route(client, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "SLOW_QUERY_MS", 0)
+    with caplog.at_level(logging.WARNING, logger="app.core.slow_queries"):
+        assert client.get("/api/v1/receipts").status_code == 200
+        assert client.get("/api/v1/receipts").status_code == 200
+
+    resp = client.get("/api/v1/admin/slow-queries", params={"limit": 1})
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["total"] >= 2
+    assert body["threshold_ms"] == 0
+    top = body["items"][0]
+    assert len(body["items"]) == 1
+    assert top["shape"].startswith("SELECT")
+    assert top["count"] == 2
+    assert top["origins"] == {"GET /api/v1/receipts": 2}
+    assert top["explain_status"] is None
+    assert "Slow query" in caplog.text and "(GET /api/v1/receipts)" in caplog.text
+
+
+def test_reset_and_auth(client, client_no_auth, monkeypatch):
+    monkeypatch.setattr(settings, "SLOW_QUERY_MS", 0)
+    client.get("/api/v1/receipts")
+    assert client_no_auth.get("/api/v1/admin/slow-queries").status_code == 401
+    assert client.delete("/api/v1/admin/slow-queries").status_code == 204
+    assert client.get("/api/v1/admin/slow-queries").json()["total"] == 0
+
+
+def test_threshold_disabled(db_session, monkeypatch):
+    monkeypatch.setattr(settings, "SLOW_QUERY_MS", -1)
+    db_session.execute(text("SELECT 1"))
+    assert slow_query_log.top() == ([], 0)
+
+
+def test_explain_captured_once_per_select_shape(file_engine, monkeypatch):
+    monkeypatch.setattr(settings, "SLOW_QUERY_MS", 0)
+    monkeypatch.setattr(settings, "SLOW_QUERY_EXPLAIN", True)
+    with file_engine.begin() as conn:
+        conn.execute(text("INSERT INTO items (name) VALUES (:name)"), {"name": "a"})
+        for i in range(3):
+            conn.execute(text("SELECT name FROM items WHERE id = :id"), {"id": i})
+    slow_query_log.flush(timeout=10)
+
+    items, _ = slow_query_log.top(limit=50)
+    by_shape = {item["shape"]: item for item in items}
+    select = by_shape["SELECT name FROM items WHERE id = ?"]
+    assert select["count"] == 3
+    assert select["origins"] == {BACKGROUND_ORIGIN: 3}
+    assert select["explain_status"] == "done"
+    assert "items" in select["explain"]
+    assert by_shape["INSERT INTO items (name) VALUES (?)"]["explain_status"] == "skipped"
+    # запрос EXPLAIN сам в журнал не попадает
+    assert not [shape for shape in by_shape if shape.startswith("EXPLAIN")]
+
+
+def test_least_expensive_shape_evicted(db_session, monkeypatch):
+    monkeypatch.setattr(settings, "SLOW_QUERY_MS", 0)
+    monkeypatch.setattr(settings, "SLOW_QUERY_MAX_SHAPES", 2)
+    conn = db_session.connection()
+    for statement, seconds in (("SELECT a FROM t", 0.5), ("SELECT b FROM t", 0.1), ("SELECT c FROM t", 0.3)):
+        slow_query_log.observe(conn, statement, (), False, seconds)
+    items, total = slow_query_log.top()
+    assert total == 2
+    assert [item["shape"] for item in items] == ["SELECT a FROM t", "SELECT c FROM t"]
@@ -0,0 +1,108 @@
+"""
+Тесты старта приложения: бюджет времени импорта, фоновая установка webhook.
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.api import telegram as telegram_api
+from telegram_bot.config import bot_config
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+# Бюджет на импорт app.main в чистом процессе (без aiogram и redis — ~1 с)
+IMPORT_BUDGET_SECONDS = 4.0
+
+_IMPORT_PROBE = """
+import sys, time
+started = time.perf_counter()
+import app.main
+print(time.perf_counter() - started)
+print(",".join(m for m in ("aiogram", "redis", "telegram_bot.handlers.menu") if m in sys.modules))
+"""
+
+
+def test_app_import_within_budget():
+    """app.main импортируется быстро и не тянет aiogram, redis и хендлеры бота."""
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join([str(BACKEND_DIR), str(BACKEND_DIR.parent)]),
+        "DATABASE_URL": "sqlite://",
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", _IMPORT_PROBE],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    elapsed, heavy_modules = result.stdout.splitlines()
+    assert heavy_modules == ""
+    assert float(elapsed) < IMPORT_BUDGET_SECONDS
+
+
+@pytest.fixture
+def fake_bot_module():
+    module = SimpleNamespace(
+        setup_webhook=AsyncMock(side_effect=RuntimeError("telegram unavailable")),
+        get_bot=MagicMock(),
+        get_dispatcher=MagicMock(),
+        get_update_queue=MagicMock(),
+    )
+    with patch.object(telegram_api, "load_bot_module", AsyncMock(return_value=module)):
+        yield module
+
+
+async def test_startup_does_not_wait_for_webhook(fake_bot_module, monkeypatch):
+    """startup_event возвращается сразу, webhook ставится в фоне."""
+    monkeypatch.setattr(bot_config, "TOKEN", "123:abc")
+    monkeypatch.setattr(bot_config, "WEBHOOK_URL", "https://example.com")
+    monkeypatch.setattr(bot_config, "WEBHOOK_SETUP_ATTEMPTS", 3)
+
+    started = time.perf_counter()
+    await telegram_api.startup_event()
+    assert time.perf_counter() - started < 0.1
+
+    task = telegram_api._startup_task
+    assert task is not None and not task.done()
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    telegram_api._startup_task = None
+
+
+async def test_webhook_retries_with_jitter(fake_bot_module, monkeypatch):
+    monkeypatch.setattr(bot_config, "WEBHOOK_SETUP_ATTEMPTS", 4)
+    monkeypatch.setattr(bot_config, "WEBHOOK_SETUP_BACKOFF_MAX", 5.0)
+    fake_bot_module.setup_webhook.side_effect = [RuntimeError("x"), RuntimeError("x"), None]
+
+    sleep = AsyncMock()
+    with patch.object(telegram_api.asyncio, "sleep", sleep), \
+            patch.object(telegram_api.random, "uniform", side_effect=lambda a, b: b) as uniform:
+        assert await telegram_api.setup_webhook_with_retries(fake_bot_module) is True
+
+    assert fake_bot_module.setup_webhook.await_count == 3
+    # Потолок паузы растёт экспоненциально: 2, 4 (и ограничен BACKOFF_MAX)
+    assert [c.args for c in uniform.call_args_list] == [(0, 2), (0, 4)]
+    assert sleep.await_count == 2
+
+
+async def test_webhook_gives_up_after_attempts(fake_bot_module, monkeypatch):
+    monkeypatch.setattr(bot_config, "WEBHOOK_SETUP_ATTEMPTS", 2)
+    with patch.object(telegram_api.asyncio, "sleep", AsyncMock()):
+        assert await telegram_api.setup_webhook_with_retries(fake_bot_module) is False
+    assert fake_bot_module.setup_webhook.await_count == 2
+
+
+async def test_initialize_bot_records_stages(fake_bot_module, monkeypatch):
+    from app.core.startup import startup_timer
+
+    monkeypatch.setattr(bot_config, "WEBHOOK_URL", "")
+    await telegram_api.initialize_bot()
+
+    assert {"bot_import", "bot_dispatcher"} <= set(startup_timer.stages)
+    fake_bot_module.get_update_queue.return_value.start.assert_called_once()
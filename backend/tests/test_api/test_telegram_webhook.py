@@ -31,3 +31,28 @@ def test_webhook_with_wrong_secret_returns_403(client):
         headers={"X-Telegram-Bot-Api-Secret-Token": "wrong-secret"}
     )
     assert response.status_code == 403
+
+
+def test_webhook_acknowledges_immediately(client):
+    """Валидное обновление ставится в очередь, ответ 200 без ожидания обработки."""
+    from telegram_bot.bot import get_update_queue
+
+    response = client.post(
+        "/webhook/telegram/webhook",
+        json={"update_id": 1},
+        headers={"X-Telegram-Bot-Api-Secret-Token": "test-webhook-secret"}
+    )
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok"}
+    assert get_update_queue().stats.enqueued >= 1
+
+
+def test_webhook_invalid_update_not_enqueued(client):
+    """Невалидное обновление отклоняется с 200, чтобы Telegram не повторял."""
+    response = client.post(
+        "/webhook/telegram/webhook",
+        json={"not_an_update": True},
+        headers={"X-Telegram-Bot-Api-Secret-Token": "test-webhook-secret"}
+    )
+    assert response.status_code == 200
+    assert response.json()["status"] == "error"
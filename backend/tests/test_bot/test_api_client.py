@@ -2,11 +2,14 @@
 Тесты API-клиента бота (Issue #17).
 Используем pytest-httpx или ручной мок httpx.AsyncClient.
 """
+import asyncio
+from datetime import datetime
+
 import pytest
 from unittest.mock import AsyncMock
 import httpx
 
-from telegram_bot.services.api_client import APIClient
+from telegram_bot.services.api_client import APIClient, ValidatorCache
 
 
 @pytest.fixture(autouse=True)
@@ -114,6 +117,95 @@ class TestAPIRequests:
         )
         assert result["id"] == 1
 
+    @pytest.mark.asyncio
+    async def test_run_receipt_commands_serializes_deadline(self, api_client):
+        mock_response = httpx.Response(
+            200,
+            json={"results": [{"index": 0, "type": "set_deadline", "receipt_id": 1, "status": "ok"}]},
+            request=httpx.Request("POST", "http://test-server:8000/api/v1/receipts/commands"),
+        )
+        mock_client = AsyncMock()
+        mock_client.is_closed = False
+        mock_client.request = AsyncMock(return_value=mock_response)
+        api_client._client = mock_client
+
+        result = await api_client.run_receipt_commands(
+            [{"type": "set_deadline", "receipt_id": 1, "deadline": datetime(2099, 1, 10, 15, 0)}],
+            telegram_id=123,
+        )
+        assert result["results"][0]["status"] == "ok"
+        sent = mock_client.request.call_args.kwargs["json"]
+        assert sent["commands"][0]["deadline"] == "2099-01-10T15:00:00"
+        assert sent["telegram_id"] == 123
+
+    @pytest.mark.asyncio
+    async def test_post_retry_reuses_idempotency_key(self, api_client, monkeypatch):
+        """Повтор POST после таймаута уходит с тем же Idempotency-Key."""
+        monkeypatch.setattr(APIClient._send.retry, "sleep", AsyncMock())
+        mock_response = httpx.Response(
+            200,
+            json={"id": 1},
+            request=httpx.Request("POST", "http://test-server:8000/api/v1/operations"),
+        )
+        mock_client = AsyncMock()
+        mock_client.is_closed = False
+        mock_client.request = AsyncMock(side_effect=[httpx.ReadTimeout("timeout"), mock_response, mock_response])
+        api_client._client = mock_client
+
+        await api_client._request("POST", "/operations", json_data={"receipt_id": 1})
+        await api_client._request("POST", "/operations", json_data={"receipt_id": 1})
+
+        keys = [call.kwargs["headers"]["Idempotency-Key"] for call in mock_client.request.call_args_list[:2]]
+        assert keys[0] == keys[1]
+        # Новый вызов метода клиента — новая операция и новый ключ
+        assert mock_client.request.call_args.kwargs["headers"]["Idempotency-Key"] != keys[0]
+
+    @pytest.mark.asyncio
+    async def test_post_retry_waits_for_running_original(self, api_client, monkeypatch):
+        """Повтор застал исходный POST в работе (409 IN_PROGRESS) — ждём Retry-After и получаем ответ."""
+        sleep = AsyncMock()
+        monkeypatch.setattr(APIClient._send.retry, "sleep", sleep)
+        request = httpx.Request("POST", "http://test-server:8000/api/v1/operations")
+        in_progress = httpx.Response(
+            409,
+            json={"detail": "Запрос с этим Idempotency-Key ещё выполняется",
+                  "error_code": "IDEMPOTENCY_IN_PROGRESS"},
+            headers={"Retry-After": "2"},
+            request=request,
+        )
+        replayed = httpx.Response(
+            201, json={"id": 7}, headers={"Idempotent-Replayed": "true"}, request=request,
+        )
+        mock_client = AsyncMock()
+        mock_client.is_closed = False
+        mock_client.request = AsyncMock(
+            side_effect=[httpx.ReadTimeout("timeout"), in_progress, in_progress, replayed]
+        )
+        api_client._client = mock_client
+
+        result = await api_client._request("POST", "/operations", json_data={"receipt_id": 1})
+
+        assert result == {"id": 7}
+        keys = {call.kwargs["headers"]["Idempotency-Key"] for call in mock_client.request.call_args_list}
+        assert len(keys) == 1
+        assert [call.args[0] for call in sleep.call_args_list][1:] == [2.0, 2.0]
+
+    @pytest.mark.asyncio
+    async def test_other_409_not_retried(self, api_client):
+        mock_response = httpx.Response(
+            409,
+            json={"detail": "Квитанция уже существует", "error_code": "DUPLICATE"},
+            request=httpx.Request("POST", "http://test-server:8000/api/v1/receipts"),
+        )
+        mock_client = AsyncMock()
+        mock_client.is_closed = False
+        mock_client.request = AsyncMock(return_value=mock_response)
+        api_client._client = mock_client
+
+        with pytest.raises(httpx.HTTPStatusError):
+            await api_client._request("POST", "/receipts", json_data={"receipt_number": "1"})
+        assert mock_client.request.call_count == 1
+
     @pytest.mark.asyncio
     async def test_no_retry_on_4xx(self, api_client):
         """4xx ошибки не должны retry-иться."""
@@ -169,3 +261,259 @@ class TestAPIRequests:
         result = await api_client.get_return_reasons()
         assert isinstance(result, list)
         assert result[0]["code"] == "dirt_inside"
+
+
+class TestInProcessTransport:
+    """In-process ASGI транспорт: запросы идут напрямую в FastAPI-приложение."""
+
+    @pytest.mark.asyncio
+    async def test_asgi_transport_calls_app(self, api_client, seeded_client):
+        from app.main import app as fastapi_app
+
+        await api_client.use_asgi_app(fastapi_app)
+        assert api_client.is_in_process
+
+        reasons = await api_client.get_return_reasons()
+        assert len(reasons) > 0
+        assert {"id", "code", "name"} <= set(reasons[0])
+
+        client = await api_client._get_client()
+        assert str(client.base_url).startswith("http://in-process")
+        assert client.headers["accept-encoding"] == "identity"
+        await api_client.close()
+
+    @pytest.mark.asyncio
+    async def test_use_http_restores_network_transport(self, api_client):
+        from app.main import app as fastapi_app
+
+        await api_client.use_asgi_app(fastapi_app)
+        await api_client.use_http()
+        assert not api_client.is_in_process
+
+        client = await api_client._get_client()
+        assert str(client.base_url).startswith("http://test-server:8000")
+        await api_client.close()
+
+
+def _mock_client(json_body: dict) -> AsyncMock:
+    """Мок httpx.AsyncClient, всегда отвечающий json_body."""
+    mock_client = AsyncMock()
+    mock_client.is_closed = False
+    mock_client.request = AsyncMock(
+        side_effect=lambda method, url, **kw: httpx.Response(
+            200, json=json_body, request=httpx.Request(method, f"http://test-server:8000{url}")
+        )
+    )
+    return mock_client
+
+
+class TestReferenceCache:
+    """Кэш справочников: TTL, инвалидация при изменениях, статистика."""
+
+    @pytest.mark.asyncio
+    async def test_return_reasons_cached(self, api_client):
+        api_client._client = _mock_client({"items": [{"id": 1, "code": "dirt_inside"}], "total": 1})
+
+        first = await api_client.get_return_reasons()
+        second = await api_client.get_return_reasons()
+
+        assert first == second
+        assert api_client._client.request.call_count == 1
+        stats = api_client.cache_stats()["return_reasons"]
+        assert stats["hits"] == 1 and stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    @pytest.mark.asyncio
+    async def test_cached_value_is_copy(self, api_client):
+        api_client._client = _mock_client({"items": [{"id": 1, "name": "Иван"}], "total": 1})
+
+        employees = await api_client.get_employees(role="master")
+        employees[0]["name"] = "изменено"
+
+        again = await api_client.get_employees(role="master")
+        assert again[0]["name"] == "Иван"
+
+    @pytest.mark.asyncio
+    async def test_employees_cached_per_params(self, api_client):
+        api_client._client = _mock_client({"items": [], "total": 0})
+
+        await api_client.get_employees(role="master")
+        await api_client.get_employees(role="polisher")
+        await api_client.get_employees(role="master")
+
+        assert api_client._client.request.call_count == 2
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("mutation, args", [
+        ("create_employee", ("Иван", "master")),
+        ("update_employee", (1,)),
+        ("activate_employee", (1,)),
+        ("deactivate_employee", (1,)),
+    ])
+    async def test_invalidated_by_employee_mutations(self, api_client, mutation, args):
+        api_client._client = _mock_client({"items": [], "total": 0})
+
+        await api_client.get_employees(role="master")
+        await getattr(api_client, mutation)(*args)
+        await api_client.get_employees(role="master")
+
+        # GET + мутация + повторный GET после инвалидации
+        assert api_client._client.request.call_count == 3
+        assert api_client.cache_stats()["employees"]["invalidations"] == 1
+
+    @pytest.mark.asyncio
+    async def test_entry_expires_after_ttl(self, api_client, monkeypatch):
+        api_client._client = _mock_client({"items": [], "total": 0})
+        now = [1000.0]
+        monkeypatch.setattr("telegram_bot.services.api_client.time.monotonic", lambda: now[0])
+
+        await api_client.get_return_reasons()
+        now[0] += api_client._cache.ttls["return_reasons"] + 1
+        await api_client.get_return_reasons()
+
+        assert api_client._client.request.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_zero_ttl_disables_cache(self, api_client):
+        api_client._cache.ttls["employees"] = 0
+        api_client._client = _mock_client({"items": [], "total": 0})
+
+        await api_client.get_employees()
+        await api_client.get_employees()
+
+        assert api_client._client.request.call_count == 2
+
+
+class TestSingleFlight:
+    """Объединение одинаковых одновременных GET-запросов."""
+
+    @staticmethod
+    def _slow_client(json_body: dict, status: int = 200) -> AsyncMock:
+        async def slow_request(method, url, **kw):
+            await asyncio.sleep(0.01)
+            return httpx.Response(
+                status, json=json_body, request=httpx.Request(method, f"http://test-server:8000{url}")
+            )
+
+        mock_client = AsyncMock()
+        mock_client.is_closed = False
+        mock_client.request = AsyncMock(side_effect=slow_request)
+        return mock_client
+
+    @pytest.mark.asyncio
+    async def test_identical_gets_coalesced(self, api_client):
+        api_client._client = self._slow_client({"items": [{"id": 1}], "total": 1})
+
+        results = await asyncio.gather(*[api_client.get_urgent_receipts() for _ in range(5)])
+
+        assert api_client._client.request.call_count == 1
+        assert all(r == [{"id": 1}] for r in results)
+        # Каждый ожидающий получает собственную копию
+        assert len({id(r[0]) for r in results}) == 5
+        stats = api_client.coalescing_stats()
+        assert stats["get_requests"] == 5
+        assert stats["backend_calls"] == 1
+        assert stats["coalesced_ratio"] == 0.8
+
+    @pytest.mark.asyncio
+    async def test_different_params_not_coalesced(self, api_client):
+        api_client._client = self._slow_client({"period": "day"})
+
+        await asyncio.gather(
+            api_client.get_performance(period="day"),
+            api_client.get_performance(period="week"),
+        )
+
+        assert api_client._client.request.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_writes_not_coalesced(self, api_client):
+        api_client._client = self._slow_client({"id": 1})
+
+        await asyncio.gather(*[
+            api_client.otk_pass(receipt_id=1, telegram_id=1) for _ in range(3)
+        ])
+
+        assert api_client._client.request.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_error_shared_and_not_cached(self, api_client):
+        api_client._client = self._slow_client({"detail": "boom"}, status=500)
+
+        results = await asyncio.gather(
+            api_client.get_receipt(1), api_client.get_receipt(1), return_exceptions=True
+        )
+        assert all(isinstance(r, httpx.HTTPStatusError) for r in results)
+        assert api_client._client.request.call_count == 1
+
+        # Следующий запрос снова идёт в бэкенд
+        with pytest.raises(httpx.HTTPStatusError):
+            await api_client.get_receipt(1)
+        assert api_client._client.request.call_count == 2
+
+
+class TestConditionalGet:
+    """Кэш валидаторов: повторный GET с If-None-Match получает 304 без тела."""
+
+    @pytest.mark.asyncio
+    async def test_repeat_view_served_from_validator_cache(self, api_client, client):
+        from app.main import app as fastapi_app
+        from tests.conftest import create_receipt
+
+        receipt = create_receipt(client, "900")
+        await api_client.use_asgi_app(fastapi_app)
+
+        first = await api_client.get_receipt_history(receipt["id"])
+        first["items"].pop()
+        second = await api_client.get_receipt_history(receipt["id"])
+        # 304 отдаёт копию сохранённого ответа — изменения first её не затронули
+        assert second is not first and len(second["items"]) == second["total"]
+        assert api_client.validator_stats()["not_modified"] == 1
+
+        client.post("/api/v1/history", json={"receipt_id": receipt["id"], "event_type": "note"})
+        third = await api_client.get_receipt_history(receipt["id"])
+        assert third["total"] == first["total"] + 1
+        stats = api_client.validator_stats()
+        assert stats["conditional_requests"] == 2 and stats["not_modified"] == 1
+        await api_client.close()
+
+    @pytest.mark.asyncio
+    async def test_responses_without_etag_not_stored(self, api_client):
+        api_client._client = _mock_client({"id": 1})
+
+        await api_client.get_receipt(1)
+        await api_client.get_receipt(1)
+
+        assert api_client._client.request.call_args.kwargs["headers"] is None
+        assert api_client.validator_stats()["entries"] == 0
+
+    def test_validator_cache_is_lru(self):
+        cache = ValidatorCache(max_entries=2)
+        cache.store(("a",), '"1"', 1)
+        cache.store(("b",), '"2"', 2)
+        cache.not_modified(("a",), cache.lookup(("a",)))
+        cache.store(("c",), '"3"', 3)
+
+        assert cache.etag_for(("b",)) is None
+        assert cache.etag_for(("a",)) == '"1"' and len(cache) == 2
+
+    @pytest.mark.asyncio
+    async def test_304_after_entry_evicted(self, api_client, monkeypatch):
+        """Запись вытеснена, пока шёл условный GET, — 304 обслуживается из захваченной записи."""
+        monkeypatch.setattr(api_client, "_validators", ValidatorCache(max_entries=1))
+        key = ("/receipts/1", ())
+        api_client._validators.store(key, '"v1"', {"id": 1, "items": [1]})
+        request = httpx.Request("GET", "http://test-server:8000/api/v1/receipts/1")
+
+        async def evict_then_304(**kwargs):
+            api_client._validators.store(("/receipts/2", ()), '"v2"', {"id": 2})
+            return httpx.Response(304, request=request)
+
+        mock_client = AsyncMock()
+        mock_client.is_closed = False
+        mock_client.request = AsyncMock(side_effect=evict_then_304)
+        api_client._client = mock_client
+
+        result = await api_client.get_receipt(1)
+        assert result == {"id": 1, "items": [1]}
+        assert mock_client.request.call_args.kwargs["headers"]["If-None-Match"] == '"v1"'
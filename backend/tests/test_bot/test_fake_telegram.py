@@ -0,0 +1,65 @@
+"""
+Тесты фейкового Bot API нагрузочного стенда webhook.
+"""
+import pytest
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, Update
+
+from benchmarks.fake_telegram import FakeBotAPI, UpdateFactory, find_button
+
+CHAT_ID = 700_000_001
+
+
+@pytest.fixture
+async def fake_bot():
+    api = FakeBotAPI()
+    await api.start()
+    bot = Bot(
+        token="123456:TEST-token",
+        session=AiohttpSession(api=TelegramAPIServer.from_base(api.url)),
+    )
+    yield api, bot
+    await bot.session.close()
+    await api.stop()
+
+
+async def test_records_calls_and_screens(fake_bot):
+    api, bot = fake_bot
+    keyboard = InlineKeyboardMarkup(inline_keyboard=[[
+        InlineKeyboardButton(text="▶", callback_data="hp:1:5"),
+        InlineKeyboardButton(text="🏠 В меню", callback_data="menu:main"),
+    ]])
+
+    sent = await bot.send_message(CHAT_ID, "Выберите действие:", reply_markup=keyboard)
+    edited = await bot.edit_message_text(
+        text="Страница 2", chat_id=CHAT_ID, message_id=sent.message_id, reply_markup=keyboard
+    )
+    assert await bot.answer_callback_query("1")
+
+    assert edited.message_id == sent.message_id
+    assert [c.method for c in api.chat_calls(CHAT_ID)] == ["sendMessage", "editMessageText"]
+    assert api.method_counts()["answerCallbackQuery"] == 1
+    screen = api.screens[CHAT_ID]
+    assert screen["text"] == "Страница 2"
+    assert find_button(screen, callback_prefix="menu:")["callback_data"] == "menu:main"
+    assert find_button(screen, text="▶")["callback_data"] == "hp:1:5"
+    assert find_button(screen, callback_prefix="otk:") is None
+
+
+def test_update_factory_builds_valid_updates():
+    updates = UpdateFactory()
+    message = Update.model_validate(updates.message(CHAT_ID, "/start"))
+    screen = {
+        "message_id": 1,
+        "date": 0,
+        "chat": {"id": CHAT_ID, "type": "private"},
+        "text": "Выберите действие:",
+    }
+    callback = Update.model_validate(updates.callback(CHAT_ID, "menu:master", screen))
+
+    assert message.message.text == "/start"
+    assert callback.update_id == message.update_id + 1
+    assert callback.callback_query.data == "menu:master"
+    assert callback.callback_query.message.chat.id == CHAT_ID
@@ -0,0 +1,145 @@
+"""
+Тесты CachedRedisStorage: L1-кэш, пакетная запись за update, версии.
+"""
+from datetime import timedelta
+from types import MappingProxyType
+
+import pytest
+from aiogram import Dispatcher
+from aiogram.exceptions import DataNotDictLikeError
+from aiogram.fsm.storage.base import StorageKey
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+
+from telegram_bot.bot import install_fsm_batching
+from telegram_bot.services.fsm_storage import CachedRedisStorage, FSMBatchMiddleware
+
+KEY = StorageKey(bot_id=1, chat_id=100, user_id=100)
+
+
+def make_storage(server: FakeServer) -> CachedRedisStorage:
+    return CachedRedisStorage(
+        redis=FakeRedis(server=server),
+        state_ttl=timedelta(hours=24),
+        data_ttl=timedelta(hours=24),
+    )
+
+
+@pytest.fixture
+def server():
+    return FakeServer()
+
+
+class TestCachedRedisStorage:
+
+    async def test_write_through_outside_batch(self, server):
+        storage = make_storage(server)
+        await storage.set_state(KEY, "Master:enter_receipt")
+        await storage.update_data(KEY, {"receipt": "R-1"})
+
+        other = make_storage(server)
+        assert await other.get_state(KEY) == "Master:enter_receipt"
+        assert await other.get_data(KEY) == {"receipt": "R-1"}
+
+    async def test_batch_single_read_and_single_write(self, server):
+        storage = make_storage(server)
+        async with storage.batch():
+            assert await storage.get_state(KEY) is None
+            await storage.set_state(KEY, "A:one")
+            await storage.update_data(KEY, {"a": 1})
+            await storage.update_data(KEY, {"b": 2})
+            assert await storage.get_data(KEY) == {"a": 1, "b": 2}
+            # Внутри batch — только первое чтение
+            assert storage.stats["redis_roundtrips"] == 1
+        assert storage.stats["redis_roundtrips"] == 2
+        assert storage.stats["flushes"] == 1
+        assert 0 < storage.stats["redis_seconds_max"] <= storage.stats["redis_seconds_total"]
+
+        redis = FakeRedis(server=server)
+        assert await redis.get(storage.key_builder.build(KEY, "state")) == b"A:one"
+        assert await redis.ttl(storage.key_builder.build(KEY, "data")) > 0
+
+    async def test_l1_hit_checks_only_version(self, server):
+        storage = make_storage(server)
+        async with storage.batch():
+            await storage.update_data(KEY, {"a": 1})
+
+        storage.stats["redis_roundtrips"] = 0
+        async with storage.batch():
+            assert await storage.get_data(KEY) == {"a": 1}
+        assert storage.stats["redis_roundtrips"] == 1
+        assert storage.stats["l1_hits"] == 1
+
+    async def test_stale_l1_is_reloaded(self, server):
+        first, second = make_storage(server), make_storage(server)
+        await first.update_data(KEY, {"a": 1})
+        await second.update_data(KEY, {"a": 2})
+
+        assert await first.get_data(KEY) == {"a": 2}
+
+    async def test_conflict_replays_changes(self, server):
+        first, second = make_storage(server), make_storage(server)
+        await first.update_data(KEY, {"a": 1})
+
+        async with first.batch():
+            await first.update_data(KEY, {"b": 2})
+            # Другой процесс меняет тот же чат, пока update ещё обрабатывается
+            await second.update_data(KEY, {"c": 3})
+
+        assert first.stats["conflicts"] == 1
+        assert await make_storage(server).get_data(KEY) == {"a": 1, "b": 2, "c": 3}
+
+    async def test_clear_deletes_keys(self, server):
+        storage = make_storage(server)
+        await storage.set_state(KEY, "A:one")
+        await storage.set_data(KEY, {"a": 1})
+        async with storage.batch():
+            await storage.set_state(KEY, None)
+            await storage.set_data(KEY, {})
+
+        redis = FakeRedis(server=server)
+        assert await redis.exists(
+            storage.key_builder.build(KEY, "state"), storage.key_builder.build(KEY, "data")
+        ) == 0
+        assert await make_storage(server).get_state(KEY) is None
+
+    async def test_returned_data_is_a_copy(self, server):
+        storage = make_storage(server)
+        await storage.set_data(KEY, {"items": [1]})
+        data = await storage.get_data(KEY)
+        data["items"].append(2)
+        assert await storage.get_data(KEY) == {"items": [1]}
+
+    async def test_set_data_accepts_any_mapping(self, server):
+        storage = make_storage(server)
+        other = make_storage(server)
+        await storage.set_data(KEY, {"receipt": "R-1"})
+        assert await other.get_data(KEY) == {"receipt": "R-1"}
+
+        # Mapping, не dict: версия растёт, L1 другого экземпляра не устаревает
+        await other.set_data(KEY, MappingProxyType({"receipt": "R-2"}))
+        assert await storage.get_data(KEY) == {"receipt": "R-2"}
+        assert await other.get_data(KEY) == {"receipt": "R-2"}
+
+        with pytest.raises(DataNotDictLikeError):
+            await storage.set_data(KEY, ["receipt"])
+
+    async def test_l1_is_bounded(self, server):
+        storage = CachedRedisStorage(redis=FakeRedis(server=server), l1_max_entries=2)
+        for chat_id in range(5):
+            await storage.set_state(StorageKey(bot_id=1, chat_id=chat_id, user_id=chat_id), "A:one")
+        assert len(storage._l1) == 2
+
+
+class TestFSMBatching:
+
+    def test_batch_middleware_wraps_fsm_middleware(self, server):
+        storage = make_storage(server)
+        dp = Dispatcher(storage=storage)
+        install_fsm_batching(dp, storage)
+
+        middlewares = list(dp.update.outer_middleware)
+        batch_index = next(
+            i for i, m in enumerate(middlewares) if isinstance(m, FSMBatchMiddleware)
+        )
+        assert middlewares.index(dp.fsm) == batch_index + 1
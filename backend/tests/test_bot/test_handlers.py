@@ -3,6 +3,7 @@
 Используем мок API-клиента, без реальных запросов.
 """
 import pytest
+from datetime import datetime
 from unittest.mock import AsyncMock, patch, MagicMock
 from aiogram.types import CallbackQuery, Message, User, Chat
 from aiogram.fsm.context import FSMContext
@@ -119,6 +120,53 @@ class TestMasterFlow:
         call_text = str(callback.message.edit_text.call_args)
         assert "квитанц" in call_text.lower() or "номер" in call_text.lower()
 
+    @pytest.mark.asyncio
+    async def test_master_bulk_assign(self, state, mock_api):
+        """Несколько номеров выдаются мастеру одним batch-запросом."""
+        from telegram_bot.handlers.master import process_receipt_number, confirm_assign_to_master
+        from telegram_bot.states import Master
+
+        mock_api.get_employees.return_value = [{"id": 7, "name": "Иван"}]
+        await state.set_state(Master.waiting_for_receipt_number)
+        await process_receipt_number(make_message("201 202 203"), state)
+
+        mock_api.get_or_create_receipt.assert_not_called()
+        assert await state.get_state() == Master.select_master
+
+        await state.update_data(master_id=7, is_urgent=False)
+        await state.set_state(Master.confirm)
+        mock_api.batch_assign_to_master.return_value = {"results": [], "succeeded": 3, "failed": 0}
+        callback = make_callback("confirm")
+        await confirm_assign_to_master(callback, state)
+
+        kwargs = mock_api.batch_assign_to_master.call_args.kwargs
+        assert kwargs["receipt_numbers"] == ["201", "202", "203"]
+        assert kwargs["master_id"] == 7
+        mock_api.assign_to_master.assert_not_called()
+        assert "Успешно: 3" in callback.message.edit_text.call_args.kwargs["text"]
+
+    @pytest.mark.asyncio
+    async def test_master_single_assign_uses_commands(self, state, mock_api):
+        """Одна квитанция: дедлайн и выдача — одним пакетом команд."""
+        from telegram_bot.handlers.master import confirm_assign_to_master
+        from telegram_bot.states import Master
+
+        await state.update_data(
+            receipt_id=5, master_id=7, is_urgent=True, deadline="2099-01-10T15:00:00",
+        )
+        await state.set_state(Master.confirm)
+        callback = make_callback("confirm")
+        await confirm_assign_to_master(callback, state)
+
+        commands = mock_api.run_receipt_commands.call_args.args[0]
+        assert commands == [{
+            "type": "assign_master", "receipt_id": 5, "master_id": 7,
+            "is_urgent": True, "deadline": datetime(2099, 1, 10, 15, 0),
+        }]
+        assert mock_api.run_receipt_commands.call_args.kwargs["telegram_id"] == 123
+        mock_api.assign_to_master.assert_not_called()
+        assert "выданы мастеру" in callback.message.edit_text.call_args.kwargs["text"]
+
 
 class TestOTKFlow:
     """Тесты прохождения ОТК."""
@@ -133,6 +181,64 @@ class TestOTKFlow:
 
         callback.message.edit_text.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_otk_bulk_pass(self, state, mock_api):
+        """Несколько номеров — только приёмка пачкой одним запросом."""
+        from telegram_bot.handlers.otk import process_receipt_number, pass_otk
+        from telegram_bot.states import OTK
+
+        await state.set_state(OTK.waiting_for_receipt_number)
+        message = make_message("101 102, 101")
+        await process_receipt_number(message, state)
+
+        mock_api.get_or_create_receipt.assert_not_called()
+        keyboard = message.answer.call_args.kwargs["reply_markup"]
+        actions = [b.callback_data for b in keyboard.inline_keyboard[0]]
+        assert actions == ["otk:pass"]
+        assert "Квитанции (2)" in message.answer.call_args.kwargs["text"]
+
+        mock_api.batch_otk_pass.return_value = {
+            "results": [
+                {"receipt_number": "101", "status": "ok"},
+                {"receipt_number": "102", "status": "error", "detail": "сбой"},
+            ],
+            "succeeded": 1,
+            "failed": 1,
+        }
+        callback = make_callback("otk:pass")
+        await pass_otk(callback, state)
+
+        assert mock_api.batch_otk_pass.call_args.kwargs["receipt_numbers"] == ["101", "102"]
+        text = callback.message.edit_text.call_args.kwargs["text"]
+        assert "Успешно: 1" in text and "№102: сбой" in text
+        callback.answer.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_otk_single_pass_uses_commands(self, state, mock_api):
+        from telegram_bot.handlers.otk import pass_otk
+        from telegram_bot.states import OTK
+
+        await state.update_data(receipt_id=5, receipt_number="105")
+        await state.set_state(OTK.select_action)
+        callback = make_callback("otk:pass")
+        await pass_otk(callback, state)
+
+        assert mock_api.run_receipt_commands.call_args.args[0] == [
+            {"type": "otk_pass", "receipt_id": 5},
+        ]
+        mock_api.otk_pass.assert_not_called()
+        assert "прошли ОТК" in callback.message.edit_text.call_args.kwargs["text"]
+
+    @pytest.mark.asyncio
+    async def test_otk_rejects_non_digit_numbers(self, state, mock_api):
+        from telegram_bot.handlers.otk import process_receipt_number
+
+        message = make_message("101 abc")
+        await process_receipt_number(message, state)
+
+        assert "только цифры" in message.answer.call_args.kwargs["text"]
+        mock_api.get_or_create_receipt.assert_not_called()
+
 
 class TestUrgentFlow:
     """Тесты срочных часов."""
@@ -140,7 +246,7 @@ class TestUrgentFlow:
     @pytest.mark.asyncio
     async def test_urgent_list_empty(self, state, mock_api):
         """Пустой список срочных часов."""
-        mock_api.get_urgent_receipts.return_value = []
+        mock_api.get_urgent_page.return_value = {"items": [], "total": 0, "next_cursor": None}
 
         from telegram_bot.handlers.urgent import show_urgent_list
 
@@ -154,9 +260,13 @@ class TestUrgentFlow:
     @pytest.mark.asyncio
     async def test_urgent_list_with_items(self, state, mock_api):
         """Список с элементами."""
-        mock_api.get_urgent_receipts.return_value = [
-            {"id": 1, "receipt_number": "R-001", "current_deadline": "2025-12-31T15:00:00"},
-        ]
+        mock_api.get_urgent_page.return_value = {
+            "items": [
+                {"id": 1, "receipt_number": "R-001", "current_deadline": "2025-12-31T15:00:00"},
+            ],
+            "total": 1,
+            "next_cursor": None,
+        }
 
         from telegram_bot.handlers.urgent import show_urgent_list
 
@@ -164,6 +274,47 @@ class TestUrgentFlow:
         await show_urgent_list(callback, state)
 
         callback.message.edit_text.assert_called_once()
+        callback.answer.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_urgent_pages_use_stored_cursor(self, state, mock_api):
+        """Следующая страница запрашивается по курсору, сохранённому в FSM."""
+        from telegram_bot.config import bot_config
+        from telegram_bot.handlers.urgent import show_urgent_list, show_urgent_page
+
+        page_size = bot_config.URGENT_PAGE_SIZE
+        items = [
+            {"id": i, "receipt_number": f"R-{i}", "current_deadline": "2025-12-31T15:00:00"}
+            for i in range(page_size)
+        ]
+        mock_api.get_urgent_page.return_value = {
+            "items": items, "total": page_size + 1, "next_cursor": "c1",
+        }
+        await show_urgent_list(make_callback("menu:urgent"), state)
+
+        callback = make_callback("urgent:list:all:1")
+        mock_api.get_urgent_page.return_value = {
+            "items": items[:1], "total": page_size + 1, "next_cursor": None,
+        }
+        await show_urgent_page(callback, state)
+
+        assert mock_api.get_urgent_page.call_args.kwargs == {
+            "window": None, "cursor": "c1", "limit": page_size,
+        }
+        keyboard = callback.message.edit_text.call_args.kwargs["reply_markup"]
+        nav_texts = [b.text for b in keyboard.inline_keyboard[-2]]
+        assert nav_texts == ["◀", "2/2"]
+
+    @pytest.mark.asyncio
+    async def test_urgent_window_resets_cursor(self, state, mock_api):
+        from telegram_bot.handlers.urgent import show_urgent_page
+
+        await state.update_data(urgent_window="all", urgent_cursors=[None, "c1"])
+        mock_api.get_urgent_page.return_value = {"items": [], "total": 0, "next_cursor": None}
+
+        await show_urgent_page(make_callback("urgent:list:overdue:1"), state)
+        assert mock_api.get_urgent_page.call_args.kwargs["window"] == "overdue"
+        assert mock_api.get_urgent_page.call_args.kwargs["cursor"] is None
 
 
 class TestHistoryFlow:
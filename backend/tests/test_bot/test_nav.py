@@ -0,0 +1,95 @@
+"""
+Тесты стека навигации: компактный формат, ограничение глубины, миграция.
+"""
+import pytest
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from telegram_bot.config import bot_config
+from telegram_bot.utils import decode_nav_entry, encode_nav_entry, pop_nav, push_nav
+
+
+@pytest.fixture
+def state():
+    return FSMContext(
+        storage=MemoryStorage(), key=StorageKey(bot_id=1, chat_id=1, user_id=1)
+    )
+
+
+class TestNavStack:
+
+    async def test_push_pop_roundtrip(self, state):
+        await push_nav(state, "MainMenu.main", "start_master")
+        await push_nav(state, "Master.waiting_for_receipt_number", "process_receipt_number")
+
+        assert await pop_nav(state) == {
+            "state": "Master.waiting_for_receipt_number",
+            "handler": "process_receipt_number",
+        }
+        assert await pop_nav(state) == {"state": "MainMenu.main", "handler": "start_master"}
+        assert await pop_nav(state) is None
+
+    async def test_stored_compactly(self, state):
+        await push_nav(state, "MainMenu.main", "start_master")
+        await push_nav(state, "Polishing.is_complex", "process_complex")
+        assert (await state.get_data())["nav_history"] == "0:0,9:c"
+
+    async def test_unknown_values_kept_verbatim(self, state):
+        await push_nav(state, "Analytics.menu", "analytics_menu")
+        assert await pop_nav(state) == {"state": "Analytics.menu", "handler": "analytics_menu"}
+
+    async def test_needs_only_base_fsm_context_api(self):
+        """Только get_data/update_data — работает и на aiogram без FSMContext.get_value."""
+        class MinimalContext:
+            def __init__(self):
+                self.data = {}
+
+            async def get_data(self):
+                return dict(self.data)
+
+            async def update_data(self, **kwargs):
+                self.data.update(kwargs)
+
+        context = MinimalContext()
+        await push_nav(context, "MainMenu.main", "start_master")
+        assert await pop_nav(context) == {"state": "MainMenu.main", "handler": "start_master"}
+
+    async def test_depth_is_bounded(self, state, monkeypatch):
+        monkeypatch.setattr(bot_config, "NAV_MAX_DEPTH", 3)
+        for i in range(10):
+            await push_nav(state, "MainMenu.main", f"h{i}")
+
+        handlers = [(await pop_nav(state))["handler"] for _ in range(3)]
+        assert handlers == ["h9", "h8", "h7"]
+        assert await pop_nav(state) is None
+
+    async def test_legacy_format_migrated(self, state):
+        await state.update_data(nav_history=[
+            {"state": "MainMenu.main", "handler": "start_otk"},
+            {"state": "OTK.waiting_for_receipt_number", "handler": "process_receipt_number"},
+        ])
+
+        await push_nav(state, "MainMenu.main", "start_history")
+        assert (await state.get_data())["nav_history"] == "0:7,4:1,0:6"
+        assert (await pop_nav(state))["handler"] == "start_history"
+        assert (await pop_nav(state))["state"] == "OTK.waiting_for_receipt_number"
+
+    def test_entry_codec(self):
+        entry = encode_nav_entry("Master.is_urgent", "process_urgent")
+        assert entry == "3:3"
+        assert decode_nav_entry(entry) == {"state": "Master.is_urgent", "handler": "process_urgent"}
+
+    def test_entry_codec_unknown_values(self):
+        for state_name, handler in (
+            ("NewFlow:step", "new_handler"),
+            ("NewFlow:step", "process_urgent"),
+            ("Odd,name:with%~", "start_master"),
+        ):
+            entry = encode_nav_entry(state_name, handler)
+            assert "," not in entry and entry.count(":") == 1
+            assert decode_nav_entry(entry) == {"state": state_name, "handler": handler}
+        # Шаг, записанный до экранирования ":" в имени состояния
+        assert decode_nav_entry("~NewFlow:step:~new_handler") == {
+            "state": "NewFlow:step", "handler": "new_handler",
+        }
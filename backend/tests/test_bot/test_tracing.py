@@ -0,0 +1,136 @@
+"""
+Тесты трассировки: хендлер → APIClient → роут FastAPI → SQL и сводка app.cli.traces.
+"""
+import io
+from types import SimpleNamespace
+
+import pytest
+
+from app.cli.traces import build_traces, load_spans, render
+from telegram_bot.bot import HandlerTracingMiddleware
+from telegram_bot.services.api_client import APIClient
+from telegram_bot.services.tracing import (
+    FileExporter,
+    OTLPExporter,
+    Span,
+    parse_traceparent,
+    tracer,
+)
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+@pytest.fixture
+def trace_file(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    sample_rate = tracer.sample_rate
+    tracer.configure(FileExporter(str(path)), sample_rate=1.0)
+    yield path
+    tracer.configure(None, sample_rate=sample_rate)
+
+
+@pytest.fixture
+def api_client():
+    APIClient._instance = None
+    APIClient._client = None
+    yield APIClient(base_url="http://test-server:8000")
+    APIClient._instance = None
+    APIClient._client = None
+
+
+async def show_reasons(event, data):
+    return await data["api_client"].get_return_reasons()
+
+
+async def run_handler(api_client):
+    middleware = HandlerTracingMiddleware("callback_query")
+    data = {
+        "handler": SimpleNamespace(callback=show_reasons),
+        "event_from_user": SimpleNamespace(id=42),
+        "api_client": api_client,
+    }
+    return await middleware(show_reasons, None, data)
+
+
+def test_parse_traceparent():
+    context = parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-01")
+    assert context == (TRACE_ID, PARENT_ID, True)
+    assert parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-00").sampled is False
+    assert parse_traceparent(f"00-{'0' * 32}-{PARENT_ID}-01") is None
+    assert parse_traceparent("garbage") is None
+    assert parse_traceparent(None) is None
+
+
+async def test_handler_trace_reaches_sql(trace_file, api_client, seeded_client):
+    from app.main import app as fastapi_app
+
+    await api_client.use_asgi_app(fastapi_app)
+    assert await run_handler(api_client)
+    await api_client.close()
+    assert tracer.flush(timeout=5)
+
+    spans = load_spans(str(trace_file))
+    [trace] = build_traces(spans)
+    assert trace.root["name"] == "test_tracing.show_reasons"
+    assert trace.root["attributes"] == {"tg.event": "callback_query", "tg.user_id": 42}
+    tree = [(depth, span["component"]) for depth, span in trace.walk()]
+    assert tree[:3] == [(0, "handler"), (1, "api_client"), (2, "http")]
+    assert {component for depth, component in tree[3:]} == {"sql"}
+    assert all(depth == 3 for depth, _ in tree[3:])
+
+    http = next(span for _, span in trace.walk() if span["component"] == "http")
+    assert http["name"] == "GET /api/v1/returns/reasons"
+    assert http["attributes"]["http.status_code"] == 200
+    assert {span["trace_id"] for span in spans} == {trace.root["trace_id"]}
+
+    out = io.StringIO()
+    render(build_traces(spans), top=5, slowest=1, out=out)
+    report = out.getvalue()
+    assert "test_tracing.show_reasons" in report
+    assert "[sql] SELECT" in report
+
+
+async def test_unsampled_trace_not_exported(trace_file, api_client, seeded_client):
+    from app.main import app as fastapi_app
+
+    tracer.sample_rate = 0.0
+    await api_client.use_asgi_app(fastapi_app)
+    assert await run_handler(api_client)
+    await api_client.close()
+    assert tracer.flush(timeout=5)
+    # Бэкенд следует решению из traceparent, а не сэмплирует заново
+    assert not trace_file.exists()
+
+
+def test_backend_continues_incoming_trace(trace_file, client):
+    tracer.sample_rate = 0.0
+    resp = client.get("/api/v1/receipts", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"})
+    assert resp.status_code == 200
+    assert tracer.flush(timeout=5)
+
+    spans = load_spans(str(trace_file))
+    server = next(span for span in spans if span["component"] == "http")
+    assert server["trace_id"] == TRACE_ID
+    assert server["parent_id"] == PARENT_ID
+    assert server["name"] == "GET /api/v1/receipts"
+    assert all(span["trace_id"] == TRACE_ID for span in spans)
+
+
+def test_otlp_payload():
+    span = Span(TRACE_ID, PARENT_ID, None, "GET /receipts", kind="client", component="api_client")
+    span.set("http.status_code", 502)
+    span.error = "HTTPStatusError: 502"
+    span.end_ns = span.start_ns + 1_000_000
+    payload = OTLPExporter("http://collector/v1/traces", "watch-service").payload([span])
+
+    resource = payload["resourceSpans"][0]
+    assert resource["resource"]["attributes"] == [
+        {"key": "service.name", "value": {"stringValue": "watch-service"}}
+    ]
+    [otlp_span] = resource["scopeSpans"][0]["spans"]
+    assert otlp_span["traceId"] == TRACE_ID and "parentSpanId" not in otlp_span
+    assert otlp_span["kind"] == 3
+    assert otlp_span["endTimeUnixNano"] == str(span.start_ns + 1_000_000)
+    assert {"key": "http.status_code", "value": {"intValue": "502"}} in otlp_span["attributes"]
+    assert otlp_span["status"] == {"code": 2, "message": "HTTPStatusError: 502"}
@@ -0,0 +1,128 @@
+"""
+Тесты очереди webhook-обновлений: порядок по чату, backpressure, дренаж.
+"""
+import asyncio
+
+import pytest
+from aiogram.types import Update
+
+from telegram_bot.services.update_queue import UpdateQueue, update_chat_key
+
+
+def make_update(update_id: int, chat_id: int) -> Update:
+    return Update.model_validate({
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "Test"},
+            "text": "hi",
+        },
+    })
+
+
+def make_callback_update(update_id: int, chat_id: int) -> Update:
+    return Update.model_validate({
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "chat_instance": "x",
+            "from": {"id": chat_id, "is_bot": False, "first_name": "Test"},
+            "data": "menu:main",
+            "message": {
+                "message_id": 1,
+                "date": 0,
+                "chat": {"id": chat_id, "type": "private"},
+            },
+        },
+    })
+
+
+class TestChatKey:
+
+    def test_message_chat(self):
+        assert update_chat_key(make_update(1, 42)) == 42
+
+    def test_callback_chat(self):
+        assert update_chat_key(make_callback_update(1, 77)) == 77
+
+    def test_unknown_event_falls_back_to_update_id(self):
+        assert update_chat_key(Update.model_validate({"update_id": 5})) == 5
+
+
+class TestUpdateQueue:
+
+    @pytest.mark.asyncio
+    async def test_per_chat_order_preserved(self):
+        processed: dict[int, list[int]] = {}
+
+        async def handler(update: Update):
+            # Разные задержки перемешивают завершение между чатами
+            await asyncio.sleep(0.001 * (update.update_id % 3))
+            processed.setdefault(update.message.chat.id, []).append(update.update_id)
+
+        queue = UpdateQueue(handler, workers=3, maxsize=100)
+        queue.start()
+        update_id = 0
+        for _ in range(10):
+            for chat_id in (1, 2, 3, 4):
+                update_id += 1
+                assert await queue.submit(make_update(update_id, chat_id))
+        await queue.drain(timeout=5)
+
+        assert set(processed) == {1, 2, 3, 4}
+        for ids in processed.values():
+            assert ids == sorted(ids)
+        assert queue.stats.processed == 40
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_full(self):
+        release = asyncio.Event()
+
+        async def handler(update: Update):
+            await release.wait()
+
+        queue = UpdateQueue(handler, workers=1, maxsize=1, enqueue_timeout=0.01)
+        queue.start()
+        assert await queue.submit(make_update(1, 1))
+        await asyncio.sleep(0)  # воркер забрал первое обновление
+        assert await queue.submit(make_update(2, 1))
+        assert not await queue.submit(make_update(3, 1))
+        assert queue.stats.rejected == 1
+
+        release.set()
+        await queue.drain(timeout=5)
+        assert queue.stats.processed == 2
+
+    @pytest.mark.asyncio
+    async def test_handler_error_does_not_stop_worker(self):
+        seen = []
+
+        async def handler(update: Update):
+            seen.append(update.update_id)
+            if update.update_id == 1:
+                raise RuntimeError("boom")
+
+        queue = UpdateQueue(handler, workers=1)
+        queue.start()
+        await queue.submit(make_update(1, 1))
+        await queue.submit(make_update(2, 1))
+        await queue.drain(timeout=5)
+
+        assert seen == [1, 2]
+        assert queue.stats.failed == 1
+        assert queue.stats.processed == 1
+        # Время обработки учитывается и для упавших обновлений
+        assert queue.stats.processing_histogram()[-1] == (float("inf"), 2)
+
+    @pytest.mark.asyncio
+    async def test_not_accepting_after_drain(self):
+        async def handler(update: Update):
+            pass
+
+        queue = UpdateQueue(handler, workers=1)
+        queue.start()
+        await queue.drain()
+        assert not queue.running
+        assert not await queue.submit(make_update(1, 1))
@@ -0,0 +1,51 @@
+"""Тесты генератора синтетических данных для бенчмарков."""
+from datetime import datetime
+
+from sqlalchemy import func
+
+from app.models.employee import Employee
+from app.models.history import HistoryEvent
+from app.models.polishing import PolishingDetails
+from app.models.receipt import Receipt
+from app.services.analytics_service import AnalyticsService
+from benchmarks.datagen import DataGenerator, parse_scale
+
+ANCHOR = datetime(2026, 6, 1, 12, 0)
+
+
+def _snapshot(db):
+    return [
+        (r.receipt_number, r.created_at, r.current_deadline)
+        for r in db.query(Receipt).order_by(Receipt.id)
+    ]
+
+
+def test_parse_scale():
+    assert parse_scale("10k") == 10_000
+    assert parse_scale("1M") == 1_000_000
+    assert parse_scale("250") == 250
+
+
+def test_generate_is_deterministic_and_consistent(db_session):
+    counts = DataGenerator(db_session, seed=7, anchor=ANCHOR).generate(40, batch_size=15)
+    assert counts.receipts == 40
+    assert db_session.query(func.count(Receipt.id)).scalar() == 40
+    assert db_session.query(func.count(HistoryEvent.id)).scalar() == counts.history
+    # Каждая квитанция создана и передана мастеру
+    created = db_session.query(HistoryEvent).filter(HistoryEvent.event_type == "receipt_created").count()
+    assert created == 40
+    assert db_session.query(func.max(HistoryEvent.created_at)).scalar() <= ANCHOR
+    polishers = {e.id for e in db_session.query(Employee).filter(Employee.role == "polisher")}
+    assert {p.polisher_id for p in db_session.query(PolishingDetails)} <= polishers
+    assert AnalyticsService(db_session).assembly_quality()["employees"]
+
+    first = _snapshot(db_session)
+    db_session.query(HistoryEvent).delete()
+    db_session.query(PolishingDetails).delete()
+    for table in ("return_reason_links", "returns", "operations"):
+        db_session.execute(Receipt.metadata.tables[table].delete())
+    db_session.query(Receipt).delete()
+    db_session.flush()
+
+    DataGenerator(db_session, seed=7, anchor=ANCHOR).generate(40, batch_size=15)
+    assert _snapshot(db_session) == first
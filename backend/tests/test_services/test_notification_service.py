@@ -105,6 +105,43 @@ class TestNotificationService:
         db_session.refresh(notif)
         assert notif.sent_at is not None
 
+    def test_mark_sent_records_delivery_lag(self, db_session):
+        """mark_sent пишет sent_at - scheduled_at в гистограмму задержки."""
+        from app.services.notification_service import DELIVERY_LAG
+
+        DELIVERY_LAG.reset()
+        receipt = self._create_receipt(db_session)
+        service = NotificationService(db_session)
+
+        notif = Notification(
+            receipt_id=receipt.id,
+            notification_type="deadline_1h",
+            scheduled_at=now_moscow() - timedelta(minutes=2),
+        )
+        db_session.add(notif)
+        db_session.commit()
+
+        service.mark_sent(notif.id)
+        assert DELIVERY_LAG.count() == 1
+        assert 110 <= DELIVERY_LAG.sum() <= 130
+        assert DELIVERY_LAG.quantile(0.5) == 300
+
+    def test_get_pending_updates_backlog_gauge(self, db_session):
+        from app.services.notification_service import BACKLOG_SIZE
+
+        receipt = self._create_receipt(db_session)
+        service = NotificationService(db_session)
+        for _ in range(3):
+            db_session.add(Notification(
+                receipt_id=receipt.id,
+                notification_type="deadline_today",
+                scheduled_at=now_moscow() - timedelta(hours=1),
+            ))
+        db_session.commit()
+
+        service.get_pending()
+        assert BACKLOG_SIZE.value() == 3
+
     def test_reschedule_on_deadline_change(self, db_session):
         """При изменении дедлайна старые уведомления отменяются, новые создаются."""
         receipt = self._create_receipt(db_session)
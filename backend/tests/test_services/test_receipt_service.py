@@ -104,3 +104,42 @@ class TestReceiptService:
 
         urgent = service.get_urgent()
         assert len(urgent) == 0
+
+    def test_get_urgent_page_keyset(self, db_session):
+        """Страницы не пересекаются, в том числе при одинаковых дедлайнах."""
+        service = ReceiptService(db_session)
+        deadline = datetime(2099, 12, 31)
+        for i in range(5):
+            service.create(ReceiptCreate(receipt_number=f"R-{i}", current_deadline=deadline))
+
+        seen, cursor = [], None
+        while True:
+            items, total, cursor = service.get_urgent_page(cursor=cursor, limit=2)
+            seen.extend(r.receipt_number for r in items)
+            assert total == 5
+            if cursor is None:
+                break
+        assert seen == [f"R-{i}" for i in range(5)]
+
+    def test_get_urgent_windows(self, db_session):
+        from app.core.utils import now_moscow
+
+        service = ReceiptService(db_session)
+        now = now_moscow()
+        service.create(ReceiptCreate(receipt_number="OVERDUE", current_deadline=now - timedelta(hours=1)))
+        service.create(ReceiptCreate(receipt_number="SOON", current_deadline=now + timedelta(seconds=30)))
+        service.create(ReceiptCreate(receipt_number="LATER", current_deadline=now + timedelta(days=30)))
+
+        def numbers(window):
+            return [r.receipt_number for r in service.get_urgent(window=window)]
+
+        assert numbers("overdue") == ["OVERDUE"]
+        assert numbers("today") in (["SOON"], [])  # [] — если тест пришёлся на полночь
+        assert "LATER" not in numbers("week")
+        assert numbers(None) == ["OVERDUE", "SOON", "LATER"]
+
+    def test_get_urgent_page_invalid_cursor(self, db_session):
+        from app.core.exceptions import ValidationException
+
+        with pytest.raises(ValidationException):
+            ReceiptService(db_session).get_urgent_page(cursor="not-a-cursor!")
@@ -2,30 +2,39 @@
 Главный файл Telegram бота на aiogram 3.x.
 Согласно ТЗ п. 12: используем aiogram 3.x.
 """
+import importlib
 import logging
 import asyncio
 from datetime import timedelta
-from typing import Any, Awaitable, Callable
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Optional
 
 from aiogram import BaseMiddleware, Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
-from aiogram.fsm.storage.redis import RedisStorage
-from aiogram.types import TelegramObject
+from aiogram.types import TelegramObject, Update
 
 from telegram_bot.config import bot_config
 from telegram_bot.states import MainMenu
 from telegram_bot.services.notification_scheduler import run_notification_scheduler
+from telegram_bot.services.tracing import tracer
+from telegram_bot.services.update_queue import UpdateHandler, UpdateQueue
 
-# Импорт роутеров (прямой импорт для избежания проблем сcircular imports)
-from telegram_bot.handlers import menu
-from telegram_bot.handlers import master
-from telegram_bot.handlers import polishing
-from telegram_bot.handlers import otk
-from telegram_bot.handlers import urgent
-from telegram_bot.handlers import history
-from telegram_bot.handlers import employees
-from telegram_bot.handlers import analytics
+if TYPE_CHECKING:
+    from aiogram.fsm.storage.base import BaseStorage
+    from telegram_bot.services.fsm_storage import CachedRedisStorage
+
+# Модули с роутерами в порядке подключения (от общего к частному).
+# Импортируются при создании диспетчера, а не при импорте bot.py.
+HANDLER_MODULES = (
+    "menu",
+    "master",
+    "polishing",
+    "otk",
+    "urgent",
+    "history",
+    "employees",
+    "analytics",
+)
 
 # Настройка логирования
 logging.basicConfig(
@@ -53,28 +62,81 @@ class ErrorHandlerMiddleware(BaseMiddleware):
                 await state.clear()
 
 
-def create_dispatcher() -> Dispatcher:
-    """Создает и настраивает диспетчер."""
-    storage = RedisStorage.from_url(
-        bot_config.REDIS_URL,
-        state_ttl=timedelta(hours=24),
-        data_ttl=timedelta(hours=24),
-    )
+class HandlerTracingMiddleware(BaseMiddleware):
+    """
+    Корневой span трассировки на вызов хендлера: имя — модуль и функция
+    хендлера (menu.cmd_start). Трасса всегда новая — воркеры очереди webhook
+    не должны продолжать span HTTP-запроса, в котором их запустили.
+    """
+
+    def __init__(self, event_type: str):
+        self.event_type = event_type
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        if not tracer.enabled:
+            return await handler(event, data)
+        callback = data["handler"].callback
+        name = f"{callback.__module__.rsplit('.', 1)[-1]}.{callback.__name__}"
+        with tracer.span(name, component="handler", root=True) as span:
+            span.set("tg.event", self.event_type)
+            user = data.get("event_from_user")
+            if user is not None:
+                span.set("tg.user_id", user.id)
+            return await handler(event, data)
+
+
+def install_fsm_batching(dp: Dispatcher, storage: "CachedRedisStorage") -> None:
+    """
+    Оборачивает обработку update в batch-область storage.
+    Middleware ставится перед FSMContextMiddleware, чтобы первое чтение
+    состояния тоже попадало в batch.
+    """
+    from telegram_bot.services.fsm_storage import FSMBatchMiddleware
+
+    dp.update.outer_middleware.unregister(dp.fsm)
+    dp.update.outer_middleware(FSMBatchMiddleware(storage))
+    dp.update.outer_middleware(dp.fsm)
+
+
+def create_dispatcher(storage: Optional["BaseStorage"] = None) -> Dispatcher:
+    """
+    Создает и настраивает диспетчер.
+    storage — готовое FSM-хранилище (нагрузочный стенд, тесты); по умолчанию
+    Redis из REDIS_URL.
+    """
+    # redis и хендлеры грузим здесь: импорт bot.py должен оставаться лёгким
+    from aiogram.fsm.storage.redis import RedisStorage
+    from telegram_bot.services.fsm_storage import CachedRedisStorage
+
+    storage_kwargs = {"state_ttl": timedelta(hours=24), "data_ttl": timedelta(hours=24)}
+    if storage is None and bot_config.FSM_L1_CACHE:
+        storage = CachedRedisStorage.from_url(
+            bot_config.REDIS_URL,
+            l1_max_entries=bot_config.FSM_L1_MAX_ENTRIES,
+            **storage_kwargs,
+        )
+    elif storage is None:
+        storage = RedisStorage.from_url(bot_config.REDIS_URL, **storage_kwargs)
     dp = Dispatcher(storage=storage)
+    if isinstance(storage, CachedRedisStorage):
+        install_fsm_batching(dp, storage)
     
     # Подключаем роутеры в правильном порядке (от общего к частному)
-    dp.include_router(menu.router)
-    dp.include_router(master.router)
-    dp.include_router(polishing.router)
-    dp.include_router(otk.router)
-    dp.include_router(urgent.router)
-    dp.include_router(history.router)
-    dp.include_router(employees.router)
-    dp.include_router(analytics.router)
+    for name in HANDLER_MODULES:
+        module = importlib.import_module(f"telegram_bot.handlers.{name}")
+        dp.include_router(module.router)
 
     # Глобальный middleware для обработки ошибок
     dp.message.middleware(ErrorHandlerMiddleware())
     dp.callback_query.middleware(ErrorHandlerMiddleware())
+    # Трассировка внутри обработчика ошибок — чтобы span видел исключение
+    dp.message.middleware(HandlerTracingMiddleware("message"))
+    dp.callback_query.middleware(HandlerTracingMiddleware("callback_query"))
 
     logger.info("Dispatcher created with all routers")
     return dp
@@ -106,6 +168,7 @@ async def start_polling():
 # Глобальные объекты для webhook
 _bot: Bot = None
 _dp: Dispatcher = None
+_update_queue: UpdateQueue = None
 _scheduler_started: bool = False
 
 
@@ -129,6 +192,20 @@ def get_dispatcher() -> Dispatcher:
     return _dp
 
 
+def get_fsm_storage_stats() -> dict | None:
+    """Статистика CachedRedisStorage; None, если диспетчер не создан или кэш выключен."""
+    if _dp is None:
+        return None
+    return getattr(_dp.storage, "stats", None)
+
+
+def get_fsm_redis() -> Any:
+    """Клиент Redis FSM-хранилища; None, если диспетчер не создан или хранилище не Redis."""
+    if _dp is None:
+        return None
+    return getattr(_dp.storage, "redis", None)
+
+
 async def setup_webhook() -> None:
     """Настраивает webhook для бота."""
     global _scheduler_started
@@ -161,17 +238,48 @@ async def setup_webhook() -> None:
         logger.info("Notification scheduler already running, skipping")
 
 
-async def process_update(update_data: dict) -> None:
+async def process_update(update_data: dict | Update) -> None:
     """Обрабатывает обновление от Telegram (для webhook)."""
-    from aiogram.types import Update
-    
     bot = get_bot()
     dp = get_dispatcher()
-    
-    update = Update.model_validate(update_data)
+
+    update = update_data if isinstance(update_data, Update) else Update.model_validate(update_data)
     await dp.feed_update(bot, update)
 
 
+def _create_update_queue(handler: UpdateHandler) -> UpdateQueue:
+    return UpdateQueue(
+        handler=handler,
+        workers=bot_config.WEBHOOK_WORKERS,
+        maxsize=bot_config.WEBHOOK_QUEUE_SIZE,
+        enqueue_timeout=bot_config.WEBHOOK_ENQUEUE_TIMEOUT,
+    )
+
+
+def get_update_queue() -> UpdateQueue:
+    """Возвращает глобальную очередь обработки webhook-обновлений."""
+    global _update_queue
+    if _update_queue is None:
+        _update_queue = _create_update_queue(process_update)
+    return _update_queue
+
+
+def configure_runtime(
+    bot: Bot,
+    dispatcher: Dispatcher,
+    update_handler: Optional[UpdateHandler] = None,
+) -> None:
+    """
+    Подставляет готовые бот и диспетчер вместо создаваемых по bot_config
+    (нагрузочный стенд с фейковым Bot API). update_handler оборачивает
+    process_update в очереди webhook. Вызывается до старта приложения.
+    """
+    global _bot, _dp, _update_queue
+    _bot = bot
+    _dp = dispatcher
+    _update_queue = _create_update_queue(update_handler or process_update)
+
+
 if __name__ == "__main__":
     # Для локального запуска в режиме polling
     asyncio.run(start_polling())
@@ -32,6 +32,16 @@ class BotConfig:
     # Redis URL для FSM storage
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 
+    # L1-кэш FSM состояния в памяти процесса (0 — обычный RedisStorage)
+    FSM_L1_CACHE: bool = os.getenv("FSM_L1_CACHE", "1") == "1"
+    FSM_L1_MAX_ENTRIES: int = int(os.getenv("FSM_L1_MAX_ENTRIES", "10000"))
+
+    # Максимальная глубина стека навигации (старые шаги отбрасываются)
+    NAV_MAX_DEPTH: int = int(os.getenv("NAV_MAX_DEPTH", "20"))
+
+    # Размер страницы списка срочных часов
+    URGENT_PAGE_SIZE: int = int(os.getenv("URGENT_PAGE_SIZE", "8"))
+
     # URL API бэкенда
     # Если не установлен, используем localhost (для Railway где бот и бэкенд в одном контейнере)
     API_BASE_URL: str = os.getenv("API_BASE_URL", "")
@@ -45,6 +55,38 @@ class BotConfig:
         # Бэкенд запущен на порту 8080
         return "http://localhost:8080"
 
+    # Транспорт APIClient: "http" — запросы по сети на API_BASE_URL,
+    # "asgi" — вызовы напрямую в FastAPI-приложение, если бот запущен в одном
+    # процессе с бэкендом (без бэкенда бот автоматически работает по HTTP)
+    API_TRANSPORT: str = os.getenv("API_TRANSPORT", "http").lower()
+
+    # TTL (секунды) клиентского кэша справочников в APIClient; 0 — кэш выключен
+    CACHE_TTL_EMPLOYEES: float = float(os.getenv("CACHE_TTL_EMPLOYEES", 300))
+    CACHE_TTL_RETURN_REASONS: float = float(os.getenv("CACHE_TTL_RETURN_REASONS", 3600))
+
+    # Размер кэша валидаторов (ETag → разобранный ответ) для условных GET; 0 — выключен
+    API_ETAG_CACHE_SIZE: int = int(os.getenv("API_ETAG_CACHE_SIZE", 256))
+
+    # Очередь обработки webhook: число воркеров, общая ёмкость, сколько ждать
+    # места в очереди перед отказом (backpressure), таймаут дренажа при остановке
+    WEBHOOK_WORKERS: int = int(os.getenv("WEBHOOK_WORKERS", 4))
+    WEBHOOK_QUEUE_SIZE: int = int(os.getenv("WEBHOOK_QUEUE_SIZE", 200))
+    WEBHOOK_ENQUEUE_TIMEOUT: float = float(os.getenv("WEBHOOK_ENQUEUE_TIMEOUT", 1.0))
+    WEBHOOK_DRAIN_TIMEOUT: float = float(os.getenv("WEBHOOK_DRAIN_TIMEOUT", 10.0))
+
+    # Установка webhook при старте: число попыток и потолок паузы между ними (с jitter)
+    WEBHOOK_SETUP_ATTEMPTS: int = int(os.getenv("WEBHOOK_SETUP_ATTEMPTS", 8))
+    WEBHOOK_SETUP_BACKOFF_MAX: float = float(os.getenv("WEBHOOK_SETUP_BACKOFF_MAX", 60.0))
+
+    # Трассировка (хендлер → APIClient → роут FastAPI → SQL): экспорт "" — выключена,
+    # "file" — JSON lines в TRACE_FILE, "otlp" — OTLP/HTTP JSON на TRACE_OTLP_ENDPOINT.
+    # TRACE_SAMPLE_RATE — доля трассируемых корневых операций (0..1)
+    TRACE_EXPORTER: str = os.getenv("TRACE_EXPORTER", "").lower()
+    TRACE_SAMPLE_RATE: float = float(os.getenv("TRACE_SAMPLE_RATE", 0.1))
+    TRACE_FILE: str = os.getenv("TRACE_FILE", "traces.jsonl")
+    TRACE_OTLP_ENDPOINT: str = os.getenv("TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+    TRACE_SERVICE_NAME: str = os.getenv("TRACE_SERVICE_NAME", "watch-service")
+
     # Порт для webhook
     PORT: int = int(os.getenv("PORT", 8000))
 
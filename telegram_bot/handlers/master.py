@@ -12,7 +12,12 @@ from aiogram.fsm.context import FSMContext
 from telegram_bot.states import Master
 from telegram_bot.keyboards.main_menu import get_back_home_keyboard, get_confirm_keyboard
 from telegram_bot.services.api_client import get_api_client
-from telegram_bot.utils import push_nav
+from telegram_bot.utils import (
+    format_batch_results,
+    format_receipts_label,
+    parse_receipt_numbers,
+    push_nav,
+)
 
 logger = logging.getLogger(__name__)
 router = Router()
@@ -24,7 +29,8 @@ async def start_master(callback: CallbackQuery, state: FSMContext) -> None:
     await push_nav(state, "MainMenu.main", "start_master")
     await callback.message.edit_text(
         text="👨‍🔧 Выдать часы мастеру\n\n"
-             "Введите номер квитанции:",
+             "Введите номер квитанции\n"
+             "(или несколько номеров через пробел — выдать пачкой):",
         reply_markup=get_back_home_keyboard("main")
     )
     await state.set_state(Master.waiting_for_receipt_number)
@@ -33,31 +39,41 @@ async def start_master(callback: CallbackQuery, state: FSMContext) -> None:
 
 @router.message(Master.waiting_for_receipt_number)
 async def process_receipt_number(message: Message, state: FSMContext) -> None:
-    """Обработка ввода номера квитанции."""
-    receipt_number = message.text.strip()
-    
-    if not receipt_number.isdigit():
+    """Обработка ввода номера квитанции (или нескольких — пакетный режим)."""
+    try:
+        receipt_numbers = parse_receipt_numbers(message.text)
+    except ValueError as e:
         await message.answer(
-            text="❌ Номер квитанции должен содержать только цифры.\n\n"
+            text=f"❌ {e}.\n\n"
                  "Попробуйте снова:",
             reply_markup=get_back_home_keyboard("main")
         )
         return
-    
+
+    receipt_number = ", ".join(receipt_numbers)
     user = message.from_user
     
     try:
-        # Пытаемся получить или создать квитанцию
-        receipt = await get_api_client().get_or_create_receipt(
-            receipt_number=receipt_number,
-            telegram_id=user.id,
-            telegram_username=user.username,
-        )
-        
-        await state.update_data(
-            receipt_id=receipt.get("id"),
-            receipt_number=receipt_number,
-        )
+        if len(receipt_numbers) > 1:
+            # Пакетный режим: квитанции создаст batch-endpoint при подтверждении
+            await state.update_data(
+                receipt_id=None,
+                receipt_number=None,
+                receipt_numbers=receipt_numbers,
+            )
+        else:
+            # Пытаемся получить или создать квитанцию
+            receipt = await get_api_client().get_or_create_receipt(
+                receipt_number=receipt_number,
+                telegram_id=user.id,
+                telegram_username=user.username,
+            )
+
+            await state.update_data(
+                receipt_id=receipt.get("id"),
+                receipt_number=receipt_number,
+                receipt_numbers=None,
+            )
         
         # Получаем список активных мастеров
         employees = await get_api_client().get_employees(active_only=True, role="master")
@@ -82,7 +98,7 @@ async def process_receipt_number(message: Message, state: FSMContext) -> None:
 
         await push_nav(state, "Master.waiting_for_receipt_number", "process_receipt_number")
         await message.answer(
-            text=f"👨‍🔧 Квитанция №{receipt_number}\n\n"
+            text=f"👨‍🔧 {format_receipts_label(await state.get_data())}\n\n"
                  f"Выберите мастера:",
             reply_markup=keyboard
         )
@@ -220,11 +236,10 @@ async def process_deadline(message: Message, state: FSMContext) -> None:
 async def show_deadline_confirmation(message: Message, state: FSMContext, deadline: datetime) -> None:
     """Показывает подтверждение с дедлайном."""
     data = await state.get_data()
-    receipt_number = data.get("receipt_number")
     
     await message.answer(
         text=f"👨‍🔧 Подтверждение\n\n"
-             f"Квитанция: №{receipt_number}\n"
+             f"{format_receipts_label(data)}\n"
              f"Срочные: Да\n"
              f"Готовность: {deadline.strftime('%d.%m %H:%M')}\n\n"
              f"Подтвердите:",
@@ -236,11 +251,10 @@ async def show_deadline_confirmation(message: Message, state: FSMContext, deadli
 async def show_confirmation(callback: CallbackQuery, state: FSMContext) -> None:
     """Показывает экран подтверждения."""
     data = await state.get_data()
-    receipt_number = data.get("receipt_number")
     
     await callback.message.edit_text(
         text=f"👨‍🔧 Подтверждение\n\n"
-             f"Квитанция: №{receipt_number}\n"
+             f"{format_receipts_label(data)}\n"
              f"Срочные: Нет\n\n"
              f"Подтвердите:",
         reply_markup=get_confirm_keyboard()
@@ -261,21 +275,41 @@ async def confirm_assign_to_master(callback: CallbackQuery, state: FSMContext) -
         deadline_raw = data.get("deadline")
         deadline = datetime.fromisoformat(deadline_raw) if deadline_raw else None
         
-        # Выдаём часы мастеру
-        result = await get_api_client().assign_to_master(
-            receipt_id=receipt_id,
-            master_id=master_id,
-            is_urgent=is_urgent,
-            deadline=deadline,
-            telegram_id=user.id,
-            telegram_username=user.username,
-        )
-        
-        await callback.message.edit_text(
-            text="✅ Часы выданы мастеру!",
-            reply_markup=get_back_home_keyboard("main")
-        )
-        logger.info(f"Assigned to master: receipt={receipt_id}, master={master_id}")
+        receipt_numbers = data.get("receipt_numbers")
+        if receipt_numbers:
+            # Пакетная выдача: один запрос на все квитанции
+            response = await get_api_client().batch_assign_to_master(
+                receipt_numbers=receipt_numbers,
+                master_id=master_id,
+                is_urgent=is_urgent,
+                deadline=deadline,
+                telegram_id=user.id,
+                telegram_username=user.username,
+            )
+            await callback.message.edit_text(
+                text=f"✅ Часы выданы мастеру!\n\n{format_batch_results(response)}",
+                reply_markup=get_back_home_keyboard("main")
+            )
+            logger.info(f"Batch assigned to master {master_id}: {len(receipt_numbers)} receipts")
+        else:
+            # Выдаём часы мастеру: дедлайн и выдача — одна транзакция
+            await get_api_client().run_receipt_commands(
+                [{
+                    "type": "assign_master",
+                    "receipt_id": receipt_id,
+                    "master_id": master_id,
+                    "is_urgent": is_urgent,
+                    "deadline": deadline,
+                }],
+                telegram_id=user.id,
+                telegram_username=user.username,
+            )
+
+            await callback.message.edit_text(
+                text="✅ Часы выданы мастеру!",
+                reply_markup=get_back_home_keyboard("main")
+            )
+            logger.info(f"Assigned to master: receipt={receipt_id}, master={master_id}")
         
     except httpx.ConnectError:
         logger.exception("Connection error while assigning to master")
@@ -11,7 +11,12 @@ from aiogram.fsm.context import FSMContext
 from telegram_bot.states import OTK
 from telegram_bot.keyboards.main_menu import get_back_home_keyboard, get_back_keyboard
 from telegram_bot.services.api_client import get_api_client
-from telegram_bot.utils import push_nav
+from telegram_bot.utils import (
+    format_batch_results,
+    format_receipts_label,
+    parse_receipt_numbers,
+    push_nav,
+)
 
 logger = logging.getLogger(__name__)
 router = Router()
@@ -27,7 +32,8 @@ async def start_otk(callback: CallbackQuery, state: FSMContext) -> None:
     await state.set_state(OTK.waiting_for_receipt_number)
     await callback.message.edit_text(
         text="🔍 ОТК-проверка\n\n"
-             "Введите номер квитанции:",
+             "Введите номер квитанции\n"
+             "(или несколько номеров через пробел — принять пачкой):",
         reply_markup=get_back_keyboard("main")
     )
     await callback.answer()
@@ -35,37 +41,49 @@ async def start_otk(callback: CallbackQuery, state: FSMContext) -> None:
 
 @router.message(OTK.waiting_for_receipt_number)
 async def process_receipt_number(message: Message, state: FSMContext) -> None:
-    """Обработка ввода номера квитанции."""
-    receipt_number = message.text.strip()
-
-    if not receipt_number.isdigit():
+    """Обработка ввода номера квитанции (или нескольких — пакетный режим)."""
+    try:
+        receipt_numbers = parse_receipt_numbers(message.text)
+    except ValueError as e:
         await message.answer(
-            text="❌ Номер квитанции должен содержать только цифры.\n\n"
+            text=f"❌ {e}.\n\n"
                  "Попробуйте снова:",
             reply_markup=get_back_keyboard("main")
         )
         return
 
+    receipt_number = ", ".join(receipt_numbers)
     user = message.from_user
 
     try:
-        receipt = await get_api_client().get_or_create_receipt(
-            receipt_number=receipt_number,
-            telegram_id=user.id,
-            telegram_username=user.username,
-        )
+        if len(receipt_numbers) > 1:
+            # Пакетный режим: только приёмка — для возврата нужны причины по каждой квитанции
+            await state.update_data(
+                receipt_id=None,
+                receipt_number=None,
+                receipt_numbers=receipt_numbers,
+            )
+            actions = [InlineKeyboardButton(text="✅ Все готовы", callback_data="otk:pass")]
+        else:
+            receipt = await get_api_client().get_or_create_receipt(
+                receipt_number=receipt_number,
+                telegram_id=user.id,
+                telegram_username=user.username,
+            )
 
-        await state.update_data(
-            receipt_id=receipt.get("id"),
-            receipt_number=receipt_number,
-        )
+            await state.update_data(
+                receipt_id=receipt.get("id"),
+                receipt_number=receipt_number,
+                receipt_numbers=None,
+            )
+            actions = [
+                InlineKeyboardButton(text="✅ Часы готовы", callback_data="otk:pass"),
+                InlineKeyboardButton(text="🔁 Оформить возврат", callback_data="otk:return"),
+            ]
 
         keyboard = InlineKeyboardMarkup(
             inline_keyboard=[
-                [
-                    InlineKeyboardButton(text="✅ Часы готовы", callback_data="otk:pass"),
-                    InlineKeyboardButton(text="🔁 Оформить возврат", callback_data="otk:return"),
-                ],
+                actions,
                 [
                     InlineKeyboardButton(text="⬅ Назад", callback_data="back:otk"),
                 ],
@@ -74,7 +92,7 @@ async def process_receipt_number(message: Message, state: FSMContext) -> None:
 
         await push_nav(state, "OTK.waiting_for_receipt_number", "process_receipt_number")
         await message.answer(
-            text=f"🔍 Квитанция №{receipt_number}\n\n"
+            text=f"🔍 {format_receipts_label(await state.get_data())}\n\n"
                  f"Выберите действие:",
             reply_markup=keyboard
         )
@@ -109,19 +127,33 @@ async def pass_otk(callback: CallbackQuery, state: FSMContext) -> None:
     receipt_number = data.get("receipt_number")
     user = callback.from_user
 
+    receipt_numbers = data.get("receipt_numbers")
+
     try:
-        await get_api_client().otk_pass(
-            receipt_id=receipt_id,
-            telegram_id=user.id,
-            telegram_username=user.username,
-        )
+        if receipt_numbers:
+            response = await get_api_client().batch_otk_pass(
+                receipt_numbers=receipt_numbers,
+                telegram_id=user.id,
+                telegram_username=user.username,
+            )
+            await callback.message.edit_text(
+                text=f"✅ Часы прошли ОТК!\n\n{format_batch_results(response)}",
+                reply_markup=get_back_home_keyboard("main")
+            )
+            logger.info(f"Batch OTK pass for {len(receipt_numbers)} receipts")
+        else:
+            await get_api_client().run_receipt_commands(
+                [{"type": "otk_pass", "receipt_id": receipt_id}],
+                telegram_id=user.id,
+                telegram_username=user.username,
+            )
 
-        await callback.message.edit_text(
-            text=f"✅ Квитанция №{receipt_number}\n\n"
-                 f"Часы успешно прошли ОТК!",
-            reply_markup=get_back_home_keyboard("main")
-        )
-        logger.info(f"Receipt {receipt_id} passed OTK")
+            await callback.message.edit_text(
+                text=f"✅ Квитанция №{receipt_number}\n\n"
+                     f"Часы успешно прошли ОТК!",
+                reply_markup=get_back_home_keyboard("main")
+            )
+            logger.info(f"Receipt {receipt_id} passed OTK")
 
     except httpx.ConnectError:
         logger.exception("Connection error while passing OTK")
@@ -11,7 +11,12 @@ from aiogram.fsm.context import FSMContext
 from telegram_bot.states import Polishing
 from telegram_bot.keyboards.main_menu import get_back_home_keyboard, get_confirm_keyboard
 from telegram_bot.services.api_client import get_api_client
-from telegram_bot.utils import push_nav
+from telegram_bot.utils import (
+    format_batch_results,
+    format_receipts_label,
+    parse_receipt_numbers,
+    push_nav,
+)
 
 logger = logging.getLogger(__name__)
 router = Router()
@@ -23,7 +28,8 @@ async def start_polishing(callback: CallbackQuery, state: FSMContext) -> None:
     await push_nav(state, "MainMenu.main", "start_polishing")
     await callback.message.edit_text(
         text="🪙 Отправить в полировку\n\n"
-             "Введите номер квитанции:",
+             "Введите номер квитанции\n"
+             "(или несколько номеров через пробел — отправить пачкой):",
         reply_markup=get_back_home_keyboard("main")
     )
     await state.set_state(Polishing.waiting_for_receipt_number)
@@ -32,31 +38,41 @@ async def start_polishing(callback: CallbackQuery, state: FSMContext) -> None:
 
 @router.message(Polishing.waiting_for_receipt_number)
 async def process_receipt_number(message: Message, state: FSMContext) -> None:
-    """Обработка ввода номера квитанции."""
-    receipt_number = message.text.strip()
-    
-    if not receipt_number.isdigit():
+    """Обработка ввода номера квитанции (или нескольких — пакетный режим)."""
+    try:
+        receipt_numbers = parse_receipt_numbers(message.text)
+    except ValueError as e:
         await message.answer(
-            text="❌ Номер квитанции должен содержать только цифры.\n\n"
+            text=f"❌ {e}.\n\n"
                  "Попробуйте снова:",
             reply_markup=get_back_home_keyboard("main")
         )
         return
-    
+
+    receipt_number = ", ".join(receipt_numbers)
     user = message.from_user
     
     try:
-        # Пытаемся получить или создать квитанцию
-        receipt = await get_api_client().get_or_create_receipt(
-            receipt_number=receipt_number,
-            telegram_id=user.id,
-            telegram_username=user.username,
-        )
-        
-        await state.update_data(
-            receipt_id=receipt.get("id"),
-            receipt_number=receipt_number,
-        )
+        if len(receipt_numbers) > 1:
+            # Пакетный режим: квитанции создаст batch-endpoint при подтверждении
+            await state.update_data(
+                receipt_id=None,
+                receipt_number=None,
+                receipt_numbers=receipt_numbers,
+            )
+        else:
+            # Пытаемся получить или создать квитанцию
+            receipt = await get_api_client().get_or_create_receipt(
+                receipt_number=receipt_number,
+                telegram_id=user.id,
+                telegram_username=user.username,
+            )
+
+            await state.update_data(
+                receipt_id=receipt.get("id"),
+                receipt_number=receipt_number,
+                receipt_numbers=None,
+            )
         
         # Получаем список полировщиков
         employees = await get_api_client().get_employees(active_only=True, role="polisher")
@@ -81,7 +97,7 @@ async def process_receipt_number(message: Message, state: FSMContext) -> None:
 
         await push_nav(state, "Polishing.waiting_for_receipt_number", "process_receipt_number")
         await message.answer(
-            text=f"🪙 Квитанция №{receipt_number}\n\n"
+            text=f"🪙 {format_receipts_label(await state.get_data())}\n\n"
                  f"Выберите полировщика:",
             reply_markup=keyboard
         )
@@ -225,7 +241,7 @@ async def process_comment(message: Message, state: FSMContext) -> None:
     
     await message.answer(
         text=f"🪙 Подтверждение передачи в полировку\n\n"
-             f"Квитанция: №{data.get('receipt_number')}\n"
+             f"{format_receipts_label(data)}\n"
              f"Металл: {data.get('metal_type')}\n"
              f"Браслет: {'Да' if data.get('has_bracelet') else 'Нет'}\n"
              f"Сложная: {'Да' if data.get('is_complex') else 'Нет'}\n"
@@ -243,23 +259,42 @@ async def confirm_polishing(callback: CallbackQuery, state: FSMContext) -> None:
     user = callback.from_user
     
     try:
-        # Создаем запись о полировке через API
-        polishing = await get_api_client().create_polishing(
-            receipt_id=data.get("receipt_id"),
-            polisher_id=data.get("polisher_id"),
-            metal_type=data.get("metal_type"),
-            has_bracelet=data.get("has_bracelet"),
-            is_complex=data.get("is_complex"),
-            comment=data.get("comment"),
-            telegram_id=user.id,
-            telegram_username=user.username,
-        )
-        
-        await callback.message.edit_text(
-            text="✅ Часы переданы в полировку!",
-            reply_markup=get_back_home_keyboard("main")
-        )
-        logger.info(f"Polishing created for receipt {data.get('receipt_id')}")
+        receipt_numbers = data.get("receipt_numbers")
+        if receipt_numbers:
+            # Пакетная передача: один запрос на все квитанции
+            response = await get_api_client().batch_create_polishing(
+                receipt_numbers=receipt_numbers,
+                polisher_id=data.get("polisher_id"),
+                metal_type=data.get("metal_type"),
+                has_bracelet=data.get("has_bracelet"),
+                is_complex=data.get("is_complex"),
+                comment=data.get("comment"),
+                telegram_id=user.id,
+                telegram_username=user.username,
+            )
+            await callback.message.edit_text(
+                text=f"✅ Часы переданы в полировку!\n\n{format_batch_results(response)}",
+                reply_markup=get_back_home_keyboard("main")
+            )
+            logger.info(f"Batch polishing created for {len(receipt_numbers)} receipts")
+        else:
+            # Создаем запись о полировке через API
+            polishing = await get_api_client().create_polishing(
+                receipt_id=data.get("receipt_id"),
+                polisher_id=data.get("polisher_id"),
+                metal_type=data.get("metal_type"),
+                has_bracelet=data.get("has_bracelet"),
+                is_complex=data.get("is_complex"),
+                comment=data.get("comment"),
+                telegram_id=user.id,
+                telegram_username=user.username,
+            )
+
+            await callback.message.edit_text(
+                text="✅ Часы переданы в полировку!",
+                reply_markup=get_back_home_keyboard("main")
+            )
+            logger.info(f"Polishing created for receipt {data.get('receipt_id')}")
         
     except httpx.ConnectError:
         logger.exception("Connection error while creating polishing")
@@ -299,7 +334,7 @@ async def skip_comment(callback: CallbackQuery, state: FSMContext) -> None:
 
     await callback.message.edit_text(
         text=f"🪙 Подтверждение передачи в полировку\n\n"
-             f"Квитанция: №{data.get('receipt_number')}\n"
+             f"{format_receipts_label(data)}\n"
              f"Металл: {data.get('metal_type')}\n"
              f"Браслет: {'Да' if data.get('has_bracelet') else 'Нет'}\n"
              f"Сложная: {'Да' if data.get('is_complex') else 'Нет'}\n"
@@ -6,9 +6,10 @@ import logging
 import httpx
 from datetime import datetime
 from aiogram import Router, F
-from aiogram.types import CallbackQuery, Message
+from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message
 from aiogram.fsm.context import FSMContext
 
+from telegram_bot.config import bot_config
 from telegram_bot.states import Urgent
 from telegram_bot.keyboards.main_menu import get_back_home_keyboard, get_back_keyboard
 from telegram_bot.services.api_client import get_api_client
@@ -19,14 +20,90 @@ logger = logging.getLogger(__name__)
 router = Router()
 
 
-@router.callback_query(F.data == "menu:urgent")
-async def show_urgent_list(callback: CallbackQuery, state: FSMContext) -> None:
-    """Показывает список срочных часов."""
-    await push_nav(state, "MainMenu.main", "show_urgent_list")
+# Окна по дедлайну: код в callback_data -> (параметр API, подпись кнопки)
+URGENT_WINDOWS = {
+    "all": (None, "Все"),
+    "overdue": ("overdue", "Просрочено"),
+    "today": ("today", "Сегодня"),
+    "week": ("week", "Неделя"),
+}
+
+
+def build_urgent_keyboard(
+    receipts: list[dict], window: str, page: int, pages: int
+) -> InlineKeyboardMarkup:
+    """Клавиатура страницы: квитанции, фильтр по окну, листание, навигация."""
+    buttons = []
+    for receipt in receipts:
+        deadline_str = format_datetime(
+            receipt.get("current_deadline"), fmt="%d.%m %H:%M"
+        )
+        buttons.append([
+            InlineKeyboardButton(
+                text=f"🕒 №{receipt.get('receipt_number')} — {deadline_str}",
+                callback_data=f"urgent:view:{receipt.get('id')}"
+            )
+        ])
+
+    buttons.append([
+        InlineKeyboardButton(
+            text=f"• {label}" if code == window else label,
+            callback_data=f"urgent:list:{code}:0",
+        )
+        for code, (_, label) in URGENT_WINDOWS.items()
+    ])
+
+    if pages > 1:
+        nav_row = []
+        if page > 0:
+            nav_row.append(InlineKeyboardButton(
+                text="◀", callback_data=f"urgent:list:{window}:{page - 1}"
+            ))
+        nav_row.append(InlineKeyboardButton(
+            text=f"{page + 1}/{pages}", callback_data="urgent:noop"
+        ))
+        if page + 1 < pages:
+            nav_row.append(InlineKeyboardButton(
+                text="▶", callback_data=f"urgent:list:{window}:{page + 1}"
+            ))
+        buttons.append(nav_row)
+
+    buttons.append([
+        InlineKeyboardButton(text="⬅ Назад", callback_data="back:main"),
+        InlineKeyboardButton(text="🏠 В меню", callback_data="menu:main"),
+    ])
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+async def render_urgent_page(
+    callback: CallbackQuery, state: FSMContext, window: str, page: int
+) -> None:
+    """
+    Показывает одну страницу срочных часов.
+    Курсоры уже открытых страниц хранятся в FSM data (urgent_cursors),
+    поэтому с API запрашивается только текущая страница.
+    """
+    data = await state.get_data()
+    cursors = data.get("urgent_cursors") or [None]
+    if data.get("urgent_window") != window:
+        cursors = [None]
+    page = max(0, min(page, len(cursors) - 1))
+
     try:
-        receipts = await get_api_client().get_urgent_receipts()
-        
-        if not receipts:
+        response = await get_api_client().get_urgent_page(
+            window=URGENT_WINDOWS[window][0],
+            cursor=cursors[page],
+            limit=bot_config.URGENT_PAGE_SIZE,
+        )
+        receipts = response.get("items", [])
+        total = response.get("total", len(receipts))
+
+        cursors = cursors[:page + 1]
+        if response.get("next_cursor"):
+            cursors.append(response["next_cursor"])
+        await state.update_data(urgent_window=window, urgent_page=page, urgent_cursors=cursors)
+
+        if not receipts and window == "all":
             await callback.message.edit_text(
                 text="🕒 Срочные часы\n\n"
                      "Нет срочных часов.",
@@ -34,36 +111,17 @@ async def show_urgent_list(callback: CallbackQuery, state: FSMContext) -> None:
             )
             await callback.answer()
             return
-        
-        from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-        
-        buttons = []
-        for receipt in receipts:
-            deadline_str = format_datetime(
-                receipt.get("current_deadline"), fmt="%d.%m %H:%M"
-            )
-            
-            buttons.append([
-                InlineKeyboardButton(
-                    text=f"🕒 №{receipt.get('receipt_number')} — {deadline_str}",
-                    callback_data=f"urgent:view:{receipt.get('id')}"
-                )
-            ])
-        
-        buttons.append([
-            InlineKeyboardButton(text="⬅ Назад", callback_data="back:main"),
-            InlineKeyboardButton(text="🏠 В меню", callback_data="menu:main"),
-        ])
-        
-        keyboard = InlineKeyboardMarkup(inline_keyboard=buttons)
-        
+
+        pages = max(1, -(-total // bot_config.URGENT_PAGE_SIZE))
+        text = f"🕒 Срочные часы — {URGENT_WINDOWS[window][1].lower()} ({total})\n\n"
+        text += "Выберите квитанцию для изменения срока:" if receipts else "Нет часов в этом окне."
+
         await callback.message.edit_text(
-            text="🕒 Срочные часы\n\n"
-                 "Выберите квитанцию для изменения срока:",
-            reply_markup=keyboard
+            text=text,
+            reply_markup=build_urgent_keyboard(receipts, window, page, pages)
         )
         await state.set_state(Urgent.list)
-        
+
     except httpx.ConnectError:
         logger.exception("Connection error while fetching urgent receipts")
         await callback.message.edit_text(
@@ -82,7 +140,29 @@ async def show_urgent_list(callback: CallbackQuery, state: FSMContext) -> None:
             text="❌ Непредвиденная ошибка при получении списка.",
             reply_markup=get_back_home_keyboard("main")
         )
-    
+
+    await callback.answer()
+
+
+@router.callback_query(F.data == "menu:urgent")
+async def show_urgent_list(callback: CallbackQuery, state: FSMContext) -> None:
+    """Показывает первую страницу списка срочных часов."""
+    await push_nav(state, "MainMenu.main", "show_urgent_list")
+    await render_urgent_page(callback, state, "all", 0)
+
+
+@router.callback_query(F.data.startswith("urgent:list:"))
+async def show_urgent_page(callback: CallbackQuery, state: FSMContext) -> None:
+    """Листание и смена окна: urgent:list:<окно>:<страница>."""
+    _, _, window, page = callback.data.split(":")
+    if window not in URGENT_WINDOWS:
+        window = "all"
+    await render_urgent_page(callback, state, window, int(page))
+
+
+@router.callback_query(F.data == "urgent:noop")
+async def urgent_noop(callback: CallbackQuery) -> None:
+    """Кнопка с номером страницы — ничего не делает."""
     await callback.answer()
 
 
@@ -97,8 +177,6 @@ async def view_urgent_receipt(callback: CallbackQuery, state: FSMContext) -> Non
 
         deadline_str = format_datetime(receipt.get("current_deadline"))
 
-        from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-
         keyboard = InlineKeyboardMarkup(
             inline_keyboard=[
                 [
@@ -314,5 +392,8 @@ async def show_urgent_history(callback: CallbackQuery, state: FSMContext) -> Non
 
 @router.callback_query(F.data == "back:urgent")
 async def back_to_urgent(callback: CallbackQuery, state: FSMContext) -> None:
-    """Возврат к списку срочных часов."""
-    await show_urgent_list(callback, state)
+    """Возврат к списку срочных часов (на ту же страницу и окно)."""
+    data = await state.get_data()
+    await render_urgent_page(
+        callback, state, data.get("urgent_window", "all"), data.get("urgent_page", 0)
+    )
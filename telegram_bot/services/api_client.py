@@ -2,21 +2,185 @@
 HTTP клиент для взаимодействия с API бэкенда.
 Согласно ТЗ п. 12.2: бот работает ТОЛЬКО через FastAPI.
 """
+import asyncio
+import copy
 import httpx
 import logging
-from typing import Optional
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Optional
 from datetime import datetime
 from telegram_bot.config import bot_config
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type, before_sleep_log
+from telegram_bot.services.tracing import tracer
+from tenacity import RetryCallState, retry, wait_exponential, retry_if_exception_type, before_sleep_log
 
 logger = logging.getLogger(__name__)
 
+# base_url для in-process транспорта — хост не используется, запрос не уходит в сеть
+IN_PROCESS_BASE_URL = "http://in-process"
+
+# Поля квитанции, нужные кнопкам списка срочных часов (sparse fieldset)
+URGENT_LIST_FIELDS = "id,receipt_number,current_deadline"
+
+# Ответ бэкенда на повтор POST, пока исходный запрос с тем же ключом выполняется
+IDEMPOTENCY_IN_PROGRESS = "IDEMPOTENCY_IN_PROGRESS"
+# Попыток всего: сетевые ошибки — до 3, ожидание исходного запроса — до 10
+MAX_ATTEMPTS = 3
+MAX_IN_PROGRESS_ATTEMPTS = 10
+MAX_RETRY_AFTER = 10.0
+
+
+class IdempotencyInProgress(httpx.HTTPStatusError):
+    """409 IDEMPOTENCY_IN_PROGRESS: запись ещё выполняется, повтор — через Retry-After."""
+
+    @property
+    def retry_after(self) -> float:
+        try:
+            seconds = float(self.response.headers.get("retry-after", 1))
+        except ValueError:
+            seconds = 1.0
+        return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+def _is_in_progress(response: httpx.Response) -> bool:
+    if response.status_code != 409:
+        return False
+    try:
+        return response.json().get("error_code") == IDEMPOTENCY_IN_PROGRESS
+    except ValueError:
+        return False
+
+
+_backoff = wait_exponential(multiplier=1, min=1, max=10)
+
+
+def _retry_wait(retry_state: RetryCallState) -> float:
+    """Исходный запрос ещё выполняется — ждём Retry-After, иначе экспоненциальная пауза."""
+    error = retry_state.outcome.exception()
+    if isinstance(error, IdempotencyInProgress):
+        return error.retry_after
+    return _backoff(retry_state)
+
+
+def _retry_stop(retry_state: RetryCallState) -> bool:
+    limit = (
+        MAX_IN_PROGRESS_ATTEMPTS
+        if isinstance(retry_state.outcome.exception(), IdempotencyInProgress)
+        else MAX_ATTEMPTS
+    )
+    return retry_state.attempt_number >= limit
+
+
+class ReferenceCache:
+    """
+    Кэш справочных данных (сотрудники, причины возврата) с TTL на ресурс.
+    Ключ — (ресурс, endpoint, params); инвалидация — целиком по ресурсу.
+    """
+
+    def __init__(self, ttls: dict[str, float]):
+        self.ttls = ttls
+        self._entries: dict[tuple, tuple[float, Any]] = {}
+        self._stats: dict[str, dict[str, int]] = {
+            resource: {"hits": 0, "misses": 0, "invalidations": 0} for resource in ttls
+        }
+
+    @staticmethod
+    def make_key(resource: str, endpoint: str, params: Optional[dict]) -> tuple:
+        return (resource, endpoint, tuple(sorted((params or {}).items())))
+
+    def get(self, key: tuple) -> tuple[bool, Any]:
+        """Возвращает (найдено, значение). Просроченные записи удаляются."""
+        resource = key[0]
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self._stats[resource]["hits"] += 1
+            return True, copy.deepcopy(entry[1])
+        if entry is not None:
+            del self._entries[key]
+        self._stats[resource]["misses"] += 1
+        return False, None
+
+    def set(self, key: tuple, value: Any) -> None:
+        ttl = self.ttls.get(key[0], 0)
+        if ttl > 0:
+            self._entries[key] = (time.monotonic() + ttl, copy.deepcopy(value))
+
+    def invalidate(self, resource: str) -> None:
+        """Сбрасывает все записи ресурса."""
+        keys = [key for key in self._entries if key[0] == resource]
+        for key in keys:
+            del self._entries[key]
+        self._stats[resource]["invalidations"] += 1
+        logger.debug(f"Reference cache invalidated: {resource} ({len(keys)} entries)")
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, dict]:
+        """Статистика попаданий по ресурсам (hit_rate — доля от всех обращений)."""
+        result = {}
+        for resource, counters in self._stats.items():
+            total = counters["hits"] + counters["misses"]
+            result[resource] = {
+                **counters,
+                "hit_rate": round(counters["hits"] / total, 3) if total else None,
+            }
+        return result
+
+
+class ValidatorCache:
+    """
+    LRU-кэш валидаторов для условных GET: ключ запроса → (ETag, разобранный ответ).
+    При 304 Not Modified ответ берётся отсюда — тело не передаётся и не парсится.
+    Хранятся и отдаются копии: изменения результата вызывающим кодом не портят кэш.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, tuple[str, Any]] = OrderedDict()
+        self.stats = {"conditional_requests": 0, "not_modified": 0, "stored": 0}
+
+    def etag_for(self, key: tuple) -> Optional[str]:
+        entry = self.lookup(key)
+        return entry[0] if entry is not None else None
+
+    def lookup(self, key: tuple) -> Optional[tuple[str, Any]]:
+        """
+        Запись (ETag, тело) для If-None-Match. Вызывающий держит её до ответа:
+        вытеснение параллельным store() не мешает обработать 304.
+        """
+        return self._entries.get(key)
+
+    def not_modified(self, key: tuple, entry: tuple[str, Any]) -> Any:
+        """Ответ 304: копия тела из записи, по которой отправлен If-None-Match."""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        self.stats["not_modified"] += 1
+        return copy.deepcopy(entry[1])
+
+    def store(self, key: tuple, etag: str, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (etag, copy.deepcopy(value))
+        self._entries.move_to_end(key)
+        self.stats["stored"] += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
 
 class APIClient:
     """Клиент для работы с API бэкенда."""
     
     _instance = None
     _client: Optional[httpx.AsyncClient] = None
+    _transport: Optional[httpx.AsyncBaseTransport] = None
     
     def __new__(cls, base_url: str = None):
         """Singleton pattern для предотвращения создания множественных соединений."""
@@ -31,6 +195,14 @@ class APIClient:
             # Ensure URL has protocol
             if self.base_url and not self.base_url.startswith(('http://', 'https://')):
                 self.base_url = 'http://' + self.base_url
+            self._cache = ReferenceCache({
+                "employees": bot_config.CACHE_TTL_EMPLOYEES,
+                "return_reasons": bot_config.CACHE_TTL_RETURN_REASONS,
+            })
+            # Single-flight: одинаковые GET-запросы «в полёте» разделяют один вызов
+            self._inflight: dict[tuple, asyncio.Future] = {}
+            self._coalesce_stats = {"get_requests": 0, "backend_calls": 0, "coalesced": 0}
+            self._validators = ValidatorCache(bot_config.API_ETAG_CACHE_SIZE)
             logger.info(f"API client initialized with base URL: {self.base_url}")
             self._initialized = True
     
@@ -40,13 +212,42 @@ class APIClient:
             if not bot_config.API_KEY:
                 logger.error("API_KEY is empty! Set API_KEY environment variable.")
             self._client = httpx.AsyncClient(
-                base_url=self.base_url,
+                base_url=IN_PROCESS_BASE_URL if self._transport else self.base_url,
                 timeout=30.0,
                 follow_redirects=True,
-                headers={"X-API-Key": bot_config.API_KEY},
+                headers=self._default_headers(),
+                transport=self._transport,
             )
             logger.debug("Created new HTTP client")
         return self._client
+
+    def _default_headers(self) -> dict[str, str]:
+        headers = {"X-API-Key": bot_config.API_KEY}
+        if self._transport is not None:
+            # В одном процессе сжатие — только лишний CPU на обеих сторонах
+            headers["Accept-Encoding"] = "identity"
+        return headers
+
+    @property
+    def is_in_process(self) -> bool:
+        """True, если запросы идут напрямую в ASGI-приложение, минуя сеть."""
+        return self._transport is not None
+
+    async def use_asgi_app(self, app: Any) -> None:
+        """
+        Переключает клиент на in-process транспорт (httpx.ASGITransport).
+        Используется, когда бот работает в одном процессе с FastAPI:
+        запросы не проходят через TCP и публичный URL.
+        """
+        await self.close()
+        self._transport = httpx.ASGITransport(app=app)
+        logger.info("API client switched to in-process ASGI transport")
+
+    async def use_http(self) -> None:
+        """Возвращает клиент на сетевой HTTP-транспорт."""
+        await self.close()
+        self._transport = None
+        logger.info(f"API client uses HTTP transport: {self.base_url}")
     
     async def close(self):
         """Закрывает HTTP клиент."""
@@ -55,47 +256,165 @@ class APIClient:
             logger.debug("HTTP client closed")
             self._client = None
     
+    async def _request(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[dict] = None,
+        json_data: Optional[dict] = None,
+    ) -> dict:
+        """
+        Выполняет запрос к API.
+        Одинаковые GET-запросы, уже выполняющиеся в этот момент, объединяются
+        в один вызов бэкенда (single-flight); пишущие методы выполняются всегда.
+        POST получает Idempotency-Key, общий для всех повторов _send: если
+        таймаут случился после записи, повтор вернёт сохранённый ответ, а пока
+        исходный запрос выполняется (409 IDEMPOTENCY_IN_PROGRESS) — ждёт Retry-After.
+        """
+        if method.upper() != "GET":
+            idempotency_key = uuid.uuid4().hex if method.upper() == "POST" else None
+            return await self._send(
+                method, endpoint, params=params, json_data=json_data,
+                idempotency_key=idempotency_key,
+            )
+
+        self._coalesce_stats["get_requests"] += 1
+        key = (endpoint.rstrip('/'), tuple(sorted((params or {}).items())))
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self._coalesce_stats["coalesced"] += 1
+            logger.debug(f"Coalesced GET {endpoint} with in-flight request")
+            return copy.deepcopy(await asyncio.shield(inflight))
+
+        self._coalesce_stats["backend_calls"] += 1
+        future = asyncio.ensure_future(self._send(method, endpoint, params=params))
+        self._inflight[key] = future
+        future.add_done_callback(lambda f: self._release_inflight(key, f))
+        return await asyncio.shield(future)
+
+    def _release_inflight(self, key: tuple, future: asyncio.Future) -> None:
+        """Убирает завершившийся запрос из таблицы in-flight."""
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        # Помечаем исключение как полученное, если все ожидающие были отменены
+        if not future.cancelled():
+            future.exception()
+
+    def coalescing_stats(self) -> dict:
+        """Статистика объединения GET-запросов (ratio — доля объединённых)."""
+        stats = dict(self._coalesce_stats)
+        total = stats["get_requests"]
+        stats["coalesced_ratio"] = round(stats["coalesced"] / total, 3) if total else None
+        return stats
+
     @retry(
-        retry=retry_if_exception_type((httpx.ConnectError, httpx.TimeoutException)),
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=1, max=10),
+        retry=retry_if_exception_type(
+            (httpx.ConnectError, httpx.TimeoutException, IdempotencyInProgress)
+        ),
+        stop=_retry_stop,
+        wait=_retry_wait,
         before_sleep=before_sleep_log(logger, logging.WARNING),
         reraise=True,
     )
-    async def _request(
+    async def _send(
         self,
         method: str,
         endpoint: str,
         params: Optional[dict] = None,
         json_data: Optional[dict] = None,
+        idempotency_key: Optional[str] = None,
     ) -> dict:
-        """Выполняет HTTP запрос к API с retry логикой."""
+        """
+        Выполняет HTTP запрос к API с retry логикой.
+        Каждая попытка — client span трассировки; его traceparent уходит
+        в заголовке, и роут бэкенда продолжает ту же трассу.
+        """
         # Remove trailing slash from endpoint to avoid redirect issues
         endpoint = endpoint.rstrip('/')
         
         client = await self._get_client()
         
-        try:
-            url = f"/api/v1{endpoint}"
-            logger.debug(f"Making {method} request to {url}")
-            
-            response = await client.request(
-                method=method,
-                url=url,
-                params=params,
-                json=json_data,
-            )
-            response.raise_for_status()
-            return response.json()
-        except httpx.ConnectError as e:
-            logger.error(f"Connection error to {endpoint}: {e}")
-            raise
-        except httpx.HTTPStatusError as e:
-            logger.error(f"HTTP error {e.response.status_code} on {endpoint}: {e.response.text if e.response else e}")
-            raise
-        except Exception as e:
-            logger.error(f"Unexpected error on {endpoint}: {e}")
-            raise
+        # Условный GET: если ответ уже есть в кэше валидаторов — шлём If-None-Match
+        validator_key = None
+        validator_entry = None
+        headers = {"Idempotency-Key": idempotency_key} if idempotency_key else None
+        if method.upper() == "GET":
+            validator_key = (endpoint, tuple(sorted((params or {}).items())))
+            validator_entry = self._validators.lookup(validator_key)
+            if validator_entry is not None:
+                headers = {"If-None-Match": validator_entry[0]}
+                self._validators.stats["conditional_requests"] += 1
+
+        with tracer.span(f"{method.upper()} {endpoint}", kind="client", component="api_client") as span:
+            try:
+                url = f"/api/v1{endpoint}"
+                logger.debug(f"Making {method} request to {url}")
+
+                response = await client.request(
+                    method=method,
+                    url=url,
+                    params=params,
+                    json=json_data,
+                    headers=tracer.inject(headers),
+                )
+                span.set("http.status_code", response.status_code)
+                if response.status_code == 304 and validator_entry is not None:
+                    return self._validators.not_modified(validator_key, validator_entry)
+                if idempotency_key and _is_in_progress(response):
+                    # Повтор после таймаута застал исходный запрос: ждём его ответ
+                    raise IdempotencyInProgress(
+                        f"{method} {endpoint}: original request still in progress",
+                        request=response.request,
+                        response=response,
+                    )
+                response.raise_for_status()
+                data = response.json()
+                etag = response.headers.get("etag")
+                if validator_key is not None and etag:
+                    self._validators.store(validator_key, etag, data)
+                return data
+            except httpx.ConnectError as e:
+                logger.error(f"Connection error to {endpoint}: {e}")
+                raise
+            except IdempotencyInProgress:
+                logger.info(f"{method} {endpoint}: waiting for the original request to finish")
+                raise
+            except httpx.HTTPStatusError as e:
+                logger.error(f"HTTP error {e.response.status_code} on {endpoint}: {e.response.text if e.response else e}")
+                raise
+            except Exception as e:
+                logger.error(f"Unexpected error on {endpoint}: {e}")
+                raise
+
+    async def _cached_get(
+        self,
+        resource: str,
+        endpoint: str,
+        params: Optional[dict] = None,
+    ):
+        """GET через кэш справочников: при попадании запрос к API не выполняется."""
+        key = self._cache.make_key(resource, endpoint, params)
+        found, value = self._cache.get(key)
+        if found:
+            return value
+        response = await self._request("GET", endpoint, params=params)
+        self._cache.set(key, response)
+        return response
+
+    def invalidate_cache(self, resource: Optional[str] = None) -> None:
+        """Сбрасывает кэш справочников (весь или по ресурсу)."""
+        if resource is None:
+            self._cache.clear()
+        else:
+            self._cache.invalidate(resource)
+
+    def validator_stats(self) -> dict:
+        """Статистика условных GET (запросы с If-None-Match, ответы 304, размер кэша)."""
+        return {**self._validators.stats, "entries": len(self._validators)}
+
+    def cache_stats(self) -> dict[str, dict]:
+        """Статистика кэша справочников (hits, misses, hit_rate по ресурсам)."""
+        return self._cache.stats()
 
     @staticmethod
     def _unwrap_paginated(response) -> list:
@@ -147,6 +466,23 @@ class APIClient:
         response = await self._request("GET", "/receipts/urgent")
         return self._unwrap_paginated(response)
 
+    async def get_urgent_page(
+        self,
+        window: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = 10,
+    ) -> dict:
+        """
+        Получает одну страницу срочных часов (только поля для кнопок списка).
+        Возвращает {"items", "total", "limit", "next_cursor"}.
+        """
+        params = {"limit": limit, "fields": URGENT_LIST_FIELDS}
+        if window:
+            params["window"] = window
+        if cursor:
+            params["cursor"] = cursor
+        return await self._request("GET", "/receipts/urgent", params=params)
+
     async def create_receipt(self, receipt_number: str) -> dict:
         """Создает новую квитанцию."""
         return await self._request(
@@ -213,17 +549,46 @@ class APIClient:
             json_data=json_data,
         )
 
+    async def batch_assign_to_master(
+        self,
+        receipt_numbers: list[str],
+        master_id: int,
+        is_urgent: bool = False,
+        deadline: Optional[datetime] = None,
+        telegram_id: int = None,
+        telegram_username: str = None,
+    ) -> dict:
+        """
+        Выдаёт мастеру несколько часов одним запросом (квитанции
+        создаются на бэкенде). Возвращает результаты по каждой квитанции.
+        """
+        json_data = {
+            "receipt_numbers": receipt_numbers,
+            "master_id": master_id,
+            "is_urgent": is_urgent,
+            "telegram_id": telegram_id,
+            "telegram_username": telegram_username,
+        }
+        if deadline:
+            json_data["deadline"] = deadline.isoformat()
+
+        return await self._request(
+            "POST",
+            "/receipts/batch/assign-master",
+            json_data=json_data,
+        )
+
     # ===== Employees =====
     async def get_employees(self, active_only: bool = True, role: Optional[str] = None) -> list[dict]:
-        """Получает список сотрудников, опционально фильтруя по роли."""
+        """
+        Получает список сотрудников, опционально фильтруя по роли.
+        Кэшируется; сбрасывается при изменении сотрудников через этот клиент.
+        Админские списки (get_all_employees, get_inactive_employees) не кэшируются.
+        """
         params = {"active_only": active_only}
         if role:
             params["role"] = role
-        response = await self._request(
-            "GET",
-            "/employees/",
-            params=params,
-        )
+        response = await self._cached_get("employees", "/employees/", params=params)
         return self._unwrap_paginated(response)
 
     async def get_all_employees(self) -> list[dict]:
@@ -248,7 +613,7 @@ class APIClient:
         telegram_username: Optional[str] = None,
     ) -> dict:
         """Создаёт нового сотрудника."""
-        return await self._request(
+        result = await self._request(
             "POST",
             "/employees/",
             json_data={
@@ -258,20 +623,26 @@ class APIClient:
                 "telegram_username": telegram_username,
             }
         )
+        self.invalidate_cache("employees")
+        return result
 
     async def activate_employee(self, employee_id: int) -> dict:
         """Активирует сотрудника."""
-        return await self._request(
+        result = await self._request(
             "POST",
             f"/employees/{employee_id}/activate"
         )
+        self.invalidate_cache("employees")
+        return result
 
     async def deactivate_employee(self, employee_id: int) -> dict:
         """Деактивирует сотрудника."""
-        return await self._request(
+        result = await self._request(
             "POST",
             f"/employees/{employee_id}/deactivate"
         )
+        self.invalidate_cache("employees")
+        return result
 
     async def get_employee(self, employee_id: int) -> dict:
         """Получает сотрудника по ID."""
@@ -279,11 +650,13 @@ class APIClient:
 
     async def update_employee(self, employee_id: int, **fields) -> dict:
         """Обновляет данные сотрудника (PATCH)."""
-        return await self._request(
+        result = await self._request(
             "PATCH",
             f"/employees/{employee_id}",
             json_data=fields,
         )
+        self.invalidate_cache("employees")
+        return result
 
     # ===== Operations =====
     async def create_operation(
@@ -335,6 +708,33 @@ class APIClient:
             }
         )
 
+    async def batch_create_polishing(
+        self,
+        receipt_numbers: list[str],
+        polisher_id: int,
+        metal_type: str,
+        has_bracelet: bool,
+        is_complex: bool,
+        comment: str = "",
+        telegram_id: int = None,
+        telegram_username: str = None,
+    ) -> dict:
+        """Передаёт в полировку несколько квитанций одним запросом."""
+        return await self._request(
+            "POST",
+            "/polishing/batch",
+            json_data={
+                "receipt_numbers": receipt_numbers,
+                "polisher_id": polisher_id,
+                "metal_type": metal_type,
+                "bracelet": has_bracelet,
+                "difficult": is_complex,
+                "comment": comment,
+                "telegram_id": telegram_id,
+                "telegram_username": telegram_username,
+            }
+        )
+
     # ===== OTK =====
     async def otk_pass(
         self,
@@ -352,6 +752,23 @@ class APIClient:
             }
         )
 
+    async def batch_otk_pass(
+        self,
+        receipt_numbers: list[str],
+        telegram_id: int = None,
+        telegram_username: str = None,
+    ) -> dict:
+        """Отмечает прохождение ОТК для нескольких квитанций одним запросом."""
+        return await self._request(
+            "POST",
+            "/receipts/batch/otk-pass",
+            json_data={
+                "receipt_numbers": receipt_numbers,
+                "telegram_id": telegram_id,
+                "telegram_username": telegram_username,
+            }
+        )
+
     async def initiate_return(
         self,
         receipt_id: int,
@@ -368,10 +785,38 @@ class APIClient:
             }
         )
 
+    async def run_receipt_commands(
+        self,
+        commands: list[dict],
+        telegram_id: int = None,
+        telegram_username: str = None,
+    ) -> dict:
+        """
+        Выполняет несколько шагов сценария (assign_master, set_deadline, otk_pass,
+        add_comment, send_to_polishing) одним запросом и одной транзакцией.
+        Возвращает {"results": [...]}; если хоть одна команда невыполнима, не
+        применяется ни одна — HTTPStatusError (400/404/409) с причинами в detail.
+        """
+        return await self._request(
+            "POST",
+            "/receipts/commands",
+            json_data={
+                "commands": [
+                    {
+                        key: value.isoformat() if isinstance(value, datetime) else value
+                        for key, value in command.items()
+                    }
+                    for command in commands
+                ],
+                "telegram_id": telegram_id,
+                "telegram_username": telegram_username,
+            }
+        )
+
     # ===== Returns =====
     async def get_return_reasons(self) -> list[dict]:
-        """Получает список причин возврата."""
-        response = await self._request("GET", "/returns/reasons")
+        """Получает список причин возврата (кэшируется, справочник меняется редко)."""
+        response = await self._cached_get("return_reasons", "/returns/reasons")
         return self._unwrap_paginated(response)
 
     async def create_return(
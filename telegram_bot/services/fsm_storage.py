@@ -0,0 +1,303 @@
+"""
+FSM storage: RedisStorage с L1-кэшем в памяти процесса.
+
+В рамках одного update (см. FSMBatchMiddleware) состояние чата читается
+из Redis не более одного раза, а все изменения state/data копятся в памяти
+и записываются одним Lua-скриптом в конце обработки. Корректность при
+нескольких процессах обеспечивает счётчик версии в Redis: запись проходит,
+только если версия не изменилась; иначе данные перечитываются и изменения
+этого update применяются поверх свежих.
+"""
+import copy
+import logging
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Mapping, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.exceptions import DataNotDictLikeError
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import StateType, StorageKey
+from aiogram.fsm.storage.redis import RedisStorage
+from aiogram.types import TelegramObject
+
+logger = logging.getLogger(__name__)
+
+# Сравнить версию и записать state/data одним запросом.
+# ARGV: expected_version (-1 — без проверки), state_mode, state, data_mode, data, state_ttl, data_ttl
+# *_mode: "keep" — не менять, "del" — удалить, "set" — записать
+_CAS_WRITE_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[3]) or '0')
+local expected = tonumber(ARGV[1])
+if expected >= 0 and current ~= expected then
+    return -1
+end
+local function write(key, mode, value, ttl)
+    if mode == 'del' then
+        redis.call('DEL', key)
+    elseif mode == 'set' then
+        if tonumber(ttl) > 0 then
+            redis.call('SET', key, value, 'EX', ttl)
+        else
+            redis.call('SET', key, value)
+        end
+    end
+end
+write(KEYS[1], ARGV[2], ARGV[3], ARGV[6])
+write(KEYS[2], ARGV[4], ARGV[5], ARGV[7])
+local version = redis.call('INCR', KEYS[3])
+local version_ttl = math.max(tonumber(ARGV[6]), tonumber(ARGV[7]))
+if version_ttl > 0 then
+    redis.call('EXPIRE', KEYS[3], version_ttl)
+end
+return version
+"""
+
+# Максимум попыток записи при конфликте версий
+MAX_WRITE_ATTEMPTS = 3
+
+
+class _Entry:
+    """Снимок FSM-состояния одного ключа и накопленные изменения."""
+
+    __slots__ = ("state", "data", "version", "ops")
+
+    def __init__(self, state: Optional[str], data: dict, version: int):
+        self.state = state
+        self.data = data
+        self.version = version
+        # Журнал изменений: ("state", value) | ("data", dict) | ("update", dict)
+        self.ops: list[tuple[str, Any]] = []
+
+    def copy(self) -> "_Entry":
+        return _Entry(self.state, copy.deepcopy(self.data), self.version)
+
+    def apply(self, op: str, value: Any) -> None:
+        if op == "state":
+            self.state = value
+        elif op == "data":
+            self.data = copy.deepcopy(value)
+        elif op == "update":
+            self.data.update(copy.deepcopy(value))
+
+
+def _ttl_seconds(ttl) -> int:
+    if ttl is None:
+        return 0
+    if isinstance(ttl, timedelta):
+        return int(ttl.total_seconds())
+    return int(ttl)
+
+
+def _state_name(state: StateType) -> Optional[str]:
+    if state is None:
+        return None
+    return state.state if isinstance(state, State) else str(state)
+
+
+class CachedRedisStorage(RedisStorage):
+    """RedisStorage с L1-кэшем и пакетной записью изменений за один update."""
+
+    def __init__(self, *args: Any, l1_max_entries: int = 10000, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.l1_max_entries = l1_max_entries
+        self._l1: OrderedDict[StorageKey, _Entry] = OrderedDict()
+        self._cas_write = self.redis.register_script(_CAS_WRITE_SCRIPT)
+        # Снимки ключей текущего update (своя переменная у каждого storage)
+        self._batch: ContextVar[Optional[dict[StorageKey, _Entry]]] = ContextVar(
+            f"fsm_storage_batch_{id(self)}", default=None
+        )
+        self.stats = {
+            "redis_roundtrips": 0,
+            "l1_hits": 0,
+            "l1_misses": 0,
+            "flushes": 0,
+            "conflicts": 0,
+            "redis_seconds_total": 0.0,
+            "redis_seconds_max": 0.0,
+        }
+
+    async def _redis(self, awaitable):
+        """Один запрос к Redis с учётом в статистике (количество и латентность)."""
+        self.stats["redis_roundtrips"] += 1
+        started = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            elapsed = time.perf_counter() - started
+            self.stats["redis_seconds_total"] += elapsed
+            self.stats["redis_seconds_max"] = max(self.stats["redis_seconds_max"], elapsed)
+
+    # ---- ключи и загрузка ----
+
+    def _keys(self, key: StorageKey) -> tuple[str, str, str]:
+        return (
+            self.key_builder.build(key, "state"),
+            self.key_builder.build(key, "data"),
+            self.key_builder.build(key, "version"),
+        )
+
+    def _decode(self, value) -> Optional[str]:
+        if isinstance(value, bytes):
+            return value.decode("utf-8")
+        return value
+
+    async def _load(self, key: StorageKey) -> _Entry:
+        """Читает state, data и версию одним MGET."""
+        state, data, version = await self._redis(self.redis.mget(self._keys(key)))
+        data = self._decode(data)
+        return _Entry(
+            state=self._decode(state),
+            data=self.json_loads(data) if data else {},
+            version=int(version or 0),
+        )
+
+    async def _fetch(self, key: StorageKey) -> _Entry:
+        """
+        Актуальный снимок ключа: из L1, если версия в Redis не изменилась
+        (один GET версии), иначе полное чтение.
+        """
+        cached = self._l1.get(key)
+        if cached is not None:
+            version = int(await self._redis(self.redis.get(self._keys(key)[2])) or 0)
+            if version == cached.version:
+                self.stats["l1_hits"] += 1
+                self._l1.move_to_end(key)
+                return cached.copy()
+        self.stats["l1_misses"] += 1
+        entry = await self._load(key)
+        self._remember(key, entry)
+        return entry.copy()
+
+    def _remember(self, key: StorageKey, entry: _Entry) -> None:
+        self._l1[key] = entry.copy()
+        self._l1.move_to_end(key)
+        while len(self._l1) > self.l1_max_entries:
+            self._l1.popitem(last=False)
+
+    async def _entry(self, key: StorageKey) -> _Entry:
+        """Снимок ключа в текущем update (загружается один раз на update)."""
+        batch = self._batch.get()
+        if batch is None:
+            return await self._fetch(key)
+        entry = batch.get(key)
+        if entry is None:
+            entry = batch[key] = await self._fetch(key)
+        return entry
+
+    # ---- запись ----
+
+    async def _write(self, key: StorageKey, entry: _Entry) -> None:
+        """Записывает накопленные изменения с проверкой версии (CAS)."""
+        expected = entry.version
+        for attempt in range(MAX_WRITE_ATTEMPTS + 1):
+            if attempt == MAX_WRITE_ATTEMPTS:
+                logger.warning(f"FSM version conflicts persist for {key}, writing without check")
+                expected = -1
+            changed = {op for op, _ in entry.ops}
+            state_mode = "keep"
+            if "state" in changed:
+                state_mode = "set" if entry.state is not None else "del"
+            data_mode = "keep"
+            if changed & {"data", "update"}:
+                data_mode = "set" if entry.data else "del"
+            version = await self._redis(self._cas_write(
+                keys=list(self._keys(key)),
+                args=[
+                    expected,
+                    state_mode,
+                    entry.state or "",
+                    data_mode,
+                    self.json_dumps(entry.data) if data_mode == "set" else "",
+                    _ttl_seconds(self.state_ttl),
+                    _ttl_seconds(self.data_ttl),
+                ],
+            ))
+            if int(version) >= 0:
+                entry.version = int(version)
+                entry.ops = []
+                self.stats["flushes"] += 1
+                self._remember(key, entry)
+                return
+            # Другой процесс изменил ключ: перечитываем и применяем изменения заново
+            self.stats["conflicts"] += 1
+            fresh = await self._load(key)
+            for op, value in entry.ops:
+                fresh.apply(op, value)
+            fresh.ops = entry.ops
+            entry.state, entry.data, entry.version = fresh.state, fresh.data, fresh.version
+            expected = fresh.version
+
+    async def _change(self, key: StorageKey, op: str, value: Any) -> None:
+        entry = await self._entry(key)
+        entry.apply(op, value)
+        entry.ops.append((op, copy.deepcopy(value)))
+        if self._batch.get() is None:
+            # Вне update — сразу записываем (write-through)
+            await self._write(key, entry)
+
+    @asynccontextmanager
+    async def batch(self):
+        """
+        Область одного update: чтения обслуживаются из памяти,
+        изменения записываются одним запросом на ключ при выходе.
+        """
+        if self._batch.get() is not None:
+            yield
+            return
+        batch: dict[StorageKey, _Entry] = {}
+        token = self._batch.set(batch)
+        try:
+            yield
+        finally:
+            self._batch.reset(token)
+            for key, entry in batch.items():
+                if entry.ops:
+                    try:
+                        await self._write(key, entry)
+                    except Exception:
+                        self._l1.pop(key, None)
+                        logger.exception(f"Failed to flush FSM state for {key}")
+                        raise
+
+    # ---- BaseStorage API ----
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        await self._change(key, "state", _state_name(state))
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return (await self._entry(key)).state
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        if not isinstance(data, Mapping):
+            raise DataNotDictLikeError(
+                f"Data must be a dict or dict-like object, got {type(data).__name__}"
+            )
+        # Любой Mapping — через L1 и версию ключа, как и dict
+        await self._change(key, "data", dict(data))
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        return copy.deepcopy((await self._entry(key)).data)
+
+    async def update_data(self, key: StorageKey, data: Mapping[str, Any]) -> dict[str, Any]:
+        await self._change(key, "update", dict(data))
+        return await self.get_data(key)
+
+
+class FSMBatchMiddleware(BaseMiddleware):
+    """Открывает batch-область CachedRedisStorage на время обработки update."""
+
+    def __init__(self, storage: CachedRedisStorage):
+        self.storage = storage
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        async with self.storage.batch():
+            return await handler(event, data)
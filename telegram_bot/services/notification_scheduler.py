@@ -4,19 +4,73 @@
 """
 import asyncio
 import logging
+import time
+from collections import Counter
 from datetime import datetime
-
-from aiogram import Bot
+from typing import TYPE_CHECKING, Optional
 
 from telegram_bot.config import bot_config
 from telegram_bot.services.api_client import get_api_client
 from telegram_bot.utils import format_datetime
 
+if TYPE_CHECKING:
+    from aiogram import Bot
+
 logger = logging.getLogger(__name__)
 
 # Интервал проверки в секундах
 CHECK_INTERVAL = 60
 
+
+class SchedulerStats:
+    """Статистика работы scheduler уведомлений (для /metrics и /health)."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.iterations: int = 0
+        self.iteration_errors: int = 0
+        self.last_duration: Optional[float] = None
+        self.max_duration: float = 0.0
+        self.total_duration: float = 0.0
+        self.last_backlog: int = 0
+        self.last_iteration_at: Optional[float] = None
+        self.notifications_sent: int = 0
+        self.send_failures: Counter = Counter()
+
+    def record_iteration(self, duration: float, backlog: int, failed: bool = False) -> None:
+        self.iterations += 1
+        if failed:
+            self.iteration_errors += 1
+        self.last_duration = duration
+        self.max_duration = max(self.max_duration, duration)
+        self.total_duration += duration
+        self.last_backlog = backlog
+        self.last_iteration_at = time.time()
+
+    def summary(self) -> dict:
+        """Краткая сводка для /health."""
+        avg = self.total_duration / self.iterations if self.iterations else None
+        return {
+            "iterations": self.iterations,
+            "iteration_errors": self.iteration_errors,
+            "last_duration_seconds": round(self.last_duration, 3) if self.last_duration is not None else None,
+            "avg_duration_seconds": round(avg, 3) if avg is not None else None,
+            "max_duration_seconds": round(self.max_duration, 3),
+            "backlog": self.last_backlog,
+            "seconds_since_last_iteration": (
+                round(time.time() - self.last_iteration_at, 1)
+                if self.last_iteration_at is not None else None
+            ),
+            "check_interval_seconds": CHECK_INTERVAL,
+            "notifications_sent": self.notifications_sent,
+            "send_failures": sum(self.send_failures.values()),
+        }
+
+
+scheduler_stats = SchedulerStats()
+
 # Тексты уведомлений
 NOTIFICATION_MESSAGES = {
     "deadline_today": "📅 Сегодня дедлайн по квитанции №{receipt_number}",
@@ -29,7 +83,7 @@ NOTIFICATION_MESSAGES = {
 }
 
 
-async def send_notification_to_otk(bot: Bot, text: str) -> int:
+async def send_notification_to_otk(bot: "Bot", text: str) -> int:
     """
     Отправляет уведомление всем OTK-пользователям (из ADMIN_IDS).
     Возвращает количество успешно отправленных сообщений.
@@ -45,13 +99,17 @@ async def send_notification_to_otk(bot: Bot, text: str) -> int:
             await bot.send_message(chat_id=user_id, text=text)
             sent += 1
         except Exception as e:
+            scheduler_stats.send_failures[user_id] += 1
             logger.error(f"Failed to send notification to {user_id}: {e}")
 
     return sent
 
 
-async def process_pending_notifications(bot: Bot) -> None:
+async def process_pending_notifications(bot: "Bot") -> None:
     """Обрабатывает одну итерацию проверки уведомлений."""
+    started = time.perf_counter()
+    pending: list[dict] = []
+    failed = False
     try:
         api = get_api_client()
         pending = await api.get_pending_notifications()
@@ -77,6 +135,7 @@ async def process_pending_notifications(bot: Bot) -> None:
 
             # Помечаем как отправленное
             if sent > 0:
+                scheduler_stats.notifications_sent += 1
                 try:
                     await api.mark_notification_sent(notification_id)
                     logger.info(f"Notification {notification_id} sent to {sent} users")
@@ -84,10 +143,15 @@ async def process_pending_notifications(bot: Bot) -> None:
                     logger.error(f"Failed to mark notification {notification_id} as sent: {e}")
 
     except Exception as e:
+        failed = True
         logger.error(f"Error processing notifications: {e}")
+    finally:
+        scheduler_stats.record_iteration(
+            time.perf_counter() - started, backlog=len(pending), failed=failed
+        )
 
 
-async def run_notification_scheduler(bot: Bot) -> None:
+async def run_notification_scheduler(bot: "Bot") -> None:
     """Запускает бесконечный цикл проверки уведомлений."""
     logger.info("Notification scheduler started")
     while True:
@@ -0,0 +1,374 @@
+"""
+Лёгкая распределённая трассировка: хендлер aiogram → APIClient → роут FastAPI → SQL.
+
+Span — отрезок работы с trace_id/span_id и родителем. Текущий span хранится
+в ContextVar, поэтому дочерние span'ы (запросы APIClient, SQL в потоках
+threadpool) связываются с ним без явной передачи. Между клиентом и бэкендом
+контекст передаётся заголовком W3C traceparent — так же, как между
+процессами, даже если бот работает внутри бэкенда (ASGI-транспорт).
+
+Решение о сэмплировании принимается в корне трассы с вероятностью
+TRACE_SAMPLE_RATE и наследуется потомками (флаг traceparent). Законченные
+span'ы экспортируются пачками в фоновом потоке: в файл JSON lines
+(FileExporter) или в OTLP/HTTP JSON коллектор (OTLPExporter).
+
+Модуль не зависит от aiogram и app: его импортируют и бот, и бэкенд.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, NamedTuple, Optional, Union
+
+import httpx
+
+from telegram_bot.config import bot_config
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT_HEADER = "traceparent"
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+# Вид span'а → SpanKind OTLP
+OTLP_KINDS = {"internal": 1, "server": 2, "client": 3}
+
+
+class SpanContext(NamedTuple):
+    """Родитель span'а из другого процесса (заголовок traceparent)."""
+
+    trace_id: str
+    span_id: str
+    sampled: bool
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[SpanContext]:
+    """Разбирает traceparent версии 00; некорректное значение — None."""
+    match = _TRACEPARENT.match((value or "").strip().lower())
+    if match is None or set(match.group(1)) == {"0"} or set(match.group(2)) == {"0"}:
+        return None
+    return SpanContext(match.group(1), match.group(2), bool(int(match.group(3), 16) & 1))
+
+
+class Span:
+    """Отрезок работы трассы. component — слой: handler, api_client, http, sql."""
+
+    __slots__ = (
+        "trace_id", "span_id", "parent_id", "name", "kind", "component",
+        "sampled", "start_ns", "end_ns", "attributes", "error",
+    )
+
+    def __init__(
+        self,
+        trace_id: str,
+        span_id: str,
+        parent_id: Optional[str],
+        name: str,
+        kind: str = "internal",
+        component: str = "",
+        sampled: bool = True,
+    ):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.component = component
+        self.sampled = sampled
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: dict[str, Any] = {}
+        self.error: Optional[str] = None
+
+    def set(self, key: str, value: Any) -> None:
+        if self.sampled:
+            self.attributes[key] = value
+
+    def record_error(self, exc: BaseException) -> None:
+        self.error = f"{type(exc).__name__}: {exc}"[:500]
+
+    @property
+    def context(self) -> SpanContext:
+        return SpanContext(self.trace_id, self.span_id, self.sampled)
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end - self.start_ns) / 1_000_000
+
+    def as_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "component": self.component,
+            "start_unix_nano": self.start_ns,
+            "end_unix_nano": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": "error" if self.error else "ok",
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+# Span выключенной трассировки: не экспортируется и не становится текущим
+NOOP_SPAN = Span("0" * 32, "0" * 16, None, "", sampled=False)
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("trace_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+class SpanExporter(ABC):
+    """
+    Базовый экспортёр: span'ы копятся в очереди и выгружаются пачками
+    в фоновом потоке (export в event loop не выполняется). При переполнении
+    очереди span'ы отбрасываются — трассировка не должна тормозить бота.
+    """
+
+    def __init__(self, max_queue: int = 4096, max_batch: int = 512, interval: float = 1.0):
+        self.max_batch = max_batch
+        self.interval = interval
+        self.dropped = 0
+        self.exported = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, span: Span) -> None:
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """Выгружает всё накопленное; False — не успели за timeout."""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    @abstractmethod
+    def export(self, spans: list[Span]) -> None:
+        """Выгружает пачку span'ов (вызывается в фоновом потоке)."""
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name=f"trace-{type(self).__name__}", daemon=True
+                )
+                self._thread.start()
+                atexit.register(self.flush, 2.0)
+
+    def _run(self) -> None:
+        while True:
+            batch: list[Span] = []
+            waiters: list[threading.Event] = []
+            try:
+                item = self._queue.get(timeout=self.interval)
+            except queue.Empty:
+                continue
+            while True:
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                if len(batch) >= self.max_batch:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self.export(batch)
+                    self.exported += len(batch)
+                except Exception:
+                    logger.exception(f"Trace export failed, {len(batch)} spans lost")
+            for waiter in waiters:
+                waiter.set()
+
+
+class FileExporter(SpanExporter):
+    """Span'ы в файл JSON lines (по строке на span) — для python -m app.cli.traces."""
+
+    def __init__(self, path: str, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+
+    def export(self, spans: list[Span]) -> None:
+        lines = "".join(json.dumps(span.as_dict(), ensure_ascii=False, default=str) + "\n" for span in spans)
+        with open(self.path, "a", encoding="utf-8") as trace_file:
+            trace_file.write(lines)
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: dict[str, Any]) -> list[dict]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+
+class OTLPExporter(SpanExporter):
+    """Span'ы в OTLP/HTTP коллектор (JSON-кодировка, POST на /v1/traces)."""
+
+    def __init__(self, endpoint: str, service_name: str, timeout: float = 5.0, **kwargs):
+        super().__init__(**kwargs)
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.timeout = timeout
+
+    def payload(self, spans: list[Span]) -> dict:
+        otlp_spans = []
+        for span in spans:
+            otlp_span = {
+                "traceId": span.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": OTLP_KINDS.get(span.kind, 1),
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns),
+                "attributes": _otlp_attributes({"component": span.component, **span.attributes}),
+                "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+            }
+            if span.parent_id:
+                otlp_span["parentSpanId"] = span.parent_id
+            otlp_spans.append(otlp_span)
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": self.service_name})},
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": otlp_spans}],
+            }]
+        }
+
+    def export(self, spans: list[Span]) -> None:
+        response = httpx.post(self.endpoint, json=self.payload(spans), timeout=self.timeout)
+        response.raise_for_status()
+
+
+def create_exporter(kind: str) -> Optional[SpanExporter]:
+    """Экспортёр по TRACE_EXPORTER: file, otlp; пусто — трассировка выключена."""
+    if not kind:
+        return None
+    if kind == "file":
+        return FileExporter(bot_config.TRACE_FILE)
+    if kind == "otlp":
+        return OTLPExporter(bot_config.TRACE_OTLP_ENDPOINT, bot_config.TRACE_SERVICE_NAME)
+    logger.warning(f"Unknown TRACE_EXPORTER={kind!r}, tracing disabled")
+    return None
+
+
+class Tracer:
+    """Создание span'ов, сэмплирование, передача контекста и экспорт."""
+
+    def __init__(self, exporter: Optional[SpanExporter] = None, sample_rate: float = 1.0):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self._random = random.Random(os.urandom(16))
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def configure(self, exporter: Optional[SpanExporter], sample_rate: Optional[float] = None) -> None:
+        """Меняет экспортёр (прежний дочищается) и, если задана, долю сэмплирования."""
+        if self.exporter is not None and self.exporter is not exporter:
+            self.exporter.flush()
+        self.exporter = exporter
+        if sample_rate is not None:
+            self.sample_rate = sample_rate
+
+    def start_span(
+        self,
+        name: str,
+        kind: str = "internal",
+        component: str = "",
+        parent: Union[Span, SpanContext, None] = None,
+        root: bool = False,
+    ) -> Span:
+        """
+        Новый span, не становящийся текущим (для span'ов на событиях, например SQL).
+        Родитель по умолчанию — текущий span; root=True начинает новую трассу.
+        """
+        if parent is None and not root:
+            parent = _current_span.get()
+        if parent is None:
+            return Span(
+                f"{self._random.getrandbits(128):032x}",
+                f"{self._random.getrandbits(64):016x}",
+                None, name, kind, component,
+                sampled=self._random.random() < self.sample_rate,
+            )
+        return Span(
+            parent.trace_id, f"{self._random.getrandbits(64):016x}", parent.span_id,
+            name, kind, component, sampled=parent.sampled,
+        )
+
+    def end_span(self, span: Span) -> None:
+        span.end_ns = time.time_ns()
+        if span.sampled and self.exporter is not None:
+            self.exporter.submit(span)
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        kind: str = "internal",
+        component: str = "",
+        parent: Union[Span, SpanContext, None] = None,
+        root: bool = False,
+    ) -> Iterator[Span]:
+        """Span как текущий на время блока; исключение отмечается в span'е и пробрасывается."""
+        if not self.enabled:
+            yield NOOP_SPAN
+            return
+        span = self.start_span(name, kind, component, parent=parent, root=root)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except Exception as e:
+            span.record_error(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end_span(span)
+
+    def inject(self, headers: Optional[dict[str, str]]) -> Optional[dict[str, str]]:
+        """Заголовки исходящего запроса с traceparent текущего span'а."""
+        span = _current_span.get()
+        if span is None or not self.enabled:
+            return headers
+        return {**(headers or {}), TRACEPARENT_HEADER: span.traceparent}
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        return self.exporter.flush(timeout) if self.exporter is not None else True
+
+
+tracer = Tracer(create_exporter(bot_config.TRACE_EXPORTER), bot_config.TRACE_SAMPLE_RATE)
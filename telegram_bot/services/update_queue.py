@@ -0,0 +1,223 @@
+"""
+Очередь входящих обновлений Telegram для webhook.
+
+Webhook кладёт провалидированный Update в ограниченную очередь и сразу
+отвечает 200, обработка идёт в пуле воркеров. Обновления одного чата
+всегда попадают к одному воркеру (chat_id % workers), поэтому
+обрабатываются строго по порядку.
+"""
+import asyncio
+import bisect
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional
+
+from aiogram.types import Update
+from aiogram.types.update import UpdateTypeLookupError
+
+logger = logging.getLogger(__name__)
+
+UpdateHandler = Callable[[Update], Awaitable[None]]
+
+# Верхние границы бакетов времени обработки обновления (секунды)
+PROCESSING_BUCKETS: tuple[float, ...] = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+# Сколько последних обработок учитывать в «недавнем» времени обработки (/health/ready)
+RECENT_WINDOW = 100
+
+
+def update_chat_key(update: Update) -> int:
+    """Ключ упорядочивания: ID чата (или пользователя) из обновления."""
+    try:
+        event = update.event
+    except UpdateTypeLookupError:
+        return update.update_id
+
+    chat = getattr(event, "chat", None)
+    if chat is None:
+        message = getattr(event, "message", None)
+        chat = getattr(message, "chat", None)
+    if chat is not None:
+        return chat.id
+
+    user = getattr(event, "from_user", None)
+    if user is not None:
+        return user.id
+    return update.update_id
+
+
+class UpdateQueueStats:
+    """Статистика очереди (для /metrics и /health)."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.enqueued: int = 0
+        self.processed: int = 0
+        self.failed: int = 0
+        self.rejected: int = 0
+        self.max_depth: int = 0
+        self.wait_seconds_total: float = 0.0
+        self.processing_seconds_total: float = 0.0
+        self.processing_seconds_max: float = 0.0
+        self.last_processing_seconds: Optional[float] = None
+        self.processing_buckets: list[int] = [0] * len(PROCESSING_BUCKETS)
+        self.last_processed_at: Optional[float] = None
+        self.recent: deque[float] = deque(maxlen=RECENT_WINDOW)
+
+    def observe_processing(self, duration: float) -> None:
+        self.processing_seconds_total += duration
+        self.processing_seconds_max = max(self.processing_seconds_max, duration)
+        self.last_processing_seconds = duration
+        self.last_processed_at = time.time()
+        self.recent.append(duration)
+        self.processing_buckets[bisect.bisect_left(PROCESSING_BUCKETS, duration)] += 1
+
+    def recent_processing(self) -> dict:
+        """Время обработки последних RECENT_WINDOW обновлений (секунды)."""
+        durations = sorted(self.recent)
+        if not durations:
+            return {"count": 0, "avg_seconds": None, "p95_seconds": None, "max_seconds": None}
+        return {
+            "count": len(durations),
+            "avg_seconds": round(sum(durations) / len(durations), 4),
+            "p95_seconds": round(durations[min(len(durations) - 1, int(0.95 * len(durations)))], 4),
+            "max_seconds": round(durations[-1], 4),
+        }
+
+    def processing_histogram(self) -> list[tuple[float, int]]:
+        """Кумулятивные бакеты времени обработки: (верхняя граница, количество)."""
+        result = []
+        cumulative = 0
+        for upper, count in zip(PROCESSING_BUCKETS, self.processing_buckets):
+            cumulative += count
+            result.append((upper, cumulative))
+        return result
+
+    def summary(self, depth: int, capacity: int, workers: int) -> dict:
+        done = self.processed + self.failed
+        return {
+            "workers": workers,
+            "depth": depth,
+            "capacity": capacity,
+            "max_depth": self.max_depth,
+            "enqueued": self.enqueued,
+            "processed": self.processed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_wait_seconds": round(self.wait_seconds_total / done, 4) if done else None,
+            "avg_processing_seconds": (
+                round(self.processing_seconds_total / done, 4) if done else None
+            ),
+            "last_processing_seconds": (
+                round(self.last_processing_seconds, 4)
+                if self.last_processing_seconds is not None else None
+            ),
+        }
+
+
+class UpdateQueue:
+    """Ограниченная очередь обновлений с пулом воркеров и упорядочиванием по чату."""
+
+    def __init__(
+        self,
+        handler: UpdateHandler,
+        workers: int = 4,
+        maxsize: int = 100,
+        enqueue_timeout: float = 1.0,
+    ):
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.per_worker_size = max(1, maxsize // self.workers)
+        self.enqueue_timeout = enqueue_timeout
+        self.stats = UpdateQueueStats()
+        self._queues: list[asyncio.Queue] = []
+        self._tasks: list[asyncio.Task] = []
+        self._accepting = False
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks) and self._accepting
+
+    @property
+    def capacity(self) -> int:
+        return self.per_worker_size * self.workers
+
+    def depth(self) -> int:
+        return sum(q.qsize() for q in self._queues)
+
+    def summary(self) -> dict:
+        return self.stats.summary(self.depth(), self.capacity, self.workers)
+
+    def start(self) -> None:
+        """Создаёт очереди и запускает воркеры в текущем event loop."""
+        if self.running:
+            return
+        self._queues = [asyncio.Queue(maxsize=self.per_worker_size) for _ in range(self.workers)]
+        self._tasks = [
+            asyncio.create_task(self._worker(i), name=f"telegram-update-worker-{i}")
+            for i in range(self.workers)
+        ]
+        self._accepting = True
+        logger.info(
+            f"Update queue started: {self.workers} workers, capacity {self.capacity}"
+        )
+
+    async def submit(self, update: Update) -> bool:
+        """
+        Ставит обновление в очередь его чата.
+        Если очередь заполнена дольше enqueue_timeout — возвращает False
+        (backpressure: webhook отвечает ошибкой, Telegram повторит доставку позже).
+        """
+        if not self._accepting:
+            return False
+        queue = self._queues[update_chat_key(update) % self.workers]
+        item = (time.perf_counter(), update)
+        try:
+            queue.put_nowait(item)
+        except asyncio.QueueFull:
+            try:
+                await asyncio.wait_for(queue.put(item), timeout=self.enqueue_timeout)
+            except asyncio.TimeoutError:
+                self.stats.rejected += 1
+                logger.warning(f"Update queue full, rejected update {update.update_id}")
+                return False
+        self.stats.enqueued += 1
+        self.stats.max_depth = max(self.stats.max_depth, self.depth())
+        return True
+
+    async def _worker(self, index: int) -> None:
+        queue = self._queues[index]
+        while True:
+            enqueued_at, update = await queue.get()
+            started = time.perf_counter()
+            self.stats.wait_seconds_total += started - enqueued_at
+            try:
+                await self.handler(update)
+                self.stats.processed += 1
+            except Exception:
+                self.stats.failed += 1
+                logger.exception(f"Error processing update {update.update_id}")
+            finally:
+                self.stats.observe_processing(time.perf_counter() - started)
+                queue.task_done()
+
+    async def drain(self, timeout: float = 10.0) -> None:
+        """Перестаёт принимать обновления, дожидается обработки очереди и останавливает воркеры."""
+        if not self._tasks:
+            return
+        self._accepting = False
+        pending = self.depth()
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(q.join() for q in self._queues)), timeout=timeout
+            )
+            logger.info(f"Update queue drained ({pending} pending updates processed)")
+        except asyncio.TimeoutError:
+            logger.warning(f"Update queue drain timed out, {self.depth()} updates dropped")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queues = []
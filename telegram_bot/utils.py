@@ -2,10 +2,15 @@
 Утилитарные функции для Telegram-бота.
 """
 import logging
+import re
 from datetime import datetime
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
+from urllib.parse import quote, unquote
 
-from aiogram.fsm.context import FSMContext
+from telegram_bot.config import bot_config
+
+if TYPE_CHECKING:
+    from aiogram.fsm.context import FSMContext
 
 logger = logging.getLogger(__name__)
 
@@ -25,20 +30,144 @@ def format_datetime(iso_string: str, fmt: str = "%d.%m.%Y %H:%M") -> str:
         return iso_string
 
 
-async def push_nav(state: FSMContext, current_state: str, handler_name: str) -> None:
-    """Сохранить текущее состояние в стек навигации."""
-    data = await state.get_data()
-    history = data.get("nav_history", [])
-    history.append({"state": current_state, "handler": handler_name})
-    await state.update_data(nav_history=history)
+# Максимум квитанций в одном сообщении (ограничение пакетных API)
+MAX_BULK_RECEIPTS = 100
+
+_RECEIPT_SEPARATORS = re.compile(r"[\s,;]+")
+
+
+def parse_receipt_numbers(text: str) -> list[str]:
+    """
+    Разбирает номера квитанций из сообщения (через пробел, запятую,
+    точку с запятой или с новой строки). Повторы убираются, порядок сохраняется.
+    Бросает ValueError, если есть нецифровой номер или их слишком много.
+    """
+    numbers = list(dict.fromkeys(n for n in _RECEIPT_SEPARATORS.split(text or "") if n))
+    if not numbers or not all(n.isdigit() for n in numbers):
+        raise ValueError("Номер квитанции должен содержать только цифры")
+    if len(numbers) > MAX_BULK_RECEIPTS:
+        raise ValueError(f"Не больше {MAX_BULK_RECEIPTS} квитанций за раз")
+    return numbers
+
+
+def format_receipts_label(data: dict) -> str:
+    """Строка с квитанцией (или списком квитанций в пакетном режиме) для экранов подтверждения."""
+    numbers = data.get("receipt_numbers")
+    if not numbers:
+        return f"Квитанция: №{data.get('receipt_number')}"
+    shown = ", ".join(f"№{n}" for n in numbers[:10])
+    if len(numbers) > 10:
+        shown += ", …"
+    return f"Квитанции ({len(numbers)}): {shown}"
+
+
+def format_batch_results(response: dict) -> str:
+    """Итог пакетной операции: счётчики и список квитанций с ошибками."""
+    text = f"Успешно: {response.get('succeeded', 0)}"
+    failed = [r for r in response.get("results", []) if r.get("status") != "ok"]
+    if failed:
+        text += f"\nС ошибкой: {len(failed)}"
+        for item in failed:
+            text += f"\n• №{item.get('receipt_number')}: {item.get('detail') or 'ошибка'}"
+    return text
+
+
+# Стек навигации хранится в FSM data (ключ nav_history) компактной строкой
+# "s:h,s:h,...", где s и h — коды состояния и хендлера из таблиц ниже.
+# Таблицы только дополняются в конец: индексы уже лежат в Redis.
+# Значения не из таблиц хранятся с префиксом "~" в percent-encoding: имена
+# состояний aiogram ("Group:state") содержат ":", разделитель частей шага.
+NAV_STATES: tuple[str, ...] = (
+    "MainMenu.main",
+    "Master.waiting_for_receipt_number",
+    "Master.select_master",
+    "Master.is_urgent",
+    "OTK.waiting_for_receipt_number",
+    "Polishing.waiting_for_receipt_number",
+    "Polishing.select_polisher",
+    "Polishing.enter_metal_type",
+    "Polishing.has_bracelet",
+    "Polishing.is_complex",
+)
+NAV_HANDLERS: tuple[str, ...] = (
+    "start_master",
+    "process_receipt_number",
+    "select_master",
+    "process_urgent",
+    "show_urgent_list",
+    "employees_menu",
+    "start_history",
+    "start_otk",
+    "start_polishing",
+    "select_polisher",
+    "process_metal_type",
+    "process_bracelet",
+    "process_complex",
+)
+_NAV_STATE_CODES = {value: format(i, "x") for i, value in enumerate(NAV_STATES)}
+_NAV_HANDLER_CODES = {value: format(i, "x") for i, value in enumerate(NAV_HANDLERS)}
+
+
+def _encode_nav_part(value: str, codes: dict[str, str]) -> str:
+    code = codes.get(value)
+    return code if code is not None else f"~{quote(value, safe='')}"
+
+
+def _decode_nav_part(part: str, table: tuple[str, ...]) -> str:
+    if part.startswith("~"):
+        return unquote(part[1:])
+    return table[int(part, 16)]
+
+
+def encode_nav_entry(current_state: str, handler_name: str) -> str:
+    """Кодирует шаг навигации в короткую строку "s:h"."""
+    return (
+        f"{_encode_nav_part(current_state, _NAV_STATE_CODES)}:"
+        f"{_encode_nav_part(handler_name, _NAV_HANDLER_CODES)}"
+    )
+
+
+def decode_nav_entry(entry: str) -> dict:
+    """Раскодирует шаг навигации обратно в {"state", "handler"}."""
+    # Хендлер — последняя часть: так читаются и шаги, записанные до
+    # экранирования, где ":" из имени состояния попал в строку как есть
+    state_part, _, handler_part = entry.rpartition(":")
+    return {
+        "state": _decode_nav_part(state_part, NAV_STATES),
+        "handler": _decode_nav_part(handler_part, NAV_HANDLERS),
+    }
+
+
+def load_nav_stack(raw) -> list[str]:
+    """
+    Читает стек навигации из FSM data.
+    Поддерживает старый формат — список словарей {"state", "handler"}.
+    """
+    if not raw:
+        return []
+    if isinstance(raw, str):
+        return raw.split(",")
+    # Старый формат: конвертируем при первом обращении
+    return [
+        encode_nav_entry(item["state"], item["handler"])
+        for item in raw
+        if isinstance(item, dict) and "state" in item and "handler" in item
+    ]
+
+
+async def push_nav(state: "FSMContext", current_state: str, handler_name: str) -> None:
+    """Сохранить текущее состояние в стек навигации (не глубже NAV_MAX_DEPTH)."""
+    stack = load_nav_stack((await state.get_data()).get("nav_history"))
+    stack.append(encode_nav_entry(current_state, handler_name))
+    del stack[:-bot_config.NAV_MAX_DEPTH]
+    await state.update_data(nav_history=",".join(stack))
 
 
-async def pop_nav(state: FSMContext) -> Optional[dict]:
+async def pop_nav(state: "FSMContext") -> Optional[dict]:
     """Извлечь предыдущее состояние из стека навигации."""
-    data = await state.get_data()
-    history = data.get("nav_history", [])
-    if history:
-        prev = history.pop()
-        await state.update_data(nav_history=history)
-        return prev
-    return None
+    stack = load_nav_stack((await state.get_data()).get("nav_history"))
+    if not stack:
+        return None
+    prev = stack.pop()
+    await state.update_data(nav_history=",".join(stack))
+    return decode_nav_entry(prev)